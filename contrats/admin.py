@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
 from django.utils.html import format_html
 from django.utils import timezone
+from proprietes.index_disponibilite import IndexDisponibilite
 from .models import Contrat, Quittance, EtatLieux
 
 
@@ -68,21 +69,30 @@ class ContratAdmin(admin.ModelAdmin):
         )
     statut.short_description = _("Statut")
     
+    @staticmethod
+    def _mettre_a_jour(queryset, **champs):
+        """update() sans signaux : l'index de disponibilité est resynchronisé ici."""
+        ids = list(queryset.values_list('pk', flat=True))
+        updated = queryset.update(**champs)
+        IndexDisponibilite.synchroniser(ids)
+        return updated
+    
     def activer_contrats(self, request, queryset):
         """Action pour activer les contrats sélectionnés."""
-        updated = queryset.update(est_actif=True)
+        updated = self._mettre_a_jour(queryset, est_actif=True)
         self.message_user(request, f'{updated} contrat(s) activé(s) avec succès.')
     activer_contrats.short_description = _("Activer les contrats sélectionnés")
     
     def desactiver_contrats(self, request, queryset):
         """Action pour désactiver les contrats sélectionnés."""
-        updated = queryset.update(est_actif=False)
+        updated = self._mettre_a_jour(queryset, est_actif=False)
         self.message_user(request, f'{updated} contrat(s) désactivé(s) avec succès.')
     desactiver_contrats.short_description = _("Désactiver les contrats sélectionnés")
     
     def resilier_contrats(self, request, queryset):
         """Action pour résilier les contrats sélectionnés."""
-        updated = queryset.update(
+        updated = self._mettre_a_jour(
+            queryset,
             est_resilie=True,
             est_actif=False,
             date_resiliation=timezone.now().date()
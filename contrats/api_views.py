@@ -10,6 +10,7 @@ from datetime import date
 from .models import Contrat, Quittance, EtatLieux
 from .serializers import (
     ContratSerializer, 
+    ContratListSerializer,
     QuittanceSerializer, 
     EtatLieuxSerializer,
     ContratDetailSerializer
@@ -33,8 +34,14 @@ class ContratViewSet(viewsets.ModelViewSet):
         """Retourne le serializer approprié selon l'action."""
         if self.action == 'retrieve':
             return ContratDetailSerializer
+        if self.action in ['list', 'actifs', 'expirant_soon']:
+            return ContratListSerializer
         return ContratSerializer
 
+    def get_queryset(self):
+        """Charge propriété et locataire avec les contrats pour les listes."""
+        return super().get_queryset().select_related('propriete', 'locataire')
+
     def perform_create(self, serializer):
         """Assigne l'utilisateur connecté comme créateur."""
         serializer.save(cree_par=self.request.user)
@@ -76,7 +83,7 @@ class ContratViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def actifs(self, request):
         """Retourne uniquement les contrats actifs."""
-        contrats = Contrat.objects.filter(est_actif=True, est_resilie=False)
+        contrats = self.get_queryset().filter(est_actif=True, est_resilie=False)
         page = self.paginate_queryset(contrats)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -88,7 +95,7 @@ class ContratViewSet(viewsets.ModelViewSet):
     def expirant_soon(self, request):
         """Retourne les contrats expirant dans les 30 prochains jours."""
         date_limite = date.today() + timezone.timedelta(days=30)
-        contrats = Contrat.objects.filter(
+        contrats = self.get_queryset().filter(
             date_fin__lte=date_limite,
             date_fin__gte=date.today(),
             est_actif=True,
@@ -271,18 +278,20 @@ class CautionViewSet(viewsets.ModelViewSet):
     ).select_related(
         'locataire', 
         'propriete', 
-        'propriete__bailleur'
+        'propriete__bailleur',
+        'propriete__type_bien'
+    ).prefetch_related(
+        'quittances',
+        'etats_lieux'
     ).order_by('-date_creation')
     
     serializer_class = ContratDetailSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     
+    # Seuls des champs du modèle : un champ inconnu fait échouer chaque requête
     filterset_fields = {
-        'caution_requise': ['exact'],
         'caution_payee': ['exact'],
-        'avance_requise': ['exact'],
-        'avance_payee': ['exact'],
         'propriete__ville': ['exact'],
         'propriete__bailleur': ['exact'],
     }
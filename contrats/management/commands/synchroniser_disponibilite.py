@@ -21,7 +21,22 @@ class Command(BaseCommand):
         )
         
         try:
-            synchroniser_disponibilite_proprietes()
+            rapport = synchroniser_disponibilite_proprietes()
+            
+            self.stdout.write(
+                f'📅 Index de disponibilité reconstruit: {rapport["periodes_occupation"]} période(s) d\'occupation'
+            )
+            self.stdout.write(
+                f'🏠 {rapport["proprietes_verifiees"]} propriété(s) vérifiée(s), '
+                f'{rapport["corrections_effectuees"]} correction(s)'
+            )
+            if options['verbose']:
+                for correction in rapport['corrections']:
+                    self.stdout.write(
+                        f'   • {correction["propriete"]}: {correction["ancien_statut"]} → {correction["nouveau_statut"]}'
+                    )
+            for erreur in rapport['erreurs_trouvees']:
+                self.stdout.write(self.style.WARNING(f'⚠️ {erreur["propriete"]}: {erreur["erreur"]}'))
             
             self.stdout.write(
                 self.style.SUCCESS('✅ Synchronisation terminée avec succès!')
@@ -340,31 +340,25 @@ class Contrat(models.Model):
     
     def verifier_disponibilite_pieces(self, pieces_ids, date_debut, date_fin):
         """Vérifie si les pièces sont disponibles pour la période donnée."""
-        from proprietes.models import Piece
+        from proprietes.index_disponibilite import IndexDisponibilite
         
         if not pieces_ids:
             return True, []
         
-        pieces = Piece.objects.filter(id__in=pieces_ids)
-        conflits = []
+        # Contrats conflictuels de toutes les pièces, en une requête sur l'index
+        periodes = IndexDisponibilite.periodes(date_debut, date_fin).filter(
+            piece_id__in=pieces_ids
+        ).select_related('piece', 'contrat__locataire').order_by('piece__nom', 'date_debut')
         
-        for piece in pieces:
-            if not piece.est_disponible(date_debut, date_fin):
-                # Vérifier les contrats conflictuels
-                contrats_conflictuels = piece.contrats.filter(
-                    est_actif=True,
-                    est_resilie=False,
-                    date_debut__lt=date_fin,
-                    date_fin__gt=date_debut
-                )
-                
-                for contrat in contrats_conflictuels:
-                    conflits.append({
-                        'piece': piece.nom,
-                        'contrat_existant': contrat.numero_contrat,
-                        'locataire_existant': contrat.locataire.get_nom_complet(),
-                        'periode': f"{contrat.date_debut} à {contrat.date_fin}"
-                    })
+        conflits = [
+            {
+                'piece': periode.piece.nom,
+                'contrat_existant': periode.contrat.numero_contrat,
+                'locataire_existant': periode.contrat.locataire.get_nom_complet(),
+                'periode': f"{periode.contrat.date_debut} à {periode.contrat.date_fin}"
+            }
+            for periode in periodes
+        ]
         
         return len(conflits) == 0, conflits
     
@@ -1,4 +1,6 @@
 from rest_framework import serializers
+
+from core.api_rest import ChampsDemandesMixin
 from .models import Contrat, Quittance, EtatLieux
 from proprietes.serializers import ProprieteSerializer, LocataireSerializer
 from utilisateurs.serializers import UtilisateurSerializer
@@ -43,7 +45,7 @@ class ContratSerializer(serializers.ModelSerializer):
         read_only=True,
         source='get_loyer_total'
     )
-    duree_mois = serializers.IntegerField(read_only=True, source='get_duree_mois')
+    duree_mois = serializers.CharField(read_only=True, source='get_duree_mois')
     
     class Meta:
         model = Contrat
@@ -58,6 +60,24 @@ class ContratSerializer(serializers.ModelSerializer):
         read_only_fields = ['numero_contrat', 'date_creation', 'date_modification']
 
 
+class ContratListSerializer(ChampsDemandesMixin, serializers.ModelSerializer):
+    """Sérialiseur léger pour la liste des contrats (champs à plat, sans imbrication)."""
+    
+    propriete_titre = serializers.CharField(source='propriete.titre', read_only=True)
+    locataire_nom = serializers.CharField(source='locataire.nom', read_only=True)
+    locataire_prenom = serializers.CharField(source='locataire.prenom', read_only=True)
+    
+    class Meta:
+        model = Contrat
+        fields = [
+            'id', 'numero_contrat', 'propriete', 'propriete_titre', 'locataire',
+            'locataire_nom', 'locataire_prenom', 'date_debut', 'date_fin',
+            'loyer_mensuel', 'charges_mensuelles', 'jour_paiement', 'mode_paiement',
+            'est_actif', 'est_resilie', 'date_creation'
+        ]
+        read_only_fields = fields
+
+
 class ContratDetailSerializer(ContratSerializer):
     """Sérialiseur pour les contrats (version détail avec relations)."""
     
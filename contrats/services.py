@@ -1,12 +1,12 @@
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import cm
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
 # from reportlab.pdfgen import canvas  # Non utilisé directement
 from io import BytesIO
 
+from core.pdf_letterhead import feuille_styles, modele_page
+
 class ProprieteValidationService:
     """Service pour valider la disponibilité et la cohérence des propriétés."""
     
@@ -160,51 +160,31 @@ class ProprieteValidationService:
 class ContratPDFService:
     def __init__(self, contrat):
         self.contrat = contrat
-        self.styles = getSampleStyleSheet()
-        self._setup_custom_styles()
+        self.styles = feuille_styles('contrat')
         # Récupérer la configuration de l'entreprise depuis la base de données
         from core.models import ConfigurationEntreprise
         self.config_entreprise = ConfigurationEntreprise.get_configuration_active()
 
-    def _setup_custom_styles(self):
-        """Configure les styles personnalisés pour le PDF"""
-        # Style pour le titre principal
-        self.styles.add(ParagraphStyle(
-            name='CustomTitle',
-            parent=self.styles['Title'],
-            fontSize=18,
-            spaceAfter=20,
-            alignment=TA_CENTER,
-            textColor=colors.darkblue
-        ))
-        
-        # Style pour les titres de section
-        self.styles.add(ParagraphStyle(
-            name='CustomHeading',
-            parent=self.styles['Heading1'],
-            fontSize=14,
-            spaceAfter=12,
-            spaceBefore=20,
-            textColor=colors.darkblue
-        ))
+    def get_pdf_version(self):
+        """Empreinte des données dont dépend le PDF du contrat (documents joints compris)"""
+        from core.pdf_cache import PDFCacheManager
         
-        # Style pour le corps du texte
-        self.styles.add(ParagraphStyle(
-            name='CustomBody',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            spaceAfter=6,
-            alignment=TA_JUSTIFY
-        ))
+        locataire = self.contrat.locataire
+        propriete = self.contrat.propriete
+        return PDFCacheManager.version_donnees(
+            self.contrat, locataire, propriete, propriete.bailleur, propriete.type_bien,
+            *locataire.documents.order_by('pk'), *propriete.documents.order_by('pk')
+        )
+
+    def get_pdf_response(self, filename, as_attachment=True):
+        """Réponse HTTP du PDF, servie en flux depuis le magasin disque s'il est à jour"""
+        from core.pdf_cache import PDFCacheManager
         
-        # Style pour les signatures
-        self.styles.add(ParagraphStyle(
-            name='CustomSignature',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            spaceAfter=20,
-            alignment=TA_CENTER
-        ))
+        return PDFCacheManager.pdf_response(
+            'contrat', self.contrat.id, self.get_pdf_version(),
+            lambda: self.generate_contrat_pdf(use_cache=False).getvalue(),
+            filename, as_attachment
+        )
 
     def generate_contrat_pdf(self, use_cache=True):
         """Génère le PDF du contrat de bail avec en-tête et pied de page fixes"""
@@ -212,7 +192,7 @@ class ContratPDFService:
         
         # Vérifier le cache si demandé
         if use_cache:
-            cached_pdf = PDFCacheManager.get_cached_pdf('contrat', self.contrat.id)
+            cached_pdf = PDFCacheManager.get_cached_pdf('contrat', self.contrat.id, self.get_pdf_version())
             if cached_pdf:
                 buffer = BytesIO()
                 buffer.write(cached_pdf)
@@ -262,13 +242,14 @@ class ContratPDFService:
         story.extend(self._create_signatures())
         
         # Génération du PDF avec en-tête et pied de page personnalisés
-        doc.build(story, onFirstPage=self._add_header_footer, onLaterPages=self._add_header_footer)
+        modele = modele_page(self.config_entreprise, 'contrat')
+        doc.build(story, onFirstPage=modele.dessiner, onLaterPages=modele.dessiner)
         buffer.seek(0)
         
         # Mettre en cache le PDF généré
         if use_cache:
             pdf_content = buffer.getvalue()
-            PDFCacheManager.cache_pdf('contrat', self.contrat.id, pdf_content)
+            PDFCacheManager.cache_pdf('contrat', self.contrat.id, pdf_content, self.get_pdf_version())
             buffer.seek(0)  # Remettre le pointeur au début
         
         return buffer
@@ -300,128 +281,6 @@ class ContratPDFService:
         
         return elements
 
-    def _add_header_footer(self, canvas_obj, doc):
-        """Ajoute l'en-tête et le pied de page fixes sur chaque page"""
-        import os
-        
-        # Dimensions de la page
-        page_width, page_height = A4
-        
-        # === EN-TÊTE ===
-        if self.config_entreprise:
-            # Utiliser l'image d'en-tête personnalisée KBIS
-            try:
-                entete_path = self.config_entreprise.get_entete_prioritaire()
-                if entete_path and os.path.exists(entete_path):
-                    # Utiliser l'image d'en-tête personnalisée
-                    from reportlab.lib.utils import ImageReader
-                    img = ImageReader(entete_path)
-                    img_width, img_height = img.getSize()
-                    
-                    # Calculer les dimensions optimales pour l'en-tête
-                    max_width = page_width - 2*cm  # Largeur maximale de la page
-                    max_height = 4*cm  # Hauteur maximale pour l'en-tête
-                    
-                    # Redimensionner proportionnellement
-                    aspect_ratio = img_width / img_height
-                    if aspect_ratio > (max_width / max_height):
-                        entete_width = max_width
-                        entete_height = max_width / aspect_ratio
-                    else:
-                        entete_height = max_height
-                        entete_width = max_height * aspect_ratio
-                    
-                    # Centrer l'en-tête
-                    entete_x = (page_width - entete_width) / 2
-                    entete_y = page_height - entete_height - 0.5*cm
-                    
-                    canvas_obj.drawImage(entete_path, entete_x, entete_y, entete_width, entete_height)
-                    
-                else:
-                    # Fallback vers l'ancien système si l'image n'existe pas
-                    # En-tête avec couleur de fond
-                    canvas_obj.setFillColor(colors.lightblue)
-                    canvas_obj.rect(0, page_height - 3*cm, page_width, 3*cm, fill=1, stroke=0)
-                    
-                    # Bordure en bas de l'en-tête
-                    canvas_obj.setStrokeColor(colors.darkblue)
-                    canvas_obj.setLineWidth(2)
-                    canvas_obj.line(0, page_height - 3*cm, page_width, page_height - 3*cm)
-                    
-                    # Logo de l'entreprise (si disponible)
-                    try:
-                        logo_path = self.config_entreprise.get_logo_prioritaire()
-                        if logo_path and os.path.exists(logo_path):
-                            # Redimensionner le logo pour l'en-tête
-                            logo_width = 2*cm
-                            logo_height = 1.5*cm
-                            
-                            # Positionner le logo à gauche
-                            logo_x = 1*cm
-                            logo_y = page_height - 2.5*cm
-                            
-                            canvas_obj.drawImage(logo_path, logo_x, logo_y, logo_width, logo_height)
-                            
-                            # Texte de l'entreprise à droite du logo
-                            text_x = logo_x + logo_width + 0.5*cm
-                            text_y = page_height - 2.2*cm
-                        else:
-                            # Pas de logo - centrer le texte
-                            text_x = 2*cm
-                            text_y = page_height - 2.2*cm
-                            
-                    except (OSError, IOError, ValueError):
-                        # En cas d'erreur avec le logo
-                        text_x = 2*cm
-                        text_y = page_height - 2.2*cm
-                    
-                    # Nom de l'entreprise
-                    canvas_obj.setFillColor(colors.darkblue)
-                    canvas_obj.setFont("Helvetica-Bold", 16)
-                    canvas_obj.drawString(text_x, text_y, self.config_entreprise.nom_entreprise)
-                    
-                    # Adresse complète
-                    canvas_obj.setFont("Helvetica", 10)
-                    canvas_obj.drawString(text_x, text_y - 0.4*cm, self.config_entreprise.get_adresse_complete())
-                    
-                    # Informations de contact complètes
-                    canvas_obj.setFont("Helvetica", 9)
-                    canvas_obj.drawString(text_x, text_y - 0.8*cm, self.config_entreprise.get_contact_complet())
-                    
-            except (OSError, IOError, ValueError, AttributeError) as e:
-                print(f"Erreur lors de l'ajout de l'en-tête personnalisé: {e}")
-                # Fallback vers l'ancien système en cas d'erreur
-                canvas_obj.setFillColor(colors.lightblue)
-                canvas_obj.rect(0, page_height - 3*cm, page_width, 3*cm, fill=1, stroke=0)
-                canvas_obj.setFillColor(colors.darkblue)
-                canvas_obj.setFont("Helvetica-Bold", 16)
-                canvas_obj.drawString(2*cm, page_height - 2.2*cm, self.config_entreprise.nom_entreprise)
-        
-        # === PIED DE PAGE SIMPLIFIÉ ===
-        # Fond du pied de page réduit
-        canvas_obj.setFillColor(colors.lightgrey)
-        canvas_obj.rect(0, 0, page_width, 1.5*cm, fill=1, stroke=0)
-        
-        # Bordure en haut du pied de page
-        canvas_obj.setStrokeColor(colors.grey)
-        canvas_obj.setLineWidth(1)
-        canvas_obj.line(0, 1.5*cm, page_width, 1.5*cm)
-        
-        if self.config_entreprise:
-            # Informations de l'entreprise simplifiées dans le pied de page
-            canvas_obj.setFillColor(colors.darkgrey)
-            canvas_obj.setFont("Helvetica", 7)
-            
-            # Nom de l'entreprise uniquement
-            canvas_obj.drawString(2*cm, 1*cm, f"{self.config_entreprise.nom_entreprise}")
-            
-            # Contact simplifié
-            canvas_obj.drawString(2*cm, 0.6*cm, f"Tél: {self.config_entreprise.telephone} | Email: {self.config_entreprise.email}")
-            
-            # Numéro de page
-            canvas_obj.setFont("Helvetica-Bold", 7)
-            canvas_obj.drawRightString(page_width - 2*cm, 0.6*cm, f"Page {doc.page}")
-
     def _create_basic_info(self):
         """Crée la section des informations de base du contrat"""
         elements = []
@@ -672,51 +531,28 @@ class RecuCautionPDFService:
     def __init__(self, recu):
         self.recu = recu
         self.contrat = recu.contrat
-        self.styles = getSampleStyleSheet()
-        self._setup_custom_styles()
+        self.styles = feuille_styles('recu_caution')
         # Récupérer la configuration de l'entreprise depuis la base de données
         from core.models import ConfigurationEntreprise
         self.config_entreprise = ConfigurationEntreprise.get_configuration_active()
 
-    def _setup_custom_styles(self):
-        """Configure les styles personnalisés pour le PDF"""
-        # Style pour le titre principal
-        self.styles.add(ParagraphStyle(
-            name='CustomTitle',
-            parent=self.styles['Title'],
-            fontSize=18,
-            spaceAfter=20,
-            alignment=TA_CENTER,
-            textColor=colors.darkgreen
-        ))
-        
-        # Style pour les titres de section
-        self.styles.add(ParagraphStyle(
-            name='CustomHeading',
-            parent=self.styles['Heading1'],
-            fontSize=14,
-            spaceAfter=12,
-            spaceBefore=20,
-            textColor=colors.darkgreen
-        ))
+    def get_pdf_version(self):
+        """Empreinte des données dont dépend le PDF du reçu de caution"""
+        from core.pdf_cache import PDFCacheManager
         
-        # Style pour le corps du texte
-        self.styles.add(ParagraphStyle(
-            name='CustomBody',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            spaceAfter=6,
-            alignment=TA_JUSTIFY
-        ))
+        return PDFCacheManager.version_donnees(
+            self.recu, self.contrat, self.contrat.locataire, self.contrat.propriete
+        )
+
+    def get_pdf_response(self, filename, as_attachment=True):
+        """Réponse HTTP du PDF, servie en flux depuis le magasin disque s'il est à jour"""
+        from core.pdf_cache import PDFCacheManager
         
-        # Style pour les signatures
-        self.styles.add(ParagraphStyle(
-            name='CustomSignature',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            spaceAfter=20,
-            alignment=TA_CENTER
-        ))
+        return PDFCacheManager.pdf_response(
+            'recu_caution', self.recu.id, self.get_pdf_version(),
+            lambda: self.generate_recu_pdf(use_cache=False).getvalue(),
+            filename, as_attachment
+        )
 
     def generate_recu_pdf(self, use_cache=True):
         """Génère le PDF du reçu de caution avec en-tête et pied de page fixes"""
@@ -724,7 +560,7 @@ class RecuCautionPDFService:
         
         # Vérifier le cache si demandé
         if use_cache:
-            cached_pdf = PDFCacheManager.get_cached_pdf('recu_caution', self.recu.id)
+            cached_pdf = PDFCacheManager.get_cached_pdf('recu_caution', self.recu.id, self.get_pdf_version())
             if cached_pdf:
                 buffer = BytesIO()
                 buffer.write(cached_pdf)
@@ -774,139 +610,18 @@ class RecuCautionPDFService:
         story.extend(self._create_signatures())
         
         # Génération du PDF avec en-tête et pied de page personnalisés
-        doc.build(story, onFirstPage=self._add_header_footer, onLaterPages=self._add_header_footer)
+        modele = modele_page(self.config_entreprise, 'recu_caution')
+        doc.build(story, onFirstPage=modele.dessiner, onLaterPages=modele.dessiner)
         buffer.seek(0)
         
         # Mettre en cache le PDF généré
         if use_cache:
             pdf_content = buffer.getvalue()
-            PDFCacheManager.cache_pdf('recu_caution', self.recu.id, pdf_content)
+            PDFCacheManager.cache_pdf('recu_caution', self.recu.id, pdf_content, self.get_pdf_version())
             buffer.seek(0)  # Remettre le pointeur au début
         
         return buffer
 
-    def _add_header_footer(self, canvas_obj, doc):
-        """Ajoute l'en-tête et le pied de page fixes sur chaque page"""
-        import os
-        
-        # Dimensions de la page
-        page_width, page_height = A4
-        
-        # === EN-TÊTE ===
-        if self.config_entreprise:
-            # Utiliser l'image d'en-tête personnalisée KBIS
-            try:
-                entete_path = self.config_entreprise.get_entete_prioritaire()
-                if entete_path and os.path.exists(entete_path):
-                    # Utiliser l'image d'en-tête personnalisée
-                    from reportlab.lib.utils import ImageReader
-                    img = ImageReader(entete_path)
-                    img_width, img_height = img.getSize()
-                    
-                    # Calculer les dimensions optimales pour l'en-tête
-                    max_width = page_width - 2*cm  # Largeur maximale de la page
-                    max_height = 4*cm  # Hauteur maximale pour l'en-tête
-                    
-                    # Redimensionner proportionnellement
-                    aspect_ratio = img_width / img_height
-                    if aspect_ratio > (max_width / max_height):
-                        entete_width = max_width
-                        entete_height = max_width / aspect_ratio
-                    else:
-                        entete_height = max_height
-                        entete_width = max_height * aspect_ratio
-                    
-                    # Centrer l'en-tête
-                    entete_x = (page_width - entete_width) / 2
-                    entete_y = page_height - entete_height - 0.5*cm
-                    
-                    canvas_obj.drawImage(entete_path, entete_x, entete_y, entete_width, entete_height)
-                    
-                else:
-                    # Fallback vers l'ancien système si l'image n'existe pas
-                    # En-tête avec couleur de fond
-                    canvas_obj.setFillColor(colors.lightgreen)
-                    canvas_obj.rect(0, page_height - 3*cm, page_width, 3*cm, fill=1, stroke=0)
-                    
-                    # Bordure en bas de l'en-tête
-                    canvas_obj.setStrokeColor(colors.darkgreen)
-                    canvas_obj.setLineWidth(2)
-                    canvas_obj.line(0, page_height - 3*cm, page_width, page_height - 3*cm)
-                    
-                    # Logo de l'entreprise (si disponible)
-                    try:
-                        logo_path = self.config_entreprise.get_logo_prioritaire()
-                        if logo_path and os.path.exists(logo_path):
-                            # Redimensionner le logo pour l'en-tête
-                            logo_width = 2*cm
-                            logo_height = 1.5*cm
-                            
-                            # Positionner le logo à gauche
-                            logo_x = 1*cm
-                            logo_y = page_height - 2.5*cm
-                            
-                            canvas_obj.drawImage(logo_path, logo_x, logo_y, logo_width, logo_height)
-                            
-                            # Texte de l'entreprise à droite du logo
-                            text_x = logo_x + logo_width + 0.5*cm
-                            text_y = page_height - 2.2*cm
-                        else:
-                            # Pas de logo - centrer le texte
-                            text_x = 2*cm
-                            text_y = page_height - 2.2*cm
-                            
-                    except (OSError, IOError, ValueError):
-                        # En cas d'erreur avec le logo
-                        text_x = 2*cm
-                        text_y = page_height - 2.2*cm
-                    
-                    # Nom de l'entreprise
-                    canvas_obj.setFillColor(colors.darkgreen)
-                    canvas_obj.setFont("Helvetica-Bold", 16)
-                    canvas_obj.drawString(text_x, text_y, self.config_entreprise.nom_entreprise)
-                    
-                    # Adresse complète
-                    canvas_obj.setFont("Helvetica", 10)
-                    canvas_obj.drawString(text_x, text_y - 0.4*cm, self.config_entreprise.get_adresse_complete())
-                    
-                    # Informations de contact complètes
-                    canvas_obj.setFont("Helvetica", 9)
-                    canvas_obj.drawString(text_x, text_y - 0.8*cm, self.config_entreprise.get_contact_complet())
-                    
-            except (OSError, IOError, ValueError, AttributeError) as e:
-                print(f"Erreur lors de l'ajout de l'en-tête personnalisé: {e}")
-                # Fallback vers l'ancien système en cas d'erreur
-                canvas_obj.setFillColor(colors.lightgreen)
-                canvas_obj.rect(0, page_height - 3*cm, page_width, 3*cm, fill=1, stroke=0)
-                canvas_obj.setFillColor(colors.darkgreen)
-                canvas_obj.setFont("Helvetica-Bold", 16)
-                canvas_obj.drawString(2*cm, page_height - 2.2*cm, self.config_entreprise.nom_entreprise)
-        
-        # === PIED DE PAGE SIMPLIFIÉ ===
-        # Fond du pied de page réduit
-        canvas_obj.setFillColor(colors.lightgrey)
-        canvas_obj.rect(0, 0, page_width, 1.5*cm, fill=1, stroke=0)
-        
-        # Bordure en haut du pied de page
-        canvas_obj.setStrokeColor(colors.grey)
-        canvas_obj.setLineWidth(1)
-        canvas_obj.line(0, 1.5*cm, page_width, 1.5*cm)
-        
-        if self.config_entreprise:
-            # Informations de l'entreprise simplifiées dans le pied de page
-            canvas_obj.setFillColor(colors.darkgrey)
-            canvas_obj.setFont("Helvetica", 7)
-            
-            # Nom de l'entreprise uniquement
-            canvas_obj.drawString(2*cm, 1*cm, f"{self.config_entreprise.nom_entreprise}")
-            
-            # Contact simplifié
-            canvas_obj.drawString(2*cm, 0.6*cm, f"Tél: {self.config_entreprise.telephone} | Email: {self.config_entreprise.email}")
-            
-            # Numéro de page
-            canvas_obj.setFont("Helvetica-Bold", 7)
-            canvas_obj.drawRightString(page_width - 2*cm, 0.6*cm, f"Page {doc.page}")
-
     def _create_receipt_info(self):
         """Crée la section des informations du reçu"""
         elements = []
@@ -1062,51 +777,29 @@ class RecuCautionPDFService:
 class ResiliationPDFService:
     def __init__(self, resiliation):
         self.resiliation = resiliation
-        self.styles = getSampleStyleSheet()
-        self._setup_custom_styles()
+        self.styles = feuille_styles('resiliation')
         # Récupérer la configuration de l'entreprise depuis la base de données
         from core.models import ConfigurationEntreprise
         self.config_entreprise = ConfigurationEntreprise.get_configuration_active()
 
-    def _setup_custom_styles(self):
-        """Configure les styles personnalisés pour le PDF"""
-        # Style pour le titre principal
-        self.styles.add(ParagraphStyle(
-            name='CustomTitle',
-            parent=self.styles['Title'],
-            fontSize=18,
-            spaceAfter=20,
-            alignment=TA_CENTER,
-            textColor=colors.darkred
-        ))
-        
-        # Style pour les titres de section
-        self.styles.add(ParagraphStyle(
-            name='CustomHeading',
-            parent=self.styles['Heading1'],
-            fontSize=14,
-            spaceAfter=12,
-            spaceBefore=20,
-            textColor=colors.darkred
-        ))
+    def get_pdf_version(self):
+        """Empreinte des données dont dépend le PDF de la résiliation"""
+        from core.pdf_cache import PDFCacheManager
         
-        # Style pour le corps du texte
-        self.styles.add(ParagraphStyle(
-            name='CustomBody',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            spaceAfter=6,
-            alignment=TA_JUSTIFY
-        ))
+        return PDFCacheManager.version_donnees(
+            self.resiliation, self.resiliation.contrat, self.resiliation.contrat.locataire,
+            self.resiliation.contrat.propriete
+        )
+
+    def get_pdf_response(self, filename, as_attachment=True):
+        """Réponse HTTP du PDF, servie en flux depuis le magasin disque s'il est à jour"""
+        from core.pdf_cache import PDFCacheManager
         
-        # Style pour les signatures
-        self.styles.add(ParagraphStyle(
-            name='CustomSignature',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            spaceAfter=20,
-            alignment=TA_CENTER
-        ))
+        return PDFCacheManager.pdf_response(
+            'resiliation', self.resiliation.id, self.get_pdf_version(),
+            lambda: self.generate_resiliation_pdf(use_cache=False).getvalue(),
+            filename, as_attachment
+        )
 
     def generate_resiliation_pdf(self, use_cache=True):
         """Génère le PDF de résiliation avec en-tête et pied de page fixes"""
@@ -1114,7 +807,7 @@ class ResiliationPDFService:
         
         # Vérifier le cache si demandé
         if use_cache:
-            cached_pdf = PDFCacheManager.get_cached_pdf('resiliation', self.resiliation.id)
+            cached_pdf = PDFCacheManager.get_cached_pdf('resiliation', self.resiliation.id, self.get_pdf_version())
             if cached_pdf:
                 buffer = BytesIO()
                 buffer.write(cached_pdf)
@@ -1164,13 +857,14 @@ class ResiliationPDFService:
         story.extend(self._create_signatures())
         
         # Génération du PDF avec en-tête et pied de page personnalisés
-        doc.build(story, onFirstPage=self._add_header_footer, onLaterPages=self._add_header_footer)
+        modele = modele_page(self.config_entreprise, 'resiliation')
+        doc.build(story, onFirstPage=modele.dessiner, onLaterPages=modele.dessiner)
         buffer.seek(0)
         
         # Mettre en cache le PDF généré
         if use_cache:
             pdf_content = buffer.getvalue()
-            PDFCacheManager.cache_pdf('resiliation', self.resiliation.id, pdf_content)
+            PDFCacheManager.cache_pdf('resiliation', self.resiliation.id, pdf_content, self.get_pdf_version())
             buffer.seek(0)  # Remettre le pointeur au début
         
         return buffer
@@ -1217,96 +911,6 @@ class ResiliationPDFService:
         
         return elements
 
-    def _add_header_footer(self, canvas_obj, doc):
-        """Ajoute l'en-tête et le pied de page fixes sur chaque page"""
-        import os
-        
-        # Dimensions de la page
-        page_width, page_height = A4
-        
-        # === EN-TÊTE ===
-        if self.config_entreprise:
-            # En-tête avec couleur de fond
-            canvas_obj.setFillColor(colors.lightcoral)
-            canvas_obj.rect(0, page_height - 3*cm, page_width, 3*cm, fill=1, stroke=0)
-            
-            # Bordure en bas de l'en-tête
-            canvas_obj.setStrokeColor(colors.darkred)
-            canvas_obj.setLineWidth(2)
-            canvas_obj.line(0, page_height - 3*cm, page_width, page_height - 3*cm)
-            
-            # Logo de l'entreprise (si disponible)
-            try:
-                logo_path = self.config_entreprise.get_logo_prioritaire()
-                if logo_path and os.path.exists(logo_path):
-                    # Redimensionner le logo pour l'en-tête
-                    logo_width = 2*cm
-                    logo_height = 1.5*cm
-                    
-                    # Positionner le logo à gauche
-                    logo_x = 1*cm
-                    logo_y = page_height - 2.5*cm
-                    
-                    canvas_obj.drawImage(logo_path, logo_x, logo_y, logo_width, logo_height)
-                    
-                    # Texte de l'entreprise à droite du logo
-                    text_x = logo_x + logo_width + 0.5*cm
-                    text_y = page_height - 2.2*cm
-                else:
-                    # Pas de logo - centrer le texte
-                    text_x = 2*cm
-                    text_y = page_height - 2.2*cm
-                    
-            except (OSError, IOError, ValueError):
-                # En cas d'erreur avec le logo
-                text_x = 2*cm
-                text_y = page_height - 2.2*cm
-            
-            # Nom de l'entreprise
-            canvas_obj.setFillColor(colors.darkred)
-            canvas_obj.setFont("Helvetica-Bold", 16)
-            canvas_obj.drawString(text_x, text_y, self.config_entreprise.nom_entreprise)
-            
-            # Adresse
-            canvas_obj.setFont("Helvetica", 10)
-            canvas_obj.drawString(text_x, text_y - 0.4*cm, self.config_entreprise.get_adresse_complete())
-            
-            # Informations de contact
-            contact_info = []
-            if self.config_entreprise.telephone:
-                contact_info.append(f"Tél: {self.config_entreprise.telephone}")
-            if self.config_entreprise.email:
-                contact_info.append(f"Email: {self.config_entreprise.email}")
-            
-            if contact_info:
-                canvas_obj.setFont("Helvetica", 9)
-                canvas_obj.drawString(text_x, text_y - 0.8*cm, " | ".join(contact_info))
-        
-        # === PIED DE PAGE SIMPLIFIÉ ===
-        # Fond du pied de page réduit
-        canvas_obj.setFillColor(colors.lightgrey)
-        canvas_obj.rect(0, 0, page_width, 1.5*cm, fill=1, stroke=0)
-        
-        # Bordure en haut du pied de page
-        canvas_obj.setStrokeColor(colors.grey)
-        canvas_obj.setLineWidth(1)
-        canvas_obj.line(0, 1.5*cm, page_width, 1.5*cm)
-        
-        if self.config_entreprise:
-            # Informations de l'entreprise simplifiées dans le pied de page
-            canvas_obj.setFillColor(colors.darkgrey)
-            canvas_obj.setFont("Helvetica", 7)
-            
-            # Nom de l'entreprise uniquement
-            canvas_obj.drawString(2*cm, 1*cm, f"{self.config_entreprise.nom_entreprise}")
-            
-            # Contact simplifié
-            canvas_obj.drawString(2*cm, 0.6*cm, f"Tél: {self.config_entreprise.telephone} | Email: {self.config_entreprise.email}")
-            
-            # Numéro de page
-            canvas_obj.setFont("Helvetica-Bold", 7)
-            canvas_obj.drawRightString(page_width - 2*cm, 0.6*cm, f"Page {doc.page}")
-
     def _create_resiliation_info(self):
         """Crée la section des informations de résiliation"""
         elements = []
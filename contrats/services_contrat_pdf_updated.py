@@ -20,10 +20,32 @@ logger = logging.getLogger(__name__)
 class ContratPDFServiceUpdated:
     """Service pour la génération de PDF de contrats avec templates mis à jour."""
     
+    # Rendu distinct de ContratPDFService : adresse séparée dans le magasin PDF
+    DOCUMENT_TYPE = 'contrat_unifie'
+    
     def __init__(self, contrat):
         self.contrat = contrat
         self.logger = logger
     
+    def get_pdf_version(self):
+        """Empreinte des données dont dépend le PDF du contrat"""
+        from core.pdf_cache import PDFCacheManager
+        
+        propriete = self.contrat.propriete
+        return PDFCacheManager.version_donnees(
+            self.contrat, self.contrat.locataire, propriete, propriete.bailleur if propriete else None
+        )
+    
+    def get_pdf_response(self, filename, as_attachment=True):
+        """Réponse HTTP du PDF, servie en flux depuis le magasin disque s'il est à jour"""
+        from core.pdf_cache import PDFCacheManager
+        
+        return PDFCacheManager.pdf_response(
+            self.DOCUMENT_TYPE, self.contrat.id, self.get_pdf_version(),
+            lambda: self.generate_contrat_pdf().getvalue(),
+            filename, as_attachment
+        )
+    
     def generate_contrat_pdf(self):
         """
         Génère un PDF de contrat avec le template mis à jour.
@@ -1,3 +1,41 @@
+"""
+Tests des listes paginées de l'API REST des contrats.
+"""
+
+import itertools
+from datetime import date
+
 from django.test import TestCase
+from django.urls import reverse
+
+from core.tests_utils import ListePagineeMixin, creer_contrat
+
+from .models import EtatLieux, Quittance
+
+
+class ListesPagineesTests(ListePagineeMixin, TestCase):
+
+    def test_liste_contrats(self):
+        self.verifier_requetes(reverse('contrats:contrat-list'), creer_contrat, 1)
+
+    def test_liste_cautions(self):
+        def creer():
+            creer_contrat(date_fin=date(2026, 1, 1))
+        self.verifier_requetes(reverse('contrats:caution-list'), creer, 3)
+
+    def test_liste_quittances(self):
+        contrat = creer_contrat()
+        mois = itertools.count(1)
+
+        def creer():
+            n = next(mois)
+            Quittance.objects.create(
+                contrat=contrat, mois=date(2024 + n // 12, n % 12 + 1, 1),
+                montant_loyer='100000', montant_charges='0', montant_total='100000',
+            )
+        self.verifier_requetes(reverse('contrats:quittance-list'), creer, 1)
 
-# Create your tests here.
+    def test_liste_etats_lieux(self):
+        def creer():
+            EtatLieux.objects.create(contrat=creer_contrat(), type_etat='entree', date_etat=date(2025, 1, 1))
+        self.verifier_requetes(reverse('contrats:etatlieux-list'), creer, 1)
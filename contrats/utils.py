@@ -67,3 +67,17 @@ def verifier_disponibilite_propriete(propriete):
     ).exists()
     
     return unites_disponibles
+
+
+def synchroniser_disponibilite_proprietes():
+    """
+    Reconstruit l'index de disponibilité (périodes d'occupation) puis aligne
+    le champ `disponible` des propriétés sur leurs contrats actifs.
+    """
+    from proprietes.index_disponibilite import IndexDisponibilite
+    from .services import ProprieteValidationService
+    
+    periodes = IndexDisponibilite.reconstruire()
+    rapport = ProprieteValidationService.valider_integrite_proprietes()
+    rapport['periodes_occupation'] = periodes
+    return rapport
@@ -6,7 +6,8 @@ from proprietes.models import Propriete, Locataire
 from django.utils import timezone
 from django.db import models
 from django.db.models import ProtectedError
-from core.models import AuditLog, ConfigurationEntreprise
+from core.audit import journaliser
+from core.models import ConfigurationEntreprise
 from django.contrib.contenttypes.models import ContentType
 from core.intelligent_views import IntelligentListView
 from core.utils import get_context_with_entreprise_config
@@ -15,7 +16,6 @@ from utilisateurs.mixins_suppression import SuppressionGeneriqueView
 from datetime import datetime, timedelta
 from django.core.paginator import Paginator
 from django.contrib.auth.decorators import user_passes_test
-from django.http import HttpResponse
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4, A5
 from proprietes.models import Bailleur
@@ -236,12 +236,9 @@ def ajouter_contrat(request):
                     pdf_service = ContratPDFServiceUpdated(contrat)
                     # Remplir automatiquement les champs manquants
                     contrat = pdf_service.auto_remplir_champs_contrat()
-                    pdf_buffer = pdf_service.generate_contrat_pdf()
                     
-                    # Créer la réponse HTTP avec le PDF
-                    from django.http import HttpResponse
-                    response = HttpResponse(pdf_buffer.getvalue(), content_type='application/pdf')
-                    response['Content-Disposition'] = f'attachment; filename="contrat_{contrat.numero_contrat}.pdf"'
+                    # Réponse servie en flux depuis le magasin PDF (générée si nécessaire)
+                    response = pdf_service.get_pdf_response(f"contrat_{contrat.numero_contrat}.pdf")
                     
                     if creer_paiement_caution or creer_paiement_avance:
                         messages.success(
@@ -365,12 +362,9 @@ def modifier_contrat(request, pk):
                     pdf_service = ContratPDFServiceUpdated(contrat)
                     # Remplir automatiquement les champs manquants
                     contrat = pdf_service.auto_remplir_champs_contrat()
-                    pdf_buffer = pdf_service.generate_contrat_pdf()
                     
-                    # Créer la réponse HTTP avec le PDF
-                    from django.http import HttpResponse
-                    response = HttpResponse(pdf_buffer.getvalue(), content_type='application/pdf')
-                    response['Content-Disposition'] = f'attachment; filename="contrat_{contrat.numero_contrat}_modifie.pdf"'
+                    # Réponse servie en flux depuis le magasin PDF (générée si nécessaire)
+                    response = pdf_service.get_pdf_response(f"contrat_{contrat.numero_contrat}_modifie.pdf")
                     
                     if generer_recu_caution:
                         messages.success(
@@ -449,7 +443,7 @@ def supprimer_contrat(request, pk):
             contrat.save()
             
             # Log d'audit
-            AuditLog.objects.create(
+            journaliser(
                 content_type=ContentType.objects.get_for_model(Contrat),
                 object_id=contrat.pk,
                 action='delete',
@@ -565,7 +559,7 @@ def resilier_contrat(request, pk):
             # lors de la sauvegarde du contrat résilié
             
             # Log d'audit pour le contrat
-            AuditLog.objects.create(
+            journaliser(
                 content_type=ContentType.objects.get_for_model(Contrat),
                 object_id=contrat.pk,
                 action='resiliate',
@@ -585,7 +579,7 @@ def resilier_contrat(request, pk):
             )
             
             # Log d'audit pour la résiliation
-            AuditLog.objects.create(
+            journaliser(
                 content_type=ContentType.objects.get_for_model(ResiliationContrat),
                 object_id=resiliation.pk,
                 action='create',
@@ -879,9 +873,8 @@ def ajouter_etat_lieux(request):
             
             # Log d'audit
             from django.contrib.contenttypes.models import ContentType
-            from core.models import AuditLog
             
-            AuditLog.objects.create(
+            journaliser(
                 content_type=ContentType.objects.get_for_model(EtatLieux),
                 object_id=etat_lieux.pk,
                 action='CREATE',
@@ -971,9 +964,8 @@ def modifier_etat_lieux(request, pk):
             
             # Log d'audit
             from django.contrib.contenttypes.models import ContentType
-            from core.models import AuditLog
             
-            AuditLog.objects.create(
+            journaliser(
                 content_type=ContentType.objects.get_for_model(EtatLieux),
                 object_id=etat_lieux.pk,
                 action='UPDATE',
@@ -1031,9 +1023,8 @@ def supprimer_etat_lieux(request, pk):
             
             # Log d'audit avant suppression
             from django.contrib.contenttypes.models import ContentType
-            from core.models import AuditLog
             
-            AuditLog.objects.create(
+            journaliser(
                 content_type=ContentType.objects.get_for_model(EtatLieux),
                 object_id=etat_lieux.pk,
                 action='DELETE',
@@ -1086,7 +1077,7 @@ def contrats_orphelins(request):
             for contrat in contrats_a_supprimer:
                 # Log d'audit avant suppression
                 old_data = {f.name: getattr(contrat, f.name) for f in contrat._meta.fields}
-                AuditLog.objects.create(
+                journaliser(
                     content_type=ContentType.objects.get_for_model(Contrat),
                     object_id=contrat.pk,
                     action='DELETE_ORPHANED',
@@ -1112,7 +1103,7 @@ def contrats_orphelins(request):
                 locataire.save()
                 
                 # Log d'audit
-                AuditLog.objects.create(
+                journaliser(
                     content_type=ContentType.objects.get_for_model(Locataire),
                     object_id=locataire.pk,
                     action='RESTORE_FROM_ORPHANED',
@@ -1556,14 +1547,9 @@ def imprimer_recu_caution(request, contrat_id):
     # Utiliser le service PDF professionnel avec la bonne image d'en-tête
     from contrats.services import RecuCautionPDFService
     pdf_service = RecuCautionPDFService(recu)
-    pdf_buffer = pdf_service.generate_recu_pdf()
     
-    # Créer la réponse HTTP
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="recu_caution_{recu.numero_recu}.pdf"'
-    response.write(pdf_buffer.getvalue())
-    
-    return response
+    # Réponse servie en flux depuis le magasin PDF (générée si nécessaire)
+    return pdf_service.get_pdf_response(f"recu_caution_{recu.numero_recu}.pdf")
 
 
 @login_required
@@ -1599,12 +1585,8 @@ def imprimer_document_contrat(request, contrat_id):
         # Remplir automatiquement les champs manquants
         contrat = service.auto_remplir_champs_contrat()
         
-        # Générer le PDF du contrat avec le nouveau contenu
-        pdf_buffer = service.generate_contrat_pdf()
-        
-        # Créer la réponse HTTP avec le PDF
-        response = HttpResponse(pdf_buffer.getvalue(), content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="contrat_{contrat.numero_contrat}_unifie.pdf"'
+        # Réponse servie en flux depuis le magasin PDF (générée si nécessaire)
+        response = service.get_pdf_response(f"contrat_{contrat.numero_contrat}_unifie.pdf")
         
         messages.success(request, f'Document de contrat {contrat.numero_contrat} généré avec le nouveau contenu unifié!')
         return response
@@ -1888,22 +1870,22 @@ def resiliation_professionnelle(request, pk):
                 # lors de la sauvegarde du contrat résilié
                 
                 # Créer l'audit log
-                AuditLog.objects.create(
-                    utilisateur=request.user,
-                    action='RESILIATION_PRO_CREEE',
-                    modele='ResiliationContrat',
-                    instance_id=resiliation.pk,
-                    anciennes_donnees={
+                journaliser(
+                    user=request.user,
+                    action='create',
+                    content_type=ContentType.objects.get_for_model(ResiliationContrat),
+                    object_id=resiliation.pk,
+                    old_data={
                         'contrat_id': contrat.pk,
                         'statut': 'ACTIF'
                     },
-                    nouvelles_donnees={
+                    new_data={
                         'contrat_id': contrat.pk,
                         'statut': 'RESILIE',
                         'date_resiliation': str(date_resiliation),
                         'motif_resiliation': motif_resiliation
                     },
-                    ip_address=request.META.get('REMOTE_ADDR', ''),
+                    ip_address=request.META.get('REMOTE_ADDR'),
                     user_agent=request.META.get('HTTP_USER_AGENT', '')
                 )
                 
@@ -2122,12 +2104,9 @@ def generer_contrat_pdf(request, pk):
         pdf_service = ContratPDFServiceUpdated(contrat)
         # Remplir automatiquement les champs manquants
         contrat = pdf_service.auto_remplir_champs_contrat()
-        pdf_buffer = pdf_service.generate_contrat_pdf()
         
-        # Créer la réponse HTTP avec le PDF
-        from django.http import HttpResponse
-        response = HttpResponse(pdf_buffer.getvalue(), content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="contrat_{contrat.numero_contrat}.pdf"'
+        # Réponse servie en flux depuis le magasin PDF (générée si nécessaire)
+        response = pdf_service.get_pdf_response(f"contrat_{contrat.numero_contrat}.pdf")
         
         messages.success(request, f'PDF du contrat {contrat.numero_contrat} généré avec succès!')
         return response
@@ -2155,12 +2134,9 @@ def generer_resiliation_pdf(request, pk):
         # Générer le PDF de la résiliation
         from .services import ResiliationPDFService
         pdf_service = ResiliationPDFService(resiliation)
-        pdf_buffer = pdf_service.generate_resiliation_pdf()
         
-        # Créer la réponse HTTP avec le PDF
-        from django.http import HttpResponse
-        response = HttpResponse(pdf_buffer.getvalue(), content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="resiliation_{resiliation.contrat.numero_contrat}.pdf"'
+        # Réponse servie en flux depuis le magasin PDF (générée si nécessaire)
+        response = pdf_service.get_pdf_response(f"resiliation_{resiliation.contrat.numero_contrat}.pdf")
         
         messages.success(request, f'PDF de la résiliation du contrat {resiliation.contrat.numero_contrat} généré avec succès!')
         return response
@@ -2198,12 +2174,9 @@ def generer_resiliation_contrat_pdf(request, pk):
         # Générer le PDF de la résiliation
         from .services import ResiliationPDFService
         pdf_service = ResiliationPDFService(resiliation_temp)
-        pdf_buffer = pdf_service.generate_resiliation_pdf()
         
-        # Créer la réponse HTTP avec le PDF
-        from django.http import HttpResponse
-        response = HttpResponse(pdf_buffer.getvalue(), content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="resiliation_{contrat.numero_contrat}.pdf"'
+        # Résiliation non enregistrée : générée et servie sans passer par le magasin
+        response = pdf_service.get_pdf_response(f"resiliation_{contrat.numero_contrat}.pdf")
         
         messages.success(request, f'PDF de résiliation pour le contrat {contrat.numero_contrat} généré avec succès!')
         return response
@@ -2,7 +2,7 @@ from django.contrib import admin
 from django import forms
 from django.core.exceptions import ValidationError
 from django.utils.html import format_html
-from .models import AuditLog, ConfigurationEntreprise
+from .models import AuditLog, ConfigurationEntreprise, TacheArrierePlan
 from .utils import valider_logo_entreprise
 from .admin_actions import (
     regenerate_all_pdfs, 
@@ -43,6 +43,22 @@ class AuditLogAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related('user', 'content_type')
 
 
+@admin.register(TacheArrierePlan)
+class TacheArrierePlanAdmin(admin.ModelAdmin):
+    """
+    Suivi de la file des tâches d'arrière-plan
+    """
+    list_display = ['id', 'fonction', 'statut', 'priorite', 'tentatives', 'executer_apres', 'duree', 'travailleur']
+    list_filter = ['statut', 'fonction']
+    search_fields = ['fonction', 'cle_unicite', 'derniere_erreur']
+    readonly_fields = ['date_creation', 'date_debut', 'date_fin', 'duree', 'travailleur', 'resultat', 'derniere_erreur']
+    date_hierarchy = 'date_creation'
+    ordering = ['-date_creation']
+    
+    def has_add_permission(self, request):
+        """Les tâches sont mises en file par le code (enqueue)"""
+        return False
+
 class ConfigurationEntrepriseAdminForm(forms.ModelForm):
     """Formulaire personnalisé pour la configuration de l'entreprise avec validation du logo"""
     
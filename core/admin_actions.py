@@ -9,27 +9,16 @@ from django.urls import reverse
 from django.utils.html import format_html
 from django.core.exceptions import PermissionDenied
 from django.db import transaction
-import threading
 
 def regenerate_all_pdfs(modeladmin, request, queryset):
     """
     Action pour régénérer tous les PDF
     """
-    def regenerate_in_background():
-        try:
-            from .pdf_cache import PDFRegenerationService
-            result = PDFRegenerationService.regenerate_all_documents()
-            if result['success']:
-                print(f"✅ Régénération automatique terminée: {result['total_regenerated']} documents mis à jour")
-            else:
-                print(f"❌ Erreur lors de la régénération: {result.get('error', 'Erreur inconnue')}")
-        except Exception as e:
-            print(f"❌ Erreur critique lors de la régénération: {e}")
+    from .pdf_cache import PDFRegenerationService
+    from .taches import enqueue
     
-    # Lancer la régénération en arrière-plan
-    thread = threading.Thread(target=regenerate_in_background)
-    thread.daemon = True
-    thread.start()
+    # Régénération confiée à la file de tâches (commande run_workers)
+    enqueue(PDFRegenerationService.regenerate_all_documents, cle='regeneration_pdf', priorite=-10)
     
     messages.success(
         request,
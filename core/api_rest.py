@@ -0,0 +1,76 @@
+"""
+Outils communs aux API REST : pagination par curseur et champs à la demande.
+
+La pagination par curseur (pagination par défaut, voir REST_FRAMEWORK dans
+les settings) filtre sur le premier champ de tri au lieu d'un OFFSET sur
+toute la liste, et une page reste stable quand des lignes sont ajoutées
+pendant le parcours. Le curseur n'encode que la valeur de ce premier champ :
+quand il est unique (clé primaire par défaut), le coût d'une page ne dépend
+pas de sa position ; sinon, les lignes qui partagent la valeur de la limite
+de page sont parcourues par décalage. Le paramètre `fields=id,montant` limite
+la réponse aux champs demandés.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.pagination import CursorPagination
+
+
+class PaginationCurseur(CursorPagination):
+    """
+    Pagination par curseur sur le tri de la vue (paramètre `ordering`
+    compris). Un premier champ non unique est suivi de la clé primaire : les
+    lignes à égalité, parcourues par décalage, gardent un ordre déterministe.
+    """
+
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    # Tri de repli quand celui de la vue ne peut pas servir de curseur
+    ordering = '-pk'
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view))
+        signe = '-' if ordering[0].startswith('-') else ''
+        nom = ordering[0].lstrip('-')
+        if nom == 'pk':
+            return tuple(ordering)
+
+        # Le curseur encode la valeur du premier champ : elle doit exister,
+        # être non nulle et se comparer (identifiant pour une clé étrangère)
+        try:
+            champ = queryset.model._meta.get_field(nom)
+        except FieldDoesNotExist:
+            return (self.ordering,)
+        if not champ.concrete or champ.null or champ.many_to_many:
+            return (self.ordering,)
+
+        if champ.primary_key or champ.unique:
+            # Curseur sur une valeur unique : aucune égalité à départager
+            return (signe + champ.attname,)
+        ordering[0] = signe + champ.attname
+        if signe + 'pk' not in ordering:
+            ordering.append(signe + 'pk')
+        return tuple(ordering)
+
+
+class ChampsDemandesMixin:
+    """
+    Sérialiseur dont la réponse se limite aux champs listés dans le paramètre
+    `fields` de la requête (lecture seulement, sérialiseur racine seulement).
+    """
+
+    parametre_champs = 'fields'
+
+    def get_fields(self):
+        champs = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method not in ('GET', 'HEAD'):
+            return champs
+        # Un sérialiseur imbriqué garde tous ses champs
+        if self.root is not self and self.root is not self.parent:
+            return champs
+        demandes = request.query_params.get(self.parametre_champs)
+        if not demandes:
+            return champs
+        noms = {nom.strip() for nom in demandes.split(',') if nom.strip()}
+        retenus = {nom: champ for nom, champ in champs.items() if nom in noms}
+        return retenus or champs
@@ -11,6 +11,7 @@ from django.conf import settings
 import json
 
 from .quick_actions_generator import QuickActionsGenerator
+from .search_cache import SearchCache
 from .utils import check_group_permissions
 
 @login_required
@@ -90,6 +91,7 @@ def performance_stats(request):
             'cache_size': len(cache._cache) if hasattr(cache, '_cache') else 0,
             'cache_hits': getattr(cache, '_cache_hits', 0),
             'cache_misses': getattr(cache, '_cache_misses', 0),
+            'recherche': SearchCache.statistiques(),
         }
         
         # Statistiques de base de données
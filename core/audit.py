@@ -0,0 +1,116 @@
+"""
+Journal d'audit tamponné.
+
+journaliser() accepte les arguments de AuditLog.objects.create (ainsi que
+old_data / new_data, rangés dans details comme ailleurs dans le projet).
+Pendant une requête, AuditTamponMiddleware ouvre un tampon : les événements
+y sont gardés dans l'ordre, horodatés à leur création, puis enregistrés en
+un seul bulk_create à la fin de la réponse, y compris quand la vue lève une
+exception. Hors requête (commandes, tâches d'arrière-plan), ou hors tampon,
+chaque événement est écrit immédiatement.
+"""
+
+import json
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+logger = logging.getLogger(__name__)
+
+# Au-delà, le tampon est vidé sans attendre la fin de la requête
+TAILLE_MAX = 500
+
+_tampon = ContextVar('tampon_audit', default=None)
+_ABSENT = object()
+
+
+class _EncodeurAudit(DjangoJSONEncoder):
+    """Encodeur des détails : ce qui n'est pas sérialisable est gardé sous forme de texte."""
+
+    def default(self, o):
+        try:
+            return super().default(o)
+        except TypeError:
+            return str(o)
+
+
+def _details_json(details):
+    return json.loads(json.dumps(details, cls=_EncodeurAudit))
+
+
+def journaliser(**champs):
+    """Enregistre un événement d'audit (tamponné pendant une requête) et le retourne."""
+    from .models import AuditLog
+
+    old_data = champs.pop('old_data', _ABSENT)
+    new_data = champs.pop('new_data', _ABSENT)
+    if old_data is not _ABSENT or new_data is not _ABSENT:
+        details = dict(champs.get('details') or {})
+        details['old_data'] = None if old_data is _ABSENT else old_data
+        details['new_data'] = None if new_data is _ABSENT else new_data
+        champs['details'] = details
+    if champs.get('details') is not None:
+        champs['details'] = _details_json(champs['details'])
+    if champs.get('action'):
+        champs['action'] = champs['action'].lower()
+
+    evenement = AuditLog(**champs)
+    tampon = _tampon.get()
+    if tampon is None:
+        evenement.save()
+        return evenement
+
+    tampon.append(evenement)
+    if len(tampon) >= TAILLE_MAX:
+        vider()
+    return evenement
+
+
+def vider():
+    """Écrit les événements tamponnés, dans l'ordre ; retourne leur nombre."""
+    from .models import AuditLog
+
+    tampon = _tampon.get()
+    if not tampon:
+        return 0
+    evenements = list(tampon)
+    tampon.clear()
+    # Un seul événement : un INSERT simple évite le point de sauvegarde de bulk_create
+    if len(evenements) == 1:
+        evenements[0].save()
+        return 1
+    try:
+        AuditLog.objects.bulk_create(evenements, batch_size=TAILLE_MAX)
+        return len(evenements)
+    except Exception as e:
+        logger.error(f"Écriture groupée du journal d'audit impossible ({e}), écriture unitaire")
+
+    ecrits = 0
+    for evenement in evenements:
+        try:
+            evenement.save()
+            ecrits += 1
+        except Exception as e:
+            logger.error(f"Événement d'audit perdu ({evenement.action}): {e}")
+    return ecrits
+
+
+@contextmanager
+def tampon_audit():
+    """
+    Tamponne les événements d'audit du bloc et les écrit à sa sortie, même
+    sur exception. Un bloc imbriqué partage le tampon englobant.
+    """
+    if _tampon.get() is not None:
+        yield
+        return
+    jeton = _tampon.set([])
+    try:
+        yield
+    finally:
+        try:
+            vider()
+        finally:
+            _tampon.reset(jeton)
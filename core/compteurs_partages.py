@@ -0,0 +1,34 @@
+"""
+Compteurs nommés partagés par tous les workers, persistés dans CompteurPartage
+
+Le cache par défaut est propre à chaque processus : une version ou une
+statistique qui doit être vue de tous les workers est gardée en base.
+L'incrément est une mise à jour F() atomique ; la lecture de plusieurs
+compteurs se fait en une requête.
+"""
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import CompteurPartage
+
+
+def incrementer(cle, n=1):
+    """Ajoute n au compteur (créé au besoin) et retourne sa nouvelle valeur."""
+    compteurs = CompteurPartage.objects.filter(cle=cle)
+    with transaction.atomic():
+        if not compteurs.update(valeur=F('valeur') + n):
+            _, cree = CompteurPartage.objects.get_or_create(cle=cle, defaults={'valeur': n})
+            if not cree:
+                compteurs.update(valeur=F('valeur') + n)
+        return compteurs.values_list('valeur', flat=True).get()
+
+
+def lire(cles):
+    """Valeurs {clé: valeur} des compteurs, 0 pour un compteur absent."""
+    trouvees = dict(CompteurPartage.objects.filter(cle__in=cles).values_list('cle', 'valeur'))
+    return {cle: trouvees.get(cle, 0) for cle in cles}
+
+
+def supprimer(cles):
+    CompteurPartage.objects.filter(cle__in=cles).delete()
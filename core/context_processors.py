@@ -5,10 +5,17 @@ Context processors pour la navigation dynamique et la configuration entreprise
 from django.urls import reverse
 from .dynamic_navigation import DynamicNavigationSystem
 
+# Configuration mémorisée par le processus, avec la version dont elle est issue
+_entreprise_memo = (None, None)
+
 def dynamic_navigation(request):
     """
     Context processor pour ajouter la navigation dynamique à tous les templates
     """
+    # Plusieurs rendus dans la même requête (fragments, inclusions) : calcul unique
+    if hasattr(request, '_navigation_context'):
+        return request._navigation_context
+    
     # Déterminer le module actuel basé sur l'URL
     current_module = None
     object_id = None
@@ -88,16 +95,47 @@ def dynamic_navigation(request):
             ]
         }
     
-    return {
+    request._navigation_context = {
         'navigation': navigation,
         'current_module': current_module,
         'object_id': object_id
     }
+    return request._navigation_context
 
-def entreprise_config(request):  # pylint: disable=unused-argument
+def entreprise_config(request):
     """
     Context processor pour ajouter la configuration de l'entreprise à tous les templates
     """
+    global _entreprise_memo
+    # Plusieurs rendus dans la même requête : une seule vérification
+    if hasattr(request, '_entreprise_context'):
+        return request._entreprise_context
+    
+    try:
+        from .models import ConfigurationEntreprise
+        version = ConfigurationEntreprise.get_version()
+    except Exception:
+        version = None
+    
+    # Mémo valable tant que la version en base est la même (enregistrement
+    # fait par n'importe quel worker)
+    version_memo, config = _entreprise_memo
+    if config is None or version is None or version != version_memo:
+        config = _charger_entreprise_config()
+        _entreprise_memo = (version, config)
+    
+    request._entreprise_context = {
+        'entreprise': config
+    }
+    return request._entreprise_context
+
+def invalider_entreprise_config():
+    """Invalide la configuration de l'entreprise mémorisée par ce processus"""
+    global _entreprise_memo
+    _entreprise_memo = (None, None)
+
+def _charger_entreprise_config():
+    """Construit la configuration de l'entreprise depuis la base"""
     # Configuration par défaut de l'entreprise
     config = {
         'nom_entreprise': 'GESTIMMOB',
@@ -130,6 +168,4 @@ def entreprise_config(request):  # pylint: disable=unused-argument
         # En cas d'erreur, utiliser la configuration par défaut
         pass
     
-    return {
-        'entreprise': config
-    }
\ No newline at end of file
+    return config
\ No newline at end of file
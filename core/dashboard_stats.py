@@ -0,0 +1,313 @@
+"""
+Instantané des statistiques du tableau de bord.
+
+Les compteurs sont persistés section par section dans StatistiqueTableauBord.
+Une modification d'un modèle surveillé (signaux) marque seulement ses sections
+comme périmées, au commit de la transaction : une mise à jour indexée, quel que
+soit le volume. Les sections périmées sont recalculées à la lecture, au plus
+une fois par DELAI_RECALCUL secondes : une série d'enregistrements ne coûte
+qu'un recalcul, et un recalcul reste juste même si des données ont été
+modifiées par update() sans signal.
+"""
+
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q
+from django.db.models.signals import post_save, post_delete
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class DashboardStatsService:
+    """Calcul, persistance et lecture de l'instantané des statistiques."""
+
+    # Sections à recalculer pour chaque modèle surveillé (app_label.Model)
+    SECTIONS_PAR_MODELE = {
+        'proprietes.Propriete': ('proprietes',),
+        'proprietes.UniteLocative': ('unites', 'proprietes'),
+        'proprietes.Bailleur': ('bailleurs',),
+        'proprietes.Locataire': ('locataires',),
+        'contrats.Contrat': ('contrats', 'proprietes'),
+        'paiements.Paiement': ('paiements',),
+        'auth.Group': ('groupes',),
+        'notifications.Notification': ('notifications',),
+    }
+
+    # Intervalle minimal entre deux recalculs d'une section périmée
+    DELAI_RECALCUL = getattr(settings, 'DASHBOARD_STATS_DELAI_RECALCUL', 60)
+
+    _local = threading.local()
+
+    # ------------------------------------------------------------------
+    # Calcul des sections
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _calculer_proprietes():
+        from proprietes.models import Propriete
+        from contrats.models import Contrat
+
+        contrat_actif = Contrat.objects.filter(propriete=OuterRef('pk'), est_actif=True)
+        stats = Propriete.objects.annotate(
+            a_contrat_actif=Exists(contrat_actif)
+        ).aggregate(
+            total=Count('id'),
+            louees=Count('id', filter=Q(a_contrat_actif=True)),
+        )
+        total = stats['total'] or 0
+        louees = stats['louees'] or 0
+        avec_unites_disponibles = Propriete.objects.filter(
+            unites_locatives__statut='disponible',
+            unites_locatives__is_deleted=False,
+        ).distinct().count()
+        return {
+            'total': total,
+            'louees': louees,
+            'disponibles': total - louees,
+            'avec_unites_disponibles': avec_unites_disponibles,
+        }
+
+    @staticmethod
+    def _calculer_unites():
+        from proprietes.models import UniteLocative
+
+        return UniteLocative.objects.aggregate(
+            total=Count('id'),
+            disponibles=Count('id', filter=Q(statut='disponible')),
+            occupees=Count('id', filter=Q(statut='occupee')),
+            reservees=Count('id', filter=Q(statut='reservee')),
+        )
+
+    @staticmethod
+    def _calculer_bailleurs():
+        from proprietes.models import Bailleur
+
+        return Bailleur.objects.aggregate(total=Count('id'))
+
+    @staticmethod
+    def _calculer_locataires():
+        from proprietes.models import Locataire
+
+        return Locataire.objects.aggregate(total=Count('id'))
+
+    @staticmethod
+    def _calculer_contrats():
+        from contrats.models import Contrat
+
+        return Contrat.objects.aggregate(
+            total=Count('id'),
+            actifs=Count('id', filter=Q(est_actif=True)),
+        )
+
+    @staticmethod
+    def _calculer_paiements():
+        from paiements.models import Paiement
+
+        return Paiement.objects.aggregate(
+            total=Count('id'),
+            valides=Count('id', filter=Q(statut='valide')),
+            en_attente=Count('id', filter=Q(statut='en_attente')),
+        )
+
+    @staticmethod
+    def _calculer_groupes():
+        return Group.objects.aggregate(total=Count('id'))
+
+    @staticmethod
+    def _calculer_notifications():
+        from notifications.models import Notification
+
+        return Notification.objects.aggregate(
+            total=Count('id'),
+            non_lues=Count('id', filter=Q(is_read=False)),
+        )
+
+    @classmethod
+    def calculer_section(cls, section):
+        """Calcule les compteurs d'une section à partir des tables sources."""
+        calcul = getattr(cls, f'_calculer_{section}')
+        return {cle: valeur or 0 for cle, valeur in calcul().items()}
+
+    # ------------------------------------------------------------------
+    # Persistance
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def rafraichir_sections(cls, sections):
+        """Recalcule et persiste les sections indiquées ; retourne {section: valeurs}."""
+        from .models import StatistiqueTableauBord
+
+        resultats = {}
+        for section in sections:
+            try:
+                # Le marqueur est levé avant le calcul : une modification validée
+                # pendant le calcul re-marque la section au lieu d'être perdue
+                StatistiqueTableauBord.objects.filter(section=section).update(perime=False)
+                valeurs = cls.calculer_section(section)
+                mises_a_jour = StatistiqueTableauBord.objects.filter(section=section).update(
+                    valeurs=valeurs, date_mise_a_jour=timezone.now()
+                )
+                if not mises_a_jour:
+                    StatistiqueTableauBord.objects.get_or_create(section=section, defaults={'valeurs': valeurs})
+                resultats[section] = valeurs
+            except Exception as e:
+                logger.error(f"Erreur lors du rafraîchissement de la section {section}: {e}")
+        return resultats
+
+    @classmethod
+    def reconstruire(cls):
+        """Reconstruit l'instantané complet."""
+        from .models import StatistiqueTableauBord
+
+        sections = [section for section, _ in StatistiqueTableauBord.SECTION_CHOICES]
+        cls.rafraichir_sections(sections)
+        return sections
+
+    @staticmethod
+    def marquer_perimees(sections):
+        """Marque les sections comme à recalculer (sans effet si elles le sont déjà)."""
+        from .models import StatistiqueTableauBord
+
+        StatistiqueTableauBord.objects.filter(section__in=sections, perime=False).update(perime=True)
+
+    @classmethod
+    def planifier_rafraichissement(cls, sections):
+        """
+        Regroupe les sections modifiées et les marque périmées une seule fois au
+        commit de la transaction courante.
+        """
+        connexion = transaction.get_connection()
+        if not connexion.in_atomic_block:
+            cls.marquer_perimees(sections)
+            return
+
+        # Un marquage est déjà planifié sur cette transaction : on complète la liste.
+        # (Si la transaction a été annulée, le callback n'est plus enregistré.)
+        en_attente = getattr(cls._local, 'en_attente', None)
+        if en_attente is not None and any(
+            entree[1] is en_attente[1] for entree in connexion.run_on_commit
+        ):
+            en_attente[0].update(sections)
+            return
+
+        sections_a_traiter = set(sections)
+
+        def executer():
+            cls._local.en_attente = None
+            cls.marquer_perimees(sorted(sections_a_traiter))
+
+        cls._local.en_attente = (sections_a_traiter, executer)
+        transaction.on_commit(executer)
+
+    # ------------------------------------------------------------------
+    # Lecture
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def get_snapshot(cls):
+        """
+        Retourne l'instantané sous forme de dictionnaire {section: valeurs}.
+        Les sections manquantes, et les sections périmées dont le dernier calcul
+        date de plus de DELAI_RECALCUL secondes, sont recalculées et persistées.
+        """
+        from .models import StatistiqueTableauBord
+
+        lignes = list(StatistiqueTableauBord.objects.all())
+        snapshot = {ligne.section: ligne.valeurs for ligne in lignes}
+        dates = [ligne.date_mise_a_jour for ligne in lignes]
+
+        limite = timezone.now() - timedelta(seconds=cls.DELAI_RECALCUL)
+        a_recalculer = [ligne.section for ligne in lignes if ligne.perime and ligne.date_mise_a_jour <= limite]
+        a_recalculer += [
+            section for section, _ in StatistiqueTableauBord.SECTION_CHOICES
+            if section not in snapshot
+        ]
+        if a_recalculer:
+            snapshot.update(cls.rafraichir_sections(a_recalculer))
+            # Section en erreur et jamais calculée : calcul direct, non persisté
+            for section in a_recalculer:
+                if section not in snapshot:
+                    snapshot[section] = cls.calculer_section(section)
+            dates.append(timezone.now())
+
+        snapshot['derniere_maj'] = max(dates) if dates else timezone.now()
+        return snapshot
+
+    @classmethod
+    def get_dashboard_context(cls):
+        """Contexte à plat attendu par le tableau de bord et son API."""
+        snapshot = cls.get_snapshot()
+        proprietes = snapshot['proprietes']
+        unites = snapshot['unites']
+        bailleurs = snapshot['bailleurs']
+        locataires = snapshot['locataires']
+        contrats = snapshot['contrats']
+        paiements = snapshot['paiements']
+        notifications = snapshot['notifications']
+
+        return {
+            # Statistiques principales
+            'total_proprietes': proprietes.get('total', 0),
+            'proprietes_louees': proprietes.get('louees', 0),
+            'proprietes_disponibles': proprietes.get('disponibles', 0) + proprietes.get('avec_unites_disponibles', 0),
+            'proprietes_en_construction': 0,  # Pas de champ construction
+
+            # Statistiques des bailleurs et locataires (tous considérés comme actifs)
+            'total_bailleurs': bailleurs.get('total', 0),
+            'bailleurs_actifs': bailleurs.get('total', 0),
+            'total_locataires': locataires.get('total', 0),
+            'locataires_actifs': locataires.get('total', 0),
+
+            # Statistiques des contrats
+            'total_contrats': contrats.get('total', 0),
+            'contrats_actifs': contrats.get('actifs', 0),
+
+            # Statistiques des paiements
+            'total_paiements': paiements.get('total', 0),
+            'paiements_valides': paiements.get('valides', 0),
+            'paiements_attente': paiements.get('en_attente', 0),
+
+            # Statistiques des unités locatives
+            'unites_stats': {
+                'total': unites.get('total', 0),
+                'disponibles': unites.get('disponibles', 0),
+                'occupees': unites.get('occupees', 0),
+                'reservees': unites.get('reservees', 0),
+            },
+
+            # Statistiques des groupes et notifications
+            'total_groupes': snapshot['groupes'].get('total', 0),
+            'total_notifications': notifications.get('total', 0),
+            'notifications_non_lues': notifications.get('non_lues', 0),
+
+            # Métadonnées
+            'derniere_maj': timezone.localtime(snapshot['derniere_maj']).strftime('%d/%m/%Y %H:%M'),
+            'statut': 'instantane',
+        }
+
+
+def _statistiques_modifiees(sender, **kwargs):
+    """Récepteur commun : planifie le recalcul des sections du modèle modifié."""
+    sections = DashboardStatsService.SECTIONS_PAR_MODELE.get(sender._meta.label)
+    if sections:
+        DashboardStatsService.planifier_rafraichissement(sections)
+
+
+def connecter_signaux():
+    """Branche les signaux post_save/post_delete des modèles surveillés."""
+    from django.apps import apps
+
+    for label in DashboardStatsService.SECTIONS_PAR_MODELE:
+        try:
+            modele = apps.get_model(label)
+        except LookupError:
+            continue
+        uid = f'dashboard_stats_{label}'
+        post_save.connect(_statistiques_modifiees, sender=modele, dispatch_uid=f'{uid}_save')
+        post_delete.connect(_statistiques_modifiees, sender=modele, dispatch_uid=f'{uid}_delete')
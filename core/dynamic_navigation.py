@@ -6,9 +6,12 @@ Améliore l'expérience utilisateur avec des liens intelligents
 from django.urls import reverse
 from django.core.cache import cache
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.db.models import Q, Count, Sum
+from django.db.models.signals import post_save, post_delete
 from django.utils import timezone
 from datetime import timedelta
+import time
 
 User = get_user_model()
 
@@ -17,12 +20,21 @@ class DynamicNavigationSystem:
     Système de navigation dynamique qui s'adapte au contexte utilisateur
     """
     
+    CACHE_TIMEOUT = 60
+    
+    # Modules dont les liens affichent des données du modèle (compteurs, numéros)
+    MODULES_PAR_MODELE = {
+        'proprietes.Propriete': 'proprietes',
+        'contrats.Contrat': 'contrats',
+        'paiements.Paiement': 'paiements',
+    }
+    
     @staticmethod
     def get_contextual_links(request, current_module=None, object_id=None):
         """
         Génère des liens contextuels basés sur le module actuel et l'objet
         """
-        cache_key = f"contextual_links_{request.user.pk}_{current_module}_{object_id}"
+        cache_key = DynamicNavigationSystem._cache_key(request, current_module, object_id)
         cached_links = cache.get(cache_key)
         
         if cached_links is not None:
@@ -54,10 +66,36 @@ class DynamicNavigationSystem:
         # Breadcrumbs dynamiques
         links['breadcrumbs'] = DynamicNavigationSystem._get_breadcrumbs(request, current_module, object_id)
         
-        # Cache pour 5 minutes
-        cache.set(cache_key, links, 300)
+        # Cache court, invalidé par signaux quand les compteurs affichés changent
+        cache.set(cache_key, links, DynamicNavigationSystem.CACHE_TIMEOUT)
         return links
     
+    @staticmethod
+    def _cache_key(request, current_module, object_id):
+        """Clé par (rôle, module, objet), préfixée par la version des données du module"""
+        user = getattr(request, 'user', None)
+        role = getattr(user, 'groupe_travail_id', None) or 'aucun'
+        version = DynamicNavigationSystem._version(current_module)
+        return f"navigation_{current_module}_v{version}_{role}_{object_id}"
+    
+    @staticmethod
+    def _version(current_module):
+        cle = f"navigation_version_{current_module}"
+        version = cache.get(cle)
+        if version is None:
+            version = time.time_ns()
+            cache.set(cle, version, None)
+        return version
+    
+    @staticmethod
+    def invalider_module(current_module):
+        """Rend obsolètes les liens mis en cache pour un module"""
+        cle = f"navigation_version_{current_module}"
+        try:
+            cache.incr(cle)
+        except ValueError:
+            cache.set(cle, time.time_ns(), None)
+    
     @staticmethod
     def _get_proprietes_links(request, object_id):
         """Liens contextuels pour le module propriétés"""
@@ -329,3 +367,18 @@ class DynamicNavigationSystem:
         
         return breadcrumbs
 
+
+def _navigation_modifiee(sender, **kwargs):
+    module = DynamicNavigationSystem.MODULES_PAR_MODELE.get(sender._meta.label)
+    if module:
+        transaction.on_commit(lambda: DynamicNavigationSystem.invalider_module(module))
+
+
+def connecter_signaux():
+    """Invalide la navigation mise en cache quand les données affichées changent"""
+    from django.apps import apps
+    
+    for label in DynamicNavigationSystem.MODULES_PAR_MODELE:
+        modele = apps.get_model(label)
+        post_save.connect(_navigation_modifiee, sender=modele, dispatch_uid=f'navigation_{label}_save')
+        post_delete.connect(_navigation_modifiee, sender=modele, dispatch_uid=f'navigation_{label}_delete')
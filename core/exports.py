@@ -0,0 +1,161 @@
+"""
+Moteur d'export tabulaire (CSV et XLSX) à mémoire constante.
+
+Une source d'export fournit des colonnes (titre, largeur) et un itérable de
+lignes, typiquement un queryset parcouru par `.iterator(chunk_size=...)` sur
+`values_list`. Le CSV est diffusé ligne à ligne par StreamingHttpResponse ;
+le XLSX est écrit par openpyxl en mode write-only (largeurs de colonnes
+fixées d'avance, sans relecture des cellules) dans un fichier temporaire
+renvoyé par morceaux.
+
+Au-delà de EXPORTS_SEUIL_ARRIERE_PLAN lignes, l'export est produit par une
+tâche d'arrière-plan (core.taches) dans le stockage, puis téléchargé par la
+vue telecharger_export une fois prêt.
+"""
+
+import csv
+import io
+import logging
+import tempfile
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill
+from openpyxl.utils import get_column_letter
+
+from .taches import enqueue, resoudre_fonction
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'excel': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+}
+
+# Lignes lues par aller-retour en base
+TAILLE_LOT = 2000
+# Nombre de lignes au-delà duquel l'export passe en arrière-plan
+SEUIL_ARRIERE_PLAN = getattr(settings, 'EXPORTS_SEUIL_ARRIERE_PLAN', 50000)
+# Durée de conservation des fichiers produits en arrière-plan
+DUREE_CONSERVATION = timedelta(hours=getattr(settings, 'EXPORTS_DUREE_CONSERVATION_HEURES', 24))
+DOSSIER = 'exports'
+
+
+class _Tampon:
+    """Pseudo-fichier pour csv.writer : renvoie la ligne au lieu de l'écrire."""
+
+    def write(self, valeur):
+        return valeur
+
+
+def iterer_csv(colonnes, lignes, delimiter=',', bom=False, lignes_par_morceau=500):
+    """Texte CSV par morceaux de `lignes_par_morceau` lignes."""
+    writer = csv.writer(_Tampon(), delimiter=delimiter)
+    morceau = ['\ufeff'] if bom else []
+    morceau.append(writer.writerow([titre for titre, _ in colonnes]))
+    for ligne in lignes:
+        morceau.append(writer.writerow(ligne))
+        if len(morceau) >= lignes_par_morceau:
+            yield ''.join(morceau)
+            morceau = []
+    if morceau:
+        yield ''.join(morceau)
+
+
+def ecrire_xlsx(colonnes, lignes, fichier, titre_feuille='Export'):
+    """Écrit un classeur XLSX en mode write-only dans `fichier`."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=titre_feuille[:31])
+    # En mode write-only, les largeurs doivent précéder la première ligne
+    for index, (_, largeur) in enumerate(colonnes, 1):
+        ws.column_dimensions[get_column_letter(index)].width = largeur
+
+    police = Font(bold=True)
+    fond = PatternFill(start_color='CCCCCC', end_color='CCCCCC', fill_type='solid')
+    entetes = []
+    for titre, _ in colonnes:
+        cellule = WriteOnlyCell(ws, value=titre)
+        cellule.font = police
+        cellule.fill = fond
+        entetes.append(cellule)
+    ws.append(entetes)
+
+    for ligne in lignes:
+        ws.append(ligne)
+    wb.save(fichier)
+
+
+def ecrire_fichier(format_export, colonnes, lignes, fichier, titre_feuille='Export', **options_csv):
+    """Écrit l'export dans un fichier binaire ouvert."""
+    if format_export == 'excel':
+        ecrire_xlsx(colonnes, lignes, fichier, titre_feuille)
+        return
+    texte = io.TextIOWrapper(fichier, encoding='utf-8', newline='')
+    for morceau in iterer_csv(colonnes, lignes, **options_csv):
+        texte.write(morceau)
+    texte.flush()
+    texte.detach()
+
+
+def nom_fichier(prefixe, format_export):
+    return f"{prefixe}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.{FORMATS[format_export][1]}"
+
+
+def reponse_export(format_export, colonnes, lignes, nom, titre_feuille='Export', **options_csv):
+    """Réponse HTTP diffusée (CSV) ou servie par morceaux depuis un fichier temporaire (XLSX)."""
+    type_contenu = FORMATS[format_export][0]
+    if format_export == 'csv':
+        response = StreamingHttpResponse(iterer_csv(colonnes, lignes, **options_csv), content_type=type_contenu)
+        response['Content-Disposition'] = f'attachment; filename="{nom}"'
+        return response
+
+    # Le fichier temporaire est supprimé quand FileResponse le referme
+    fichier = tempfile.TemporaryFile()
+    ecrire_xlsx(colonnes, lignes, fichier, titre_feuille)
+    fichier.seek(0)
+    return FileResponse(fichier, as_attachment=True, filename=nom, content_type=type_contenu)
+
+
+def exporter_en_arriere_plan(source, params, format_export, nom, utilisateur, titre_feuille='Export', **options_csv):
+    """
+    Met en file la production de l'export. `source` est le chemin pointé
+    d'une fonction params -> (colonnes, lignes) ; la tâche est retournée.
+    """
+    return enqueue(
+        produire_fichier, source, params, format_export, nom,
+        utilisateur_id=utilisateur.pk, titre_feuille=titre_feuille, **options_csv
+    )
+
+
+def produire_fichier(source, params, format_export, nom, utilisateur_id=None, titre_feuille='Export', **options_csv):
+    """Tâche d'arrière-plan : écrit l'export dans le stockage et retourne son emplacement."""
+    purger_anciens()
+    colonnes, lignes = resoudre_fonction(source)(params)
+    with tempfile.TemporaryFile() as fichier:
+        ecrire_fichier(format_export, colonnes, lignes, fichier, titre_feuille, **options_csv)
+        fichier.seek(0)
+        chemin = default_storage.save(f"{DOSSIER}/{uuid.uuid4().hex}_{nom}", File(fichier))
+    return {'fichier': chemin, 'nom_fichier': nom, 'utilisateur_id': utilisateur_id}
+
+
+def purger_anciens():
+    """Supprime les exports produits il y a plus de DUREE_CONSERVATION."""
+    try:
+        _, fichiers = default_storage.listdir(DOSSIER)
+    except (FileNotFoundError, NotImplementedError):
+        return
+    limite = timezone.now() - DUREE_CONSERVATION
+    for nom in fichiers:
+        chemin = f"{DOSSIER}/{nom}"
+        try:
+            if default_storage.get_modified_time(chemin) < limite:
+                default_storage.delete(chemin)
+        except (OSError, NotImplementedError) as e:
+            logger.warning(f"Impossible de purger l'export {chemin}: {e}")
@@ -5,6 +5,7 @@ Système de génération d'IDs uniques professionnels pour l'entreprise de gesti
 import re
 from datetime import datetime
 from django.db import models, transaction
+from django.db.models.functions import Greatest
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 
@@ -51,6 +52,13 @@ class IDGenerator:
             'sequence_field': 'numero_paiement',
             'model': 'paiements.Paiement'
         },
+        'paiement_jour': {
+            'prefix': 'PAI',
+            'format': 'PAI-{day}-{sequence:04d}',
+            'description': 'Numéro de paiement journalier (PAI-YYYYMMDD-XXXX)',
+            'sequence_field': 'numero_paiement',
+            'model': 'paiements.Paiement'
+        },
         'quittance': {
             'prefix': 'QUI',
             'format': 'QUI-{yearmonth}-{sequence:04d}',
@@ -61,13 +69,17 @@ class IDGenerator:
     }
     
     @classmethod
-    def generate_id(cls, entity_type, force_new_sequence=False, **kwargs):
+    def generate_id(cls, entity_type, force_new_sequence=False, combler_trous=False, **kwargs):
         """
         Génère un ID unique pour une entité donnée
         
         Args:
             entity_type (str): Type d'entité (bailleur, locataire, propriete, etc.)
-            force_new_sequence (bool): Force une nouvelle séquence même si des gaps existent
+            force_new_sequence (bool): Conservé pour compatibilité, le compteur n'attribue
+                jamais un numéro inférieur au dernier attribué
+            combler_trous (bool): Réutilise le premier numéro libre en parcourant les IDs
+                existants. Coûteux et non protégé contre la concurrence : à réserver aux
+                traitements hors ligne
             **kwargs: Paramètres supplémentaires (ex: date_paiement pour les paiements)
         
         Returns:
@@ -76,20 +88,69 @@ class IDGenerator:
         if entity_type not in cls.ID_FORMATS:
             raise ValueError(f"Type d'entité non reconnu: {entity_type}")
         
-        config = cls.ID_FORMATS[entity_type]
-        
         # Obtenir l'année courante
         current_year = datetime.now().year
         
-        # Obtenir la séquence suivante
-        sequence = cls._get_next_sequence(entity_type, current_year, force_new_sequence=force_new_sequence, **kwargs)
+        if combler_trous:
+            sequence = cls._scan_next_sequence(entity_type, current_year, force_new_sequence=force_new_sequence, **kwargs)
+            # Un numéro pris après le plus haut ne doit pas être réattribué par le compteur
+            cls._avancer_compteur(entity_type, cls._get_periode(entity_type, current_year, **kwargs), sequence)
+        else:
+            sequence = cls._get_next_sequence(entity_type, current_year, **kwargs)
+        
+        return cls._format_id(entity_type, sequence, current_year, **kwargs)
+    
+    @classmethod
+    def reserve(cls, entity_type, n, **kwargs):
+        """
+        Réserve d'un coup n IDs consécutifs (imports en masse)
+        
+        Args:
+            entity_type (str): Type d'entité
+            n (int): Nombre d'IDs à réserver
+            **kwargs: Paramètres supplémentaires (ex: date_paiement pour les paiements)
+        
+        Returns:
+            list: IDs réservés, dans l'ordre
+        """
+        current_year = datetime.now().year
+        return [
+            cls._format_id(entity_type, sequence, current_year, **kwargs)
+            for sequence in cls.reserver_sequences(entity_type, n, **kwargs)
+        ]
+    
+    @classmethod
+    def reserver_sequences(cls, entity_type, n, **kwargs):
+        """
+        Réserve n numéros de séquence consécutifs sans les mettre en forme
+        
+        Returns:
+            range: Séquences réservées
+        """
+        if entity_type not in cls.ID_FORMATS:
+            raise ValueError(f"Type d'entité non reconnu: {entity_type}")
+        if n <= 0:
+            return range(0)
+        
+        periode = cls._get_periode(entity_type, datetime.now().year, **kwargs)
+        dernier = cls._allouer(entity_type, periode, n)
+        return range(dernier - n + 1, dernier + 1)
+    
+    @classmethod
+    def _format_id(cls, entity_type, sequence, year, **kwargs):
+        """Met en forme un ID à partir de sa séquence"""
+        config = cls.ID_FORMATS[entity_type]
         
-        # Générer l'ID selon le format
         if entity_type == 'paiement':
             # Format: PAY-YYYYMM-XXXX
             yearmonth = kwargs.get('date_paiement', datetime.now()).strftime('%Y%m')
             return config['format'].format(yearmonth=yearmonth, sequence=sequence)
         
+        elif entity_type == 'paiement_jour':
+            # Format: PAI-YYYYMMDD-XXXX
+            day = kwargs.get('date_creation', datetime.now()).strftime('%Y%m%d')
+            return config['format'].format(day=day, sequence=sequence)
+        
         elif entity_type == 'quittance':
             # Format: QUI-YYYYMM-XXXX
             yearmonth = kwargs.get('date_emission', datetime.now()).strftime('%Y%m')
@@ -97,90 +158,161 @@ class IDGenerator:
         
         else:
             # Format standard: PREFIX-YYYY-XXXX
-            return config['format'].format(year=current_year, sequence=sequence)
+            return config['format'].format(year=year, sequence=sequence)
+    
+    @classmethod
+    def _get_periode(cls, entity_type, year, **kwargs):
+        """Période de remise à zéro de la séquence (AAAA, AAAAMM ou AAAAMMJJ)"""
+        if entity_type == 'paiement_jour':
+            return kwargs.get('date_creation', datetime.now()).strftime('%Y%m%d')
+        if entity_type == 'paiement':
+            return kwargs.get('date_paiement', datetime.now()).strftime('%Y%m')
+        if entity_type == 'quittance':
+            return kwargs.get('date_emission', datetime.now()).strftime('%Y%m')
+        return str(year)
+    
+    @classmethod
+    def _get_model(cls, entity_type):
+        from django.apps import apps
+        app_label, model_name = cls.ID_FORMATS[entity_type]['model'].split('.')
+        return apps.get_model(app_label, model_name)
+    
+    @classmethod
+    def _get_next_sequence(cls, entity_type, year, **kwargs):
+        """
+        Obtient la prochaine séquence pour une entité et une période via le compteur
+        """
+        return cls._allouer(entity_type, cls._get_periode(entity_type, year, **kwargs), 1)
     
     @classmethod
-    def _get_next_sequence(cls, entity_type, year, force_new_sequence=False, **kwargs):
+    def _allouer(cls, entity_type, periode, n):
         """
-        Obtient la prochaine séquence disponible pour une entité et une année
+        Incrémente atomiquement le compteur de n et retourne le dernier numéro attribué
+        
+        L'incrément F() est exécuté avant la lecture : il pose le verrou d'écriture sur
+        la ligne (PostgreSQL) ou la base (SQLite), si bien que deux transactions
+        concurrentes ne peuvent pas obtenir le même numéro. À sa création, le compteur
+        est initialisé avec la plus haute séquence déjà présente pour la période.
+        """
+        from core.models import SequenceCompteur
+        
+        compteurs = SequenceCompteur.objects.filter(type_entite=entity_type, periode=periode)
+        with transaction.atomic():
+            if not compteurs.update(dernier_numero=models.F('dernier_numero') + n):
+                SequenceCompteur.objects.get_or_create(
+                    type_entite=entity_type,
+                    periode=periode,
+                    defaults={'dernier_numero': cls._get_max_sequence(entity_type, periode)},
+                )
+                compteurs.update(dernier_numero=models.F('dernier_numero') + n)
+            return compteurs.values_list('dernier_numero', flat=True).get()
+    
+    @classmethod
+    def _avancer_compteur(cls, entity_type, periode, sequence):
+        """
+        Porte le compteur au moins à `sequence`, numéro attribué hors compteur
+        (GREATEST : sans effet pour un trou comblé sous le dernier numéro)
+        """
+        from core.models import SequenceCompteur
+        
+        compteurs = SequenceCompteur.objects.filter(type_entite=entity_type, periode=periode)
+        avance = Greatest(models.F('dernier_numero'), models.Value(sequence))
+        with transaction.atomic():
+            if not compteurs.update(dernier_numero=avance):
+                SequenceCompteur.objects.get_or_create(
+                    type_entite=entity_type,
+                    periode=periode,
+                    defaults={'dernier_numero': cls._get_max_sequence(entity_type, periode)},
+                )
+                compteurs.update(dernier_numero=avance)
+    
+    @classmethod
+    def _get_existing_ids(cls, entity_type, prefixe):
+        model = cls._get_model(entity_type)
+        sequence_field = cls.ID_FORMATS[entity_type]['sequence_field']
+        return model.objects.filter(
+            **{f"{sequence_field}__startswith": prefixe}
+        ).values_list(sequence_field, flat=True)
+    
+    @staticmethod
+    def _extraire_sequences(existing_ids):
+        """Extrait les numéros de séquence (dernière partie après le dernier tiret)"""
+        sequences = []
+        for id_value in existing_ids:
+            if id_value:
+                parts = id_value.split('-')
+                if len(parts) >= 2:
+                    try:
+                        sequences.append(int(parts[-1]))
+                    except ValueError:
+                        continue
+        return sequences
+    
+    @classmethod
+    def _get_max_sequence(cls, entity_type, periode):
+        """Plus haute séquence existante pour une période (initialisation du compteur)"""
+        prefixe = f"{cls.ID_FORMATS[entity_type]['prefix']}-{periode}-"
+        sequences = cls._extraire_sequences(cls._get_existing_ids(entity_type, prefixe))
+        return max(sequences) if sequences else 0
+    
+    @staticmethod
+    def _premiere_sequence_libre(sequences, force_new_sequence=False):
+        """Premier trou de la séquence, ou max + 1"""
+        if not sequences:
+            return 1
+        if force_new_sequence:
+            # Forcer une nouvelle séquence après la plus haute
+            return max(sequences) + 1
+        sequences_sorted = sorted(sequences)
+        for i, seq in enumerate(sequences_sorted, 1):
+            if i != seq:
+                return i  # Retourner le premier gap trouvé
+        return max(sequences) + 1  # Pas de gap, retourner max + 1
+    
+    @classmethod
+    def _scan_next_sequence(cls, entity_type, year, force_new_sequence=False, **kwargs):
+        """
+        Mode « comblement des trous » : parcourt tous les IDs existants de la période
         
         Args:
             force_new_sequence (bool): Si True, force une nouvelle séquence après la plus haute existante
         """
         config = cls.ID_FORMATS[entity_type]
-        model_name = config['model']
-        sequence_field = config['sequence_field']
-        
-        # Importer le modèle dynamiquement
-        app_label, model_name = model_name.split('.')
-        from django.apps import apps
-        model = apps.get_model(app_label, model_name)
         
-        # Utiliser une transaction pour éviter les conflits de concurrence
-        with transaction.atomic():
-            # Construire le filtre pour l'année
-            if entity_type == 'paiement':
-                # Pour les paiements, filtrer par mois
-                if 'date_paiement' in kwargs:
-                    date = kwargs['date_paiement']
-                    yearmonth = date.strftime('%Y%m')
-                    # Extraire l'année et le mois du numéro existant
-                    existing_ids = model.objects.filter(
-                        **{f"{sequence_field}__startswith": f"PAY-{yearmonth}"}
-                    ).values_list(sequence_field, flat=True)
-                else:
-                    # Utiliser l'année courante
-                    existing_ids = model.objects.filter(
-                        **{f"{sequence_field}__startswith": f"PAY-{year}"}
-                    ).values_list(sequence_field, flat=True)
-            
-            elif entity_type == 'quittance':
-                # Pour les quittances, filtrer par mois
-                if 'date_emission' in kwargs:
-                    date = kwargs['date_emission']
-                    yearmonth = date.strftime('%Y%m')
-                    existing_ids = model.objects.filter(
-                        **{f"{sequence_field}__startswith": f"QUI-{yearmonth}"}
-                    ).values_list(sequence_field, flat=True)
-                else:
-                    # Utiliser l'année courante
-                    existing_ids = model.objects.filter(
-                        **{f"{sequence_field}__startswith": f"QUI-{year}"}
-                    ).values_list(sequence_field, flat=True)
-            
+        # Construire le préfixe de recherche
+        if entity_type == 'paiement':
+            if 'date_paiement' in kwargs:
+                prefixe = f"PAY-{kwargs['date_paiement'].strftime('%Y%m')}"
             else:
-                # Pour les autres entités, filtrer par année
-                existing_ids = model.objects.filter(
-                    **{f"{sequence_field}__startswith": f"{config['prefix']}-{year}"}
-                ).values_list(sequence_field, flat=True)
-            
-            # Extraire les séquences existantes
-            sequences = []
-            for id_value in existing_ids:
-                if id_value:
-                    # Extraire le numéro de séquence (dernière partie après le dernier tiret)
-                    parts = id_value.split('-')
-                    if len(parts) >= 2:
-                        try:
-                            seq_num = int(parts[-1])
-                            sequences.append(seq_num)
-                        except ValueError:
-                            continue
-            
-            # Retourner la prochaine séquence disponible
-            if sequences:
-                if force_new_sequence:
-                    # Forcer une nouvelle séquence après la plus haute
-                    return max(sequences) + 1
-                else:
-                    # Chercher le premier gap ou retourner max + 1
-                    sequences_sorted = sorted(sequences)
-                    for i, seq in enumerate(sequences_sorted, 1):
-                        if i != seq:
-                            return i  # Retourner le premier gap trouvé
-                    return max(sequences) + 1  # Pas de gap, retourner max + 1
+                prefixe = f"PAY-{year}"
+        elif entity_type == 'quittance':
+            if 'date_emission' in kwargs:
+                prefixe = f"QUI-{kwargs['date_emission'].strftime('%Y%m')}"
             else:
-                return 1
+                prefixe = f"QUI-{year}"
+        else:
+            prefixe = f"{config['prefix']}-{year}"
+        
+        with transaction.atomic():
+            sequences = cls._extraire_sequences(cls._get_existing_ids(entity_type, prefixe))
+            return cls._premiere_sequence_libre(sequences, force_new_sequence)
+    
+    @classmethod
+    def resynchroniser_compteur(cls, entity_type, periode):
+        """
+        Recale le compteur d'une période sur la plus haute séquence existante
+        (à lancer hors ligne, par exemple après un import ou une purge)
+        """
+        from core.models import SequenceCompteur
+        
+        with transaction.atomic():
+            maximum = cls._get_max_sequence(entity_type, periode)
+            SequenceCompteur.objects.update_or_create(
+                type_entite=entity_type,
+                periode=periode,
+                defaults={'dernier_numero': maximum},
+            )
+        return maximum
     
     @classmethod
     def validate_id_format(cls, entity_type, id_value):
@@ -204,6 +336,9 @@ class IDGenerator:
         if entity_type in ['paiement', 'quittance']:
             # Format: PAY-YYYYMM-XXXX ou QUI-YYYYMM-XXXX
             pattern = rf"^{prefix}-\d{{6}}-\d{{4}}$"
+        elif entity_type == 'paiement_jour':
+            # Format: PAI-YYYYMMDD-XXXX
+            pattern = rf"^{prefix}-\d{{8}}-\d{{4,}}$"
         else:
             # Format: PREFIX-YYYY-XXXX
             pattern = rf"^{prefix}-\d{{4}}-\d{{4}}$"
@@ -227,6 +362,16 @@ class IDGenerator:
         
         parts = id_value.split('-')
         
+        if entity_type == 'paiement_jour':
+            # Format: PAI-YYYYMMDD-XXXX
+            day = parts[1]
+            return {
+                'year': int(day[:4]),
+                'month': int(day[4:6]),
+                'day': int(day[6:8]),
+                'sequence': int(parts[2]),
+            }
+        
         if entity_type in ['paiement', 'quittance']:
             # Format: PREFIX-YYYYMM-XXXX
             yearmonth = parts[1]
@@ -279,6 +424,8 @@ class IDGenerator:
         
         if entity_type == 'paiement':
             return f"PAY-{current_year:04d}{current_month:02d}-0001"
+        elif entity_type == 'paiement_jour':
+            return f"PAI-{current_year:04d}{current_month:02d}{current_day:02d}-0001"
         elif entity_type == 'quittance':
             return f"QUI-{current_year:04d}{current_month:02d}-0001"
         else:
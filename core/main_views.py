@@ -15,17 +15,20 @@ from django.contrib.auth.decorators import user_passes_test
 from django.core.exceptions import PermissionDenied
 from django.http import HttpResponse
 from django.template.loader import render_to_string
+from django.urls import reverse
 import json
 import os
+from urllib.parse import urlencode
 
+from .audit import journaliser
 from .models import ConfigurationEntreprise, TemplateRecu, Devise, AuditLog
 from paiements.models import Paiement
-from proprietes.models import Propriete, Locataire, Bailleur, UniteLocative
+from proprietes.models import Propriete
 from contrats.models import Contrat
 from utilisateurs.models import Utilisateur
-from django.contrib.auth.models import Group
 from .forms import ConfigurationEntrepriseForm
 from .utils import convertir_montant, check_group_permissions
+from .dashboard_stats import DashboardStatsService
 from django.contrib.contenttypes.models import ContentType
 from .optimizations import (
     performance_monitor, 
@@ -73,141 +76,12 @@ def home(request):
 @login_required
 @performance_monitor
 def dashboard(request):
-    """Tableau de bord principal unifié - STATISTIQUES DYNAMIQUES ET RÉELLES."""
-    # Calculer les statistiques directement sans cache pour debug
+    """Tableau de bord principal unifié - lu depuis l'instantané des statistiques."""
     try:
-        print("DEBUG: Debut du calcul des statistiques")
-        # Statistiques des propriétés - CORRIGÉES
-        proprietes_stats = Propriete.objects.aggregate(
-            total=Count('id')
-        )
-        print(f"DEBUG: proprietes_stats = {proprietes_stats}")
-        
-        # Calculer les propriétés louées et disponibles différemment
-        proprietes_louees = 0
-        proprietes_disponibles = 0
-        
-        # Vérifier si les propriétés ont des contrats actifs
-        for propriete in Propriete.objects.all():
-            contrats_actifs = Contrat.objects.filter(propriete=propriete, est_actif=True).count()
-            if contrats_actifs > 0:
-                proprietes_louees += 1
-            else:
-                proprietes_disponibles += 1
-        
-        proprietes_stats['louees'] = proprietes_louees
-        proprietes_stats['disponibles'] = proprietes_disponibles
-        
-        # Statistiques des unités locatives - CORRIGÉES
-        try:
-            unites_stats = UniteLocative.objects.aggregate(
-                total=Count('id'),
-                disponibles=Count('id', filter=Q(statut='disponible')),
-                occupees=Count('id', filter=Q(statut='occupee')),
-                reservees=Count('id', filter=Q(statut='reservee'))
-            )
-        except Exception:
-            unites_stats = {'total': 0, 'disponibles': 0, 'occupees': 0, 'reservees': 0}
-        
-        # Statistiques des bailleurs et locataires - CORRIGÉES
-        bailleurs_stats = Bailleur.objects.aggregate(
-            total=Count('id')
-        )
-        bailleurs_stats['actifs'] = bailleurs_stats['total']  # Tous les bailleurs sont considérés comme actifs
-        
-        locataires_stats = Locataire.objects.aggregate(
-            total=Count('id')
-        )
-        locataires_stats['actifs'] = locataires_stats['total']  # Tous les locataires sont considérés comme actifs
-        
-        # Statistiques des contrats - CORRIGÉES
-        contrats_stats = Contrat.objects.aggregate(
-            total=Count('id'),
-            actifs=Count('id', filter=Q(est_actif=True))
-        )
-        
-        # Statistiques des paiements - CORRIGÉES
-        paiements_stats = Paiement.objects.aggregate(
-            total=Count('id'),
-            valides=Count('id', filter=Q(statut='valide')),
-            en_attente=Count('id', filter=Q(statut='en_attente'))
-        )
-        
-        # Statistiques des groupes d'utilisateurs
-        groupes_stats = Group.objects.aggregate(
-            total=Count('id')
-        )
-        
-        # Statistiques des notifications
-        try:
-            from notifications.models import Notification
-            notifications_stats = Notification.objects.aggregate(
-                total=Count('id'),
-                non_lues=Count('id', filter=Q(is_read=False))
-            )
-        except (ImportError, AttributeError):
-            notifications_stats = {'total': 0, 'non_lues': 0}
-        
-        # Calculer les propriétés disponibles avec unités
-        try:
-            proprietes_avec_unites_disponibles = Propriete.objects.filter(
-                unites_locatives__statut='disponible'
-            ).distinct().count()
-        except Exception:
-            proprietes_avec_unites_disponibles = 0
-        
-        # Total des propriétés disponibles (propriétés + unités)
-        total_disponibles = proprietes_stats['disponibles'] + proprietes_avec_unites_disponibles
-        
-        # Préparer les statistiques finales
-        print(f"DEBUG: Avant creation du contexte - proprietes_stats['total'] = {proprietes_stats.get('total', 'NOT_FOUND')}")
-        cached_stats = {
-            # Statistiques principales
-            'total_proprietes': proprietes_stats['total'] or 0,
-            'proprietes_louees': proprietes_stats['louees'] or 0,
-            'proprietes_disponibles': total_disponibles,
-            'proprietes_en_construction': 0,  # Pas de champ construction
-            
-            # Statistiques des bailleurs et locataires
-            'total_bailleurs': bailleurs_stats['total'] or 0,
-            'bailleurs_actifs': bailleurs_stats['actifs'] or 0,
-            'total_locataires': locataires_stats['total'] or 0,
-            'locataires_actifs': locataires_stats['actifs'] or 0,
-            
-            # Statistiques des contrats
-            'total_contrats': contrats_stats['total'] or 0,
-            'contrats_actifs': contrats_stats['actifs'] or 0,
-            
-            # Statistiques des paiements
-            'total_paiements': paiements_stats['total'] or 0,
-            'paiements_valides': paiements_stats['valides'] or 0,
-            'paiements_attente': paiements_stats['en_attente'] or 0,
-            
-            # Statistiques des unités locatives
-            'unites_stats': {
-                'total': unites_stats['total'] or 0,
-                'disponibles': unites_stats['disponibles'] or 0,
-                'occupees': unites_stats['occupees'] or 0,
-                'reservees': unites_stats['reservees'] or 0
-            },
-            
-            # Statistiques des groupes et notifications
-            'total_groupes': groupes_stats['total'] or 0,
-            'total_notifications': notifications_stats['total'] or 0,
-            'notifications_non_lues': notifications_stats['non_lues'] or 0,
-            
-            # Métadonnées
-            'derniere_maj': timezone.now().strftime('%d/%m/%Y %H:%M'),
-            'statut': 'dynamique'
-        }
-        
-        # Mettre en cache avec une durée plus courte
-        # from django.core.cache import cache
-        # cache.set(cache_key, cached_stats, 60)  # 1 minute seulement
-        
+        context = DashboardStatsService.get_dashboard_context()
     except Exception as e:
         # En cas d'erreur, retourner des valeurs par défaut
-        cached_stats = {
+        context = {
             'total_proprietes': 0,
             'proprietes_louees': 0,
             'proprietes_disponibles': 0,
@@ -230,108 +104,15 @@ def dashboard(request):
             'erreur': str(e)
         }
     
-    # Préparer le contexte du template
-    context = cached_stats or {}
-    print(f"DEBUG: Contexte final = {context}")
-    
     return render(request, 'core/dashboard_unified.html', context)
 
 @login_required
 def dashboard_stats_api(request):
     """API pour les statistiques dynamiques du dashboard."""
     try:
-        # Calculer les statistiques en temps réel - CORRIGÉES
-        proprietes_stats = Propriete.objects.aggregate(
-            total=Count('id')
-        )
-        
-        # Calculer les propriétés louées et disponibles
-        proprietes_louees = 0
-        proprietes_disponibles = 0
-        
-        for propriete in Propriete.objects.all():
-            contrats_actifs = Contrat.objects.filter(propriete=propriete, est_actif=True).count()
-            if contrats_actifs > 0:
-                proprietes_louees += 1
-            else:
-                proprietes_disponibles += 1
-        
-        proprietes_stats['louees'] = proprietes_louees
-        proprietes_stats['disponibles'] = proprietes_disponibles
-        
-        try:
-            unites_stats = UniteLocative.objects.aggregate(
-                total=Count('id'),
-                disponibles=Count('id', filter=Q(statut='disponible')),
-                occupees=Count('id', filter=Q(statut='occupee')),
-                reservees=Count('id', filter=Q(statut='reservee'))
-            )
-        except Exception:
-            unites_stats = {'total': 0, 'disponibles': 0, 'occupees': 0, 'reservees': 0}
-        
-        bailleurs_stats = Bailleur.objects.aggregate(
-            total=Count('id')
-        )
-        bailleurs_stats['actifs'] = bailleurs_stats['total']
-        
-        locataires_stats = Locataire.objects.aggregate(
-            total=Count('id')
-        )
-        locataires_stats['actifs'] = locataires_stats['total']
-        
-        contrats_stats = Contrat.objects.aggregate(
-            total=Count('id'),
-            actifs=Count('id', filter=Q(est_actif=True))
-        )
-        
-        paiements_stats = Paiement.objects.aggregate(
-            total=Count('id'),
-            valides=Count('id', filter=Q(statut='valide')),
-            en_attente=Count('id', filter=Q(statut='en_attente'))
-        )
-        
-        groupes_stats = Group.objects.aggregate(total=Count('id'))
-        
-        try:
-            from notifications.models import Notification
-            notifications_stats = Notification.objects.aggregate(
-                total=Count('id'),
-                non_lues=Count('id', filter=Q(lu=False))
-            )
-        except (ImportError, AttributeError):
-            notifications_stats = {'total': 0, 'non_lues': 0}
-        
-        # Calculer les propriétés disponibles avec unités
-        try:
-            proprietes_avec_unites_disponibles = Propriete.objects.filter(
-                unites_locatives__statut='disponible'
-            ).distinct().count()
-        except Exception:
-            proprietes_avec_unites_disponibles = 0
-        
-        total_disponibles = proprietes_stats['disponibles'] + proprietes_avec_unites_disponibles
-        
-        # Préparer la réponse
-        stats = {
-            'total_proprietes': proprietes_stats['total'] or 0,
-            'proprietes_louees': proprietes_stats['louees'] or 0,
-            'proprietes_disponibles': total_disponibles,
-            'total_bailleurs': bailleurs_stats['total'] or 0,
-            'bailleurs_actifs': bailleurs_stats['actifs'] or 0,
-            'total_locataires': locataires_stats['total'] or 0,
-            'locataires_actifs': locataires_stats['actifs'] or 0,
-            'total_contrats': contrats_stats['total'] or 0,
-            'contrats_actifs': contrats_stats['actifs'] or 0,
-            'total_paiements': paiements_stats['total'] or 0,
-            'paiements_valides': paiements_stats['valides'] or 0,
-            'paiements_attente': paiements_stats['en_attente'] or 0,
-            'total_groupes': groupes_stats['total'] or 0,
-            'total_notifications': notifications_stats['total'] or 0,
-            'notifications_non_lues': notifications_stats['non_lues'] or 0,
-            'derniere_maj': timezone.now().strftime('%d/%m/%Y %H:%M'),
-            'statut': 'dynamique'
-        }
-        
+        stats = DashboardStatsService.get_dashboard_context()
+        stats.pop('unites_stats', None)
+        stats.pop('proprietes_en_construction', None)
         return JsonResponse(stats)
         
     except Exception as e:
@@ -521,7 +302,7 @@ def gestion_templates(request):
             template.deleted_at = timezone.now()
             template.deleted_by = request.user
             template.save()
-            AuditLog.objects.create(
+            journaliser(
                 content_type=ContentType.objects.get_for_model(TemplateRecu),
                 object_id=template.pk,
                 action='delete',
@@ -720,36 +501,11 @@ def rapports_audit(request):
     export_format = request.GET.get('export', '')
     page_size = int(request.GET.get('page_size', 20))
     
-    # Construction du queryset de base
-    queryset = AuditLog.objects.select_related('user', 'content_type')
-    
-    # Application des filtres
-    if search_query:
-        queryset = queryset.filter(
-            Q(user__username__icontains=search_query) |
-            Q(object_repr__icontains=search_query) |
-            Q(details__icontains=search_query) |
-            Q(ip_address__icontains=search_query)
-        )
-    
-    if action_type:
-        queryset = queryset.filter(action=action_type)
-    
-    if user_filter:
-        queryset = queryset.filter(user__username=user_filter)
-    
-    if date_from:
-        queryset = queryset.filter(timestamp__date__gte=date_from)
-    
-    if date_to:
-        queryset = queryset.filter(timestamp__date__lte=date_to)
-    
-    # Tri par défaut
-    queryset = queryset.order_by('-timestamp')
+    queryset = filtrer_audit_logs(request.GET).select_related('user', 'content_type')
     
     # Export des données si demandé
     if export_format:
-        return export_audit_data(queryset, export_format)
+        return export_audit_data(request, queryset, export_format)
     
     # Pagination
     paginator = Paginator(queryset, page_size)
@@ -838,89 +594,147 @@ def rapports_audit(request):
     return render(request, 'core/rapports_audit.html', context)
 
 
-def export_audit_data(queryset, format_type):
+def filtrer_audit_logs(params):
     """
-    Export des données d'audit dans différents formats
+    Logs d'audit filtrés selon les paramètres du rapport d'audit
+    (search, action_type, user, date_from, date_to), du plus récent au plus ancien
     """
-    from django.http import HttpResponse
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, PatternFill
-    import csv
-    import io
-    
-    if format_type == 'csv':
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="audit_logs_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow(['Date/Heure', 'Utilisateur', 'Action', 'Type Objet', 'ID Objet', 'Détails', 'IP'])
-        
-        for log in queryset:
-            writer.writerow([
-                log.timestamp.strftime('%d/%m/%Y %H:%M:%S'),
-                log.user.username if log.user else 'Système',
-                log.get_action_display(),
-                log.content_type.model if log.content_type else '-',
-                log.object_id if log.object_id else '-',
-                str(log.details)[:100] if log.details else '-',
-                log.ip_address if log.ip_address else '-'
-            ])
-        
-        return response
+    search_query = params.get('search', '')
+    action_type = params.get('action_type', '')
+    user_filter = params.get('user', '')
+    date_from = params.get('date_from', '')
+    date_to = params.get('date_to', '')
     
-    elif format_type == 'excel':
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Logs d'Audit"
-        
-        # En-têtes
-        headers = ['Date/Heure', 'Utilisateur', 'Action', 'Type Objet', 'ID Objet', 'Détails', 'IP']
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col, value=header)
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-        
-        # Données
-        for row, log in enumerate(queryset, 2):
-            ws.cell(row=row, column=1, value=log.timestamp.strftime('%d/%m/%Y %H:%M:%S'))
-            ws.cell(row=row, column=2, value=log.user.username if log.user else 'Système')
-            ws.cell(row=row, column=3, value=log.get_action_display())
-            ws.cell(row=row, column=4, value=log.content_type.model if log.content_type else '-')
-            ws.cell(row=row, column=5, value=log.object_id if log.object_id else '-')
-            ws.cell(row=row, column=6, value=str(log.details)[:100] if log.details else '-')
-            ws.cell(row=row, column=7, value=log.ip_address if log.ip_address else '-')
-        
-        # Ajustement automatique des colonnes
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
-        
-        response = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    queryset = AuditLog.objects.all()
+    
+    # Application des filtres
+    if search_query:
+        queryset = queryset.filter(
+            Q(user__username__icontains=search_query) |
+            Q(object_repr__icontains=search_query) |
+            Q(details__icontains=search_query) |
+            Q(ip_address__icontains=search_query)
         )
-        response['Content-Disposition'] = f'attachment; filename="audit_logs_{timezone.now().strftime("%Y%m%d_%H%M%S")}.xlsx"'
+    
+    if action_type:
+        queryset = queryset.filter(action=action_type)
+    
+    if user_filter:
+        queryset = queryset.filter(user__username=user_filter)
+    
+    if date_from:
+        queryset = queryset.filter(timestamp__date__gte=date_from)
+    
+    if date_to:
+        queryset = queryset.filter(timestamp__date__lte=date_to)
+    
+    # Tri par défaut
+    return queryset.order_by('-timestamp')
+
+
+# Colonnes de l'export d'audit : (titre, largeur dans le classeur)
+COLONNES_EXPORT_AUDIT = [
+    ('Date/Heure', 20), ('Utilisateur', 20), ('Action', 16), ('Type Objet', 18),
+    ('ID Objet', 10), ('Détails', 50), ('IP', 16),
+]
+
+
+def lignes_export_audit(params):
+    """
+    Source d'export des logs d'audit : colonnes et lignes lues par lots,
+    sans instancier les logs
+    """
+    actions = dict(AuditLog.ACTION_CHOICES)
+    valeurs = filtrer_audit_logs(params).values_list(
+        'timestamp', 'user__username', 'action', 'content_type__model',
+        'object_id', 'details', 'ip_address'
+    ).iterator(chunk_size=2000)
+    
+    def lignes():
+        for timestamp, username, action, modele, object_id, details, ip_address in valeurs:
+            yield [
+                timezone.localtime(timestamp).strftime('%d/%m/%Y %H:%M:%S'),
+                username or 'Système',
+                actions.get(action, action),
+                modele or '-',
+                object_id if object_id else '-',
+                str(details)[:100] if details else '-',
+                ip_address or '-',
+            ]
+    
+    return COLONNES_EXPORT_AUDIT, lignes()
+
+
+def export_audit_data(request, queryset, format_type):
+    """
+    Export des données d'audit dans différents formats
+    
+    Le fichier est diffusé au fil de la lecture ; au-delà du seuil des exports
+    en arrière-plan, il est produit par une tâche et téléchargé une fois prêt.
+    """
+    from . import exports
+    
+    if format_type in exports.FORMATS:
+        params = request.GET.dict()
+        nom = exports.nom_fichier('audit_logs', format_type)
+        if queryset.count() > exports.SEUIL_ARRIERE_PLAN:
+            tache = exports.exporter_en_arriere_plan(
+                'core.main_views.lignes_export_audit', params, format_type, nom,
+                request.user, titre_feuille="Logs d'Audit"
+            )
+            lien = reverse('core:telecharger_export', args=[tache.pk])
+            messages.info(
+                request,
+                "L'export est volumineux : il est en cours de préparation. "
+                f"Téléchargez-le lorsqu'il sera prêt : {lien}"
+            )
+            params.pop('export', None)
+            return redirect(f"{request.path}?{urlencode(params)}" if params else request.path)
         
-        wb.save(response)
-        return response
+        colonnes, lignes = lignes_export_audit(params)
+        return exports.reponse_export(format_type, colonnes, lignes, nom, titre_feuille="Logs d'Audit")
     
     elif format_type == 'pdf':
         # Pour l'export PDF, on peut utiliser reportlab ou weasyprint
         # Pour l'instant, retournons un message d'erreur
-        from django.contrib import messages
         messages.error(request, "L'export PDF n'est pas encore disponible.")
         return redirect('core:rapports_audit')
     
     return redirect('core:rapports_audit')
 
 
+@login_required
+def telecharger_export(request, tache_id):
+    """
+    Téléchargement d'un export produit en arrière-plan, par l'utilisateur qui l'a demandé
+    """
+    from django.http import FileResponse, Http404
+    from django.core.files.storage import default_storage
+    from .exports import produire_fichier
+    from .models import TacheArrierePlan
+    from .taches import chemin_fonction
+    
+    tache = get_object_or_404(TacheArrierePlan, pk=tache_id, fonction=chemin_fonction(produire_fichier))
+    if tache.arguments_nommes.get('utilisateur_id') != request.user.pk:
+        raise PermissionDenied
+    
+    if tache.statut in ('en_attente', 'en_cours'):
+        messages.info(request, "L'export est encore en préparation, réessayez dans quelques instants.")
+        return redirect('core:rapports_audit')
+    if tache.statut == 'echouee':
+        messages.error(request, "La préparation de l'export a échoué.")
+        return redirect('core:rapports_audit')
+    
+    resultat = tache.resultat or {}
+    if not resultat.get('fichier') or not default_storage.exists(resultat['fichier']):
+        raise Http404("Export expiré ou introuvable")
+    return FileResponse(
+        default_storage.open(resultat['fichier'], 'rb'),
+        as_attachment=True,
+        filename=resultat.get('nom_fichier')
+    )
+
+
 @login_required
 def detection_anomalies(request):
     """
@@ -936,79 +750,48 @@ def detection_anomalies(request):
     anomalies = []
     
     # 1. Détecter les paiements en retard (mois en cours ET mois précédents)
-    from datetime import date
-    from calendar import monthrange
-    from dateutil.relativedelta import relativedelta
+    from paiements.services_retards import DetecteurRetards
     
-    paiements_retard = []
+    mois_noms = ['Janvier', 'Février', 'Mars', 'Avril', 'Mai', 'Juin',
+                 'Juillet', 'Août', 'Septembre', 'Octobre', 'Novembre', 'Décembre']
     contrats_actifs = Contrat.objects.filter(est_actif=True).select_related('locataire', 'propriete')
-    aujourd_hui = timezone.now().date()
     
-    # Déterminer les mois à vérifier
-    mois_a_verifier = []
+    # Loyers sans paiement validé dont l'échéance est dépassée
+    retards = DetecteurRetards.detecter(contrats_actifs, types=('loyer',))
+    paiements_attente = Paiement.objects.select_related('contrat__locataire').in_bulk(
+        [retard['paiement_en_attente'] for retard in retards if retard['paiement_en_attente']]
+    )
     
-    # Si on est dans les 5 premiers jours du mois, vérifier le mois précédent
-    if aujourd_hui.day <= 5:
-        if aujourd_hui.month == 1:
-            mois_precedent = 12
-            annee_precedente = aujourd_hui.year - 1
+    paiements_retard = []
+    for retard in retards:
+        contrat = retard['contrat']
+        jours_retard = retard['jours_retard']
+        mois_nom = f"{mois_noms[retard['mois'].month - 1]} {retard['mois'].year}"
+        paiement_mois = paiements_attente.get(retard['paiement_en_attente'])
+        
+        if paiement_mois:
+            # Paiement existe mais pas encore reçu
+            paiements_retard.append(paiement_mois)
+            anomalies.append({
+                'type': 'paiement_retard',
+                'severite': 'warning' if jours_retard <= 7 else 'danger',
+                'titre': f'Paiement en retard de {jours_retard} jours ({mois_nom})',
+                'description': f'Paiement en retard pour {contrat.locataire.nom}',
+                'date': retard['date_echeance'],
+                'objet': paiement_mois,
+                'url': f'/paiements/detail/{paiement_mois.id}/'
+            })
         else:
-            mois_precedent = aujourd_hui.month - 1
-            annee_precedente = aujourd_hui.year
-        mois_a_verifier.append((annee_precedente, mois_precedent))
-    
-    # Toujours vérifier le mois en cours
-    mois_a_verifier.append((aujourd_hui.year, aujourd_hui.month))
-    
-    for contrat in contrats_actifs:
-        for annee, mois in mois_a_verifier:
-            # Obtenir le dernier jour du mois
-            _, dernier_jour_mois = monthrange(annee, mois)
-            
-            # Date d'échéance = jour de paiement du contrat ou dernier jour du mois si le jour n'existe pas
-            jour_paiement = min(contrat.jour_paiement, dernier_jour_mois)
-            date_echeance = date(annee, mois, jour_paiement)
-            
-            # Vérifier si le paiement pour ce mois existe et est en retard
-            paiement_mois = Paiement.objects.filter(
-                contrat=contrat,
-                type_paiement='loyer',
-                date_paiement__year=annee,
-                date_paiement__month=mois,
-                statut='en_attente'
-            ).first()
-            
-            if paiement_mois:
-                # Paiement existe mais pas encore reçu
-                if aujourd_hui > date_echeance:
-                    jours_retard = (aujourd_hui - date_echeance).days
-                    paiements_retard.append(paiement_mois)
-                    mois_nom = ['Janvier', 'Février', 'Mars', 'Avril', 'Mai', 'Juin',
-                               'Juillet', 'Août', 'Septembre', 'Octobre', 'Novembre', 'Décembre'][mois-1]
-                    anomalies.append({
-                        'type': 'paiement_retard',
-                        'severite': 'warning' if jours_retard <= 7 else 'danger',
-                        'titre': f'Paiement en retard de {jours_retard} jours ({mois_nom} {annee})',
-                        'description': f'Paiement en retard pour {contrat.locataire.nom}',
-                        'date': date_echeance,
-                        'objet': paiement_mois,
-                        'url': f'/paiements/detail/{paiement_mois.id}/'
-                    })
-            else:
-                # Aucun paiement enregistré pour ce mois
-                if aujourd_hui > date_echeance:
-                    jours_retard = (aujourd_hui - date_echeance).days
-                    mois_nom = ['Janvier', 'Février', 'Mars', 'Avril', 'Mai', 'Juin',
-                               'Juillet', 'Août', 'Septembre', 'Octobre', 'Novembre', 'Décembre'][mois-1]
-                    anomalies.append({
-                        'type': 'paiement_manquant',
-                        'severite': 'warning' if jours_retard <= 7 else 'danger',
-                        'titre': f'Paiement manquant depuis {jours_retard} jours ({mois_nom} {annee})',
-                        'description': f'Loyer manquant pour {contrat.locataire.nom}',
-                        'date': date_echeance,
-                        'objet': contrat,
-                        'url': f'/contrats/detail/{contrat.id}/'
-                    })
+            # Aucun paiement enregistré pour ce mois
+            anomalies.append({
+                'type': 'paiement_manquant',
+                'severite': 'warning' if jours_retard <= 7 else 'danger',
+                'titre': f'Paiement manquant depuis {jours_retard} jours ({mois_nom})',
+                'description': f'Loyer manquant pour {contrat.locataire.nom}',
+                'date': retard['date_echeance'],
+                'objet': contrat,
+                'url': f'/contrats/detail/{contrat.id}/'
+            })
     
     # 2. Détecter les contrats expirant bientôt
     date_limite = timezone.now().date() + timedelta(days=30)
@@ -0,0 +1,88 @@
+"""
+Commande Django comparant l'écriture du journal d'audit événement par
+événement et l'écriture tamponnée (une insertion groupée par requête)
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.audit import journaliser, tampon_audit
+from core.models import AuditLog
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le débit du journal d'audit, écrit directement ou tamponné par requête "
+        "(événements synthétiques supprimés en fin de mesure)"
+    )
+
+    # Repère des événements synthétiques, pour les supprimer ensuite
+    MARQUEUR = 'benchmark_audit'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--evenements',
+            type=int,
+            nargs='+',
+            default=[1, 10, 100, 1000],
+            help="Nombres d'événements par requête simulée",
+        )
+        parser.add_argument(
+            '--requetes',
+            type=int,
+            default=20,
+            help='Nombre de requêtes simulées par mesure',
+        )
+
+    def handle(self, *args, **options):
+        requetes = options['requetes']
+        self.stdout.write(
+            f"{'Évén./req.':>10} | {'Direct (év/s)':>14} | {'Tampon (év/s)':>14} | "
+            f"{'Requêtes SQL':>13} | {'Gain':>7}"
+        )
+        self.stdout.write('-' * 72)
+
+        try:
+            for nombre in options['evenements']:
+                direct, sql_direct = self._mesurer(nombre, requetes, tamponne=False)
+                tampon, sql_tampon = self._mesurer(nombre, requetes, tamponne=True)
+                gain = tampon / direct if direct else float('inf')
+                sql = f"{sql_direct} → {sql_tampon}"
+                self.stdout.write(
+                    f"{nombre:>10} | {direct:>14.0f} | {tampon:>14.0f} | {sql:>13} | {gain:>6.1f}x"
+                )
+        finally:
+            supprimes, _ = AuditLog.objects.filter(description=self.MARQUEUR).delete()
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Mesure terminée, {supprimes} événement(s) synthétique(s) supprimé(s)'))
+
+    def _mesurer(self, nombre, requetes, tamponne):
+        """
+        Débit en événements par seconde et requêtes SQL par requête simulée.
+        Les écritures sont validées une à une comme dans une vraie requête,
+        hors transaction englobante.
+        """
+        debut = time.perf_counter()
+        with CaptureQueriesContext(connection) as requetes_sql:
+            for _ in range(requetes):
+                if tamponne:
+                    with tampon_audit():
+                        self._ecrire(nombre)
+                else:
+                    self._ecrire(nombre)
+        duree = time.perf_counter() - debut
+        debit = nombre * requetes / duree if duree else float('inf')
+        return debit, len(requetes_sql) // requetes
+
+    def _ecrire(self, nombre):
+        for i in range(nombre):
+            journaliser(
+                action='update',
+                object_id=i,
+                object_repr=f'Objet {i}',
+                details={'old_data': {'statut': 'en_attente'}, 'new_data': {'statut': 'valide'}},
+                description=self.MARQUEUR,
+            )
@@ -0,0 +1,107 @@
+"""
+Commande Django comparant la recherche par index unifié et le parcours
+par LIKE module par module
+"""
+
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import DocumentRecherche
+from core.search_index import SearchIndex, normaliser
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure la latence de la recherche unifiée sur un volume synthétique de documents "
+        "(insérés dans une transaction annulée en fin de mesure)"
+    )
+
+    NOMS = ['ouedraogo', 'kabore', 'sawadogo', 'traore', 'zongo', 'compaore', 'ilboudo', 'kone']
+    PRENOMS = ['aminata', 'issouf', 'mariam', 'boukary', 'salif', 'awa', 'adama', 'fatimata']
+    VILLES = ['ouagadougou', 'bobo-dioulasso', 'koudougou', 'banfora', 'ouahigouya']
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--entites',
+            type=int,
+            default=100_000,
+            help='Nombre de documents synthétiques à générer',
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=20,
+            help='Nombre de recherches mesurées par méthode',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=10,
+            help='Nombre de résultats par module',
+        )
+
+    def handle(self, *args, **options):
+        requetes = ['kabore', 'PRO-0042', 'ouaga', 'mariam zongo', 'CTR-12']
+
+        with transaction.atomic():
+            debut = time.time()
+            self._generer(options['entites'])
+            self.stdout.write(f"📦 {options['entites']} documents générés en {time.time() - debut:.1f}s")
+
+            self.stdout.write(f"{'Requête':>14} | {'Index (ms)':>11} | {'LIKE (ms)':>11} | {'Gain':>7}")
+            self.stdout.write('-' * 54)
+            for requete in requetes:
+                index = self._mesurer(lambda: SearchIndex.rechercher(requete, options['limit']), options['iterations'])
+                parcours = self._mesurer(lambda: self._parcours_like(requete, options['limit']), options['iterations'])
+                gain = parcours / index if index else float('inf')
+                self.stdout.write(f"{requete:>14} | {index:>11.2f} | {parcours:>11.2f} | {gain:>6.1f}x")
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('✅ Mesure terminée, documents synthétiques supprimés'))
+
+    def _generer(self, nombre):
+        aleatoire = random.Random(42)
+        types = [t for t, _ in DocumentRecherche.TYPE_OBJET_CHOICES]
+        prefixes = {'propriete': 'PRO', 'bailleur': 'BAI', 'locataire': 'LOC', 'contrat': 'CTR', 'paiement': 'PAI'}
+        # Identifiants hors de portée des objets réels pour ne pas entrer en conflit
+        decalage = 10 ** 12
+
+        lot = []
+        for i in range(nombre):
+            type_objet = types[i % len(types)]
+            numero = f"{prefixes[type_objet]}-{i:04d}"
+            personne = f"{aleatoire.choice(self.PRENOMS)} {aleatoire.choice(self.NOMS)}"
+            lot.append(DocumentRecherche(
+                type_objet=type_objet,
+                objet_id=decalage + i,
+                contenu=normaliser(f"{numero} {personne} {aleatoire.choice(self.VILLES)}"),
+                titre=numero,
+                url='#',
+            ))
+            if len(lot) >= 5000:
+                DocumentRecherche.objects.bulk_create(lot)
+                lot = []
+        DocumentRecherche.objects.bulk_create(lot)
+
+    @staticmethod
+    def _parcours_like(requete, limit):
+        """Équivalent de l'ancienne recherche : un LIKE par module."""
+        termes = SearchIndex._termes(requete)
+        resultats = {}
+        for type_objet in SearchIndex.MODELES:
+            queryset = DocumentRecherche.objects.filter(type_objet=type_objet)
+            for terme in termes:
+                queryset = queryset.filter(contenu__icontains=terme)
+            resultats[type_objet] = list(queryset[:limit])
+        return resultats
+
+    @staticmethod
+    def _mesurer(fonction, iterations):
+        debut = time.perf_counter()
+        for _ in range(iterations):
+            fonction()
+        return (time.perf_counter() - debut) * 1000 / iterations
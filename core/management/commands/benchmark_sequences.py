@@ -0,0 +1,85 @@
+"""
+Commande Django comparant l'allocation par compteur de séquence et l'ancien
+parcours des IDs existants
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.id_generator import IDGenerator
+from core.models import SequenceCompteur
+from proprietes.models import Bailleur
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare le coût d'attribution d'un ID par parcours des IDs existants "
+        "et par compteur de séquence, via IDGenerator sur la base configurée "
+        "(bailleurs synthétiques insérés dans une transaction annulée en fin de mesure)"
+    )
+
+    # Période fictive, sans conflit avec les numéros réels
+    ANNEE = 2099
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tailles',
+            type=int,
+            nargs='+',
+            default=[1_000, 10_000, 100_000],
+            help='Nombres de lignes existantes à simuler',
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=20,
+            help="Nombre d'attributions mesurées par méthode",
+        )
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        self.stdout.write(f"{'Lignes':>10} | {'Parcours (ms/ID)':>17} | {'Compteur (ms/ID)':>17} | {'Gain':>8}")
+        self.stdout.write('-' * 62)
+
+        for taille in options['tailles']:
+            with transaction.atomic():
+                self._preparer(taille)
+                parcours = self._mesurer(
+                    lambda: IDGenerator._scan_next_sequence('bailleur', self.ANNEE), iterations
+                )
+                compteur = self._mesurer(
+                    lambda: IDGenerator._allouer('bailleur', str(self.ANNEE), 1), iterations
+                )
+                transaction.set_rollback(True)
+
+            gain = parcours / compteur if compteur else float('inf')
+            self.stdout.write(f"{taille:>10} | {parcours:>17.3f} | {compteur:>17.3f} | {gain:>7.0f}x")
+
+        self.stdout.write(self.style.SUCCESS('✅ Mesure terminée, données synthétiques supprimées'))
+
+    def _preparer(self, taille):
+        """Bailleurs numérotés BAI-2099-XXXX et compteur initialisé sur le dernier."""
+        lot = []
+        for i in range(1, taille + 1):
+            lot.append(Bailleur(
+                numero_bailleur=f'BAI-{self.ANNEE}-{i:04d}',
+                nom=f'Benchmark {i}',
+                prenom='Sequence',
+                telephone='00000000',
+            ))
+            if len(lot) >= 5000:
+                Bailleur.objects.bulk_create(lot)
+                lot = []
+        Bailleur.objects.bulk_create(lot)
+        SequenceCompteur.objects.update_or_create(
+            type_entite='bailleur', periode=str(self.ANNEE), defaults={'dernier_numero': taille}
+        )
+
+    @staticmethod
+    def _mesurer(fonction, iterations):
+        debut = time.perf_counter()
+        for _ in range(iterations):
+            fonction()
+        return (time.perf_counter() - debut) * 1000 / iterations
@@ -0,0 +1,41 @@
+"""
+Commande Django pour reconstruire l'instantané des statistiques du tableau de bord
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.dashboard_stats import DashboardStatsService
+from core.models import StatistiqueTableauBord
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'instantané des statistiques du tableau de bord"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--section',
+            type=str,
+            action='append',
+            choices=[section for section, _ in StatistiqueTableauBord.SECTION_CHOICES],
+            help='Section à reconstruire (répétable, toutes par défaut)',
+        )
+
+    def handle(self, *args, **options):
+        debut = time.time()
+
+        if options['section']:
+            sections = options['section']
+            DashboardStatsService.rafraichir_sections(sections)
+        else:
+            sections = DashboardStatsService.reconstruire()
+
+        for ligne in StatistiqueTableauBord.objects.filter(section__in=sections):
+            self.stdout.write(f'📊 {ligne.get_section_display()}: {ligne.valeurs}')
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✅ {len(sections)} section(s) reconstruite(s) en {time.time() - debut:.2f}s'
+            )
+        )
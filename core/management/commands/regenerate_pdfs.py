@@ -2,9 +2,12 @@
 Commande Django pour régénérer tous les PDF
 """
 
-from django.core.management.base import BaseCommand
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from core.pdf_cache import PDFRegenerationService, PDFCacheManager
-from core.signals import force_regenerate_all_documents
 
 class Command(BaseCommand):
     help = 'Régénère tous les documents PDF avec la configuration actuelle'
@@ -13,7 +16,7 @@ class Command(BaseCommand):
         parser.add_argument(
             '--force',
             action='store_true',
-            help='Force la régénération même si le cache est valide',
+            help='Force la régénération même si le cache est valide (ignore --only-stale)',
         )
         parser.add_argument(
             '--type',
@@ -27,60 +30,116 @@ class Command(BaseCommand):
             action='store_true',
             help='Vide le cache avant la régénération',
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Nombre de processus de rendu en parallèle (défaut: 1)',
+        )
+        parser.add_argument(
+            '--since',
+            type=str,
+            help='Seulement les documents (ou leurs locataire, propriété, bailleur) modifiés depuis cette date (AAAA-MM-JJ ou ISO 8601)',
+        )
+        parser.add_argument(
+            '--only-stale',
+            action='store_true',
+            help='Ignore les documents déjà à jour dans le magasin (données et configuration inchangées)',
+        )
+        parser.add_argument(
+            '--taille-lot',
+            type=int,
+            default=PDFRegenerationService.TAILLE_LOT,
+            help=f'Nombre de documents par lot envoyé à un processus (défaut: {PDFRegenerationService.TAILLE_LOT})',
+        )
+
+    def _parse_since(self, valeur):
+        if not valeur:
+            return None
+        since = parse_datetime(valeur)
+        if since is None:
+            jour = parse_date(valeur)
+            if jour is None:
+                raise CommandError(f'Date invalide pour --since: {valeur}')
+            since = datetime.combine(jour, datetime.min.time())
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
+
+    def _progression(self, libelle):
+        def afficher(traites, total, ecoule):
+            debit = traites / ecoule if ecoule else 0
+            self.stdout.write(f'⏳ {libelle}: {traites}/{total} documents ({debit:.1f} docs/s)')
+        return afficher
+
+    def _afficher_resultat(self, libelle, resultat, verbosity):
+        self.stdout.write(
+            f'📄 {libelle}: {resultat["regenerated_count"]}/{resultat["total_count"]} régénérés, '
+            f'{resultat.get("skipped_count", 0)} à jour ignorés '
+            f'en {resultat.get("duration", 0):.1f}s ({resultat.get("throughput", 0):.1f} docs/s)'
+        )
+
+        timings = sorted(resultat.get('timings', []), key=lambda t: t[1])
+        if timings:
+            durees = [duree for _, duree in timings]
+            p95 = durees[min(len(durees) - 1, int(len(durees) * 0.95))]
+            self.stdout.write(
+                f'   ⏱️ Par document: moyenne {sum(durees) / len(durees) * 1000:.0f} ms, '
+                f'p95 {p95 * 1000:.0f} ms, max {durees[-1] * 1000:.0f} ms'
+            )
+            lents = timings if verbosity >= 2 else timings[-5:]
+            for document_id, duree in reversed(lents):
+                self.stdout.write(f'   • #{document_id}: {duree * 1000:.0f} ms')
+
+        for error in resultat.get('errors', []):
+            self.stdout.write(
+                self.style.WARNING(f'⚠️ {error}')
+            )
 
     def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers doit être supérieur ou égal à 1')
+
         self.stdout.write(
             self.style.SUCCESS('🚀 Démarrage de la régénération des PDF...')
         )
-        
+
         # Vider le cache si demandé
         if options['clear_cache']:
             self.stdout.write('🗑️ Vidage du cache...')
             PDFCacheManager.invalidate_all_pdf_cache()
-        
-        # Régénérer selon le type demandé
-        if options['type'] == 'all':
-            result = PDFRegenerationService.regenerate_all_documents()
-        elif options['type'] == 'contrat':
-            result = PDFRegenerationService.regenerate_all_contracts()
-        elif options['type'] == 'resiliation':
-            result = PDFRegenerationService.regenerate_all_resiliations()
-        
-        # Afficher les résultats
-        if result['success']:
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f'✅ Régénération terminée: {result.get("total_regenerated", 0)} documents mis à jour'
-                )
+
+        types = ['contrat', 'resiliation'] if options['type'] == 'all' else [options['type']]
+        regeneration = {
+            'since': self._parse_since(options['since']),
+            'only_stale': options['only_stale'] and not options['force'],
+            'workers': options['workers'],
+            'taille_lot': options['taille_lot'],
+        }
+
+        total_regenerated = 0
+        total_errors = 0
+        for document_type in types:
+            libelle = PDFRegenerationService.DOCUMENTS[document_type]['libelle']
+            result = PDFRegenerationService.regenerer(
+                document_type, progression=self._progression(libelle), **regeneration
             )
-            
-            # Afficher les détails par type
-            if 'contracts' in result:
-                contracts = result['contracts']
-                self.stdout.write(
-                    f'📄 Contrats: {contracts["regenerated_count"]}/{contracts["total_count"]} régénérés'
-                )
-                if contracts.get('errors'):
-                    for error in contracts['errors']:
-                        self.stdout.write(
-                            self.style.WARNING(f'⚠️ {error}')
-                        )
-            
-            if 'resiliations' in result:
-                resiliations = result['resiliations']
+            if not result['success']:
                 self.stdout.write(
-                    f'📄 Résiliations: {resiliations["regenerated_count"]}/{resiliations["total_count"]} régénérés'
+                    self.style.ERROR(f'❌ Erreur lors de la régénération: {result.get("error", "Erreur inconnue")}')
                 )
-                if resiliations.get('errors'):
-                    for error in resiliations['errors']:
-                        self.stdout.write(
-                            self.style.WARNING(f'⚠️ {error}')
-                        )
-        else:
-            self.stdout.write(
-                self.style.ERROR(f'❌ Erreur lors de la régénération: {result.get("error", "Erreur inconnue")}')
+            self._afficher_resultat(libelle, result, options['verbosity'])
+            total_regenerated += result['regenerated_count']
+            total_errors += len(result['errors'])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✅ Régénération terminée: {total_regenerated} documents mis à jour'
             )
-        
+        )
+        if total_errors:
+            self.stdout.write(self.style.WARNING(f'⚠️ {total_errors} erreurs rencontrées'))
+
         # Afficher les statistiques du cache
         cache_stats = PDFCacheManager.get_cache_stats()
         self.stdout.write(f'📊 Hash de configuration actuel: {cache_stats["current_config_hash"]}')
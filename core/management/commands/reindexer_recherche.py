@@ -0,0 +1,42 @@
+"""
+Commande Django pour reconstruire l'index de recherche unifié
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.search_index import SearchIndex
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index de recherche unifié (propriétés, bailleurs, locataires, contrats, paiements)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--type',
+            type=str,
+            action='append',
+            choices=list(SearchIndex.MODELES),
+            help="Type d'objet à réindexer (répétable, tous par défaut)",
+        )
+        parser.add_argument(
+            '--taille-lot',
+            type=int,
+            default=SearchIndex.TAILLE_LOT,
+            help='Nombre de documents écrits par lot',
+        )
+
+    def handle(self, *args, **options):
+        debut = time.time()
+        SearchIndex.TAILLE_LOT = options['taille_lot']
+
+        resultats = SearchIndex.reconstruire(options['type'])
+        for type_objet, nombre in resultats.items():
+            self.stdout.write(f'🔎 {type_objet}: {nombre} document(s) indexé(s)')
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✅ {sum(resultats.values())} document(s) indexé(s) en {time.time() - debut:.2f}s'
+            )
+        )
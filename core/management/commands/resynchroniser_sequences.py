@@ -0,0 +1,40 @@
+"""
+Commande Django pour recaler les compteurs de séquence sur les IDs existants
+"""
+
+from django.core.management.base import BaseCommand
+
+from core.id_generator import IDGenerator
+from core.models import SequenceCompteur
+
+
+class Command(BaseCommand):
+    help = 'Recale les compteurs de séquence des IDs sur la plus haute séquence existante'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--type',
+            type=str,
+            choices=list(IDGenerator.ID_FORMATS),
+            help="Type d'entité à recaler (tous les compteurs existants par défaut)",
+        )
+        parser.add_argument(
+            '--periode',
+            type=str,
+            help='Période à recaler (AAAA ou AAAAMM)',
+        )
+
+    def handle(self, *args, **options):
+        if options['type'] and options['periode']:
+            cibles = [(options['type'], options['periode'])]
+        else:
+            compteurs = SequenceCompteur.objects.filter(type_entite__in=list(IDGenerator.ID_FORMATS))
+            if options['type']:
+                compteurs = compteurs.filter(type_entite=options['type'])
+            cibles = list(compteurs.values_list('type_entite', 'periode'))
+
+        for type_entite, periode in cibles:
+            maximum = IDGenerator.resynchroniser_compteur(type_entite, periode)
+            self.stdout.write(f'🔢 {type_entite} {periode} : {maximum}')
+
+        self.stdout.write(self.style.SUCCESS(f'✅ {len(cibles)} compteur(s) recalé(s)'))
@@ -0,0 +1,101 @@
+"""
+Commande Django pour exécuter les tâches d'arrière-plan de la file en base.
+"""
+import multiprocessing
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.models import TacheArrierePlan
+from core.taches import TravailleurTaches
+
+
+def _processus_travailleur(numero, intervalle, vider):
+    travailleur = TravailleurTaches()
+    travailleur.nom = f"{travailleur.nom}#{numero}"
+
+    def arreter(*args):
+        travailleur.arret_demande = True
+
+    signal.signal(signal.SIGTERM, arreter)
+    signal.signal(signal.SIGINT, arreter)
+    travailleur.boucler(intervalle=intervalle, vider=vider)
+
+
+class Command(BaseCommand):
+    help = "Exécute les tâches d'arrière-plan (TacheArrierePlan) avec un ou plusieurs processus"
+
+    # Fréquence de récupération des tâches abandonnées par un processus tué
+    INTERVALLE_RECUPERATION = 60
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processus',
+            type=int,
+            default=1,
+            help='Nombre de processus travailleurs (1 par défaut)',
+        )
+        parser.add_argument(
+            '--intervalle',
+            type=float,
+            default=2.0,
+            help="Attente en secondes quand la file est vide (2 par défaut)",
+        )
+        parser.add_argument(
+            '--vider',
+            action='store_true',
+            help="S'arrêter dès que la file est vide",
+        )
+
+    def handle(self, *args, **options):
+        nombre = max(1, options['processus'])
+        recuperees = TravailleurTaches.recuperer_abandonnees()
+        if recuperees:
+            self.stdout.write(self.style.WARNING(f'⚠️ {recuperees} tâche(s) abandonnée(s) récupérée(s)'))
+
+        en_attente = TacheArrierePlan.objects.filter(statut='en_attente').count()
+        self.stdout.write(
+            self.style.SUCCESS(f'🚀 {nombre} travailleur(s) démarré(s), {en_attente} tâche(s) en attente')
+        )
+
+        debut = time.monotonic()
+        if nombre == 1:
+            travailleur = TravailleurTaches()
+            try:
+                traitees = travailleur.boucler(intervalle=options['intervalle'], vider=options['vider'])
+            except KeyboardInterrupt:
+                traitees = None
+        else:
+            traitees = self._lancer_processus(nombre, options['intervalle'], options['vider'])
+
+        bilan = f'{traitees} tâche(s) traitée(s) ' if traitees is not None else ''
+        self.stdout.write(self.style.SUCCESS(f'✅ Arrêt: {bilan}en {time.monotonic() - debut:.1f}s'))
+
+    def _lancer_processus(self, nombre, intervalle, vider):
+        # Les connexions ne doivent pas être partagées avec les processus enfants
+        connections.close_all()
+        contexte = multiprocessing.get_context('fork')
+        processus = [
+            contexte.Process(target=_processus_travailleur, args=(i, intervalle, vider), daemon=False)
+            for i in range(1, nombre + 1)
+        ]
+        for p in processus:
+            p.start()
+
+        derniere_recuperation = time.monotonic()
+        try:
+            while any(p.is_alive() for p in processus):
+                for p in processus:
+                    p.join(timeout=1)
+                if time.monotonic() - derniere_recuperation > self.INTERVALLE_RECUPERATION:
+                    TravailleurTaches.recuperer_abandonnees()
+                    derniere_recuperation = time.monotonic()
+        except KeyboardInterrupt:
+            self.stdout.write('⏹️ Arrêt demandé, fin des tâches en cours...')
+            for p in processus:
+                p.terminate()
+            for p in processus:
+                p.join()
+        return None
@@ -4,8 +4,10 @@ Middleware package for the core application
 
 from .document_verification_middleware import DocumentVerificationMiddleware, DocumentVerificationFormMixin
 from .data_verification_middleware import DataVerificationMiddleware
+from .audit_middleware import AuditTamponMiddleware
 
 __all__ = [
+    'AuditTamponMiddleware',
     'DataVerificationMiddleware',
     'DocumentVerificationMiddleware', 
     'DocumentVerificationFormMixin'
@@ -0,0 +1,21 @@
+"""
+Middleware du journal d'audit tamponné
+Regroupe les écritures d'audit d'une requête en une seule insertion
+"""
+
+from core.audit import tampon_audit
+
+
+class AuditTamponMiddleware:
+    """
+    Tamponne les événements d'audit de la requête (core.audit.journaliser)
+    et les écrit en une seule insertion groupée quand la réponse est prête,
+    y compris si la vue lève une exception.
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with tampon_audit():
+            return self.get_response(request)
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.24 on 2026-10-17 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_auto_20251005_2002'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatistiqueTableauBord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('section', models.CharField(choices=[('proprietes', 'Propriétés'), ('unites', 'Unités locatives'), ('bailleurs', 'Bailleurs'), ('locataires', 'Locataires'), ('contrats', 'Contrats'), ('paiements', 'Paiements'), ('groupes', 'Groupes'), ('notifications', 'Notifications')], max_length=30, unique=True, verbose_name='Section')),
+                ('valeurs', models.JSONField(default=dict, help_text='Compteurs agrégés de la section', verbose_name='Valeurs')),
+                ('date_mise_a_jour', models.DateTimeField(auto_now=True, verbose_name='Dernière mise à jour')),
+            ],
+            options={
+                'verbose_name': 'Statistique du tableau de bord',
+                'verbose_name_plural': 'Statistiques du tableau de bord',
+                'ordering': ['section'],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.24 on 2026-10-17 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_statistiquetableaubord'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SequenceCompteur',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type_entite', models.CharField(max_length=50, verbose_name="Type d'entité")),
+                ('periode', models.CharField(help_text='Année (AAAA), mois (AAAAMM) ou jour (AAAAMMJJ) de la séquence', max_length=10, verbose_name='Période')),
+                ('dernier_numero', models.PositiveIntegerField(default=0, verbose_name='Dernier numéro attribué')),
+                ('date_modification', models.DateTimeField(auto_now=True, verbose_name='Date de modification')),
+            ],
+            options={
+                'verbose_name': 'Compteur de séquence',
+                'verbose_name_plural': 'Compteurs de séquence',
+                'ordering': ['type_entite', '-periode'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='sequencecompteur',
+            constraint=models.UniqueConstraint(fields=('type_entite', 'periode'), name='unique_sequence_type_periode'),
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 4.2.24 on 2026-10-17 11:00
+
+from django.db import migrations, models
+
+
+POSTGRESQL_CREATE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS core_docrech_contenu_trgm ON core_documentrecherche USING gin (contenu gin_trgm_ops)",
+]
+POSTGRESQL_DROP = [
+    "DROP INDEX IF EXISTS core_docrech_contenu_trgm",
+]
+
+# Table FTS5 à contenu externe, synchronisée par triggers avec core_documentrecherche.
+# Le type d'objet est indexé pour borner la recherche module par module.
+SQLITE_CREATE = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS core_documentrecherche_fts USING fts5(
+        contenu, type_objet, content='core_documentrecherche', content_rowid='id',
+        tokenize="unicode61 remove_diacritics 2"
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS core_docrech_ai AFTER INSERT ON core_documentrecherche BEGIN
+        INSERT INTO core_documentrecherche_fts(rowid, contenu, type_objet) VALUES (new.id, new.contenu, new.type_objet);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS core_docrech_ad AFTER DELETE ON core_documentrecherche BEGIN
+        INSERT INTO core_documentrecherche_fts(core_documentrecherche_fts, rowid, contenu, type_objet) VALUES ('delete', old.id, old.contenu, old.type_objet);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS core_docrech_au AFTER UPDATE ON core_documentrecherche BEGIN
+        INSERT INTO core_documentrecherche_fts(core_documentrecherche_fts, rowid, contenu, type_objet) VALUES ('delete', old.id, old.contenu, old.type_objet);
+        INSERT INTO core_documentrecherche_fts(rowid, contenu, type_objet) VALUES (new.id, new.contenu, new.type_objet);
+    END""",
+]
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS core_docrech_au",
+    "DROP TRIGGER IF EXISTS core_docrech_ad",
+    "DROP TRIGGER IF EXISTS core_docrech_ai",
+    "DROP TABLE IF EXISTS core_documentrecherche_fts",
+]
+
+
+def creer_index_texte(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {'postgresql': POSTGRESQL_CREATE, 'sqlite': SQLITE_CREATE}.get(vendor, [])
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def supprimer_index_texte(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {'postgresql': POSTGRESQL_DROP, 'sqlite': SQLITE_DROP}.get(vendor, [])
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_sequencecompteur'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentRecherche',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type_objet', models.CharField(choices=[('propriete', 'Propriété'), ('bailleur', 'Bailleur'), ('locataire', 'Locataire'), ('contrat', 'Contrat'), ('paiement', 'Paiement')], max_length=20, verbose_name="Type d'objet")),
+                ('objet_id', models.PositiveBigIntegerField(verbose_name="ID de l'objet")),
+                ('contenu', models.TextField(verbose_name='Contenu indexé')),
+                ('titre', models.CharField(max_length=255, verbose_name='Titre')),
+                ('sous_titre', models.CharField(blank=True, max_length=255, verbose_name='Sous-titre')),
+                ('url', models.CharField(max_length=255, verbose_name='URL')),
+                ('icone', models.CharField(blank=True, max_length=50, verbose_name='Icône')),
+                ('badge', models.CharField(blank=True, max_length=100, verbose_name='Badge')),
+                ('donnees', models.JSONField(blank=True, default=dict, verbose_name='Données complémentaires')),
+                ('date_mise_a_jour', models.DateTimeField(auto_now=True, verbose_name='Dernière mise à jour')),
+            ],
+            options={
+                'verbose_name': 'Document de recherche',
+                'verbose_name_plural': 'Documents de recherche',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='documentrecherche',
+            constraint=models.UniqueConstraint(fields=('type_objet', 'objet_id'), name='unique_document_recherche'),
+        ),
+        migrations.RunPython(creer_index_texte, supprimer_index_texte),
+    ]
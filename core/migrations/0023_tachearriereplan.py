@@ -0,0 +1,44 @@
+# Generated by Django 4.2.24 on 2026-10-17 23:00
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_documentrecherche'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TacheArrierePlan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fonction', models.CharField(max_length=255, verbose_name='Fonction')),
+                ('arguments', models.JSONField(blank=True, default=list, verbose_name='Arguments positionnels')),
+                ('arguments_nommes', models.JSONField(blank=True, default=dict, verbose_name='Arguments nommés')),
+                ('cle_unicite', models.CharField(blank=True, max_length=255, null=True, verbose_name='Clé de déduplication')),
+                ('priorite', models.IntegerField(default=0, help_text='Les plus grandes d\'abord', verbose_name='Priorité')),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('terminee', 'Terminée'), ('echouee', 'Échouée')], default='en_attente', max_length=20, verbose_name='Statut')),
+                ('tentatives', models.PositiveIntegerField(default=0, verbose_name='Tentatives')),
+                ('max_tentatives', models.PositiveIntegerField(default=3, verbose_name='Tentatives maximum')),
+                ('executer_apres', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Exécuter après')),
+                ('travailleur', models.CharField(blank=True, max_length=100, verbose_name='Travailleur')),
+                ('resultat', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='Résultat')),
+                ('derniere_erreur', models.TextField(blank=True, verbose_name='Dernière erreur')),
+                ('date_creation', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('date_debut', models.DateTimeField(blank=True, null=True, verbose_name="Début d'exécution")),
+                ('date_fin', models.DateTimeField(blank=True, null=True, verbose_name="Fin d'exécution")),
+                ('duree', models.FloatField(blank=True, null=True, verbose_name='Durée (s)')),
+            ],
+            options={
+                'verbose_name': "Tâche d'arrière-plan",
+                'verbose_name_plural': "Tâches d'arrière-plan",
+                'ordering': ['-date_creation'],
+                'indexes': [models.Index(fields=['statut', '-priorite', 'executer_apres'], name='core_tache_file_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('statut__in', ['en_attente', 'en_cours'])), fields=('cle_unicite',), name='unique_tache_active_par_cle')],
+            },
+        ),
+    ]
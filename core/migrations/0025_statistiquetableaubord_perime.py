@@ -0,0 +1,18 @@
+# Generated by Django 4.2.24 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_auditlog_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='statistiquetableaubord',
+            name='perime',
+            field=models.BooleanField(default=False, help_text='Une donnée source a changé depuis le dernier calcul', verbose_name='À recalculer'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.24 on 2026-10-18 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_statistiquetableaubord_perime'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompteurPartage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cle', models.CharField(max_length=100, unique=True, verbose_name='Clé')),
+                ('valeur', models.BigIntegerField(default=0, verbose_name='Valeur')),
+                ('date_modification', models.DateTimeField(auto_now=True, verbose_name='Date de modification')),
+            ],
+            options={
+                'verbose_name': 'Compteur partagé',
+                'verbose_name_plural': 'Compteurs partagés',
+                'ordering': ['cle'],
+            },
+        ),
+    ]
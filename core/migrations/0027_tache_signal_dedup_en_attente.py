@@ -0,0 +1,26 @@
+# Generated by Django 4.2.24 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_compteurpartage'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='tachearriereplan',
+            name='unique_tache_active_par_cle',
+        ),
+        migrations.AddField(
+            model_name='tachearriereplan',
+            name='date_signal',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Dernier signe de vie'),
+        ),
+        migrations.AddConstraint(
+            model_name='tachearriereplan',
+            constraint=models.UniqueConstraint(condition=models.Q(('statut', 'en_attente')), fields=('cle_unicite',), name='unique_tache_en_attente_par_cle'),
+        ),
+    ]
@@ -5,6 +5,7 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.utils import timezone
+from django.core.serializers.json import DjangoJSONEncoder
 
 
 class NiveauAcces(models.Model):
@@ -352,9 +353,10 @@ class AuditLog(models.Model):
         verbose_name=_("User Agent")
     )
     
-    # Horodatage
+    # Horodatage (heure de l'action, pas celle de l'écriture différée par core.audit)
     timestamp = models.DateTimeField(
-        auto_now_add=True,
+        default=timezone.now,
+        editable=False,
         verbose_name=_("Horodatage")
     )
     
@@ -515,6 +517,18 @@ class ConfigurationEntreprise(models.Model):
     def __str__(self):
         return f"{self.nom_entreprise} ({self.ville})"
     
+    @classmethod
+    def get_version(cls):
+        """
+        Version persistée des configurations (nombre de lignes, dernière
+        modification) : une requête légère, identique pour tous les workers,
+        qui change à chaque enregistrement, création ou suppression.
+        """
+        version = cls.objects.order_by().aggregate(
+            nombre=models.Count('pk'), modification=models.Max('date_modification')
+        )
+        return version['nombre'], version['modification']
+    
     @classmethod
     def get_configuration_active(cls):
         """Retourne la configuration active de l'entreprise."""
@@ -706,4 +720,203 @@ class HistoriqueGeneration(models.Model):
     
     def __str__(self):
         status = "✓" if self.succes else "✗"
-        return f"{status} {self.nom_fichier} - {self.date_generation.strftime('%d/%m/%Y %H:%M')}"
\ No newline at end of file
+        return f"{status} {self.nom_fichier} - {self.date_generation.strftime('%d/%m/%Y %H:%M')}"
+
+class StatistiqueTableauBord(models.Model):
+    """Instantané persistant des statistiques du tableau de bord, une ligne par section."""
+    
+    SECTION_CHOICES = [
+        ('proprietes', 'Propriétés'),
+        ('unites', 'Unités locatives'),
+        ('bailleurs', 'Bailleurs'),
+        ('locataires', 'Locataires'),
+        ('contrats', 'Contrats'),
+        ('paiements', 'Paiements'),
+        ('groupes', 'Groupes'),
+        ('notifications', 'Notifications'),
+    ]
+    
+    section = models.CharField(
+        max_length=30,
+        choices=SECTION_CHOICES,
+        unique=True,
+        verbose_name=_("Section")
+    )
+    valeurs = models.JSONField(
+        default=dict,
+        verbose_name=_("Valeurs"),
+        help_text=_("Compteurs agrégés de la section")
+    )
+    date_mise_a_jour = models.DateTimeField(
+        auto_now=True,
+        verbose_name=_("Dernière mise à jour")
+    )
+    perime = models.BooleanField(
+        default=False,
+        verbose_name=_("À recalculer"),
+        help_text=_("Une donnée source a changé depuis le dernier calcul")
+    )
+    
+    class Meta:
+        verbose_name = _("Statistique du tableau de bord")
+        verbose_name_plural = _("Statistiques du tableau de bord")
+        ordering = ['section']
+    
+    def __str__(self):
+        return f"{self.get_section_display()} - {self.date_mise_a_jour}"
+
+
+class SequenceCompteur(models.Model):
+    """Compteur de séquence des identifiants métier, une ligne par type d'entité et période."""
+    
+    type_entite = models.CharField(
+        max_length=50,
+        verbose_name=_("Type d'entité")
+    )
+    periode = models.CharField(
+        max_length=10,
+        verbose_name=_("Période"),
+        help_text=_("Année (AAAA), mois (AAAAMM) ou jour (AAAAMMJJ) de la séquence")
+    )
+    dernier_numero = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Dernier numéro attribué")
+    )
+    date_modification = models.DateTimeField(
+        auto_now=True,
+        verbose_name=_("Date de modification")
+    )
+    
+    class Meta:
+        verbose_name = _("Compteur de séquence")
+        verbose_name_plural = _("Compteurs de séquence")
+        ordering = ['type_entite', '-periode']
+        constraints = [
+            models.UniqueConstraint(fields=['type_entite', 'periode'], name='unique_sequence_type_periode'),
+        ]
+    
+    def __str__(self):
+        return f"{self.type_entite} {self.periode} : {self.dernier_numero}"
+
+
+class CompteurPartage(models.Model):
+    """Compteur nommé partagé par tous les workers (versions de caches, statistiques)."""
+    
+    cle = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name=_("Clé")
+    )
+    valeur = models.BigIntegerField(
+        default=0,
+        verbose_name=_("Valeur")
+    )
+    date_modification = models.DateTimeField(
+        auto_now=True,
+        verbose_name=_("Date de modification")
+    )
+    
+    class Meta:
+        verbose_name = _("Compteur partagé")
+        verbose_name_plural = _("Compteurs partagés")
+        ordering = ['cle']
+    
+    def __str__(self):
+        return f"{self.cle} : {self.valeur}"
+
+
+class DocumentRecherche(models.Model):
+    """Document dénormalisé de la recherche unifiée, maintenu par signaux."""
+    
+    TYPE_OBJET_CHOICES = [
+        ('propriete', 'Propriété'),
+        ('bailleur', 'Bailleur'),
+        ('locataire', 'Locataire'),
+        ('contrat', 'Contrat'),
+        ('paiement', 'Paiement'),
+    ]
+    
+    type_objet = models.CharField(
+        max_length=20,
+        choices=TYPE_OBJET_CHOICES,
+        verbose_name=_("Type d'objet")
+    )
+    objet_id = models.PositiveBigIntegerField(verbose_name=_("ID de l'objet"))
+    
+    # Texte normalisé (minuscules, sans accents) sur lequel porte la recherche
+    contenu = models.TextField(verbose_name=_("Contenu indexé"))
+    
+    # Rendu du résultat, calculé à l'indexation
+    titre = models.CharField(max_length=255, verbose_name=_("Titre"))
+    sous_titre = models.CharField(max_length=255, blank=True, verbose_name=_("Sous-titre"))
+    url = models.CharField(max_length=255, verbose_name=_("URL"))
+    icone = models.CharField(max_length=50, blank=True, verbose_name=_("Icône"))
+    badge = models.CharField(max_length=100, blank=True, verbose_name=_("Badge"))
+    donnees = models.JSONField(default=dict, blank=True, verbose_name=_("Données complémentaires"))
+    
+    date_mise_a_jour = models.DateTimeField(auto_now=True, verbose_name=_("Dernière mise à jour"))
+    
+    class Meta:
+        verbose_name = _("Document de recherche")
+        verbose_name_plural = _("Documents de recherche")
+        constraints = [
+            models.UniqueConstraint(fields=['type_objet', 'objet_id'], name='unique_document_recherche'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_type_objet_display()} #{self.objet_id} - {self.titre}"
+
+
+class TacheArrierePlan(models.Model):
+    """Tâche de fond persistée en base, exécutée par la commande run_workers."""
+    
+    STATUT_CHOICES = [
+        ('en_attente', 'En attente'),
+        ('en_cours', 'En cours'),
+        ('terminee', 'Terminée'),
+        ('echouee', 'Échouée'),
+    ]
+    
+    # Chemin pointé de la fonction à appeler (module.fonction ou module.Classe.methode)
+    fonction = models.CharField(max_length=255, verbose_name=_("Fonction"))
+    arguments = models.JSONField(default=list, blank=True, verbose_name=_("Arguments positionnels"))
+    arguments_nommes = models.JSONField(default=dict, blank=True, verbose_name=_("Arguments nommés"))
+    
+    # Une seule tâche en attente par clé de déduplication (une nouvelle peut
+    # être planifiée pendant qu'une tâche de même clé s'exécute)
+    cle_unicite = models.CharField(max_length=255, null=True, blank=True, verbose_name=_("Clé de déduplication"))
+    priorite = models.IntegerField(default=0, verbose_name=_("Priorité"), help_text=_("Les plus grandes d'abord"))
+    
+    statut = models.CharField(max_length=20, choices=STATUT_CHOICES, default='en_attente', verbose_name=_("Statut"))
+    tentatives = models.PositiveIntegerField(default=0, verbose_name=_("Tentatives"))
+    max_tentatives = models.PositiveIntegerField(default=3, verbose_name=_("Tentatives maximum"))
+    executer_apres = models.DateTimeField(default=timezone.now, verbose_name=_("Exécuter après"))
+    
+    travailleur = models.CharField(max_length=100, blank=True, verbose_name=_("Travailleur"))
+    resultat = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder, verbose_name=_("Résultat"))
+    derniere_erreur = models.TextField(blank=True, verbose_name=_("Dernière erreur"))
+    
+    date_creation = models.DateTimeField(auto_now_add=True, verbose_name=_("Date de création"))
+    date_debut = models.DateTimeField(null=True, blank=True, verbose_name=_("Début d'exécution"))
+    date_fin = models.DateTimeField(null=True, blank=True, verbose_name=_("Fin d'exécution"))
+    # Mis à jour périodiquement par le travailleur pendant l'exécution
+    date_signal = models.DateTimeField(null=True, blank=True, verbose_name=_("Dernier signe de vie"))
+    duree = models.FloatField(null=True, blank=True, verbose_name=_("Durée (s)"))
+    
+    class Meta:
+        verbose_name = _("Tâche d'arrière-plan")
+        verbose_name_plural = _("Tâches d'arrière-plan")
+        ordering = ['-date_creation']
+        indexes = [
+            models.Index(fields=['statut', '-priorite', 'executer_apres'], name='core_tache_file_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['cle_unicite'],
+                condition=models.Q(statut='en_attente'),
+                name='unique_tache_en_attente_par_cle',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.fonction} ({self.get_statut_display()})"
@@ -5,7 +5,6 @@ API Views pour la navigation dynamique et la recherche intelligente
 from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_http_methods
-from django.views.decorators.cache import cache_page
 from django.core.cache import cache
 import json
 
@@ -39,7 +38,6 @@ def get_navigation_context(request):
 
 @login_required
 @require_http_methods(["GET"])
-@cache_page(60 * 5)  # Cache de 5 minutes
 def smart_search_api(request):
     """
     API pour la recherche intelligente
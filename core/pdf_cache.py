@@ -4,236 +4,465 @@ Système de cache intelligent pour les PDF avec mise à jour automatique
 
 import os
 import json
+import shutil
 import hashlib
-from datetime import datetime
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from django.conf import settings
-from django.core.cache import cache
-from django.utils import timezone
+from django.db import connections
+from django.db.models import Q
+from django.http import FileResponse, HttpResponse
 
 class PDFCacheManager:
-    """Gestionnaire de cache pour les PDF avec détection des modifications"""
+    """
+    Magasin disque des PDF générés, adressé par contenu.
+
+    Un PDF est rangé sous <type>/<id>/<empreinte>.pdf, l'empreinte couvrant la
+    version des données du document et celle de la configuration de
+    l'entreprise : toute modification produit une nouvelle adresse, l'ancienne
+    n'est plus jamais lue. Les fichiers sont partagés par tous les workers,
+    servis en flux (FileResponse) et la taille totale est plafonnée en
+    supprimant les moins récemment utilisés.
+
+    Le hash de configuration est mémorisé par processus et revalidé contre la
+    version persistée de ConfigurationEntreprise, commune à tous les workers.
+    """
     
     CACHE_PREFIX = "pdf_cache_"
-    CACHE_TIMEOUT = 60 * 60 * 24  # 24 heures
-    CONFIG_HASH_KEY = "config_hash"
+    # Part de la taille maximale écrite par un processus entre deux contrôles
+    # de la limite (parcours complet du magasin)
+    FRACTION_CONTROLE = 0.05
+    
+    _verrou = threading.Lock()
+    _config_memo = (None, None)  # (version de la configuration, hash)
+    _octets_ecrits = 0
+    
+    # Champs sans effet sur le rendu (suivi d'impression, horodatage automatique)
+    CHAMPS_HORS_VERSION = {'imprime', 'date_impression', 'imprime_par_id', 'date_modification'}
+    
+    @classmethod
+    def get_store_dir(cls):
+        return str(getattr(settings, 'PDF_STORE_DIR', os.path.join(settings.BASE_DIR, 'pdf_store')))
+    
+    @classmethod
+    def get_max_size(cls):
+        return getattr(settings, 'PDF_STORE_MAX_SIZE', 500 * 1024 * 1024)
+    
+    @classmethod
+    def _calculer_config_hash(cls):
+        from core.models import ConfigurationEntreprise
+        
+        config = ConfigurationEntreprise.get_configuration_active()
+        if not config:
+            return "no_config"
+        
+        # Créer un hash basé sur les champs importants
+        config_data = {
+            field.attname: str(getattr(config, field.attname))
+            for field in config._meta.concrete_fields
+        }
+        
+        # Créer un hash stable
+        config_str = json.dumps(config_data, sort_keys=True)
+        return hashlib.md5(config_str.encode()).hexdigest()
     
     @classmethod
     def get_config_hash(cls):
-        """Génère un hash de la configuration actuelle de l'entreprise"""
+        """
+        Hash de la configuration actuelle de l'entreprise, mémorisé par le
+        processus tant que la version en base de ConfigurationEntreprise
+        (modifiée par n'importe quel worker) reste la même
+        """
         from core.models import ConfigurationEntreprise
         
         try:
-            config = ConfigurationEntreprise.get_configuration_active()
-            if not config:
-                return "no_config"
-            
-            # Créer un hash basé sur les champs importants
-            config_data = {
-                'nom_entreprise': config.nom_entreprise,
-                'adresse': config.adresse,
-                'ville': config.ville,
-                'pays': config.pays,
-                'code_postal': config.code_postal,
-                'telephone': config.telephone,
-                'email': config.email,
-                'site_web': getattr(config, 'site_web', ''),
-                'rccm': getattr(config, 'rccm', ''),
-                'ifu': getattr(config, 'ifu', ''),
-                'logo': str(config.logo) if hasattr(config, 'logo') and config.logo else '',
-                'entete_personnalise': str(config.entete_personnalise) if hasattr(config, 'entete_personnalise') and config.entete_personnalise else '',
-                'pied_page_personnalise': str(config.pied_page_personnalise) if hasattr(config, 'pied_page_personnalise') and config.pied_page_personnalise else '',
-                'date_modification': config.date_modification.isoformat() if hasattr(config, 'date_modification') else '',
-            }
-            
-            # Créer un hash stable
-            config_str = json.dumps(config_data, sort_keys=True)
-            return hashlib.md5(config_str.encode()).hexdigest()
-            
+            # Version lue avant le calcul : une modification concurrente
+            # provoque au pire un recalcul de plus
+            version = ConfigurationEntreprise.get_version()
+            version_memo, config_hash = cls._config_memo
+            if config_hash is None or version != version_memo:
+                config_hash = cls._calculer_config_hash()
+                cls._config_memo = (version, config_hash)
         except Exception as e:
             print(f"Erreur lors de la génération du hash de configuration: {e}")
             return "error"
+        return config_hash
     
     @classmethod
-    def get_cache_key(cls, document_type, document_id):
-        """Génère une clé de cache pour un document"""
-        return f"{cls.CACHE_PREFIX}{document_type}_{document_id}"
+    def reset_config_hash(cls):
+        cls._config_memo = (None, None)
+    
+    @staticmethod
+    def version_donnees(*objets):
+        """Empreinte des valeurs des champs des objets dont dépend un document"""
+        empreinte = hashlib.sha256()
+        for objet in objets:
+            if objet is None:
+                continue
+            empreinte.update(objet._meta.label.encode())
+            for field in objet._meta.concrete_fields:
+                if field.attname in PDFCacheManager.CHAMPS_HORS_VERSION:
+                    continue
+                empreinte.update(f"|{field.attname}={getattr(objet, field.attname)}".encode())
+        return empreinte.hexdigest()
     
     @classmethod
-    def is_cache_valid(cls, document_type, document_id):
-        """Vérifie si le cache est valide pour un document"""
-        cache_key = cls.get_cache_key(document_type, document_id)
-        current_config_hash = cls.get_config_hash()
-        
-        # Récupérer les métadonnées du cache
-        cache_metadata = cache.get(f"{cache_key}_metadata")
-        if not cache_metadata:
-            return False
-        
-        # Vérifier si la configuration a changé
-        if cache_metadata.get('config_hash') != current_config_hash:
-            return False
-        
-        # Vérifier si le cache n'a pas expiré
-        cache_time = cache_metadata.get('timestamp')
-        if cache_time:
-            cache_datetime = datetime.fromisoformat(cache_time)
-            if timezone.now() - cache_datetime > timezone.timedelta(hours=24):
-                return False
-        
-        return True
+    def get_cache_key(cls, document_type, document_id, version=''):
+        """Adresse du document : empreinte de (type, id, version des données, configuration)"""
+        contenu = f"{document_type}|{document_id}|{version}|{cls.get_config_hash()}"
+        return hashlib.sha256(contenu.encode()).hexdigest()
+    
+    @classmethod
+    def _document_dir(cls, document_type, document_id):
+        return os.path.join(cls.get_store_dir(), str(document_type), str(document_id))
     
     @classmethod
-    def get_cached_pdf(cls, document_type, document_id):
-        """Récupère un PDF depuis le cache s'il est valide"""
-        if not cls.is_cache_valid(document_type, document_id):
+    def get_cached_path(cls, document_type, document_id, version=''):
+        """Chemin du PDF à jour s'il est présent dans le magasin, sinon None"""
+        if document_id is None:
             return None
-        
-        cache_key = cls.get_cache_key(document_type, document_id)
-        return cache.get(cache_key)
+        chemin = os.path.join(
+            cls._document_dir(document_type, document_id),
+            f"{cls.get_cache_key(document_type, document_id, version)}.pdf"
+        )
+        try:
+            # Date d'accès mise à jour pour l'éviction LRU
+            os.utime(chemin)
+        except OSError:
+            return None
+        return chemin
     
     @classmethod
-    def cache_pdf(cls, document_type, document_id, pdf_content):
-        """Met en cache un PDF avec ses métadonnées"""
-        cache_key = cls.get_cache_key(document_type, document_id)
-        current_config_hash = cls.get_config_hash()
-        
-        # Mettre en cache le PDF
-        cache.set(cache_key, pdf_content, cls.CACHE_TIMEOUT)
+    def is_cache_valid(cls, document_type, document_id, version=''):
+        """Vérifie si le magasin contient le document à jour"""
+        return cls.get_cached_path(document_type, document_id, version) is not None
+    
+    @classmethod
+    def get_cached_pdf(cls, document_type, document_id, version=''):
+        """Récupère le contenu d'un PDF depuis le magasin s'il est à jour"""
+        chemin = cls.get_cached_path(document_type, document_id, version)
+        if chemin is None:
+            return None
+        try:
+            with open(chemin, 'rb') as fichier:
+                return fichier.read()
+        except OSError:
+            return None
+    
+    @classmethod
+    def cache_pdf(cls, document_type, document_id, pdf_content, version='', appliquer_limite=True):
+        """
+        Enregistre un PDF dans le magasin et retourne son chemin.
         
-        # Mettre en cache les métadonnées
-        metadata = {
-            'config_hash': current_config_hash,
-            'timestamp': timezone.now().isoformat(),
-            'document_type': document_type,
-            'document_id': document_id,
-            'size': len(pdf_content)
-        }
-        cache.set(f"{cache_key}_metadata", metadata, cls.CACHE_TIMEOUT)
+        La taille du magasin n'est contrôlée qu'après FRACTION_CONTROLE de la
+        taille maximale écrite par ce processus ; appliquer_limite=False laisse
+        ce contrôle à l'appelant (régénération en masse : un seul parcours du
+        magasin à la fin).
+        """
+        if document_id is None:
+            return None
+        dossier = cls._document_dir(document_type, document_id)
+        nom = f"{cls.get_cache_key(document_type, document_id, version)}.pdf"
+        try:
+            os.makedirs(dossier, exist_ok=True)
+            # Écriture atomique : un lecteur ne voit jamais de fichier partiel
+            descripteur, temporaire = tempfile.mkstemp(dir=dossier, suffix='.tmp')
+            with os.fdopen(descripteur, 'wb') as fichier:
+                fichier.write(pdf_content)
+            os.replace(temporaire, os.path.join(dossier, nom))
+            
+            # Les versions précédentes du document ne seront plus lues
+            for entree in os.scandir(dossier):
+                if entree.name != nom and entree.name.endswith('.pdf'):
+                    os.remove(entree.path)
+            
+            if appliquer_limite:
+                cls._controler_limite(len(pdf_content))
+        except OSError as e:
+            print(f"Erreur lors de l'enregistrement du PDF {document_type} {document_id}: {e}")
+            return None
+        return os.path.join(dossier, nom)
+    
+    @classmethod
+    def _fichiers(cls):
+        for racine, _, fichiers in os.walk(cls.get_store_dir()):
+            for nom in fichiers:
+                if nom.endswith('.pdf'):
+                    chemin = os.path.join(racine, nom)
+                    try:
+                        yield chemin, os.stat(chemin)
+                    except OSError:
+                        continue
+    
+    @classmethod
+    def _controler_limite(cls, taille):
+        """Applique la limite une fois assez d'octets écrits depuis le dernier contrôle"""
+        with cls._verrou:
+            cls._octets_ecrits += taille
+            if cls._octets_ecrits < cls.get_max_size() * cls.FRACTION_CONTROLE:
+                return
+            cls._octets_ecrits = 0
+        cls._appliquer_limite()
+    
+    @classmethod
+    def _appliquer_limite(cls):
+        """Supprime les PDF les moins récemment utilisés au-delà de la taille maximale"""
+        fichiers = list(cls._fichiers())
+        total = sum(stat.st_size for _, stat in fichiers)
+        limite = cls.get_max_size()
+        if total <= limite:
+            return
+        for chemin, stat in sorted(fichiers, key=lambda f: f[1].st_mtime):
+            try:
+                os.remove(chemin)
+            except OSError:
+                continue
+            total -= stat.st_size
+            if total <= limite:
+                break
+    
+    @classmethod
+    def pdf_response(cls, document_type, document_id, version, generer, filename, as_attachment=True):
+        """
+        Réponse HTTP d'un PDF : servie en flux depuis le magasin si le document
+        est à jour, sinon générée (generer() retourne les octets) puis enregistrée.
+        """
+        chemin = cls.get_cached_path(document_type, document_id, version)
+        if chemin is None:
+            pdf_content = generer()
+            chemin = cls.cache_pdf(document_type, document_id, pdf_content, version)
+            if chemin is None:
+                disposition = 'attachment' if as_attachment else 'inline'
+                response = HttpResponse(pdf_content, content_type='application/pdf')
+                response['Content-Disposition'] = f'{disposition}; filename="{filename}"'
+                return response
+        try:
+            return FileResponse(
+                open(chemin, 'rb'), content_type='application/pdf',
+                as_attachment=as_attachment, filename=filename
+            )
+        except OSError:
+            # Fichier évincé entre-temps
+            return cls.pdf_response(document_type, document_id, version, generer, filename, as_attachment)
     
     @classmethod
     def invalidate_cache(cls, document_type=None, document_id=None):
-        """Invalide le cache pour un document spécifique ou tous les documents"""
+        """Invalide le cache pour un document spécifique, un type ou tous les documents"""
         if document_type and document_id:
-            # Invalider un document spécifique
-            cache_key = cls.get_cache_key(document_type, document_id)
-            cache.delete(cache_key)
-            cache.delete(f"{cache_key}_metadata")
+            dossier = cls._document_dir(document_type, document_id)
+        elif document_type:
+            dossier = os.path.join(cls.get_store_dir(), str(document_type))
         else:
-            # Invalider tous les caches PDF
-            # Note: En production, vous pourriez utiliser un pattern de clés plus sophistiqué
-            from django.core.cache.utils import make_template_fragment_key
-            # Pour l'instant, on va simplement forcer la régénération
-            pass
+            dossier = cls.get_store_dir()
+        shutil.rmtree(dossier, ignore_errors=True)
     
     @classmethod
     def invalidate_all_pdf_cache(cls):
-        """Invalide tous les caches PDF"""
-        # Marquer que la configuration a changé
-        cache.set("config_changed", True, 60 * 60)  # 1 heure
+        """Invalide tous les caches PDF (changement de configuration de l'entreprise)"""
+        cls.reset_config_hash()
+        cls.invalidate_cache()
     
     @classmethod
     def get_cache_stats(cls):
-        """Retourne les statistiques du cache"""
-        # Cette méthode pourrait être étendue pour fournir des statistiques détaillées
+        """Retourne les statistiques du magasin"""
+        fichiers = list(cls._fichiers())
         return {
             'cache_prefix': cls.CACHE_PREFIX,
             'current_config_hash': cls.get_config_hash(),
-            'cache_timeout': cls.CACHE_TIMEOUT
+            'store_dir': cls.get_store_dir(),
+            'documents': len(fichiers),
+            'total_size': sum(stat.st_size for _, stat in fichiers),
+            'max_size': cls.get_max_size(),
         }
 
 
+def _initialiser_worker():
+    """Prépare un processus de régénération (Django déjà chargé si le processus est forké)"""
+    import django
+    from django.apps import apps
+    
+    if not apps.ready:
+        django.setup()
+
+
+def _regenerer_lot(document_type, ids, only_stale):
+    return PDFRegenerationService.regenerer_lot(document_type, ids, only_stale)
+
+
 class PDFRegenerationService:
-    """Service pour la régénération automatique des PDF"""
+    """
+    Service pour la régénération des PDF.
+
+    Les documents sont traités par lots d'identifiants, éventuellement répartis
+    sur plusieurs processus : ReportLab est limité par le CPU, et chaque
+    processus a ses propres connexions à la base.
+    """
+    
+    TAILLE_LOT = 50
+    
+    # type -> modèle, service, méthode de rendu, relations chargées avec le
+    # document et préfixes des objets dont la date de modification compte
+    DOCUMENTS = {
+        'contrat': {
+            'modele': 'contrats.Contrat',
+            'service': 'ContratPDFService',
+            'generer': 'generate_contrat_pdf',
+            'relations': ('locataire', 'propriete__bailleur'),
+            'dependances': ('', 'locataire__', 'propriete__', 'propriete__bailleur__'),
+            'libelle': 'Contrat',
+        },
+        'resiliation': {
+            'modele': 'contrats.ResiliationContrat',
+            'service': 'ResiliationPDFService',
+            'generer': 'generate_resiliation_pdf',
+            'relations': ('contrat__locataire', 'contrat__propriete__bailleur'),
+            'dependances': ('', 'contrat__', 'contrat__locataire__', 'contrat__propriete__'),
+            'libelle': 'Résiliation',
+        },
+    }
     
     @classmethod
-    def regenerate_all_contracts(cls):
-        """Régénère tous les PDF de contrats"""
-        from contrats.models import Contrat
-        from contrats.services import ContratPDFService
-        
-        regenerated_count = 0
-        errors = []
+    def _modele(cls, document_type):
+        from django.apps import apps
         
-        try:
-            contrats = Contrat.objects.all()
-            for contrat in contrats:
-                try:
-                    # Générer le nouveau PDF
-                    service = ContratPDFService(contrat)
-                    pdf_content = service.generate_contrat_pdf().getvalue()
-                    
-                    # Mettre à jour le cache
-                    PDFCacheManager.cache_pdf('contrat', contrat.id, pdf_content)
-                    regenerated_count += 1
-                    
-                except Exception as e:
-                    errors.append(f"Contrat {contrat.id}: {str(e)}")
-            
-            return {
-                'success': True,
-                'regenerated_count': regenerated_count,
-                'total_count': contrats.count(),
-                'errors': errors
-            }
-            
-        except Exception as e:
-            return {
-                'success': False,
-                'error': str(e),
-                'regenerated_count': regenerated_count,
-                'errors': errors
-            }
+        return apps.get_model(cls.DOCUMENTS[document_type]['modele'])
     
     @classmethod
-    def regenerate_all_resiliations(cls):
-        """Régénère tous les PDF de résiliations"""
-        from contrats.models import ResiliationContrat
-        from contrats.services import ResiliationPDFService
+    def ids_a_regenerer(cls, document_type, since=None):
+        """Identifiants des documents du type, limités à ceux modifiés depuis `since`"""
+        documents = cls._modele(document_type).objects.all()
+        if since is not None:
+            filtre = Q()
+            for prefixe in cls.DOCUMENTS[document_type]['dependances']:
+                filtre |= Q(**{f'{prefixe}date_modification__gte': since})
+            documents = documents.filter(filtre)
+        return list(documents.order_by('pk').values_list('pk', flat=True).distinct())
+    
+    @classmethod
+    def regenerer_lot(cls, document_type, ids, only_stale=False):
+        """
+        Régénère les documents d'un lot d'identifiants.
+
+        Avec only_stale, les documents déjà présents dans le magasin pour leur
+        version de données et la configuration courante sont ignorés.
+        """
+        from contrats import services
+        
+        description = cls.DOCUMENTS[document_type]
+        service_class = getattr(services, description['service'])
+        documents = cls._modele(document_type).objects.select_related(
+            *description['relations']
+        ).filter(pk__in=ids)
         
-        regenerated_count = 0
-        errors = []
+        resultat = {'regenerated': 0, 'skipped': 0, 'errors': [], 'timings': []}
+        for document in documents:
+            debut = time.perf_counter()
+            try:
+                service = service_class(document)
+                version = service.get_pdf_version()
+                if only_stale and PDFCacheManager.is_cache_valid(document_type, document.pk, version):
+                    resultat['skipped'] += 1
+                    continue
+                pdf_content = getattr(service, description['generer'])(use_cache=False).getvalue()
+                PDFCacheManager.cache_pdf(
+                    document_type, document.pk, pdf_content, version, appliquer_limite=False
+                )
+                resultat['regenerated'] += 1
+                resultat['timings'].append((document.pk, time.perf_counter() - debut))
+            except Exception as e:
+                resultat['errors'].append(f"{description['libelle']} {document.pk}: {str(e)}")
+        return resultat
+    
+    @classmethod
+    def regenerer(cls, document_type, since=None, only_stale=False, workers=1,
+                  taille_lot=None, progression=None):
+        """
+        Régénère les documents d'un type, séquentiellement ou avec `workers` processus.
+
+        progression(traites, total, ecoule) est appelée après chaque lot.
+        """
+        taille_lot = taille_lot or cls.TAILLE_LOT
+        debut = time.monotonic()
+        resultat = {
+            'success': True,
+            'regenerated_count': 0,
+            'skipped_count': 0,
+            'total_count': 0,
+            'errors': [],
+            'timings': [],
+        }
         
         try:
-            resiliations = ResiliationContrat.objects.all()
-            for resiliation in resiliations:
-                try:
-                    # Générer le nouveau PDF
-                    service = ResiliationPDFService(resiliation)
-                    pdf_content = service.generate_resiliation_pdf().getvalue()
-                    
-                    # Mettre à jour le cache
-                    PDFCacheManager.cache_pdf('resiliation', resiliation.id, pdf_content)
-                    regenerated_count += 1
-                    
-                except Exception as e:
-                    errors.append(f"Résiliation {resiliation.id}: {str(e)}")
+            ids = cls.ids_a_regenerer(document_type, since)
+            resultat['total_count'] = len(ids)
+            lots = [ids[i:i + taille_lot] for i in range(0, len(ids), taille_lot)]
+            
+            def integrer(partiel):
+                resultat['regenerated_count'] += partiel['regenerated']
+                resultat['skipped_count'] += partiel['skipped']
+                resultat['errors'].extend(partiel['errors'])
+                resultat['timings'].extend(partiel['timings'])
+                if progression:
+                    traites = resultat['regenerated_count'] + resultat['skipped_count'] + len(resultat['errors'])
+                    progression(traites, len(ids), time.monotonic() - debut)
             
-            return {
-                'success': True,
-                'regenerated_count': regenerated_count,
-                'total_count': resiliations.count(),
-                'errors': errors
-            }
+            if workers > 1 and len(lots) > 1:
+                # Les processus forkés ne doivent pas partager les connexions du parent
+                connections.close_all()
+                with ProcessPoolExecutor(max_workers=workers, initializer=_initialiser_worker) as pool:
+                    futures = {
+                        pool.submit(_regenerer_lot, document_type, lot, only_stale): lot
+                        for lot in lots
+                    }
+                    for future in as_completed(futures):
+                        lot = futures[future]
+                        try:
+                            partiel = future.result()
+                        except Exception as e:
+                            libelle = cls.DOCUMENTS[document_type]['libelle']
+                            partiel = {
+                                'regenerated': 0, 'skipped': 0, 'timings': [],
+                                'errors': [f"{libelle} {pk}: {str(e)}" for pk in lot],
+                            }
+                        integrer(partiel)
+            else:
+                for lot in lots:
+                    integrer(cls.regenerer_lot(document_type, lot, only_stale))
             
+            PDFCacheManager._appliquer_limite()
         except Exception as e:
-            return {
-                'success': False,
-                'error': str(e),
-                'regenerated_count': regenerated_count,
-                'errors': errors
-            }
+            resultat['success'] = False
+            resultat['error'] = str(e)
+        
+        resultat['duration'] = time.monotonic() - debut
+        resultat['throughput'] = (
+            resultat['regenerated_count'] / resultat['duration'] if resultat['duration'] else 0
+        )
+        return resultat
+    
+    @classmethod
+    def regenerate_all_contracts(cls, **options):
+        """Régénère tous les PDF de contrats"""
+        return cls.regenerer('contrat', **options)
+    
+    @classmethod
+    def regenerate_all_resiliations(cls, **options):
+        """Régénère tous les PDF de résiliations"""
+        return cls.regenerer('resiliation', **options)
     
     @classmethod
-    def regenerate_all_documents(cls):
+    def regenerate_all_documents(cls, **options):
         """Régénère tous les documents PDF"""
         print("🔄 Début de la régénération de tous les documents PDF...")
         
         # Régénérer les contrats
-        contracts_result = cls.regenerate_all_contracts()
+        contracts_result = cls.regenerate_all_contracts(**options)
         print(f"📄 Contrats: {contracts_result['regenerated_count']}/{contracts_result['total_count']} régénérés")
         
         # Régénérer les résiliations
-        resiliations_result = cls.regenerate_all_resiliations()
+        resiliations_result = cls.regenerate_all_resiliations(**options)
         print(f"📄 Résiliations: {resiliations_result['regenerated_count']}/{resiliations_result['total_count']} régénérés")
         
         # Résumé
@@ -0,0 +1,326 @@
+"""
+En-tête et pied de page partagés des documents ReportLab
+
+Les chemins et dimensions des images d'en-tête et du logo sont résolus une
+fois par processus et par configuration de l'entreprise (l'empreinte de
+PDFCacheManager change à chaque modification), et les images sont encodées
+à ce moment-là : ReportLab ne les réencode plus pour chaque document. Le
+décor fixe de la page est dessiné une seule fois par document dans un Form
+XObject, puis référencé sur chaque page : seul le numéro de page est
+redessiné.
+
+Le partage des images encodées passe par des API internes de ReportLab ; il
+n'est activé que pour les versions vérifiées (VERSIONS_INTERNES) quand ces
+attributs sont présents, sinon les images sont placées par drawImage.
+"""
+
+import copy
+import hashlib
+import logging
+import os
+import threading
+from io import BytesIO
+
+import reportlab
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase.pdfdoc import PDFImageXObject
+from reportlab.pdfgen.canvas import Canvas
+
+logger = logging.getLogger(__name__)
+
+
+# Couleurs de chaque famille de documents ; image_entete=False réserve
+# l'en-tête au bandeau coloré (résiliations)
+THEMES = {
+    'contrat': {'fond': colors.lightblue, 'accent': colors.darkblue, 'image_entete': True},
+    'recu_caution': {'fond': colors.lightgreen, 'accent': colors.darkgreen, 'image_entete': True},
+    'resiliation': {'fond': colors.lightcoral, 'accent': colors.darkred, 'image_entete': False},
+}
+
+
+# Versions de ReportLab [min, max[ dont les API internes utilisées par
+# _dessiner_image ont été vérifiées
+VERSIONS_INTERNES = ((3, 0), (5, 0))
+
+
+def _internes_disponibles():
+    """
+    Vrai si la version de ReportLab est vérifiée et expose Canvas._doc,
+    _setXObjects, _code, _formsinuse et PDFDocument.idToObject
+    """
+    try:
+        version = tuple(int(partie) for partie in reportlab.Version.split('.')[:2])
+    except (AttributeError, ValueError):
+        return False
+    if not VERSIONS_INTERNES[0] <= version < VERSIONS_INTERNES[1]:
+        return False
+    try:
+        essai = Canvas(BytesIO())
+        document = essai._doc
+        return (
+            callable(getattr(essai, '_setXObjects', None))
+            and isinstance(essai._code, list)
+            and isinstance(essai._formsinuse, list)
+            and isinstance(document.idToObject, dict)
+            and all(callable(getattr(document, nom, None)) for nom in ('getXObjectName', 'Reference', 'addForm'))
+        )
+    except Exception:
+        return False
+
+
+INTERNES_REPORTLAB = _internes_disponibles()
+
+
+def _taille_image(chemin):
+    """Dimensions de l'image, ou None si elle est absente ou illisible"""
+    if not chemin or not os.path.exists(chemin):
+        return None
+    try:
+        return ImageReader(chemin).getSize()
+    except (OSError, IOError, ValueError):
+        return None
+
+
+class ModelePageEntreprise:
+    """Décor fixe (en-tête et pied de page) d'une famille de documents"""
+
+    def __init__(self, config, theme):
+        self.config = config
+        self.theme = theme
+        self.couleurs = THEMES[theme]
+        self.nom_form = f'entete_{theme}'
+        self.entete = None
+        self.logo = None
+        self.erreur = False
+        self.images = {}
+
+        if config is None:
+            return
+
+        try:
+            if self.couleurs['image_entete']:
+                self.entete = self._placer_entete(config.get_entete_prioritaire())
+            if self.entete is None:
+                logo_path = config.get_logo_prioritaire()
+                if _taille_image(logo_path):
+                    self.logo = logo_path
+            # Sans les API internes, pas d'encodage partagé : drawImage
+            chemins = [self.entete and self.entete[0], self.logo] if INTERNES_REPORTLAB else []
+            for chemin in filter(None, chemins):
+                nom = 'img' + hashlib.md5(chemin.encode()).hexdigest()
+                self.images[chemin] = (nom, PDFImageXObject(nom, chemin))
+        except (OSError, IOError, ValueError, AttributeError) as e:
+            logger.error(f"Erreur lors de la préparation de l'en-tête personnalisé: {e}")
+            self.erreur = True
+
+    @staticmethod
+    def _placer_entete(chemin):
+        """Position et taille de l'image d'en-tête, centrée et redimensionnée"""
+        if not chemin or not os.path.exists(chemin):
+            return None
+
+        page_width, page_height = A4
+        img_width, img_height = ImageReader(chemin).getSize()
+        max_width = page_width - 2*cm
+        max_height = 4*cm
+
+        aspect_ratio = img_width / img_height
+        if aspect_ratio > (max_width / max_height):
+            largeur = max_width
+            hauteur = max_width / aspect_ratio
+        else:
+            hauteur = max_height
+            largeur = max_height * aspect_ratio
+
+        return chemin, (page_width - largeur) / 2, page_height - hauteur - 0.5*cm, largeur, hauteur
+
+    def _dessiner_image(self, canvas_obj, chemin, x, y, largeur, hauteur):
+        """
+        Place une image encodée à la préparation du modèle. Chaque document
+        enregistre sa propre copie de l'objet (ReportLab y note son nom interne).
+        """
+        if chemin not in self.images:
+            # Version de ReportLab non vérifiée ou image non préparée
+            canvas_obj.drawImage(chemin, x, y, largeur, hauteur)
+            return
+
+        try:
+            nom, modele = self.images[chemin]
+            document = canvas_obj._doc
+            reg_name = document.getXObjectName(nom)
+            if reg_name not in document.idToObject:
+                image = copy.copy(modele)
+                canvas_obj._setXObjects(image)
+                document.Reference(image, reg_name)
+                document.addForm(nom, image)
+        except (KeyError, AttributeError):
+            # Image non préparée ou API interne de ReportLab différente
+            canvas_obj.drawImage(chemin, x, y, largeur, hauteur)
+            return
+
+        canvas_obj.saveState()
+        canvas_obj.translate(x, y)
+        canvas_obj.scale(largeur, hauteur)
+        canvas_obj._code.append(f"/{reg_name} Do")
+        canvas_obj.restoreState()
+        canvas_obj._formsinuse.append(nom)
+
+    def _contact_entete(self):
+        if self.theme != 'resiliation':
+            return self.config.get_contact_complet()
+        contact_info = []
+        if self.config.telephone:
+            contact_info.append(f"Tél: {self.config.telephone}")
+        if self.config.email:
+            contact_info.append(f"Email: {self.config.email}")
+        return " | ".join(contact_info)
+
+    def _dessiner_entete(self, canvas_obj):
+        page_width, page_height = A4
+        fond, accent = self.couleurs['fond'], self.couleurs['accent']
+
+        if self.erreur:
+            canvas_obj.setFillColor(fond)
+            canvas_obj.rect(0, page_height - 3*cm, page_width, 3*cm, fill=1, stroke=0)
+            canvas_obj.setFillColor(accent)
+            canvas_obj.setFont("Helvetica-Bold", 16)
+            canvas_obj.drawString(2*cm, page_height - 2.2*cm, self.config.nom_entreprise)
+            return
+
+        if self.entete:
+            chemin, x, y, largeur, hauteur = self.entete
+            self._dessiner_image(canvas_obj, chemin, x, y, largeur, hauteur)
+            return
+
+        # Bandeau coloré avec logo et coordonnées
+        canvas_obj.setFillColor(fond)
+        canvas_obj.rect(0, page_height - 3*cm, page_width, 3*cm, fill=1, stroke=0)
+        canvas_obj.setStrokeColor(accent)
+        canvas_obj.setLineWidth(2)
+        canvas_obj.line(0, page_height - 3*cm, page_width, page_height - 3*cm)
+
+        text_x = 2*cm
+        text_y = page_height - 2.2*cm
+        if self.logo:
+            logo_width = 2*cm
+            self._dessiner_image(canvas_obj, self.logo, 1*cm, page_height - 2.5*cm, logo_width, 1.5*cm)
+            text_x = 1*cm + logo_width + 0.5*cm
+
+        canvas_obj.setFillColor(accent)
+        canvas_obj.setFont("Helvetica-Bold", 16)
+        canvas_obj.drawString(text_x, text_y, self.config.nom_entreprise)
+
+        canvas_obj.setFont("Helvetica", 10)
+        canvas_obj.drawString(text_x, text_y - 0.4*cm, self.config.get_adresse_complete())
+
+        contact = self._contact_entete()
+        if contact:
+            canvas_obj.setFont("Helvetica", 9)
+            canvas_obj.drawString(text_x, text_y - 0.8*cm, contact)
+
+    def _dessiner_pied(self, canvas_obj):
+        page_width, _ = A4
+
+        canvas_obj.setFillColor(colors.lightgrey)
+        canvas_obj.rect(0, 0, page_width, 1.5*cm, fill=1, stroke=0)
+        canvas_obj.setStrokeColor(colors.grey)
+        canvas_obj.setLineWidth(1)
+        canvas_obj.line(0, 1.5*cm, page_width, 1.5*cm)
+
+        if self.config:
+            canvas_obj.setFillColor(colors.darkgrey)
+            canvas_obj.setFont("Helvetica", 7)
+            canvas_obj.drawString(2*cm, 1*cm, f"{self.config.nom_entreprise}")
+            canvas_obj.drawString(2*cm, 0.6*cm, f"Tél: {self.config.telephone} | Email: {self.config.email}")
+
+    def dessiner(self, canvas_obj, doc):
+        """Callback onPage : référence le décor du document, puis numérote la page"""
+        if not canvas_obj.hasForm(self.nom_form):
+            canvas_obj.beginForm(self.nom_form)
+            if self.config:
+                self._dessiner_entete(canvas_obj)
+            self._dessiner_pied(canvas_obj)
+            canvas_obj.endForm()
+        canvas_obj.doForm(self.nom_form)
+
+        if self.config:
+            page_width, _ = A4
+            canvas_obj.setFillColor(colors.darkgrey)
+            canvas_obj.setFont("Helvetica-Bold", 7)
+            canvas_obj.drawRightString(page_width - 2*cm, 0.6*cm, f"Page {doc.page}")
+
+
+_lock = threading.Lock()
+_modeles = {}
+_feuilles = {}
+
+
+def modele_page(config, theme):
+    """Décor de page du thème pour la configuration, partagé par le processus"""
+    from core.pdf_cache import PDFCacheManager
+
+    cle = (PDFCacheManager.get_config_hash() if config else None, theme)
+    modele = _modeles.get(cle)
+    if modele is None:
+        modele = ModelePageEntreprise(config, theme)
+        with _lock:
+            # Une seule configuration active : les décors des anciennes sont abandonnés
+            for ancienne in [c for c in _modeles if c[0] != cle[0]]:
+                del _modeles[ancienne]
+            _modeles[cle] = modele
+    return modele
+
+
+def feuille_styles(theme):
+    """Feuille de styles du thème (titre, sections, corps, signatures), construite une fois"""
+    styles = _feuilles.get(theme)
+    if styles is not None:
+        return styles
+
+    accent = THEMES[theme]['accent']
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(
+        name='CustomTitle',
+        parent=styles['Title'],
+        fontSize=18,
+        spaceAfter=20,
+        alignment=TA_CENTER,
+        textColor=accent
+    ))
+    styles.add(ParagraphStyle(
+        name='CustomHeading',
+        parent=styles['Heading1'],
+        fontSize=14,
+        spaceAfter=12,
+        spaceBefore=20,
+        textColor=accent
+    ))
+    styles.add(ParagraphStyle(
+        name='CustomBody',
+        parent=styles['Normal'],
+        fontSize=10,
+        spaceAfter=6,
+        alignment=TA_JUSTIFY
+    ))
+    styles.add(ParagraphStyle(
+        name='CustomSignature',
+        parent=styles['Normal'],
+        fontSize=10,
+        spaceAfter=20,
+        alignment=TA_CENTER
+    ))
+
+    with _lock:
+        return _feuilles.setdefault(theme, styles)
+
+
+def reinitialiser():
+    """Oublie les décors et feuilles de styles mémorisés"""
+    with _lock:
+        _modeles.clear()
+        _feuilles.clear()
@@ -5,108 +5,270 @@ pour l'application de gestion immobilière
 
 import time
 import logging
-import psutil
 import threading
+import bisect
+import itertools
+from array import array
 from functools import wraps
 from django.core.cache import cache
 from django.db import connection
 from django.conf import settings
 from django.utils import timezone
-from collections import defaultdict, deque
 import json
 
+try:
+    import psutil
+except ImportError:  # Mesures système indisponibles sans psutil
+    psutil = None
+
+from .search_cache import SearchCache
+
 logger = logging.getLogger(__name__)
 
+# Bornes supérieures (secondes) des classes des histogrammes de latence
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.25, 0.35, 0.5,
+    0.75, 1.0, 1.5, 2.5, 5.0, 10.0, float('inf'),
+)
+
+
+class MetricsRingBuffer:
+    """
+    Tampon circulaire de taille fixe (tableaux typés) des dernières requêtes.
+
+    L'écriture réserve un emplacement via un compteur atomique puis remplit
+    les colonnes ; aucune liste ne grandit et aucun verrou n'est pris. La
+    lecture copie les colonnes : un enregistrement en cours d'écriture peut
+    y apparaître incomplet, ce qui est sans conséquence pour des statistiques.
+    """
+    
+    def __init__(self, size=4096):
+        self.size = size
+        self._sequence = itertools.count()
+        self._written = 0
+        self.timestamps = array('d', [0.0]) * size  # time.monotonic()
+        self.durations = array('d', [0.0]) * size
+        self.status_codes = array('H', [0]) * size
+        self.queries = array('I', [0]) * size
+        self.path_ids = array('I', [0]) * size
+    
+    def append(self, timestamp, duration, status_code, queries_count, path_id):
+        index = next(self._sequence)
+        slot = index % self.size
+        self.timestamps[slot] = timestamp
+        self.durations[slot] = duration
+        self.status_codes[slot] = status_code
+        self.queries[slot] = queries_count
+        self.path_ids[slot] = path_id
+        self._written = index + 1
+    
+    def snapshot(self, since=None):
+        """Copie des enregistrements présents (optionnellement depuis un instant monotonic)"""
+        count = min(self._written, self.size)
+        columns = (
+            self.timestamps[:count], self.durations[:count], self.status_codes[:count],
+            self.queries[:count], self.path_ids[:count],
+        )
+        records = zip(*columns)
+        if since is not None:
+            records = (r for r in records if r[0] >= since)
+        return list(records)
+
+
+class LatencyHistogram:
+    """Histogramme cumulé à classes fixes d'un chemin"""
+    
+    __slots__ = ('counts', 'total', 'sum')
+    
+    def __init__(self):
+        self.counts = array('Q', [0]) * len(LATENCY_BUCKETS)
+        self.total = 0
+        self.sum = 0.0
+    
+    def add(self, duration):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, duration)] += 1
+        self.total += 1
+        self.sum += duration
+    
+    def percentile(self, p):
+        """Borne supérieure de la classe contenant le p-ième centile"""
+        if not self.total:
+            return 0.0
+        rank = p / 100 * self.total
+        cumulated = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.counts):
+            cumulated += count
+            if cumulated >= rank:
+                return bound if bound != float('inf') else LATENCY_BUCKETS[-2]
+        return LATENCY_BUCKETS[-2]
+    
+    def as_dict(self):
+        return {
+            'count': self.total,
+            'average': self.sum / self.total if self.total else 0.0,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+        }
+
+
+def _percentiles(values, percentiles=(50, 95, 99)):
+    if not values:
+        return {f'p{p}': 0.0 for p in percentiles}
+    values = sorted(values)
+    last = len(values) - 1
+    return {f'p{p}': values[min(last, int(round(p / 100 * last)))] for p in percentiles}
+
+
 class PerformanceMonitor:
     """Moniteur de performance en temps réel"""
     
-    def __init__(self):
-        self.metrics = defaultdict(list)
+    MAX_PATHS = 200  # au-delà, les chemins sont regroupés dans OTHER_PATH
+    OTHER_PATH = '(autres)'
+    MEMORY_SAMPLE_INTERVAL = 5.0  # secondes
+    
+    def __init__(self, size=4096):
+        self.buffer = MetricsRingBuffer(size)
+        self.histograms = {}
         self.active_requests = {}
-        self.system_metrics = {}
-        self.lock = threading.Lock()
+        self.memory_samples = array('d', [0.0]) * 120
+        self._memory_sequence = itertools.count()
+        self._memory_written = 0
+        self._last_memory_sample = 0.0
+        self._paths = {self.OTHER_PATH: 0}
+        self._path_names = [self.OTHER_PATH]
+        self.histograms[self.OTHER_PATH] = LatencyHistogram()
+        # Verrou réservé à l'enregistrement d'un nouveau chemin (rare)
+        self._paths_lock = threading.Lock()
+    
+    def _path_id(self, path):
+        path_id = self._paths.get(path)
+        if path_id is not None:
+            return path_id
+        with self._paths_lock:
+            if path not in self._paths:
+                if len(self._path_names) >= self.MAX_PATHS:
+                    return 0
+                self.histograms[path] = LatencyHistogram()
+                self._path_names.append(path)
+                self._paths[path] = len(self._path_names) - 1
+            return self._paths[path]
+    
+    def _sample_memory(self, now):
+        """Relevé mémoire échantillonné, au plus une fois par intervalle"""
+        if psutil is None or now - self._last_memory_sample < self.MEMORY_SAMPLE_INTERVAL:
+            return
+        self._last_memory_sample = now
+        index = next(self._memory_sequence)
+        self.memory_samples[index % len(self.memory_samples)] = psutil.Process().memory_info().rss
+        self._memory_written = index + 1
         
     def start_request(self, request_id, path, method):
         """Démarrer le monitoring d'une requête"""
-        with self.lock:
-            self.active_requests[request_id] = {
-                'path': path,
-                'method': method,
-                'start_time': time.time(),
-                'queries': [],
-                'memory_start': psutil.Process().memory_info().rss,
-            }
+        self.active_requests[request_id] = {
+            'path': path,
+            'method': method,
+            'start_time': time.monotonic(),
+            'queries': 0,
+        }
     
     def end_request(self, request_id, status_code):
         """Terminer le monitoring d'une requête"""
-        with self.lock:
-            if request_id in self.active_requests:
-                request_data = self.active_requests[request_id]
-                duration = time.time() - request_data['start_time']
-                memory_used = psutil.Process().memory_info().rss - request_data['memory_start']
-                
-                # Enregistrer les métriques
-                self.metrics['response_time'].append({
-                    'timestamp': timezone.now().isoformat(),
-                    'path': request_data['path'],
-                    'method': request_data['method'],
-                    'duration': duration,
-                    'status_code': status_code,
-                    'queries_count': len(request_data['queries']),
-                    'memory_used': memory_used,
-                })
-                
-                # Nettoyer les anciennes données
-                self._cleanup_old_metrics()
-                
-                del self.active_requests[request_id]
+        request_data = self.active_requests.pop(request_id, None)
+        if request_data is None:
+            return
+        self.record(request_data['path'], time.monotonic() - request_data['start_time'],
+                    status_code, request_data['queries'])
+    
+    def record(self, path, duration, status_code, queries_count=0):
+        """Enregistre une requête terminée"""
+        now = time.monotonic()
+        path_id = self._path_id(path)
+        self.buffer.append(now, duration, status_code, queries_count, path_id)
+        self.histograms[self._path_names[path_id]].add(duration)
+        self._sample_memory(now)
     
     def add_query(self, request_id, query, duration):
         """Ajouter une requête SQL au monitoring"""
-        with self.lock:
-            if request_id in self.active_requests:
-                self.active_requests[request_id]['queries'].append({
-                    'query': query,
-                    'duration': duration,
-                })
+        request_data = self.active_requests.get(request_id)
+        if request_data is not None:
+            request_data['queries'] += 1
     
     def get_system_metrics(self):
         """Obtenir les métriques système"""
-        return {
-            'cpu_percent': psutil.cpu_percent(),
-            'memory_percent': psutil.virtual_memory().percent,
-            'disk_percent': psutil.disk_usage('/').percent,
+        metrics = {
             'active_connections': len(self.active_requests),
             'timestamp': timezone.now().isoformat(),
         }
+        if psutil is not None:
+            metrics.update({
+                'cpu_percent': psutil.cpu_percent(),
+                'memory_percent': psutil.virtual_memory().percent,
+                'disk_percent': psutil.disk_usage('/').percent,
+            })
+        return metrics
+    
+    def get_memory_samples(self):
+        count = min(self._memory_written, len(self.memory_samples))
+        return list(self.memory_samples[:count])
+    
+    def snapshot(self, window=3600):
+        """
+        Instantané des métriques sur la fenêtre (secondes), sans bloquer les
+        threads de requête : les colonnes sont copiées puis agrégées.
+        """
+        records = self.buffer.snapshot(since=time.monotonic() - window)
+        path_names = list(self._path_names)
+        durations = [r[1] for r in records]
+        
+        by_path = {}
+        for _, duration, _, _, path_id in records:
+            by_path.setdefault(path_names[path_id], []).append(duration)
+        
+        memory = self.get_memory_samples()
+        return {
+            'requests': len(records),
+            'latency': _percentiles(durations),
+            'paths': {
+                path: {'count': len(values), **_percentiles(values)}
+                for path, values in by_path.items()
+            },
+            'histograms': {path: hist.as_dict() for path, hist in list(self.histograms.items())},
+            'memory': {
+                'current': memory[-1] if memory else None,
+                'max': max(memory) if memory else None,
+                'samples': len(memory),
+            },
+        }
     
     def get_performance_summary(self):
         """Obtenir un résumé des performances"""
-        with self.lock:
-            if not self.metrics['response_time']:
-                return {}
-            
-            recent_metrics = self.metrics['response_time'][-100:]  # 100 dernières requêtes
-            
+        records = self.buffer.snapshot()
+        if not records:
+            return {}
+        
+        records.sort(key=lambda r: r[0])
+        recent = records[-100:]  # 100 dernières requêtes
+        path_names = list(self._path_names)
+        
+        def as_request(record):
             return {
-                'total_requests': len(recent_metrics),
-                'average_response_time': sum(m['duration'] for m in recent_metrics) / len(recent_metrics),
-                'slowest_request': max(recent_metrics, key=lambda x: x['duration']),
-                'fastest_request': min(recent_metrics, key=lambda x: x['duration']),
-                'queries_per_request': sum(len(m.get('queries', [])) for m in recent_metrics) / len(recent_metrics),
-                'error_rate': len([m for m in recent_metrics if m['status_code'] >= 400]) / len(recent_metrics),
-                'system_metrics': self.get_system_metrics(),
+                'path': path_names[record[4]],
+                'duration': record[1],
+                'status_code': record[2],
+                'queries_count': record[3],
             }
-    
-    def _cleanup_old_metrics(self):
-        """Nettoyer les anciennes métriques"""
-        cutoff_time = time.time() - 3600  # 1 heure
         
-        for metric_type in self.metrics:
-            self.metrics[metric_type] = [
-                m for m in self.metrics[metric_type]
-                if time.mktime(timezone.datetime.fromisoformat(m['timestamp']).timetuple()) > cutoff_time
-            ]
+        return {
+            'total_requests': len(recent),
+            'average_response_time': sum(r[1] for r in recent) / len(recent),
+            'slowest_request': as_request(max(recent, key=lambda r: r[1])),
+            'fastest_request': as_request(min(recent, key=lambda r: r[1])),
+            'queries_per_request': sum(r[3] for r in recent) / len(recent),
+            'error_rate': len([r for r in recent if r[2] >= 400]) / len(recent),
+            **_percentiles([r[1] for r in recent]),
+            'system_metrics': self.get_system_metrics(),
+        }
 
 # Instance globale du moniteur
 performance_monitor = PerformanceMonitor()
@@ -160,31 +322,22 @@ class PerformanceMiddleware:
         self.get_response = get_response
     
     def __call__(self, request):
-        request_id = f"{request.META.get('REMOTE_ADDR')}_{int(time.time() * 1000)}"
-        path = request.path
-        method = request.method
-        
-        # Démarrer le monitoring
-        performance_monitor.start_request(request_id, path, method)
+        start = time.monotonic()
         
         # Compter les requêtes initiales
         initial_queries = len(connection.queries)
         
         response = self.get_response(request)
         
-        # Compter les nouvelles requêtes
-        new_queries = connection.queries[initial_queries:]
-        for query in new_queries:
-            performance_monitor.add_query(request_id, query['sql'], float(query['time']))
+        duration = time.monotonic() - start
+        queries_count = len(connection.queries) - initial_queries
         
-        # Terminer le monitoring
-        performance_monitor.end_request(request_id, response.status_code)
+        # Enregistrement dans le tampon circulaire (sans verrou)
+        performance_monitor.record(request.path, duration, response.status_code, queries_count)
         
         # Ajouter des headers de performance
-        response['X-Process-Time'] = str(time.time() - time.mktime(timezone.datetime.fromisoformat(
-            performance_monitor.active_requests.get(request_id, {}).get('start_time', time.time())
-        ).timetuple()))
-        response['X-Query-Count'] = str(len(new_queries))
+        response['X-Process-Time'] = f"{duration:.6f}"
+        response['X-Query-Count'] = str(queries_count)
         
         return response
 
@@ -194,9 +347,11 @@ def get_performance_dashboard_data():
     
     # Ajouter des métriques de cache
     cache_stats = cache.get('cache_stats', {})
+    cache_stats['recherche'] = SearchCache.statistiques()
     
     return {
         'performance': summary,
+        'snapshot': performance_monitor.snapshot(),
         'cache': cache_stats,
         'recommendations': _get_performance_recommendations(summary),
     }
@@ -255,6 +410,7 @@ def export_performance_data():
     data = {
         'timestamp': timezone.now().isoformat(),
         'performance_summary': performance_monitor.get_performance_summary(),
+        'snapshot': performance_monitor.snapshot(),
         'system_metrics': performance_monitor.get_system_metrics(),
     }
     
@@ -0,0 +1,130 @@
+"""
+Cache des résultats de la recherche unifiée
+
+Les clés sont déterministes (empreinte SHA-1 de la requête normalisée).
+Chaque module porte un numéro de version, incrémenté en base à chaque mise à
+jour de l'index (CompteurPartage) : tous les workers lisent la même version,
+et une entrée dont la version ne correspond plus n'est jamais relue. Seuls
+les modules invalidés sont recalculés, en une requête. Les compteurs de
+succès/échecs sont cumulés par processus et reportés en base périodiquement.
+"""
+
+import hashlib
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from . import compteurs_partages
+from .search_index import SearchIndex, normaliser
+
+
+class SearchCache:
+    """Cache par module des résultats de SearchIndex, invalidé par versions."""
+
+    PREFIXE = 'smart_search'
+    DUREE = 300  # 5 minutes
+    CLE_SUCCES = f'{PREFIXE}:stats:hits'
+    CLE_ECHECS = f'{PREFIXE}:stats:misses'
+    # Intervalle de report des compteurs du processus vers la base
+    REPORT_STATISTIQUES = 10  # secondes
+
+    _verrou = threading.Lock()
+    _en_attente = {CLE_SUCCES: 0, CLE_ECHECS: 0}
+    _dernier_report = time.monotonic()
+
+    @classmethod
+    def _cle_version(cls, type_objet):
+        return f'{cls.PREFIXE}:version:{type_objet}'
+
+    @staticmethod
+    def empreinte(query):
+        """Empreinte stable d'une requête (indépendante du processus)."""
+        return hashlib.sha1(normaliser(query).encode('utf-8')).hexdigest()
+
+    @classmethod
+    def _versions(cls, types):
+        cles = {cls._cle_version(t): t for t in types}
+        return {cles[cle]: version for cle, version in compteurs_partages.lire(list(cles)).items()}
+
+    @classmethod
+    def rechercher(cls, query, limit=10):
+        """Résultats {module: [...]} de la recherche, servis depuis le cache si possible."""
+        types = list(SearchIndex.MODULES)
+        versions = cls._versions(types)
+        empreinte = cls.empreinte(query)
+        cles = {
+            t: f'{cls.PREFIXE}:{t}:v{versions[t]}:{limit}:{empreinte}'
+            for t in types
+        }
+
+        en_cache = cache.get_many(list(cles.values()))
+        resultats = {}
+        a_calculer = []
+        for type_objet, cle in cles.items():
+            if cle in en_cache:
+                resultats[SearchIndex.MODULES[type_objet]] = en_cache[cle]
+            else:
+                a_calculer.append(type_objet)
+
+        if a_calculer:
+            calcules = SearchIndex.rechercher(query, limit, types=a_calculer)
+            resultats.update(calcules)
+            cache.set_many(
+                {cles[t]: calcules[SearchIndex.MODULES[t]] for t in a_calculer},
+                cls.DUREE,
+            )
+
+        cls._compter(len(types) - len(a_calculer), len(a_calculer))
+
+        # Ordre des modules conservé pour l'affichage
+        return {module: resultats[module] for module in SearchIndex.MODULES.values()}
+
+    @classmethod
+    def invalider(cls, types):
+        """Incrémente la version des modules indiqués, au commit de la transaction."""
+        def incrementer():
+            for type_objet in sorted(set(types)):
+                compteurs_partages.incrementer(cls._cle_version(type_objet))
+
+        transaction.on_commit(incrementer)
+
+    @classmethod
+    def _compter(cls, succes, echecs):
+        with cls._verrou:
+            cls._en_attente[cls.CLE_SUCCES] += succes
+            cls._en_attente[cls.CLE_ECHECS] += echecs
+            if time.monotonic() - cls._dernier_report < cls.REPORT_STATISTIQUES:
+                return
+        cls._reporter()
+
+    @classmethod
+    def _reporter(cls):
+        """Reporte en base les compteurs cumulés par ce processus."""
+        with cls._verrou:
+            a_reporter = {cle: nombre for cle, nombre in cls._en_attente.items() if nombre}
+            cls._en_attente = {cls.CLE_SUCCES: 0, cls.CLE_ECHECS: 0}
+            cls._dernier_report = time.monotonic()
+        for cle, nombre in a_reporter.items():
+            compteurs_partages.incrementer(cle, nombre)
+
+    @classmethod
+    def statistiques(cls):
+        """Compteurs de succès/échecs de tous les workers, par module consulté."""
+        cls._reporter()
+        compteurs = compteurs_partages.lire([cls.CLE_SUCCES, cls.CLE_ECHECS])
+        succes = compteurs[cls.CLE_SUCCES]
+        echecs = compteurs[cls.CLE_ECHECS]
+        total = succes + echecs
+        return {
+            'hits': succes,
+            'misses': echecs,
+            'hit_rate': round(succes / total, 3) if total else 0,
+        }
+
+    @classmethod
+    def reinitialiser_statistiques(cls):
+        with cls._verrou:
+            cls._en_attente = {cls.CLE_SUCCES: 0, cls.CLE_ECHECS: 0}
+        compteurs_partages.supprimer([cls.CLE_SUCCES, cls.CLE_ECHECS])
@@ -13,8 +13,43 @@ from datetime import datetime, timedelta
 import json
 import logging
 
+from .suggestion_index import suggestion_index
+
 logger = logging.getLogger(__name__)
 
+# Analyseur de requêtes compilé une seule fois par processus
+SEARCH_PATTERNS = {
+    'prix': re.compile(r'(\d+)\s*(F CFA|francs?|cfa)'),
+    'surface': re.compile(r'(\d+)\s*(m²|m2|mètres?\s*carrés?)'),
+    'ville': re.compile(r'(à|dans|sur)\s+([A-Za-zÀ-ÿ\s]+)'),
+    'type': re.compile(r'(appartement|maison|studio|loft|duplex|terrasse)'),
+    'statut': re.compile(r'(disponible|loué|en\s+attente|réservé)'),
+    'urgence': re.compile(r'(urgent|rapide|immédiat|dès\s+que\s+possible)'),
+}
+
+WORD_PATTERN = re.compile(r'\b\w+\b')
+SPECIAL_CHARS_PATTERN = re.compile(r'[^a-zA-Z0-9\s]')
+
+STOP_WORDS = frozenset({
+    'le', 'la', 'les', 'un', 'une', 'des', 'et', 'ou', 'de', 'du',
+    'à', 'au', 'aux', 'avec', 'sans', 'pour', 'par', 'dans', 'sur', 'sous',
+    'entre', 'chez', 'vers', 'depuis', 'jusqu', 'pendant', 'avant', 'après',
+    'je', 'tu', 'il', 'elle', 'nous', 'vous', 'ils', 'elles',
+    'ce', 'cette', 'ces', 'mon', 'ma', 'mes', 'ton', 'ta', 'tes',
+    'son', 'sa', 'ses', 'notre', 'votre', 'leur', 'leurs'
+})
+
+SEMANTIC_KEYWORDS = {
+    'recherche': ('cherche', 'recherche', 'trouve', 'disponible'),
+    'location': ('louer', 'location', 'bail', 'loyer'),
+    'achat': ('acheter', 'achat', 'vendre', 'vente'),
+    'urgence': ('urgent', 'rapide', 'immédiat', 'dès que possible'),
+    'budget': ('pas cher', 'bon prix', 'économique', 'budget'),
+    'luxe': ('luxueux', 'haut de gamme', 'premium', 'standing'),
+    'famille': ('famille', 'enfants', 'grand', 'spacieux'),
+    'étudiant': ('étudiant', 'petit', 'studio', 'économique'),
+}
+
 class IntelligentSearchEngine:
     """
     Moteur de recherche intelligent avec fonctionnalités avancées
@@ -22,14 +57,7 @@ class IntelligentSearchEngine:
     
     def __init__(self):
         self.search_history = {}
-        self.search_patterns = {
-            'prix': r'(\d+)\s*(F CFA|francs?|cfa)',
-            'surface': r'(\d+)\s*(m²|m2|mètres?\s*carrés?)',
-            'ville': r'(à|dans|sur)\s+([A-Za-zÀ-ÿ\s]+)',
-            'type': r'(appartement|maison|studio|loft|duplex|terrasse)',
-            'statut': r'(disponible|loué|en\s+attente|réservé)',
-            'urgence': r'(urgent|rapide|immédiat|dès\s+que\s+possible)',
-        }
+        self.search_patterns = SEARCH_PATTERNS
         
     def parse_search_query(self, query: str) -> Dict[str, Any]:
         """
@@ -62,17 +90,8 @@ class IntelligentSearchEngine:
     def _extract_keywords(self, query: str) -> List[str]:
         """Extrait les mots-clés importants de la requête"""
         # Supprimer les mots vides
-        stop_words = {
-            'le', 'la', 'les', 'un', 'une', 'des', 'et', 'ou', 'de', 'du', 'des',
-            'à', 'au', 'aux', 'avec', 'sans', 'pour', 'par', 'dans', 'sur', 'sous',
-            'entre', 'chez', 'vers', 'depuis', 'jusqu', 'pendant', 'avant', 'après',
-            'je', 'tu', 'il', 'elle', 'nous', 'vous', 'ils', 'elles',
-            'ce', 'cette', 'ces', 'mon', 'ma', 'mes', 'ton', 'ta', 'tes',
-            'son', 'sa', 'ses', 'notre', 'votre', 'leur', 'leurs'
-        }
-        
-        words = re.findall(r'\b\w+\b', query)
-        keywords = [word for word in words if word not in stop_words and len(word) > 2]
+        words = WORD_PATTERN.findall(query)
+        keywords = [word for word in words if word not in STOP_WORDS and len(word) > 2]
         
         return keywords
     
@@ -81,27 +100,27 @@ class IntelligentSearchEngine:
         filters = {}
         
         # Recherche de prix
-        prix_match = re.search(self.search_patterns['prix'], query)
+        prix_match = self.search_patterns['prix'].search(query)
         if prix_match:
             filters['prix_max'] = int(prix_match.group(1))
             
         # Recherche de surface
-        surface_match = re.search(self.search_patterns['surface'], query)
+        surface_match = self.search_patterns['surface'].search(query)
         if surface_match:
             filters['surface_min'] = int(surface_match.group(1))
             
         # Recherche de ville
-        ville_match = re.search(self.search_patterns['ville'], query)
+        ville_match = self.search_patterns['ville'].search(query)
         if ville_match:
             filters['ville'] = ville_match.group(2).strip()
             
         # Recherche de type
-        type_match = re.search(self.search_patterns['type'], query)
+        type_match = self.search_patterns['type'].search(query)
         if type_match:
             filters['type'] = type_match.group(1)
             
         # Recherche de statut
-        statut_match = re.search(self.search_patterns['statut'], query)
+        statut_match = self.search_patterns['statut'].search(query)
         if statut_match:
             filters['statut'] = statut_match.group(1)
             
@@ -109,18 +128,7 @@ class IntelligentSearchEngine:
     
     def _extract_semantic_meaning(self, query: str) -> str:
         """Extrait le sens sémantique de la requête"""
-        semantic_keywords = {
-            'recherche': ['cherche', 'recherche', 'trouve', 'disponible'],
-            'location': ['louer', 'location', 'bail', 'loyer'],
-            'achat': ['acheter', 'achat', 'vendre', 'vente'],
-            'urgence': ['urgent', 'rapide', 'immédiat', 'dès que possible'],
-            'budget': ['pas cher', 'bon prix', 'économique', 'budget'],
-            'luxe': ['luxueux', 'haut de gamme', 'premium', 'standing'],
-            'famille': ['famille', 'enfants', 'grand', 'spacieux'],
-            'étudiant': ['étudiant', 'petit', 'studio', 'économique'],
-        }
-        
-        for category, keywords in semantic_keywords.items():
+        for category, keywords in SEMANTIC_KEYWORDS.items():
             if any(keyword in query for keyword in keywords):
                 return category
                 
@@ -251,23 +259,15 @@ class IntelligentSearchEngine:
             
         suggestions = []
         
-        # Suggestions basées sur les données existantes
+        # Suggestions basées sur les données existantes (index en mémoire, sans requête)
         try:
-            # Villes
-            villes = model_class.objects.values_list('ville', flat=True).distinct()
-            suggestions.extend([f"à {ville}" for ville in villes if ville.lower().startswith(query.lower())])
-            
-            # Types
-            if hasattr(model_class, 'type_bien'):
-                types = model_class.objects.values_list('type_bien__nom', flat=True).distinct()
-                suggestions.extend([f"{type_bien}" for type_bien in types if type_bien.lower().startswith(query.lower())])
-                
-            # Prix
-            if any(char.isdigit() for char in query):
-                suggestions.extend([f"{query} F CFA", f"{query} francs CFA"])
-                
+            suggestions.extend(suggestion_index.suggerer(query, limit=10))
         except Exception as e:
             logger.error(f"Erreur lors de la génération des suggestions: {e}")
+        
+        # Prix
+        if any(char.isdigit() for char in query):
+            suggestions.extend([f"{query} F CFA", f"{query} francs CFA"])
             
         return suggestions[:10]  # Limiter à 10 suggestions
     
@@ -278,7 +278,7 @@ class IntelligentSearchEngine:
         analytics = {
             'query_length': len(query),
             'has_numbers': any(char.isdigit() for char in query),
-            'has_special_chars': bool(re.search(r'[^a-zA-Z0-9\s]', query)),
+            'has_special_chars': bool(SPECIAL_CHARS_PATTERN.search(query)),
             'word_count': len(query.split()),
             'estimated_complexity': 'simple'
         }
@@ -0,0 +1,405 @@
+"""
+Index de recherche unifié
+
+Chaque propriété, bailleur, locataire, contrat et paiement est représenté par
+un DocumentRecherche (texte normalisé + rendu du résultat), tenu à jour par
+signaux. La recherche interroge tous les modules en une seule requête classée,
+limitée par type : FTS5 sur SQLite, trigrammes (pg_trgm) sur PostgreSQL.
+"""
+
+import logging
+import re
+import unicodedata
+
+from django.db import connection, transaction
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+from django.db.models.signals import post_save, post_delete
+
+logger = logging.getLogger(__name__)
+
+
+def normaliser(texte):
+    """Minuscules, sans accents, espaces compactés."""
+    if not texte:
+        return ''
+    texte = unicodedata.normalize('NFKD', str(texte))
+    texte = ''.join(c for c in texte if not unicodedata.combining(c))
+    return ' '.join(texte.lower().split())
+
+
+def _nom_complet(personne):
+    if not personne:
+        return ''
+    return ' '.join(filter(None, [personne.prenom, personne.nom]))
+
+
+class SearchIndex:
+    """Construction, mise à jour et interrogation de l'index de recherche."""
+
+    MODULES = {
+        'propriete': 'proprietes',
+        'bailleur': 'bailleurs',
+        'locataire': 'locataires',
+        'contrat': 'contrats',
+        'paiement': 'paiements',
+    }
+
+    MODELES = {
+        'propriete': 'proprietes.Propriete',
+        'bailleur': 'proprietes.Bailleur',
+        'locataire': 'proprietes.Locataire',
+        'contrat': 'contrats.Contrat',
+        'paiement': 'paiements.Paiement',
+    }
+
+    CHAMPS_DOCUMENT = ['contenu', 'titre', 'sous_titre', 'url', 'icone', 'badge', 'donnees']
+
+    TAILLE_LOT = 1000
+
+    # Présence de la table FTS5, par alias de connexion
+    _fts5 = {}
+
+    # ------------------------------------------------------------------
+    # Construction des documents
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _queryset(cls, type_objet):
+        from django.apps import apps
+
+        modele = apps.get_model(cls.MODELES[type_objet])
+        queryset = modele.objects.all()
+        if type_objet == 'propriete':
+            queryset = queryset.select_related('bailleur', 'type_bien')
+        elif type_objet == 'contrat':
+            queryset = queryset.select_related('locataire', 'propriete')
+        elif type_objet == 'paiement':
+            queryset = queryset.select_related('contrat__locataire')
+        return queryset
+
+    @staticmethod
+    def _document_propriete(p):
+        bailleur = _nom_complet(p.bailleur)
+        type_bien = p.type_bien.nom if p.type_bien_id else ''
+        return {
+            'contenu': [p.numero_propriete, p.titre, p.adresse, p.ville, type_bien, bailleur],
+            'titre': f"Propriété {p.numero_propriete}",
+            'sous_titre': f"{p.adresse}, {p.ville}",
+            'url': f"/proprietes/detail/{p.pk}/",
+            'icone': 'house',
+            'badge': type_bien,
+            'donnees': {'bailleur': p.bailleur.get_nom_complet() if p.bailleur else 'Sans bailleur'},
+        }
+
+    @staticmethod
+    def _document_personne(personne, numero, url, icone, badge):
+        return {
+            'contenu': [numero, personne.nom, personne.prenom, personne.telephone, personne.email],
+            'titre': personne.get_nom_complet(),
+            'sous_titre': f"{personne.telephone} • {personne.email or 'Pas d’email'}",
+            'url': url,
+            'icone': icone,
+            'badge': badge,
+            'donnees': {},
+        }
+
+    @classmethod
+    def _document_bailleur(cls, b):
+        return cls._document_personne(
+            b, b.numero_bailleur, f"/proprietes/bailleurs/{b.pk}/", 'person-badge', 'Bailleur'
+        )
+
+    @classmethod
+    def _document_locataire(cls, l):
+        return cls._document_personne(
+            l, l.numero_locataire, f"/proprietes/locataires/{l.pk}/", 'person', 'Locataire'
+        )
+
+    @staticmethod
+    def _document_contrat(c):
+        return {
+            'contenu': [
+                c.numero_contrat,
+                _nom_complet(c.locataire),
+                c.propriete.numero_propriete if c.propriete else '',
+            ],
+            'titre': f"Contrat {c.numero_contrat}",
+            'sous_titre': (
+                f"{c.locataire.get_nom_complet() if c.locataire else ''} • "
+                f"{c.propriete.numero_propriete if c.propriete else ''}"
+            ),
+            'url': f"/contrats/detail/{c.pk}/",
+            'icone': 'file-text',
+            'badge': c.get_statut() if c.date_fin or c.est_resilie or not c.est_actif else 'Actif',
+            'donnees': {'montant': f"{c.loyer_mensuel} F CFA"},
+        }
+
+    @staticmethod
+    def _document_paiement(p):
+        locataire = p.contrat.locataire if p.contrat else None
+        return {
+            'contenu': [
+                p.reference_paiement,
+                p.numero_paiement,
+                p.contrat.numero_contrat if p.contrat else '',
+                _nom_complet(locataire),
+            ],
+            'titre': f"Paiement {p.reference_paiement or p.pk}",
+            'sous_titre': f"{locataire.get_nom_complet() if locataire else ''} • {p.montant} F CFA",
+            'url': f"/paiements/detail/{p.pk}/",
+            'icone': 'credit-card',
+            'badge': p.get_statut_display(),
+            'donnees': {'date': p.date_paiement.strftime('%d/%m/%Y') if p.date_paiement else ''},
+        }
+
+    @classmethod
+    def construire_document(cls, type_objet, objet):
+        """Retourne un DocumentRecherche non sauvegardé pour l'objet."""
+        from .models import DocumentRecherche
+
+        valeurs = getattr(cls, f'_document_{type_objet}')(objet)
+        valeurs['contenu'] = normaliser(' '.join(str(v) for v in valeurs['contenu'] if v))
+        for champ, longueur in (('titre', 255), ('sous_titre', 255), ('badge', 100)):
+            valeurs[champ] = (valeurs[champ] or '')[:longueur]
+        return DocumentRecherche(type_objet=type_objet, objet_id=objet.pk, **valeurs)
+
+    # ------------------------------------------------------------------
+    # Mise à jour de l'index
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def indexer(cls, type_objet, objets):
+        """Insère ou met à jour (upsert) les documents des objets donnés."""
+        from .models import DocumentRecherche
+
+        documents = [cls.construire_document(type_objet, objet) for objet in objets]
+        if documents:
+            DocumentRecherche.objects.bulk_create(
+                documents,
+                batch_size=cls.TAILLE_LOT,
+                update_conflicts=True,
+                unique_fields=['type_objet', 'objet_id'],
+                update_fields=cls.CHAMPS_DOCUMENT,
+            )
+            cls._invalider_cache([type_objet])
+        return len(documents)
+
+    @classmethod
+    def retirer(cls, type_objet, objet_ids):
+        from .models import DocumentRecherche
+
+        DocumentRecherche.objects.filter(type_objet=type_objet, objet_id__in=list(objet_ids)).delete()
+        cls._invalider_cache([type_objet])
+
+    @staticmethod
+    def _invalider_cache(types):
+        from .search_cache import SearchCache
+
+        SearchCache.invalider(types)
+
+    @classmethod
+    def reindexer(cls, type_objet, filtre=None):
+        """Réindexe un type d'objet (éventuellement restreint par un filtre Q)."""
+        queryset = cls._queryset(type_objet)
+        if filtre is not None:
+            queryset = queryset.filter(filtre)
+        total = 0
+        lot = []
+        for objet in queryset.iterator(chunk_size=cls.TAILLE_LOT):
+            lot.append(objet)
+            if len(lot) >= cls.TAILLE_LOT:
+                total += cls.indexer(type_objet, lot)
+                lot = []
+        total += cls.indexer(type_objet, lot)
+        return total
+
+    @classmethod
+    def reconstruire(cls, types=None):
+        """Vide puis reconstruit l'index pour les types indiqués (tous par défaut)."""
+        from .models import DocumentRecherche
+
+        resultats = {}
+        for type_objet in types or cls.MODELES:
+            with transaction.atomic():
+                DocumentRecherche.objects.filter(type_objet=type_objet).delete()
+                resultats[type_objet] = cls.reindexer(type_objet)
+        return resultats
+
+    # ------------------------------------------------------------------
+    # Recherche
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _termes(query):
+        return [t for t in re.split(r'[^\w@.+]+', normaliser(query)) if t]
+
+    @classmethod
+    def rechercher(cls, query, limit=10, types=None):
+        """
+        Recherche dans tous les modules (ou les types indiqués) en une requête.
+
+        Retourne {module: [résultats]} avec au plus `limit` résultats par type.
+        """
+        types = [t for t in cls.MODULES if types is None or t in types]
+        resultats = {cls.MODULES[t]: [] for t in types}
+        termes = cls._termes(query)
+        if not termes or not types:
+            return resultats
+
+        vendor = connection.vendor
+        if vendor == 'sqlite' and cls._fts5_disponible():
+            documents = cls._rechercher_sqlite(termes, limit, types)
+        elif vendor == 'postgresql':
+            documents = cls._rechercher_postgresql(termes, normaliser(query), limit, types)
+        else:
+            documents = cls._rechercher_orm(termes, limit, types)
+
+        for document in documents:
+            resultats[cls.MODULES[document.type_objet]].append(cls.serialiser(document))
+        return resultats
+
+    @staticmethod
+    def serialiser(document):
+        resultat = {
+            'id': document.objet_id,
+            'type': document.type_objet,
+            'title': document.titre,
+            'subtitle': document.sous_titre,
+            'url': document.url,
+            'icon': document.icone,
+            'badge': document.badge,
+        }
+        resultat.update(document.donnees or {})
+        return resultat
+
+    @classmethod
+    def _fts5_disponible(cls):
+        alias = connection.alias
+        if alias not in cls._fts5:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'core_documentrecherche_fts'"
+                )
+                cls._fts5[alias] = cursor.fetchone() is not None
+        return cls._fts5[alias]
+
+    @classmethod
+    def _rechercher_sqlite(cls, termes, limit, types):
+        from .models import DocumentRecherche
+
+        # Chaque terme est une recherche par préfixe ; tous les termes sont requis
+        expression = ' '.join('"{}"*'.format(t.replace('"', '""')) for t in termes)
+        table = DocumentRecherche._meta.db_table
+
+        # Par module, FTS5 classe toutes les correspondances (bm25) et ne garde
+        # que les `limit` meilleures : un document ancien reste trouvable.
+        candidats = ' UNION ALL '.join(
+            f"""SELECT * FROM (
+                SELECT rowid AS doc_id, bm25({table}_fts, 1.0, 0.0) AS score
+                FROM {table}_fts WHERE {table}_fts MATCH %s
+                ORDER BY score, rowid DESC LIMIT %s
+            )"""
+            for _ in types
+        )
+        params = []
+        for type_objet in types:
+            params += [f'type_objet : {type_objet} AND contenu : ({expression})', limit]
+
+        sql = f"""
+            SELECT * FROM (
+                SELECT d.*, ROW_NUMBER() OVER (
+                    PARTITION BY d.type_objet ORDER BY c.score, d.id DESC
+                ) AS rang
+                FROM ({candidats}) c
+                JOIN {table} d ON d.id = c.doc_id
+            ) WHERE rang <= %s
+            ORDER BY type_objet, rang
+        """
+        return list(DocumentRecherche.objects.raw(sql, params + [limit]))
+
+    @classmethod
+    def _rechercher_postgresql(cls, termes, query, limit, types):
+        from .models import DocumentRecherche
+
+        # Les LIKE sont servis par l'index GIN trigramme ; le classement par similarité
+        table = DocumentRecherche._meta.db_table
+        marqueurs = ', '.join(['%s'] * len(types))
+        conditions = ' AND '.join(['d.contenu LIKE %s'] * len(termes))
+        motifs = ['%{}%'.format(t.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')) for t in termes]
+        sql = f"""
+            SELECT * FROM (
+                SELECT d.*, ROW_NUMBER() OVER (
+                    PARTITION BY d.type_objet ORDER BY similarity(d.contenu, %s) DESC, d.id DESC
+                ) AS rang
+                FROM {table} d
+                WHERE d.type_objet IN ({marqueurs}) AND {conditions}
+            ) AS resultats WHERE rang <= %s
+            ORDER BY type_objet, rang
+        """
+        return list(DocumentRecherche.objects.raw(sql, [query, *types, *motifs, limit]))
+
+    @classmethod
+    def _rechercher_orm(cls, termes, limit, types):
+        from .models import DocumentRecherche
+
+        filtre = Q(type_objet__in=types)
+        for terme in termes:
+            filtre &= Q(contenu__contains=terme)
+        return list(
+            DocumentRecherche.objects.filter(filtre).annotate(
+                rang=Window(RowNumber(), partition_by=[F('type_objet')], order_by=F('id').desc())
+            ).filter(rang__lte=limit).order_by('type_objet', 'rang')
+        )
+
+
+# ----------------------------------------------------------------------
+# Synchronisation par signaux
+# ----------------------------------------------------------------------
+
+# Documents dépendants à réindexer quand un objet lié change
+DEPENDANCES = {
+    'bailleur': [('propriete', 'bailleur_id')],
+    'locataire': [('contrat', 'locataire_id'), ('paiement', 'contrat__locataire_id')],
+    'propriete': [('contrat', 'propriete_id')],
+    'contrat': [('paiement', 'contrat_id')],
+}
+
+_TYPE_PAR_MODELE = {label: type_objet for type_objet, label in SearchIndex.MODELES.items()}
+
+
+def _synchroniser(type_objet, pk):
+    objet = SearchIndex._queryset(type_objet).filter(pk=pk).first()
+    if objet is None:
+        # Supprimé ou supprimé logiquement : le document disparaît
+        SearchIndex.retirer(type_objet, [pk])
+    else:
+        SearchIndex.indexer(type_objet, [objet])
+
+    for type_dependant, champ in DEPENDANCES.get(type_objet, []):
+        SearchIndex.reindexer(type_dependant, Q(**{champ: pk}))
+
+
+def _objet_modifie(sender, instance, **kwargs):
+    type_objet = _TYPE_PAR_MODELE.get(sender._meta.label)
+    if not type_objet:
+        return
+    pk = instance.pk
+
+    def executer():
+        try:
+            _synchroniser(type_objet, pk)
+        except Exception as e:
+            logger.error(f"Erreur lors de l'indexation de {type_objet} #{pk}: {e}")
+
+    transaction.on_commit(executer)
+
+
+def connecter_signaux():
+    """Branche la mise à jour de l'index sur les modèles indexés."""
+    from django.apps import apps
+
+    for label in SearchIndex.MODELES.values():
+        modele = apps.get_model(label)
+        post_save.connect(_objet_modifie, sender=modele, dispatch_uid=f'search_index_{label}_save')
+        post_delete.connect(_objet_modifie, sender=modele, dispatch_uid=f'search_index_{label}_delete')
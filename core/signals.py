@@ -5,10 +5,25 @@ Signaux Django pour la gestion automatique des PDF
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.core.cache import cache
+from django.db import transaction
 from .models import ConfigurationEntreprise
 from .pdf_cache import PDFCacheManager, PDFRegenerationService
-import threading
-import time
+from .context_processors import invalider_entreprise_config
+from .dashboard_stats import connecter_signaux as connecter_signaux_statistiques
+from .dynamic_navigation import connecter_signaux as connecter_signaux_navigation
+from .search_index import connecter_signaux as connecter_signaux_recherche
+from .suggestion_index import connecter_signaux as connecter_signaux_suggestions
+from .taches import enqueue
+
+@receiver(post_save, sender=ConfigurationEntreprise)
+@receiver(post_delete, sender=ConfigurationEntreprise)
+def configuration_invalider_contexte(sender, instance, **kwargs):
+    """
+    Invalide la configuration mise en cache pour les templates et le hash
+    de configuration des PDF
+    """
+    transaction.on_commit(invalider_entreprise_config)
+    transaction.on_commit(PDFCacheManager.reset_config_hash)
 
 @receiver(post_save, sender=ConfigurationEntreprise)
 def configuration_updated(sender, instance, created, **kwargs):
@@ -21,24 +36,12 @@ def configuration_updated(sender, instance, created, **kwargs):
         # Invalider tous les caches PDF
         PDFCacheManager.invalidate_all_pdf_cache()
         
-        # Démarrer la régénération en arrière-plan
-        def regenerate_documents():
-            try:
-                print("🚀 Démarrage de la régénération automatique des PDF...")
-                result = PDFRegenerationService.regenerate_all_documents()
-                
-                if result['success']:
-                    print(f"✅ Régénération automatique terminée: {result['total_regenerated']} documents mis à jour")
-                else:
-                    print(f"❌ Erreur lors de la régénération: {result.get('error', 'Erreur inconnue')}")
-                    
-            except Exception as e:
-                print(f"❌ Erreur critique lors de la régénération: {e}")
-        
-        # Lancer la régénération en arrière-plan
-        thread = threading.Thread(target=regenerate_documents)
-        thread.daemon = True
-        thread.start()
+        # Régénération confiée à la file de tâches (commande run_workers)
+        enqueue(
+            PDFRegenerationService.regenerate_all_documents,
+            cle='regeneration_pdf',
+            priorite=-10
+        )
 
 @receiver(post_delete, sender=ConfigurationEntreprise)
 def configuration_deleted(sender, instance, **kwargs):
@@ -56,4 +59,17 @@ def force_regenerate_all_documents():
     """
     print("🔄 Forçage de la régénération de tous les documents PDF...")
     result = PDFRegenerationService.regenerate_all_documents()
-    return result
\ No newline at end of file
+    return result
+
+
+# Mise à jour incrémentale de l'instantané des statistiques du tableau de bord
+connecter_signaux_statistiques()
+
+# Synchronisation de l'index de recherche unifié
+connecter_signaux_recherche()
+
+# Mise à jour incrémentale de l'index de suggestions en mémoire
+connecter_signaux_suggestions()
+
+# Invalidation de la navigation contextuelle mise en cache
+connecter_signaux_navigation()
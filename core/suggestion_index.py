@@ -0,0 +1,335 @@
+"""
+Index de suggestions par préfixe (trie en mémoire)
+
+Les termes proposés pendant la saisie (numéros de propriété, villes, types de
+bien, noms des bailleurs et locataires) sont chargés une fois par worker puis
+tenus à jour par signaux. Les réponses sont calculées en mémoire, sans
+requête. La taille est bornée : au-delà de CAPACITE termes, les moins
+récemment utilisés sont évincés.
+
+Chaque modification incrémente une génération partagée en base
+(CompteurPartage) ; les autres workers la relisent toutes les VERIFICATION
+secondes et rechargent leur trie s'il a changé. Le rechargement construit un
+nouveau trie hors verrou puis le substitue à l'ancien : les suggestions
+continuent d'être servies pendant les lectures en base.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+from . import compteurs_partages
+from .search_index import normaliser
+
+logger = logging.getLogger(__name__)
+
+
+class _Noeud:
+    __slots__ = ('enfants', 'cles')
+
+    def __init__(self):
+        self.enfants = {}
+        self.cles = set()
+
+
+class PrefixSuggestionIndex:
+    """Trie de suggestions avec éviction LRU, partagé par le processus."""
+
+    CAPACITE = 20000
+    VERIFICATION = 30  # secondes entre deux contrôles de la génération partagée
+    CLE_GENERATION = 'suggestions:generation'
+
+    def __init__(self, capacite=None):
+        self.capacite = capacite or self.CAPACITE
+        self.lock = threading.RLock()
+        # Un seul rechargement à la fois ; il ne bloque pas les suggestions
+        self._verrou_chargement = threading.Lock()
+        self._racine = _Noeud()
+        self._termes = OrderedDict()  # (catégorie, texte normalisé) -> {'label', 'sources'}
+        self._sources = {}  # (modèle, pk) -> clés des termes fournis
+        self._charge = False
+        self._generation = None
+        self._dernier_controle = 0.0
+        # Mises à jour reçues pendant un rechargement, rejouées sur le nouveau trie
+        self._journal = None
+
+    # ------------------------------------------------------------------
+    # Trie
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _suffixes(texte):
+        """Suffixes commençant à chaque mot : « aminata kabore » et « kabore »."""
+        mots = texte.split()
+        return [' '.join(mots[i:]) for i in range(len(mots))]
+
+    def _inserer_trie(self, cle):
+        for suffixe in self._suffixes(cle[1]):
+            noeud = self._racine
+            for caractere in suffixe:
+                noeud = noeud.enfants.setdefault(caractere, _Noeud())
+            noeud.cles.add(cle)
+
+    def _retirer_trie(self, cle):
+        for suffixe in self._suffixes(cle[1]):
+            chemin = [self._racine]
+            for caractere in suffixe:
+                noeud = chemin[-1].enfants.get(caractere)
+                if noeud is None:
+                    break
+                chemin.append(noeud)
+            else:
+                chemin[-1].cles.discard(cle)
+                # Élagage des nœuds devenus vides
+                for i in range(len(suffixe), 0, -1):
+                    noeud = chemin[i]
+                    if noeud.cles or noeud.enfants:
+                        break
+                    del chemin[i - 1].enfants[suffixe[i - 1]]
+
+    # ------------------------------------------------------------------
+    # Termes et sources
+    # ------------------------------------------------------------------
+
+    def _ajouter(self, source, categorie, label, texte=None):
+        texte = normaliser(texte or label)
+        if not texte:
+            return
+        cle = (categorie, texte)
+        terme = self._termes.get(cle)
+        if terme is None:
+            terme = {'label': label, 'sources': set()}
+            self._termes[cle] = terme
+            self._inserer_trie(cle)
+            if len(self._termes) > self.capacite:
+                self._evincer()
+        terme['sources'].add(source)
+        self._sources.setdefault(source, set()).add(cle)
+
+    def _supprimer_terme(self, cle):
+        terme = self._termes.pop(cle, None)
+        if terme is None:
+            return
+        self._retirer_trie(cle)
+        for source in terme['sources']:
+            cles = self._sources.get(source)
+            if cles is not None:
+                cles.discard(cle)
+                if not cles:
+                    del self._sources[source]
+
+    def _evincer(self):
+        while len(self._termes) > self.capacite:
+            cle = next(iter(self._termes))
+            self._supprimer_terme(cle)
+
+    def _retirer_source(self, source):
+        for cle in self._sources.pop(source, set()):
+            terme = self._termes.get(cle)
+            if terme is None:
+                continue
+            terme['sources'].discard(source)
+            if not terme['sources']:
+                self._supprimer_terme(cle)
+
+    # ------------------------------------------------------------------
+    # Extraction des termes depuis les modèles
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def termes_propriete(numero, ville, type_bien):
+        termes = []
+        if numero:
+            termes.append(('numero', numero, None))
+        if ville:
+            termes.append(('ville', f"à {ville}", ville))
+        if type_bien:
+            termes.append(('type', type_bien, None))
+        return termes
+
+    @staticmethod
+    def termes_personne(categorie, prenom, nom):
+        label = ' '.join(filter(None, [prenom, nom]))
+        return [(categorie, label, None)] if label else []
+
+    def _remplacer_source(self, source, termes):
+        self._retirer_source(source)
+        for categorie, label, texte in termes:
+            self._ajouter(source, categorie, label, texte)
+
+    def _remplir(self):
+        """Lit tous les termes en base (instance neuve, non partagée : sans verrou)."""
+        from proprietes.models import Bailleur, Locataire, Propriete, TypeBien
+
+        for pk, nom in TypeBien.objects.values_list('pk', 'nom').iterator():
+            self._remplacer_source(('typebien', pk), [('type', nom, None)])
+        for pk, numero, ville, type_bien in Propriete.objects.values_list(
+            'pk', 'numero_propriete', 'ville', 'type_bien__nom'
+        ).iterator():
+            self._remplacer_source(('propriete', pk), self.termes_propriete(numero, ville, type_bien))
+        for modele, categorie in ((Bailleur, 'bailleur'), (Locataire, 'locataire')):
+            for pk, prenom, nom in modele.objects.values_list('pk', 'prenom', 'nom').iterator():
+                self._remplacer_source((categorie, pk), self.termes_personne(categorie, prenom, nom))
+
+    def _generation_partagee(self):
+        return compteurs_partages.lire([self.CLE_GENERATION])[self.CLE_GENERATION]
+
+    def charger(self, attendre=True):
+        """
+        (Re)charge tous les termes depuis la base. Le nouveau trie est construit
+        hors verrou puis substitué ; si un autre thread recharge déjà, retourne
+        sans attendre quand `attendre` est faux.
+        """
+        if not self._verrou_chargement.acquire(blocking=attendre):
+            return
+        try:
+            with self.lock:
+                self._journal = []
+            generation = self._generation_partagee()
+            nouveau = PrefixSuggestionIndex(self.capacite)
+            nouveau._remplir()
+
+            with self.lock:
+                # Modifications validées pendant la lecture : rejouées (idempotent)
+                for source, termes in self._journal:
+                    nouveau._remplacer_source(source, termes)
+                self._journal = None
+                self._racine = nouveau._racine
+                self._termes = nouveau._termes
+                self._sources = nouveau._sources
+                self._charge = True
+                self._generation = generation
+                self._dernier_controle = time.monotonic()
+        finally:
+            with self.lock:
+                self._journal = None
+            self._verrou_chargement.release()
+
+    def _verifier(self):
+        """Chargement paresseux, puis rechargement si un autre worker a modifié les données."""
+        if not self._charge:
+            self.charger()
+            return
+        maintenant = time.monotonic()
+        if maintenant - self._dernier_controle < self.VERIFICATION:
+            return
+        self._dernier_controle = maintenant
+        if self._generation_partagee() != self._generation:
+            # Les suggestions restent servies par l'ancien trie pendant la lecture
+            self.charger(attendre=False)
+
+    def mettre_a_jour(self, source, termes):
+        """Remplace les termes fournis par une source ; liste vide pour la retirer."""
+        with self.lock:
+            if self._journal is not None:
+                self._journal.append((source, termes))
+            if not self._charge:
+                return
+            self._remplacer_source(source, termes)
+
+    def signaler_modification(self):
+        """Incrémente la génération partagée pour que les autres workers rechargent."""
+        generation = compteurs_partages.incrementer(self.CLE_GENERATION)
+        with self.lock:
+            # Seule notre modification est en jeu : l'index local est déjà à jour
+            if isinstance(self._generation, int) and generation == self._generation + 1:
+                self._generation = generation
+
+    # ------------------------------------------------------------------
+    # Interrogation
+    # ------------------------------------------------------------------
+
+    def suggerer(self, prefixe, limit=10):
+        """Retourne au plus `limit` libellés dont un mot commence par le préfixe."""
+        prefixe = normaliser(prefixe)
+        if not prefixe:
+            return []
+
+        self._verifier()
+        with self.lock:
+            noeud = self._racine
+            for caractere in prefixe:
+                noeud = noeud.enfants.get(caractere)
+                if noeud is None:
+                    return []
+
+            trouvees = []
+            vues = set()
+            pile = [noeud]
+            while pile and len(trouvees) < limit:
+                courant = pile.pop()
+                for cle in sorted(courant.cles):
+                    if cle not in vues:
+                        vues.add(cle)
+                        trouvees.append(cle)
+                        if len(trouvees) >= limit:
+                            break
+                pile.extend(courant.enfants[c] for c in sorted(courant.enfants, reverse=True))
+
+            for cle in trouvees:
+                self._termes.move_to_end(cle)
+            return [self._termes[cle]['label'] for cle in trouvees]
+
+    def statistiques(self):
+        with self.lock:
+            return {
+                'termes': len(self._termes),
+                'sources': len(self._sources),
+                'capacite': self.capacite,
+                'charge': self._charge,
+            }
+
+
+# Instance du processus
+suggestion_index = PrefixSuggestionIndex()
+
+
+def _termes_objet(label, instance):
+    """Termes courants d'un objet, ou liste vide s'il est supprimé (logiquement ou non)."""
+    if getattr(instance, 'is_deleted', False):
+        return []
+    if label == 'proprietes.Propriete':
+        type_bien = instance.type_bien.nom if instance.type_bien_id else None
+        return PrefixSuggestionIndex.termes_propriete(instance.numero_propriete, instance.ville, type_bien)
+    if label == 'proprietes.TypeBien':
+        return [('type', instance.nom, None)]
+    categorie = 'bailleur' if label == 'proprietes.Bailleur' else 'locataire'
+    return PrefixSuggestionIndex.termes_personne(categorie, instance.prenom, instance.nom)
+
+
+SOURCES = {
+    'proprietes.Propriete': 'propriete',
+    'proprietes.TypeBien': 'typebien',
+    'proprietes.Bailleur': 'bailleur',
+    'proprietes.Locataire': 'locataire',
+}
+
+
+def _objet_modifie(sender, instance, **kwargs):
+    label = sender._meta.label
+    source = (SOURCES[label], instance.pk)
+    try:
+        termes = [] if kwargs.get('signal') is post_delete else _termes_objet(label, instance)
+    except Exception as e:
+        logger.error(f"Erreur lors de l'extraction des suggestions de {label} #{instance.pk}: {e}")
+        return
+
+    def appliquer():
+        suggestion_index.mettre_a_jour(source, termes)
+        suggestion_index.signaler_modification()
+
+    transaction.on_commit(appliquer)
+
+
+def connecter_signaux():
+    """Branche la mise à jour incrémentale du trie."""
+    from django.apps import apps
+
+    for label in SOURCES:
+        modele = apps.get_model(label)
+        post_save.connect(_objet_modifie, sender=modele, dispatch_uid=f'suggestions_{label}_save')
+        post_delete.connect(_objet_modifie, sender=modele, dispatch_uid=f'suggestions_{label}_delete')
@@ -0,0 +1,244 @@
+"""
+File de tâches d'arrière-plan persistée en base.
+
+enqueue() enregistre l'appel d'une fonction (chemin pointé et arguments JSON)
+dans TacheArrierePlan, dans la transaction de l'appelant : la tâche n'est
+visible des travailleurs qu'une fois la transaction validée. La commande
+run_workers lance un ou plusieurs processus qui réservent les tâches par
+priorité décroissante (mise à jour conditionnelle du statut, sans verrou
+applicatif), les exécutent, mesurent leur durée et les replanifient avec un
+délai croissant en cas d'échec.
+
+Une clé de déduplication évite d'empiler la même tâche tant qu'elle est en
+attente. Si une tâche de même clé est en cours, une nouvelle est planifiée
+(les données ont pu changer après sa lecture) et n'est réservée qu'une fois
+la première terminée. Pendant l'exécution, le travailleur signale sa présence
+toutes les BATTEMENT secondes ; une tâche en cours sans signe de vie depuis
+DELAI_ABANDON est considérée comme abandonnée (processus tué).
+"""
+
+import importlib
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import Exists, F, OuterRef
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import TacheArrierePlan
+
+logger = logging.getLogger(__name__)
+
+
+def chemin_fonction(fonction):
+    """Chemin pointé d'une fonction, d'une méthode de classe ou d'une chaîne déjà pointée."""
+    if isinstance(fonction, str):
+        return fonction
+    proprietaire = getattr(fonction, '__self__', None)
+    if isinstance(proprietaire, type):
+        return f"{proprietaire.__module__}.{proprietaire.__qualname__}.{fonction.__name__}"
+    return f"{fonction.__module__}.{fonction.__qualname__}"
+
+
+def resoudre_fonction(chemin):
+    """Importe le plus long module du chemin puis descend les attributs restants."""
+    parties = chemin.split('.')
+    for i in range(len(parties) - 1, 0, -1):
+        try:
+            objet = importlib.import_module('.'.join(parties[:i]))
+        except ImportError:
+            continue
+        for attribut in parties[i:]:
+            objet = getattr(objet, attribut)
+        return objet
+    raise ImportError(f"Fonction de tâche introuvable: {chemin}")
+
+
+def enqueue(fonction, *args, priorite=0, cle=None, max_tentatives=3, delai=None, **kwargs):
+    """
+    Met en file l'appel fonction(*args, **kwargs) et retourne la tâche.
+    Si une tâche de même clé est déjà en attente, elle est retournée telle
+    quelle ; une tâche de même clé en cours n'empêche pas la mise en file.
+    """
+    tache = TacheArrierePlan(
+        fonction=chemin_fonction(fonction),
+        arguments=list(args),
+        arguments_nommes=kwargs,
+        cle_unicite=cle,
+        priorite=priorite,
+        max_tentatives=max_tentatives,
+        executer_apres=timezone.now() + timedelta(seconds=delai) if delai else timezone.now(),
+    )
+    if cle is None:
+        tache.save()
+        return tache
+    try:
+        with transaction.atomic():
+            tache.save()
+        return tache
+    except IntegrityError:
+        existante = TacheArrierePlan.objects.filter(cle_unicite=cle, statut='en_attente').first()
+        if existante is None:
+            raise
+        return existante
+
+
+def _meme_cle(statut):
+    """Existence d'une autre tâche de même clé dans le statut donné."""
+    return Exists(TacheArrierePlan.objects.filter(
+        cle_unicite=OuterRef('cle_unicite'), statut=statut
+    ).exclude(pk=OuterRef('pk')))
+
+
+class _Battement(threading.Thread):
+    """Met à jour date_signal de la tâche tant qu'elle s'exécute."""
+
+    def __init__(self, tache_id, intervalle):
+        super().__init__(daemon=True, name=f"battement-tache-{tache_id}")
+        self.tache_id = tache_id
+        self.intervalle = intervalle
+        self.arret = threading.Event()
+
+    def run(self):
+        try:
+            while not self.arret.wait(self.intervalle):
+                TacheArrierePlan.objects.filter(pk=self.tache_id, statut='en_cours').update(
+                    date_signal=timezone.now()
+                )
+        except Exception as e:
+            logger.error(f"Battement de la tâche #{self.tache_id} interrompu: {e}")
+        finally:
+            # Connexion propre à ce thread
+            connection.close()
+
+
+class TravailleurTaches:
+    """Boucle d'un processus travailleur : réserver, exécuter, recommencer."""
+
+    # Intervalle du signe de vie envoyé pendant l'exécution d'une tâche
+    BATTEMENT = getattr(settings, 'TACHES_BATTEMENT', 30)
+    # Sans signe de vie depuis ce délai, une tâche en cours est abandonnée
+    DELAI_ABANDON = getattr(settings, 'TACHES_DELAI_ABANDON', 5 * 60)
+    # Délai avant nouvelle tentative, doublé à chaque échec
+    DELAI_REESSAI = getattr(settings, 'TACHES_DELAI_REESSAI', 30)
+    CANDIDATS = 10
+
+    def __init__(self, nom=None):
+        self.nom = nom or f"{socket.gethostname()}:{os.getpid()}"
+        self.arret_demande = False
+
+    def reserver(self):
+        """Réserve la prochaine tâche exécutable, ou None si la file est vide."""
+        maintenant = timezone.now()
+        # Une tâche attend la fin de celle de même clé en cours
+        candidats = TacheArrierePlan.objects.filter(
+            statut='en_attente', executer_apres__lte=maintenant
+        ).exclude(_meme_cle('en_cours')).order_by('-priorite', 'executer_apres', 'pk').values_list('pk', flat=True)[:self.CANDIDATS]
+        for pk in candidats:
+            # Seul le travailleur dont la mise à jour aboutit exécute la tâche
+            reservee = TacheArrierePlan.objects.filter(pk=pk, statut='en_attente').update(
+                statut='en_cours',
+                travailleur=self.nom,
+                date_debut=maintenant,
+                date_signal=maintenant,
+                date_fin=None,
+                tentatives=F('tentatives') + 1,
+            )
+            if reservee:
+                return TacheArrierePlan.objects.get(pk=pk)
+        return None
+
+    @staticmethod
+    def _serialisable(resultat):
+        try:
+            DjangoJSONEncoder().encode(resultat)
+            return resultat
+        except (TypeError, ValueError):
+            return {'repr': repr(resultat)}
+
+    def executer(self, tache):
+        debut = time.monotonic()
+        battement = _Battement(tache.pk, self.BATTEMENT)
+        battement.start()
+        try:
+            resultat = resoudre_fonction(tache.fonction)(*tache.arguments, **tache.arguments_nommes)
+        except Exception:
+            erreur = traceback.format_exc()
+            logger.error(f"Tâche #{tache.pk} {tache.fonction} en échec (tentative {tache.tentatives}): {erreur}")
+            self._terminer(tache, debut, erreur=erreur)
+            return False
+        finally:
+            battement.arret.set()
+            battement.join()
+        self._terminer(tache, debut, resultat=self._serialisable(resultat))
+        return True
+
+    def _terminer(self, tache, debut, resultat=None, erreur=None):
+        champs = {
+            'date_fin': timezone.now(),
+            'duree': round(time.monotonic() - debut, 3),
+        }
+        if erreur is None:
+            champs.update(statut='terminee', resultat=resultat, derniere_erreur='')
+        elif tache.tentatives < tache.max_tentatives:
+            champs.update(
+                statut='en_attente',
+                derniere_erreur=erreur,
+                executer_apres=timezone.now() + timedelta(
+                    seconds=self.DELAI_REESSAI * 2 ** (tache.tentatives - 1)
+                ),
+            )
+        else:
+            champs.update(statut='echouee', derniere_erreur=erreur)
+        try:
+            with transaction.atomic():
+                TacheArrierePlan.objects.filter(pk=tache.pk).update(**champs)
+        except IntegrityError:
+            # Nouvelle tentative inutile : une tâche de même clé attend déjà
+            champs.pop('executer_apres', None)
+            champs['statut'] = 'echouee'
+            TacheArrierePlan.objects.filter(pk=tache.pk).update(**champs)
+
+    @classmethod
+    def recuperer_abandonnees(cls):
+        """Remet en file (ou en échec) les tâches en cours sans signe de vie depuis DELAI_ABANDON."""
+        limite = timezone.now() - timedelta(seconds=cls.DELAI_ABANDON)
+        abandonnees = TacheArrierePlan.objects.annotate(
+            dernier_signal=Coalesce('date_signal', 'date_debut')
+        ).filter(statut='en_cours', dernier_signal__lt=limite)
+        erreur = f"Abandonnée après {cls.DELAI_ABANDON}s sans signe de vie"
+        # Pas de relance si une tâche de même clé attend déjà
+        relancees = abandonnees.filter(tentatives__lt=F('max_tentatives')).exclude(
+            _meme_cle('en_attente')
+        ).update(
+            statut='en_attente', derniere_erreur=erreur, executer_apres=timezone.now()
+        )
+        echouees = abandonnees.update(statut='echouee', derniere_erreur=erreur, date_fin=timezone.now())
+        return relancees + echouees
+
+    def boucler(self, intervalle=2.0, vider=False):
+        """
+        Exécute les tâches jusqu'à l'arrêt demandé, ou jusqu'à ce que la file
+        soit vide si `vider`. Retourne le nombre de tâches traitées.
+        """
+        traitees = 0
+        while not self.arret_demande:
+            close_old_connections()
+            tache = self.reserver()
+            if tache is None:
+                if vider:
+                    break
+                time.sleep(intervalle)
+                continue
+            self.executer(tache)
+            traitees += 1
+        close_old_connections()
+        return traitees
@@ -0,0 +1,89 @@
+"""
+Outils partagés des tests : fabriques de données minimales et contrôle du
+nombre de requêtes des listes paginées de l'API REST.
+"""
+
+import itertools
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+_numeros = itertools.count(1)
+
+
+def numero():
+    """Numéro unique dans la session de test (noms, références, téléphones)."""
+    return next(_numeros)
+
+
+def creer_bailleur():
+    from proprietes.models import Bailleur
+
+    n = numero()
+    return Bailleur.objects.create(
+        numero_bailleur=f'BAI-TEST-{n:04d}', nom=f'Nom{n}', prenom=f'Prenom{n}', telephone=f'0102{n:06d}'
+    )
+
+
+def creer_locataire():
+    from proprietes.models import Locataire
+
+    n = numero()
+    return Locataire.objects.create(
+        numero_locataire=f'LOC-TEST-{n:04d}', nom=f'Nom{n}', prenom=f'Prenom{n}', telephone=f'0203{n:06d}'
+    )
+
+
+def creer_propriete(bailleur=None):
+    from proprietes.models import Propriete, TypeBien
+
+    n = numero()
+    type_bien, _ = TypeBien.objects.get_or_create(nom='Appartement')
+    return Propriete.objects.create(
+        numero_propriete=f'PRO-TEST-{n:04d}', titre=f'Propriété {n}', type_bien=type_bien,
+        bailleur=bailleur or creer_bailleur(),
+    )
+
+
+def creer_contrat(**champs):
+    from contrats.models import Contrat
+
+    champs.setdefault('date_debut', date(2025, 1, 1))
+    champs.setdefault('date_signature', champs['date_debut'])
+    champs.setdefault('loyer_mensuel', '100000')
+    return Contrat.objects.create(
+        numero_contrat=f'CT-TEST-{numero():04d}', propriete=creer_propriete(), locataire=creer_locataire(),
+        **champs
+    )
+
+
+class ListePagineeMixin:
+    """
+    Pour un TestCase : une page de liste coûte le même nombre de requêtes
+    pour 2 ou 12 lignes (client API authentifié).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.utilisateur = get_user_model().objects.create_user(username='api_test', password='test')
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.utilisateur)
+
+    def verifier_requetes(self, url, creer, requetes):
+        for _ in range(2):
+            creer()
+        with self.assertNumQueries(requetes):
+            reponse = self.client.get(url)
+        self.assertEqual(reponse.status_code, 200)
+        self.assertEqual(len(reponse.data['results']), 2)
+
+        for _ in range(10):
+            creer()
+        with self.assertNumQueries(requetes):
+            reponse = self.client.get(url)
+        self.assertEqual(len(reponse.data['results']), 12)
@@ -8,7 +8,8 @@ from .main_views import (
     rapports_audit,
     detection_anomalies,
     detail_audit_log,
-    audit_statistiques
+    audit_statistiques,
+    telecharger_export
 )
 from .views import (
     configuration_entreprise_admin,
@@ -87,6 +88,7 @@ urlpatterns = [
     
     # Audit et sécurité
     path('rapports-audit/', rapports_audit, name='rapports_audit'),
+    path('exports/<int:tache_id>/', telecharger_export, name='telecharger_export'),
     path('detection-anomalies/', detection_anomalies, name='detection_anomalies'),
     path('audit/log/<int:log_id>/', detail_audit_log, name='detail_audit_log'),
     path('audit/statistiques/', audit_statistiques, name='audit_statistiques'),
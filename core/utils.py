@@ -719,7 +719,7 @@ def log_audit_action(request, action, content_type=None, object_id=None, object_
         details: Détails supplémentaires en JSON (optionnel)
     """
     try:
-        from .models import AuditLog
+        from .audit import journaliser
         from django.contrib.contenttypes.models import ContentType
         
         # Récupérer l'adresse IP et le user agent
@@ -727,7 +727,7 @@ def log_audit_action(request, action, content_type=None, object_id=None, object_
         user_agent = request.META.get('HTTP_USER_AGENT', '')
         
         # Créer le log d'audit
-        AuditLog.objects.create(
+        journaliser(
             user=request.user,
             action=action,
             content_type=content_type,
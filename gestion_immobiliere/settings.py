@@ -35,6 +35,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.AuditTamponMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -100,6 +101,16 @@ LOGOUT_REDIRECT_URL = '/utilisateurs/connexion-groupes/'
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 
+# Magasin disque des PDF générés (adressé par contenu, taille plafonnée)
+PDF_STORE_DIR = BASE_DIR / 'pdf_store'
+PDF_STORE_MAX_SIZE = 500 * 1024 * 1024  # 500 Mo
+
+# API REST : pagination par curseur sur toutes les listes
+REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS': 'core.api_rest.PaginationCurseur',
+    'PAGE_SIZE': 50,
+}
+
 # Configuration de sécurité pour le développement
 if DEBUG:
     # En développement, on peut désactiver certaines vérifications de sécurité
@@ -34,6 +34,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.AuditTamponMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -92,6 +93,12 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 
+# API REST : pagination par curseur sur toutes les listes
+REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS': 'core.api_rest.PaginationCurseur',
+    'PAGE_SIZE': 50,
+}
+
 # Configuration des URLs
 LOGIN_URL = '/utilisateurs/connexion-groupes/'
 LOGIN_REDIRECT_URL = '/'
@@ -237,45 +237,22 @@ class PaymentOverdueService:
     def _get_overdue_contracts(self, overdue_date):
         """Obtenir les contrats avec paiements en retard"""
         from contrats.models import Contrat
-        from paiements.models import Paiement
-        from dateutil.relativedelta import relativedelta
+        from paiements.services_retards import DetecteurRetards
+        
+        today = timezone.now().date()
         
         # Trouver les contrats actifs
         active_contracts = Contrat.objects.filter(
-            date_fin__gte=timezone.now().date(),
+            date_fin__gte=today,
             est_actif=True
-        )
-        
-        overdue_contracts = []
-        today = timezone.now().date()
+        ).select_related('locataire', 'propriete', 'propriete__bailleur')
         
-        for contrat in active_contracts:
-            # Vérifier les retards pour le mois en cours ET les mois précédents
-            months_to_check = self._get_months_to_check(today, overdue_date)
-            
-            for check_date in months_to_check:
-                # Vérifier si le paiement du mois est en retard
-                expected_payment_date = datetime(
-                    check_date.year, 
-                    check_date.month, 
-                    contrat.jour_paiement or 1
-                ).date()
-                
-                # Chercher un paiement pour ce mois
-                payment_exists = Paiement.objects.filter(
-                    contrat=contrat,
-                    date_paiement__year=expected_payment_date.year,
-                    date_paiement__month=expected_payment_date.month,
-                    statut='valide'
-                ).exists()
-                
-                if not payment_exists and today > expected_payment_date:
-                    # Ajouter le contrat s'il n'est pas déjà dans la liste
-                    if contrat not in overdue_contracts:
-                        overdue_contracts.append(contrat)
-                    break  # Un seul retard par contrat suffit
-        
-        return overdue_contracts
+        # Vérifier les retards pour le mois en cours ET les mois précédents, en une requête
+        return DetecteurRetards.contrats_en_retard(
+            active_contracts,
+            mois=self._get_months_to_check(today, overdue_date),
+            aujourd_hui=today
+        )
     
     def _get_months_to_check(self, today, overdue_date):
         """Déterminer quels mois vérifier pour les retards"""
@@ -695,10 +695,8 @@ class RecapMensuelAdmin(admin.ModelAdmin):
     
     def recalculer_totaux(self, request, queryset):
         """Action pour recalculer les totaux des récapitulatifs."""
-        updated = 0
-        for recap in queryset:
-            recap.calculer_totaux_bailleur()
-            updated += 1
+        from .services_recap_mensuel import ServiceRecapMensuel
+        updated = len(ServiceRecapMensuel.appliquer_totaux(queryset))
         self.message_user(request, f'{updated} récapitulatif(s) recalculé(s) avec succès.')
     recalculer_totaux.short_description = _("Recalculer les totaux")
     
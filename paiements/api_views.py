@@ -10,12 +10,15 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.views import View
+from django.contrib.contenttypes.models import ContentType
 import re
 
 from .models import Paiement
-from .serializers import PaiementSerializer, PaiementDetailSerializer
+from .services_grand_livre import planifier
+from .serializers import PaiementSerializer, PaiementDetailSerializer, PaiementListSerializer
 from contrats.models import Contrat
 from proprietes.models import Locataire, Propriete
+from core.audit import journaliser
 
 def clean_numeric_value(value):
     """Nettoie une valeur numérique en supprimant les caractères non numériques"""
@@ -402,7 +405,8 @@ def api_contexte_intelligent_contrat(request, contrat_id):
                 
                 # Calculer le prochain mois de paiement en tenant compte des avances
                 prochain_mois_paiement = ServiceGestionAvance.calculer_prochain_mois_paiement(contrat)
-                montant_du_mois_prochain, montant_avance_utilisee = ServiceGestionAvance.calculer_montant_du_mois(
+                from .services_grand_livre import GrandLivreContrat
+                montant_du_mois_prochain, montant_avance_utilisee = GrandLivreContrat.montant_du_mois(
                     contrat, prochain_mois_paiement
                 )
                 
@@ -765,14 +769,20 @@ class PaiementViewSet(viewsets.ModelViewSet):
     ordering = ['-created_at']
     
     def get_serializer_class(self):
-        """Utiliser un serializer détaillé pour les actions de détail."""
-        if self.action in ['retrieve', 'list']:
+        """Serializer léger pour la liste, détaillé pour le détail."""
+        if self.action == 'list':
+            return PaiementListSerializer
+        if self.action == 'retrieve':
             return PaiementDetailSerializer
         return PaiementSerializer
     
     def get_queryset(self):
         """Filtrer les paiements selon les permissions utilisateur."""
         queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = queryset.select_related(None).select_related(
+                'contrat__locataire', 'contrat__propriete'
+            )
         
         # Filtrer les paiements supprimés
         queryset = queryset.filter(is_deleted=False)
@@ -805,7 +815,7 @@ class PaiementViewSet(viewsets.ModelViewSet):
         
         paiement.statut = 'valide'
         paiement.date_validation = timezone.now()
-        paiement.validé_par = request.user
+        paiement.valide_par = request.user
         paiement.save()
         
         return Response({
@@ -886,51 +896,38 @@ class PaiementViewSet(viewsets.ModelViewSet):
     def paiements_en_retard(self, request):
         """Obtenir les paiements en retard."""
         from contrats.models import Contrat
-        from datetime import date
-        from calendar import monthrange
+        from .services_retards import DetecteurRetards
         
-        paiements_retard = []
         contrats_actifs = Contrat.objects.filter(est_actif=True).select_related(
             'locataire', 'propriete'
         )
         
         aujourd_hui = timezone.now().date()
         
-        for contrat in contrats_actifs:
-            # Calculer la date d'échéance pour le mois en cours
-            annee = aujourd_hui.year
-            mois = aujourd_hui.month
-            
-            # Obtenir le dernier jour du mois
-            _, dernier_jour_mois = monthrange(annee, mois)
-            
-            # Date d'échéance = jour de paiement du contrat ou dernier jour du mois
-            jour_paiement = min(contrat.jour_paiement, dernier_jour_mois)
-            date_echeance = date(annee, mois, jour_paiement)
-            
-            # Vérifier si le paiement pour ce mois existe et est en retard
-            paiement_mois = Paiement.objects.filter(
-                contrat=contrat,
-                type_paiement='loyer',
-                date_paiement__year=annee,
-                date_paiement__month=mois,
-                statut__in=['en_attente', 'valide']
-            ).first()
-            
-            if not paiement_mois and aujourd_hui > date_echeance:
-                jours_retard = (aujourd_hui - date_echeance).days
-                paiements_retard.append({
-                    'contrat': {
-                        'id': contrat.id,
-                        'numero_contrat': contrat.numero_contrat,
-                        'locataire': f"{contrat.locataire.nom} {contrat.locataire.prenom}",
-                        'propriete': contrat.propriete.titre,
-                        'loyer_mensuel': contrat.loyer_mensuel
-                    },
-                    'date_echeance': date_echeance,
-                    'jours_retard': jours_retard,
-                    'montant_du': contrat.loyer_mensuel
-                })
+        # Loyer du mois en cours ni payé ni en attente, échéance dépassée
+        retards = DetecteurRetards.detecter(
+            contrats_actifs,
+            mois=[aujourd_hui.replace(day=1)],
+            statuts=('en_attente', 'valide'),
+            types=('loyer',),
+            aujourd_hui=aujourd_hui
+        )
+        
+        paiements_retard = []
+        for retard in retards:
+            contrat = retard['contrat']
+            paiements_retard.append({
+                'contrat': {
+                    'id': contrat.id,
+                    'numero_contrat': contrat.numero_contrat,
+                    'locataire': f"{contrat.locataire.nom} {contrat.locataire.prenom}",
+                    'propriete': contrat.propriete.titre,
+                    'loyer_mensuel': contrat.loyer_mensuel
+                },
+                'date_echeance': retard['date_echeance'],
+                'jours_retard': retard['jours_retard'],
+                'montant_du': clean_numeric_value(contrat.loyer_mensuel)
+            })
         
         return Response({
             'paiements_en_retard': paiements_retard,
@@ -960,13 +957,36 @@ class PaiementViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Valider tous les paiements
-        count = paiements.update(
+        # Valider tous les paiements en une requête ; update() ne déclenche
+        # pas les signaux, le grand livre et l'audit sont donc faits ici
+        a_valider = list(paiements.values_list('id', 'contrat_id', 'reference_paiement'))
+        count = Paiement.objects.filter(
+            id__in=[pk for pk, _, _ in a_valider],
+            statut='en_attente'
+        ).update(
             statut='valide',
             date_validation=timezone.now(),
-            validé_par=request.user
+            valide_par=request.user
         )
         
+        for contrat_id in {contrat_id for _, contrat_id, _ in a_valider}:
+            planifier(contrat_id)
+        
+        # Un événement par paiement, écrits ensemble en fin de requête
+        content_type = ContentType.objects.get_for_model(Paiement)
+        for pk, _, reference in a_valider:
+            journaliser(
+                content_type=content_type,
+                object_id=pk,
+                action='validation',
+                object_repr=reference,
+                details={'old_data': {'statut': 'en_attente'}, 'new_data': {'statut': 'valide'}},
+                user=request.user,
+                ip_address=request.META.get('REMOTE_ADDR'),
+                user_agent=request.META.get('HTTP_USER_AGENT', ''),
+                description='Validation multiple'
+            )
+        
         return Response({
             'message': f'{count} paiement(s) validé(s) avec succès.',
             'paiements_valides': count
@@ -999,7 +1019,8 @@ class PaiementCautionAvanceViewSet(viewsets.ModelViewSet):
     ).select_related(
         'contrat__locataire',
         'contrat__propriete',
-        'contrat__propriete__bailleur'
+        'contrat__propriete__bailleur',
+        'contrat__propriete__type_bien'
         ).order_by('-date_paiement')
     
     serializer_class = PaiementDetailSerializer
@@ -1222,7 +1243,7 @@ class PaiementCautionAvanceViewSet(viewsets.ModelViewSet):
         # Valider le paiement
         paiement.statut = 'valide'
         paiement.date_validation = timezone.now()
-        paiement.validé_par = request.user
+        paiement.valide_par = request.user
         paiement.save()
         
         return Response({
@@ -12,3 +12,12 @@ class PaiementsConfig(AppConfig):
         from . import models
         # Importer les signaux quand l'application est prête
         from . import signals_retrait
+        # Filigrane de consommation des avances invalidé quand elles changent
+        from .services_consommation_avance import connecter_signaux
+        connecter_signaux()
+        # Grand livre mensuel des contrats tenu à jour par les paiements et les avances
+        from .services_grand_livre import connecter_signaux as connecter_grand_livre
+        connecter_grand_livre()
+        # Suivi des avances recalculé quand une consommation disparaît
+        from .services_suivi_avances import connecter_signaux as connecter_suivi_avances
+        connecter_suivi_avances()
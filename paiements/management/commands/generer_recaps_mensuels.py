@@ -0,0 +1,66 @@
+"""
+Commande de management pour générer en masse les récapitulatifs mensuels des bailleurs
+"""
+
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from paiements.services_recap_mensuel import ServiceRecapMensuel
+
+
+class Command(BaseCommand):
+    help = 'Génère et recalcule les récapitulatifs mensuels de tous les bailleurs pour un mois'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--mois',
+            type=str,
+            help='Mois au format AAAA-MM (par défaut : le mois précédent)',
+        )
+        parser.add_argument(
+            '--bailleur',
+            type=int,
+            action='append',
+            help='ID du bailleur à traiter (répétable, tous par défaut)',
+        )
+        parser.add_argument(
+            '--inclure-valides',
+            action='store_true',
+            help='Recalculer aussi les récapitulatifs validés, envoyés ou payés',
+        )
+        parser.add_argument(
+            '--lier-paiements',
+            action='store_true',
+            help='Lier les paiements validés du mois à tous les récapitulatifs du mois',
+        )
+
+    def handle(self, *args, **options):
+        if options['mois']:
+            try:
+                mois = datetime.strptime(options['mois'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError('Format de mois invalide, attendu AAAA-MM')
+        else:
+            mois = ServiceRecapMensuel.mois_precedent()
+
+        self.stdout.write(f"🚀 Génération des récapitulatifs de {mois.strftime('%m/%Y')}...")
+        debut = time.time()
+
+        resultat = ServiceRecapMensuel.generer_recaps_mois(
+            mois,
+            bailleur_ids=options['bailleur'],
+            inclure_valides=options['inclure_valides'],
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ {resultat['crees']} récapitulatif(s) créé(s), "
+                f"{resultat['mis_a_jour']} recalculé(s) en {time.time() - debut:.2f}s"
+            )
+        )
+
+        if options['lier_paiements']:
+            liens = ServiceRecapMensuel.lier_paiements_mois(mois)
+            self.stdout.write(self.style.SUCCESS(f'🔗 {liens} lien(s) paiement/récapitulatif traité(s)'))
@@ -7,7 +7,9 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import date, datetime
 
+from paiements.models_avance import SuiviAvance
 from paiements.services_monitoring_avance import ServiceMonitoringAvance
+from paiements.services_suivi_avances import ServiceSuiviAvances
 
 
 class Command(BaseCommand):
@@ -34,6 +36,11 @@ class Command(BaseCommand):
             action='store_true',
             help='Exécuter toutes les tâches de monitoring',
         )
+        parser.add_argument(
+            '--complet',
+            action='store_true',
+            help='Recalculer le suivi de toutes les avances (sinon seulement les contrats modifiés)',
+        )
 
     def handle(self, *args, **options):
         self.stdout.write(
@@ -54,19 +61,33 @@ class Command(BaseCommand):
                         self.style.ERROR('❌ Erreur lors de la synchronisation')
                     )
             
+            # Instantané du suivi des avances, lu par les alertes, le rapport et les vues
+            self.stdout.write('🧮 Calcul du suivi des avances...')
+            suivi = ServiceSuiviAvances.actualiser(complet=options['complet'])
+            mode = 'complet' if suivi['complet'] else 'incrémental'
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'✅ Suivi {mode}: {suivi["avances"]} avance(s) recalculée(s) '
+                    f'sur {suivi["contrats"]} contrat(s)'
+                )
+            )
+            
             # Envoi des alertes
             if options['alert'] or options['all']:
                 self.stdout.write('🚨 Vérification des alertes...')
-                message = ServiceMonitoringAvance.envoyer_alertes_expiration()
-                if message:
+                resultat = ServiceMonitoringAvance.envoyer_alertes()
+                if resultat.get('alertes_envoyees'):
                     self.stdout.write(
-                        self.style.WARNING('⚠️ Alertes envoyées:')
+                        self.style.WARNING(f'⚠️ {resultat["message"]}')
                     )
-                    self.stdout.write(message)
-                else:
+                elif resultat.get('success'):
                     self.stdout.write(
                         self.style.SUCCESS('✅ Aucune alerte à envoyer')
                     )
+                else:
+                    self.stdout.write(
+                        self.style.ERROR(f'❌ Erreur lors de l\'envoi des alertes: {resultat.get("erreur")}')
+                    )
             
             # Génération du rapport
             if options['report'] or options['all']:
@@ -85,7 +106,9 @@ class Command(BaseCommand):
             # Si aucune option spécifiée, afficher le statut
             if not any([options['sync'], options['alert'], options['report'], options['all']]):
                 self.stdout.write('📊 Analyse de la progression des avances...')
-                progressions = ServiceMonitoringAvance.analyser_progression_avances()
+                progressions = SuiviAvance.objects.exclude(niveau_risque='epuisee').select_related(
+                    'avance', 'contrat', 'contrat__locataire'
+                ).order_by('-progression')
                 self.afficher_progressions(progressions)
             
             self.stdout.write(
@@ -104,20 +127,18 @@ class Command(BaseCommand):
         self.stdout.write('='*50)
         
         # Statistiques
-        stats = rapport['statistiques']
-        self.stdout.write(f'📈 Total des avances: {stats["total_avances"]}')
-        self.stdout.write(f'🔴 Critiques: {stats["avances_critiques"]}')
-        self.stdout.write(f'🟡 Avancées: {stats["avances_avancees"]}')
-        self.stdout.write(f'🟢 Normales: {stats["avances_normales"]}')
-        self.stdout.write(f'⚫ Épuisées: {stats["avances_epuisees"]}')
+        self.stdout.write(f'📈 Total des avances: {rapport["total_avances"]}')
+        self.stdout.write(f'🔴 Critiques: {rapport["avances_critiques"]}')
+        self.stdout.write(f'🟢 Actives: {rapport["avances_actives"]}')
+        self.stdout.write(f'⚫ Épuisées: {rapport["avances_epuisees"]}')
+        self.stdout.write(f'📉 Progression moyenne: {rapport["progression_moyenne"]:.1f}%')
         
         # Montants
-        montants = rapport['montants']
         self.stdout.write(f'\n💰 MONTANTS:')
-        self.stdout.write(f'   Total: {montants["total_avances"]:,.0f} F CFA')
-        self.stdout.write(f'   Consommé: {montants["total_consomme"]:,.0f} F CFA')
-        self.stdout.write(f'   Restant: {montants["total_restant"]:,.0f} F CFA')
-        self.stdout.write(f'   Pourcentage: {montants["pourcentage_consomme"]:.1f}%')
+        self.stdout.write(f'   Total: {rapport["montant_total_avances"]:,.0f} F CFA')
+        self.stdout.write(f'   Consommé: {rapport["montant_consomme_total"]:,.0f} F CFA')
+        self.stdout.write(f'   Restant: {rapport["montant_restant_total"]:,.0f} F CFA')
+        self.stdout.write(f'   Pourcentage: {rapport["pourcentage_consomme"]:.1f}%')
         
         self.stdout.write('='*50)
 
@@ -131,40 +152,15 @@ class Command(BaseCommand):
         self.stdout.write('📊 PROGRESSION DES AVANCES')
         self.stdout.write('='*80)
         
-        for progression in progressions:
-            avance = progression['avance']
-            self.stdout.write(f'\n🏠 {avance.contrat.locataire.get_nom_complet()}')
-            self.stdout.write(f'   Contrat: {avance.contrat.numero_contrat}')
-            self.stdout.write(f'   Montant: {avance.montant_avance:,.0f} F CFA')
-            self.stdout.write(f'   Restant: {progression["montant_restant"]:,.0f} F CFA')
-            self.stdout.write(f'   Progression: {progression["pourcentage_reel"]:.1f}%')
-            self.stdout.write(f'   Statut: {progression["statut_progression"].upper()}')
-            self.stdout.write(f'   Mois restants: {progression["mois_restants_estimes"]}')
+        for suivi in progressions:
+            self.stdout.write(f'\n🏠 {suivi.contrat.locataire.get_nom_complet()}')
+            self.stdout.write(f'   Contrat: {suivi.contrat.numero_contrat}')
+            self.stdout.write(f'   Montant: {suivi.avance.montant_avance:,.0f} F CFA')
+            self.stdout.write(f'   Restant: {suivi.montant_restant:,.0f} F CFA')
+            self.stdout.write(f'   Progression: {suivi.progression:.1f}%')
+            self.stdout.write(f'   Statut: {suivi.niveau_risque.upper()}')
+            self.stdout.write(f'   Mois restants: {suivi.mois_restants}')
+            if suivi.date_epuisement_estimee:
+                self.stdout.write(f'   Épuisement estimé: {suivi.date_epuisement_estimee:%m/%Y}')
         
         self.stdout.write('='*80)
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
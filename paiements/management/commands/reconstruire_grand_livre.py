@@ -0,0 +1,32 @@
+"""
+Commande Django pour reconstruire le grand livre mensuel des contrats.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from paiements.services_grand_livre import GrandLivreContrat
+
+
+class Command(BaseCommand):
+    help = 'Reconstruit le grand livre mensuel (dû, payé, avance, solde) des contrats'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--contrat',
+            type=int,
+            action='append',
+            help='Limite la reconstruction à ce contrat (id, option répétable)',
+        )
+
+    def handle(self, *args, **options):
+        contrats = options['contrat']
+        cible = f"{len(contrats)} contrat(s)" if contrats else 'tous les contrats'
+        self.stdout.write(self.style.SUCCESS(f'📒 Reconstruction du grand livre pour {cible}...'))
+
+        debut = time.monotonic()
+        lignes = GrandLivreContrat.reconstruire(contrats)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Terminé en {time.monotonic() - debut:.1f}s: {lignes} ligne(s) mensuelle(s)')
+        )
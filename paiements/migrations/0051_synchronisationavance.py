@@ -0,0 +1,28 @@
+# Generated manually for the bulk advance consumption engine
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contrats', '0010_merge_20251008_1344'),
+        ('paiements', '0050_add_mois_effet_personnalise'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SynchronisationAvance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mois_limite', models.DateField(verbose_name="Consommé jusqu'au mois")),
+                ('date_synchronisation', models.DateTimeField(auto_now=True, verbose_name='Date de synchronisation')),
+                ('contrat', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='synchronisation_avances', to='contrats.contrat', verbose_name='Contrat')),
+            ],
+            options={
+                'verbose_name': 'Synchronisation des avances',
+                'verbose_name_plural': 'Synchronisations des avances',
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated manually for the per-contract monthly ledger
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('paiements', '0051_synchronisationavance'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='historiquepaiement',
+            name='paiement',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='historique', to='paiements.paiement', verbose_name='Paiement'),
+        ),
+        migrations.AddField(
+            model_name='historiquepaiement',
+            name='solde',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Solde'),
+        ),
+        migrations.AddField(
+            model_name='historiquepaiement',
+            name='nombre_paiements',
+            field=models.PositiveIntegerField(default=0, verbose_name='Nombre de paiements'),
+        ),
+        migrations.AddField(
+            model_name='historiquepaiement',
+            name='date_mise_a_jour',
+            field=models.DateTimeField(auto_now=True, verbose_name='Date de mise à jour'),
+        ),
+    ]
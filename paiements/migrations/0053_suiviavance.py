@@ -0,0 +1,38 @@
+# Generated manually for the batched advance monitoring snapshot
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contrats', '0010_merge_20251008_1344'),
+        ('paiements', '0052_historiquepaiement_grand_livre'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SuiviAvance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mois_consommes', models.PositiveIntegerField(default=0, verbose_name='Mois consommés')),
+                ('mois_restants', models.PositiveIntegerField(default=0, verbose_name='Mois restants')),
+                ('montant_consomme', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Montant consommé')),
+                ('montant_restant', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Montant restant')),
+                ('progression', models.DecimalField(decimal_places=2, default=0, max_digits=6, verbose_name='Progression (%)')),
+                ('date_epuisement_estimee', models.DateField(blank=True, null=True, verbose_name='Épuisement estimé')),
+                ('niveau_risque', models.CharField(choices=[('debut', 'Début'), ('en_cours', 'En cours'), ('critique', 'Critique'), ('epuisee', 'Épuisée')], default='debut', max_length=20, verbose_name='Niveau de risque')),
+                ('bientot_epuisee', models.BooleanField(default=False, verbose_name='Bientôt épuisée')),
+                ('expiree_non_consommee', models.BooleanField(default=False, verbose_name='Expirée mais non consommée')),
+                ('date_calcul', models.DateTimeField(verbose_name='Date du calcul')),
+                ('avance', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='suivi', to='paiements.avanceloyer', verbose_name='Avance')),
+                ('contrat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='suivis_avances', to='contrats.contrat', verbose_name='Contrat')),
+            ],
+            options={
+                'verbose_name': "Suivi d'avance",
+                'verbose_name_plural': "Suivis d'avances",
+                'indexes': [models.Index(fields=['niveau_risque'], name='paiements_suivi_risque_idx')],
+            },
+        ),
+    ]
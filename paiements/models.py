@@ -100,139 +100,22 @@ class RecapMensuel(models.Model):
     def calculer_totaux_bailleur(self):
         """Calcule les totaux pour le bailleur avec les charges dynamiques et les paiements réels."""
         from decimal import Decimal
-        from django.db.models import Sum, Q
-        from proprietes.models import ChargesBailleur
-        from datetime import datetime, timedelta
+        from .services_recap_mensuel import ServiceRecapMensuel
         
         try:
-            # Initialiser les totaux
-            total_loyers = Decimal('0')
-            total_charges_deductibles = Decimal('0')
-            total_charges_bailleur = Decimal('0')
-            nombre_proprietes = 0
-            nombre_contrats_actifs = 0
-            nombre_paiements_recus = 0
-            
-            # Récupérer les propriétés du bailleur
-            proprietes = self.bailleur.proprietes.filter(is_deleted=False)
-            nombre_proprietes = proprietes.count()
-            
-            # Calculer les loyers bruts pour le mois - basé sur les contrats actifs
-            # Calculer les dates de début et fin du mois
-            mois_debut = self.mois_recap.replace(day=1)
-            if self.mois_recap.month == 12:
-                mois_fin = self.mois_recap.replace(year=self.mois_recap.year + 1, month=1, day=1) - timedelta(days=1)
-            else:
-                mois_fin = self.mois_recap.replace(month=self.mois_recap.month + 1, day=1) - timedelta(days=1)
-            
-            for propriete in proprietes:
-                # Récupérer les contrats actifs pour cette propriété au moment du récapitulatif
-                contrats_actifs = propriete.contrats.filter(
-                    est_actif=True,
-                    est_resilie=False,
-                    date_debut__lte=mois_fin
-                ).filter(
-                    models.Q(date_fin__gte=mois_debut) | models.Q(date_fin__isnull=True)
-                )
-                
-                for contrat in contrats_actifs:
-                    nombre_contrats_actifs += 1
-                    # Loyer mensuel - conversion sécurisée
-                    loyer_mensuel = contrat.loyer_mensuel
-                    if loyer_mensuel is None:
-                        loyer_mensuel = Decimal('0')
-                    elif isinstance(loyer_mensuel, str):
-                        try:
-                            loyer_mensuel = Decimal(str(loyer_mensuel))
-                        except:
-                            loyer_mensuel = Decimal('0')
-                    else:
-                        loyer_mensuel = Decimal(str(loyer_mensuel))
-                    total_loyers += loyer_mensuel
-                    
-                    # Charges déductibles du contrat - conversion sécurisée
-                    charges_mensuelles = contrat.charges_mensuelles
-                    if charges_mensuelles is None:
-                        charges_mensuelles = Decimal('0')
-                    elif isinstance(charges_mensuelles, str):
-                        try:
-                            charges_mensuelles = Decimal(str(charges_mensuelles))
-                        except:
-                            charges_mensuelles = Decimal('0')
-                    else:
-                        charges_mensuelles = Decimal(str(charges_mensuelles))
-                    total_charges_deductibles += charges_mensuelles
-            
-            # NOUVEAU : Calculer les paiements réels reçus pour ce mois
-            # Utiliser une requête directe pour éviter les imports circulaires
-            from django.db import connection
-            
-            # Calculer les paiements réels reçus pour ce mois
-            paiements_mois = Paiement.objects.filter(
-                contrat__propriete__bailleur=self.bailleur,
-                date_paiement__year=self.mois_recap.year,
-                date_paiement__month=self.mois_recap.month,
-                statut='confirme'
-            )
-            
-            nombre_paiements_recus = paiements_mois.count()
-            total_paiements_reels = sum(p.montant for p in paiements_mois) if paiements_mois.exists() else Decimal('0')
-            
-            # Si des paiements réels existent, les utiliser pour les totaux
-            if nombre_paiements_recus > 0 and total_paiements_reels > total_loyers:
-                total_loyers = total_paiements_reels
-                
-                # Lier automatiquement les paiements au récapitulatif
-                try:
-                    self.lier_paiements_automatiquement()
-                except:
-                    pass  # Ignorer les erreurs de liaison
-            
-            # Calculer les charges bailleur pour le mois
-            charges_bailleur_mois = ChargesBailleur.objects.filter(
-                propriete__bailleur=self.bailleur,
-                date_charge__year=self.mois_recap.year,
-                date_charge__month=self.mois_recap.month,
-                statut__in=['en_attente', 'deduite_retrait']
-            )
-            
-            for charge in charges_bailleur_mois:
-                total_charges_bailleur += charge.montant_restant or charge.montant
-            
-            # Calculer le total net
-            total_net = total_loyers - total_charges_deductibles - total_charges_bailleur
-            
-            # Mettre à jour les champs
-            self.total_loyers_bruts = total_loyers
-            self.total_charges_deductibles = total_charges_deductibles
-            self.total_charges_bailleur = total_charges_bailleur
-            self.total_net_a_payer = max(total_net, Decimal('0'))
-            self.nombre_proprietes = nombre_proprietes
-            self.nombre_contrats_actifs = nombre_contrats_actifs
-            self.nombre_paiements_recus = nombre_paiements_recus
-            
-            # Sauvegarder les modifications
-            self.save()
-            
-        except Exception as e:
+            # Même moteur que la génération en masse, restreint à ce récapitulatif
+            return ServiceRecapMensuel.appliquer_totaux([self])[self.pk]
+        except Exception:
             # En cas d'erreur, utiliser les valeurs par défaut
-            total_loyers = Decimal('0')
-            total_charges_deductibles = Decimal('0')
-            total_charges_bailleur = Decimal('0')
-            nombre_proprietes = 0
-            nombre_contrats_actifs = 0
-            nombre_paiements_recus = 0
-            total_net = Decimal('0')
-        
-        return {
-            'total_loyers_bruts': total_loyers,
-            'total_charges_deductibles': total_charges_deductibles,
-            'total_charges_bailleur': total_charges_bailleur,
-            'total_net_a_payer': max(total_net, Decimal('0')),
-            'nombre_proprietes': nombre_proprietes,
-            'nombre_contrats_actifs': nombre_contrats_actifs,
-            'nombre_paiements_recus': nombre_paiements_recus,
-        }
+            return {
+                'total_loyers_bruts': Decimal('0'),
+                'total_charges_deductibles': Decimal('0'),
+                'total_charges_bailleur': Decimal('0'),
+                'total_net_a_payer': Decimal('0'),
+                'nombre_proprietes': 0,
+                'nombre_contrats_actifs': 0,
+                'nombre_paiements_recus': 0,
+            }
     
     def calculer_charges_bailleur_disponibles(self):
         """Calcule les charges bailleur disponibles pour ce mois."""
@@ -251,31 +134,9 @@ class RecapMensuel(models.Model):
     
     def lier_paiements_automatiquement(self):
         """Lie automatiquement les paiements du mois au récapitulatif."""
-        from django.db import connection
+        from .services_recap_mensuel import ServiceRecapMensuel
         
-        with connection.cursor() as cursor:
-            # Récupérer les IDs des paiements pour ce mois et ce bailleur
-            cursor.execute("""
-                SELECT p.id
-                FROM paiements_paiement p
-                JOIN contrats_contrat c ON p.contrat_id = c.id
-                JOIN proprietes_propriete pr ON c.propriete_id = pr.id
-                WHERE pr.bailleur_id = %s
-                AND EXTRACT(YEAR FROM p.date_paiement) = %s
-                AND EXTRACT(MONTH FROM p.date_paiement) = %s
-                AND p.statut IN ('valide', 'encaisse')
-            """, [self.bailleur.id, self.mois_recap.year, self.mois_recap.month])
-            
-            paiement_ids = [row[0] for row in cursor.fetchall()]
-            
-            # Lier les paiements au récapitulatif
-            if paiement_ids:
-                # Utiliser une requête directe pour éviter les imports circulaires
-                cursor.execute("""
-                    INSERT INTO paiements_recapmensuel_paiements_concernes (recapmensuel_id, paiement_id)
-                    SELECT %s, unnest(%s::int[])
-                    ON CONFLICT DO NOTHING
-                """, [self.id, paiement_ids])
+        return ServiceRecapMensuel.lier_paiements([self])
 
     def generer_pdf_recapitulatif(self):
         """Génère le PDF du récapitulatif mensuel."""
@@ -744,8 +605,34 @@ class Paiement(models.Model):
     def __str__(self):
         return f"Paiement {self.montant} F CFA - {self.contrat.locataire.get_nom_complet()}"
     
+    TENTATIVES_NUMEROTATION = 3
+    
     def save(self, *args, **kwargs):
         """Sauvegarde personnalisée pour calculer automatiquement les montants"""
+        from django.db import IntegrityError, transaction
+        
+        self._preparer_enregistrement()
+        
+        # Générer la référence et le numéro de paiement s'ils n'existent pas
+        numeros_generes = self._attribuer_numeros()
+        
+        for tentative in range(self.TENTATIVES_NUMEROTATION):
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                # Collision sur un numéro généré (compteur recalé, saisie manuelle...) :
+                # on en tire un nouveau et on réessaie
+                derniere = tentative == self.TENTATIVES_NUMEROTATION - 1
+                if derniere or not numeros_generes or not self._numeros_en_conflit(numeros_generes):
+                    raise
+                for champ in numeros_generes:
+                    setattr(self, champ, '')
+                self._attribuer_numeros()
+    
+    def _preparer_enregistrement(self):
+        """Champs calculés avant écriture (partagé avec creer_en_masse)"""
         from django.utils import timezone
         
         # Calculer le montant net payé si pas défini
@@ -756,55 +643,105 @@ class Paiement(models.Model):
         if not self.date_creation:
             self.date_creation = timezone.now()
         
-        # Générer la référence de paiement si elle n'existe pas
-        if not hasattr(self, 'reference_paiement') or not self.reference_paiement:
-            self.reference_paiement = self.generate_reference_paiement()
-        
-        # Générer le numéro de paiement si il n'existe pas
-        if not hasattr(self, 'numero_paiement') or not self.numero_paiement:
-            self.numero_paiement = self.generate_numero_paiement()
-        
         # Générer le libellé si il n'existe pas
         if not hasattr(self, 'libelle') or not self.libelle:
             self.libelle = self.generate_libelle()
         
         # Mettre à jour la date de modification
         self.date_modification = timezone.now()
+    
+    def _attribuer_numeros(self, sequence=None, moment=None):
+        """
+        Renseigne la référence et le numéro de paiement manquants à partir d'une
+        seule séquence du compteur journalier. Retourne les champs renseignés.
+        """
+        from django.utils import timezone
         
-        super().save(*args, **kwargs)
+        champs = [
+            champ for champ in ('reference_paiement', 'numero_paiement')
+            if not getattr(self, champ, None)
+        ]
+        if not champs:
+            return champs
+        
+        moment = moment or timezone.now()
+        if sequence is None:
+            sequence = self._reserver_sequences(1, moment)[0]
+        if 'reference_paiement' in champs:
+            self.reference_paiement = self._format_reference(sequence, moment)
+        if 'numero_paiement' in champs:
+            self.numero_paiement = self._format_numero(sequence, moment)
+        return champs
+    
+    def _numeros_en_conflit(self, champs):
+        """Vérifie qu'un des numéros générés est déjà pris par un autre paiement"""
+        conflit = Q()
+        for champ in champs:
+            conflit |= Q(**{champ: getattr(self, champ)})
+        return Paiement._base_manager.filter(conflit).exclude(pk=self.pk).exists()
+    
+    @staticmethod
+    def _reserver_sequences(n, moment):
+        from core.id_generator import IDGenerator
+        return IDGenerator.reserver_sequences('paiement_jour', n, date_creation=moment)
+    
+    @staticmethod
+    def _format_reference(sequence, moment):
+        # Format: PAI-YYYYMMDD-HHMMSS-XXXX
+        return f"PAI-{moment.strftime('%Y%m%d-%H%M%S')}-{sequence:04d}"
+    
+    @staticmethod
+    def _format_numero(sequence, moment):
+        # Format: PAI-YYYYMMDD-XXXX
+        return f"PAI-{moment.strftime('%Y%m%d')}-{sequence:04d}"
     
     def generate_reference_paiement(self):
         """Génère une référence de paiement unique"""
         from django.utils import timezone
-        from datetime import datetime
         
-        # Format: PAI-YYYYMMDD-HHMMSS-XXXX
         now = timezone.now()
-        timestamp = now.strftime('%Y%m%d-%H%M%S')
-        
-        # Compter les paiements du jour pour avoir un numéro séquentiel
-        today = now.date()
-        count_today = Paiement.objects.filter(
-            date_creation__date=today
-        ).count() + 1
-        
-        return f"PAI-{timestamp}-{count_today:04d}"
+        return self._format_reference(self._reserver_sequences(1, now)[0], now)
     
     def generate_numero_paiement(self):
         """Génère un numéro de paiement unique"""
         from django.utils import timezone
         
-        # Format: PAI-YYYYMMDD-XXXX
         now = timezone.now()
-        date_str = now.strftime('%Y%m%d')
+        return self._format_numero(self._reserver_sequences(1, now)[0], now)
+    
+    @classmethod
+    def creer_en_masse(cls, paiements, batch_size=500):
+        """
+        Crée un lot de paiements (imports) en attribuant tous les numéros manquants
+        avec une seule réservation sur le compteur journalier.
+        
+        Comme bulk_create, n'émet pas les signaux post_save.
+        """
+        from django.db import transaction
+        from django.utils import timezone
+        
+        paiements = list(paiements)
+        if not paiements:
+            return []
+        
+        # Charger les contrats et locataires en une requête pour les libellés
+        contrat_ids = {p.contrat_id for p in paiements if not p.libelle}
+        if contrat_ids:
+            contrats = Contrat.objects.select_related('locataire').in_bulk(contrat_ids)
+            for paiement in paiements:
+                if not paiement.libelle and paiement.contrat_id in contrats:
+                    paiement.contrat = contrats[paiement.contrat_id]
         
-        # Compter les paiements du jour
-        today = now.date()
-        count_today = Paiement.objects.filter(
-            date_creation__date=today
-        ).count() + 1
+        moment = timezone.now()
+        a_numeroter = [p for p in paiements if not p.reference_paiement or not p.numero_paiement]
         
-        return f"PAI-{date_str}-{count_today:04d}"
+        with transaction.atomic():
+            sequences = cls._reserver_sequences(len(a_numeroter), moment)
+            for paiement, sequence in zip(a_numeroter, sequences):
+                paiement._attribuer_numeros(sequence=sequence, moment=moment)
+            for paiement in paiements:
+                paiement._preparer_enregistrement()
+            return cls.objects.bulk_create(paiements, batch_size=batch_size)
     
     def generate_libelle(self):
         """Génère un libellé automatique pour le paiement"""
@@ -441,7 +441,12 @@ class AvanceLoyer(models.Model):
             self.statut = 'epuisee'
             self.montant_restant = Decimal('0')
         
-        self.save()
+        # Enregistrement marqué : le filigrane de consommation reste valable
+        self._consommation = True
+        try:
+            self.save()
+        finally:
+            del self._consommation
         return True
     
     def est_mois_couvert(self, mois):
@@ -556,9 +561,141 @@ class ConsommationAvance(models.Model):
         return f"Consommation {self.mois_consomme.strftime('%B %Y')} - {self.montant_consomme} F CFA"
 
 
+class SynchronisationAvance(models.Model):
+    """
+    Filigrane de consommation automatique des avances d'un contrat : les mois
+    échus jusqu'à `mois_limite` inclus ont déjà été consommés.
+    """
+    contrat = models.OneToOneField(
+        Contrat,
+        on_delete=models.CASCADE,
+        related_name='synchronisation_avances',
+        verbose_name=_("Contrat")
+    )
+    
+    mois_limite = models.DateField(
+        verbose_name=_("Consommé jusqu'au mois")
+    )
+    
+    date_synchronisation = models.DateTimeField(
+        auto_now=True,
+        verbose_name=_("Date de synchronisation")
+    )
+    
+    class Meta:
+        app_label = 'paiements'
+        verbose_name = _("Synchronisation des avances")
+        verbose_name_plural = _("Synchronisations des avances")
+    
+    def __str__(self):
+        return f"Avances {self.contrat_id} synchronisées jusqu'à {self.mois_limite.strftime('%B %Y')}"
+
+
+class SuiviAvance(models.Model):
+    """
+    Instantané du suivi d'une avance (consommation, couverture restante,
+    épuisement estimé, niveau de risque), calculé en lot par
+    services_suivi_avances et lu par les vues de monitoring.
+    """
+    NIVEAU_CHOICES = [
+        ('debut', 'Début'),
+        ('en_cours', 'En cours'),
+        ('critique', 'Critique'),
+        ('epuisee', 'Épuisée'),
+    ]
+    
+    avance = models.OneToOneField(
+        AvanceLoyer,
+        on_delete=models.CASCADE,
+        related_name='suivi',
+        verbose_name=_("Avance")
+    )
+    
+    contrat = models.ForeignKey(
+        Contrat,
+        on_delete=models.CASCADE,
+        related_name='suivis_avances',
+        verbose_name=_("Contrat")
+    )
+    
+    mois_consommes = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Mois consommés")
+    )
+    
+    mois_restants = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Mois restants")
+    )
+    
+    montant_consomme = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        verbose_name=_("Montant consommé")
+    )
+    
+    montant_restant = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        verbose_name=_("Montant restant")
+    )
+    
+    progression = models.DecimalField(
+        max_digits=6,
+        decimal_places=2,
+        default=0,
+        verbose_name=_("Progression (%)")
+    )
+    
+    date_epuisement_estimee = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name=_("Épuisement estimé")
+    )
+    
+    niveau_risque = models.CharField(
+        max_length=20,
+        choices=NIVEAU_CHOICES,
+        default='debut',
+        verbose_name=_("Niveau de risque")
+    )
+    
+    # Alertes
+    bientot_epuisee = models.BooleanField(
+        default=False,
+        verbose_name=_("Bientôt épuisée")
+    )
+    
+    expiree_non_consommee = models.BooleanField(
+        default=False,
+        verbose_name=_("Expirée mais non consommée")
+    )
+    
+    # Début du calcul qui a produit la ligne
+    date_calcul = models.DateTimeField(
+        verbose_name=_("Date du calcul")
+    )
+    
+    class Meta:
+        app_label = 'paiements'
+        verbose_name = _("Suivi d'avance")
+        verbose_name_plural = _("Suivis d'avances")
+        indexes = [
+            models.Index(fields=['niveau_risque'], name='paiements_suivi_risque_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Suivi avance {self.avance_id} - {self.progression}%"
+
+
 class HistoriquePaiement(models.Model):
     """
-    Modèle pour l'historique détaillé des paiements
+    Grand livre mensuel d'un contrat : une ligne par mois avec le montant dû,
+    les règlements, la part couverte par les avances et le solde. Tenu à jour
+    par les signaux des paiements et des consommations d'avance
+    (voir services_grand_livre).
     """
     # Relations
     contrat = models.ForeignKey(
@@ -568,10 +705,12 @@ class HistoriquePaiement(models.Model):
         verbose_name=_("Contrat")
     )
     
-    # Paiement original
+    # Dernier règlement du mois
     paiement = models.ForeignKey(
         'Paiement',
-        on_delete=models.CASCADE,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
         related_name='historique',
         verbose_name=_("Paiement")
     )
@@ -608,6 +747,19 @@ class HistoriquePaiement(models.Model):
         verbose_name=_("Montant restant dû")
     )
     
+    # Dû - payé - avance : négatif en cas de trop-perçu
+    solde = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        verbose_name=_("Solde")
+    )
+    
+    nombre_paiements = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Nombre de paiements")
+    )
+    
     # Statut du mois
     mois_regle = models.BooleanField(
         default=False,
@@ -616,6 +768,7 @@ class HistoriquePaiement(models.Model):
     
     # Métadonnées
     created_at = models.DateTimeField(auto_now_add=True)
+    date_mise_a_jour = models.DateTimeField(auto_now=True, verbose_name=_("Date de mise à jour"))
     
     class Meta:
         app_label = 'paiements'
@@ -626,3 +779,7 @@ class HistoriquePaiement(models.Model):
     
     def __str__(self):
         return f"Historique {self.mois_paiement.strftime('%B %Y')} - {self.contrat.locataire.get_nom_complet()}"
+    
+    @property
+    def mois(self):
+        return self.mois_paiement
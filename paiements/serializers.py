@@ -1,4 +1,6 @@
 from rest_framework import serializers
+
+from core.api_rest import ChampsDemandesMixin
 from .models import Paiement
 from contrats.serializers import ContratSerializer
 from proprietes.serializers import BailleurSerializer
@@ -50,7 +52,26 @@ class PaiementSerializer(serializers.ModelSerializer):
         return data
 
 
-class PaiementDetailSerializer(PaiementSerializer):
+class PaiementListSerializer(ChampsDemandesMixin, serializers.ModelSerializer):
+    """Sérialiseur léger pour la liste des paiements (champs à plat, sans imbrication)."""
+    
+    contrat_numero = serializers.CharField(source='contrat.numero_contrat', read_only=True)
+    locataire_nom = serializers.CharField(source='contrat.locataire.nom', read_only=True)
+    locataire_prenom = serializers.CharField(source='contrat.locataire.prenom', read_only=True)
+    propriete_titre = serializers.CharField(source='contrat.propriete.titre', read_only=True)
+    
+    class Meta:
+        model = Paiement
+        fields = [
+            'id', 'contrat', 'contrat_numero', 'locataire_nom', 'locataire_prenom',
+            'propriete_titre', 'montant', 'type_paiement', 'statut', 'mode_paiement',
+            'date_paiement', 'date_encaissement', 'reference_paiement', 'numero_paiement',
+            'created_at'
+        ]
+        read_only_fields = fields
+
+
+class PaiementDetailSerializer(ChampsDemandesMixin, PaiementSerializer):
     """Sérialiseur détaillé pour les paiements (version détail)."""
     
     # Informations du contrat avec plus de détails
@@ -5,6 +5,8 @@ from datetime import date, datetime
 from dateutil.relativedelta import relativedelta
 from .models import Paiement
 from .models_avance import AvanceLoyer, ConsommationAvance, HistoriquePaiement
+from .services_consommation_avance import MoteurConsommationAvances
+from .services_grand_livre import GrandLivreContrat
 from contrats.models import Contrat
 
 
@@ -407,70 +409,10 @@ class ServiceGestionAvance:
     def synchroniser_consommations_manquantes(contrat):
         """
         Synchronise automatiquement les consommations d'avances basées sur les mois écoulés
+        (une seule lecture tant que le filigrane du contrat est à jour)
         """
         try:
-            from django.utils import timezone
-            from dateutil.relativedelta import relativedelta
-            
-            # Récupérer toutes les avances actives du contrat
-            avances_actives = AvanceLoyer.objects.filter(
-                contrat=contrat,
-                statut='active',
-                montant_restant__gt=0
-            )
-            
-            for avance in avances_actives:
-                # Calculer les mois écoulés depuis le début de couverture
-                aujourd_hui = timezone.now().date()
-                mois_ecoules = 0
-                
-                if avance.mois_debut_couverture:
-                    mois_ecoules = ((aujourd_hui.year - avance.mois_debut_couverture.year) * 12 +
-                                   (aujourd_hui.month - avance.mois_debut_couverture.month))
-                    
-                    # Si on est au 20 du mois ou plus, considérer qu'un mois s'est écoulé
-                    if aujourd_hui.day >= 20:
-                        mois_ecoules += 1
-                
-                # Calculer combien de mois devraient être consommés selon la logique du 20
-                # Un mois n'est consommé que si on est au 20 du mois ou plus
-                mois_devraient_etre_consommes = 0
-                if mois_ecoules > 0:
-                    # Vérifier si on est au 20 du mois ou plus pour le mois actuel
-                    if aujourd_hui.day >= 20:
-                        mois_devraient_etre_consommes = min(mois_ecoules, avance.nombre_mois_couverts)
-                    else:
-                        # Si on n'est pas au 20, ne consommer que les mois précédents
-                        mois_devraient_etre_consommes = min(mois_ecoules - 1, avance.nombre_mois_couverts)
-                        mois_devraient_etre_consommes = max(0, mois_devraient_etre_consommes)
-                
-                # Calculer combien de mois ont déjà été consommés
-                mois_deja_consommes = ConsommationAvance.objects.filter(avance=avance).count()
-                
-                # Consommer les mois manquants
-                mois_a_consommer = mois_devraient_etre_consommes - mois_deja_consommes
-                
-                for i in range(mois_a_consommer):
-                    mois_a_consommer_date = avance.mois_debut_couverture + relativedelta(months=mois_deja_consommes + i)
-                    
-                    # Vérifier si ce mois est dans la période de couverture
-                    if (avance.mois_debut_couverture <= mois_a_consommer_date <= avance.mois_fin_couverture):
-                        # Consommer ce mois
-                        if avance.consommer_mois(mois_a_consommer_date):
-                            # Créer l'enregistrement de consommation
-                            ConsommationAvance.objects.create(
-                                avance=avance,
-                                paiement=None,  # Consommation automatique
-                                mois_consomme=mois_a_consommer_date,
-                                montant_consomme=avance.loyer_mensuel,
-                                montant_restant_apres=avance.montant_restant
-                            )
-                            
-                            # Mettre à jour le statut si l'avance est épuisée
-                            if avance.montant_restant <= 0:
-                                avance.statut = 'epuisee'
-                                avance.save()
-                
+            MoteurConsommationAvances.synchroniser_contrat(contrat)
         except Exception as e:
             print(f"Erreur lors de la synchronisation des consommations: {str(e)}")
             # Ne pas lever l'exception pour ne pas bloquer le processus principal
@@ -479,25 +421,29 @@ class ServiceGestionAvance:
     def calculer_montant_du_mois(contrat, mois):
         """
         Calcule le montant dû pour un mois en tenant compte des avances
-        Synchronise automatiquement les consommations avant le calcul
+        Lecture seule : la couverture du mois est déduite des périodes des
+        avances, sans consommer ni synchroniser (une requête)
         """
         try:
-            # D'abord, synchroniser toutes les consommations manquantes
-            ServiceGestionAvance.synchroniser_consommations_manquantes(contrat)
-            
             # Montant du loyer mensuel (conversion en Decimal)
             loyer_mensuel = Decimal(str(contrat.loyer_mensuel)) if contrat.loyer_mensuel else Decimal('0')
             charges_mensuelles = Decimal(str(contrat.charges_mensuelles)) if contrat.charges_mensuelles else Decimal('0')
             montant_total_du = loyer_mensuel + charges_mensuelles
             
-            # Vérifier s'il y a des avances disponibles pour ce mois
-            avance_disponible, montant_avance = ServiceGestionAvance.consommer_avance_pour_mois(contrat, mois)
+            # Avance (active ou déjà épuisée) dont les mois payés couvrent ce mois
+            mois = mois.replace(day=1)
+            avances = AvanceLoyer.objects.filter(
+                contrat=contrat,
+                statut__in=['active', 'epuisee'],
+                mois_debut_couverture__lte=mois,
+                mois_fin_couverture__gte=mois
+            ).order_by('date_avance')
+            for avance in avances:
+                if mois in MoteurConsommationAvances.mois_dus(avance, mois):
+                    montant_avance = Decimal(str(avance.loyer_mensuel))
+                    return max(montant_total_du - montant_avance, Decimal('0')), montant_avance
             
-            if avance_disponible:
-                montant_restant = montant_total_du - montant_avance
-                return max(montant_restant, Decimal('0')), montant_avance
-            else:
-                return montant_total_du, Decimal('0')
+            return montant_total_du, Decimal('0')
                 
         except Exception as e:
             raise Exception(f"Erreur lors du calcul du montant dû: {str(e)}")
@@ -505,27 +451,18 @@ class ServiceGestionAvance:
     @staticmethod
     def synchroniser_toutes_avances():
         """
-        Synchronise toutes les avances de tous les contrats
+        Synchronise toutes les avances de tous les contrats en une passe
         À appeler périodiquement pour maintenir la cohérence
         """
         try:
-            from contrats.models import Contrat
-            
-            contrats_avec_avances = Contrat.objects.filter(avances_loyer__isnull=False).distinct()
-            total_synchronise = 0
-            
-            for contrat in contrats_avec_avances:
-                try:
-                    ServiceGestionAvance.synchroniser_consommations_manquantes(contrat)
-                    total_synchronise += 1
-                except Exception as e:
-                    print(f"Erreur lors de la synchronisation du contrat {contrat.id}: {str(e)}")
-                    continue
-            
+            resultat = MoteurConsommationAvances.synchroniser()
             return {
                 'success': True,
-                'contrats_traites': total_synchronise,
-                'message': f'{total_synchronise} contrats synchronisés'
+                'contrats_traites': resultat['contrats'],
+                'consommations_creees': resultat['consommations_creees'],
+                'avances_epuisees': resultat['avances_epuisees'],
+                'message': f"{resultat['contrats']} contrats synchronisés, "
+                           f"{resultat['consommations_creees']} mois d'avance consommés"
             }
             
         except Exception as e:
@@ -538,54 +475,32 @@ class ServiceGestionAvance:
     def traiter_paiement_mensuel(paiement):
         """
         Traite un paiement mensuel en tenant compte des avances
+        Le grand livre du contrat est recalculé et la ligne du mois retournée
         """
         try:
             with transaction.atomic():
                 contrat = paiement.contrat
                 mois_paiement = paiement.date_paiement.replace(day=1)
                 
-                # Calculer le montant dû et l'avance utilisée
-                montant_du, montant_avance_utilisee = ServiceGestionAvance.calculer_montant_du_mois(
-                    contrat, mois_paiement
-                )
+                GrandLivreContrat.reconstruire([contrat.pk])
+                historique = HistoriquePaiement.objects.filter(
+                    contrat=contrat, mois_paiement=mois_paiement
+                ).first()
+                if historique is None:
+                    # Mois hors bail sans règlement comptabilisé
+                    return None
                 
                 # Mettre à jour le paiement
-                paiement.montant_du_mois = montant_du + montant_avance_utilisee
-                paiement.montant_restant_du = max(montant_du - paiement.montant, Decimal('0'))
-                
-                # Créer ou mettre à jour l'historique
-                historique, created = HistoriquePaiement.objects.get_or_create(
-                    contrat=contrat,
-                    mois_paiement=mois_paiement,
-                    defaults={
-                        'paiement': paiement,
-                        'montant_paye': paiement.montant,
-                        'montant_du': paiement.montant_du_mois,
-                        'montant_avance_utilisee': montant_avance_utilisee,
-                        'montant_restant_du': paiement.montant_restant_du,
-                        'mois_regle': paiement.montant_restant_du <= 0
-                    }
-                )
-                
-                if not created:
-                    # Mettre à jour l'historique existant
-                    historique.paiement = paiement
-                    historique.montant_paye += paiement.montant
-                    historique.montant_avance_utilisee += montant_avance_utilisee
-                    historique.montant_restant_du = max(historique.montant_du - historique.montant_paye, Decimal('0'))
-                    historique.mois_regle = historique.montant_restant_du <= 0
-                    historique.save()
+                paiement.montant_du_mois = historique.montant_du
+                paiement.montant_restant_du = historique.montant_restant_du
                 
-                # Mettre à jour la consommation d'avance si applicable
-                if montant_avance_utilisee > 0:
-                    consommation = ConsommationAvance.objects.filter(
+                # Rattacher la consommation d'avance du mois au paiement
+                if historique.montant_avance_utilisee > 0:
+                    ConsommationAvance.objects.filter(
                         avance__contrat=contrat,
-                        mois_consomme=mois_paiement
-                    ).first()
-                    
-                    if consommation:
-                        consommation.paiement = paiement
-                        consommation.save()
+                        mois_consomme=mois_paiement,
+                        paiement__isnull=True
+                    ).update(paiement=paiement)
                 
                 return historique
                 
@@ -607,15 +522,7 @@ class ServiceGestionAvance:
         """
         Retourne l'historique des paiements pour un contrat
         """
-        queryset = HistoriquePaiement.objects.filter(contrat=contrat)
-        
-        if mois_debut:
-            queryset = queryset.filter(mois_paiement__gte=mois_debut)
-        
-        if mois_fin:
-            queryset = queryset.filter(mois_paiement__lte=mois_fin)
-        
-        return queryset.order_by('-mois_paiement')
+        return GrandLivreContrat.lignes(contrat, mois_debut, mois_fin).order_by('-mois_paiement')
     
     @staticmethod
     def get_statut_avances_contrat(contrat):
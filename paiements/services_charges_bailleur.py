@@ -11,7 +11,7 @@ from typing import Dict, List, Optional, Tuple
 from proprietes.models import ChargesBailleur, Bailleur, Propriete
 from contrats.models import Contrat
 from paiements.models import Paiement, RetraitBailleur
-from core.models import AuditLog
+from core.audit import journaliser
 
 
 class ServiceChargesBailleurIntelligent:
@@ -504,7 +504,7 @@ class ServiceChargesBailleurIntelligent:
         try:
             from django.contrib.contenttypes.models import ContentType
             content_type = ContentType.objects.get_for_model(RetraitBailleur)
-            AuditLog.objects.create(
+            journaliser(
                 content_type=content_type,
                 object_id=retrait.id,
                 action='update',
@@ -532,7 +532,7 @@ class ServiceChargesBailleurIntelligent:
             from django.contrib.contenttypes.models import ContentType
             # Utiliser un ContentType générique pour les erreurs de service
             content_type = ContentType.objects.get(app_label='core', model='auditlog')
-            AuditLog.objects.create(
+            journaliser(
                 content_type=content_type,
                 object_id=0,
                 action='update',
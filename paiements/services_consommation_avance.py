@@ -0,0 +1,192 @@
+"""
+Moteur de consommation automatique des avances de loyer.
+
+Un mois couvert par une avance est consommé à partir du 20 de ce mois. Les
+mois échus de toutes les avances actives sont calculés en une passe : deux
+requêtes de lecture (avances, consommations existantes), puis un bulk_create
+des consommations manquantes, un bulk_update des avances et l'enregistrement
+du filigrane (SynchronisationAvance) de chaque contrat. Tant que le filigrane
+d'un contrat couvre le mois échu courant, sa synchronisation se limite à une
+lecture ; les enregistrements de AvanceLoyer.consommer_mois ne le périment pas.
+"""
+
+import logging
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from .models_avance import AvanceLoyer, ConsommationAvance, SynchronisationAvance
+from .services_grand_livre import planifier as planifier_grand_livre
+
+logger = logging.getLogger(__name__)
+
+
+class MoteurConsommationAvances:
+    """
+    Consommation en masse des mois échus des avances actives
+    """
+
+    JOUR_CONSOMMATION = 20
+    TAILLE_LOT = 500
+
+    @classmethod
+    def mois_limite(cls, aujourd_hui=None):
+        """Dernier mois échu : le mois courant à partir du 20, sinon le mois précédent."""
+        aujourd_hui = aujourd_hui or timezone.now().date()
+        mois = aujourd_hui.replace(day=1)
+        if aujourd_hui.day < cls.JOUR_CONSOMMATION:
+            mois -= relativedelta(months=1)
+        return mois
+
+    @staticmethod
+    def mois_dus(avance, mois_limite):
+        """Mois couverts par l'avance et échus au mois limite, dans la limite des mois payés."""
+        courant = avance.mois_debut_couverture.replace(day=1)
+        dernier = min(avance.mois_fin_couverture.replace(day=1), mois_limite)
+        mois = []
+        while courant <= dernier and len(mois) < avance.nombre_mois_couverts:
+            mois.append(courant)
+            courant += relativedelta(months=1)
+        return mois
+
+    @classmethod
+    def est_a_jour(cls, contrat, aujourd_hui=None):
+        """Vrai si le filigrane du contrat couvre déjà le mois échu courant (une lecture)."""
+        return SynchronisationAvance.objects.filter(
+            contrat=contrat,
+            mois_limite__gte=cls.mois_limite(aujourd_hui)
+        ).exists()
+
+    @classmethod
+    def _consommer_lot(cls, avances, mois_limite, resultat):
+        existants = {}
+        for avance_id, mois in ConsommationAvance.objects.filter(
+            avance_id__in=[avance.pk for avance in avances]
+        ).values_list('avance_id', 'mois_consomme'):
+            existants.setdefault(avance_id, set()).add(mois.replace(day=1))
+
+        consommations = []
+        modifiees = []
+        maintenant = timezone.now()
+        for avance in avances:
+            deja = existants.get(avance.pk, set())
+            loyer = Decimal(str(avance.loyer_mensuel))
+            restant = Decimal(str(avance.montant_restant))
+            nouvelles = 0
+            for mois in cls.mois_dus(avance, mois_limite):
+                if mois in deja:
+                    continue
+                restant -= loyer
+                if restant <= 0:
+                    restant = Decimal('0')
+                    avance.statut = 'epuisee'
+                consommations.append(ConsommationAvance(
+                    avance=avance,
+                    paiement=None,  # Consommation automatique
+                    mois_consomme=mois,
+                    montant_consomme=loyer,
+                    montant_restant_apres=restant
+                ))
+                nouvelles += 1
+                if avance.statut == 'epuisee':
+                    resultat['avances_epuisees'] += 1
+                    break
+
+            if nouvelles:
+                avance.montant_restant = restant
+                avance.updated_at = maintenant
+                modifiees.append(avance)
+
+        ConsommationAvance.objects.bulk_create(consommations, batch_size=cls.TAILLE_LOT)
+        # bulk_create n'émet pas de signaux : grand livre des contrats concernés
+        for contrat_id in {consommation.avance.contrat_id for consommation in consommations}:
+            planifier_grand_livre(contrat_id)
+        AvanceLoyer.objects.bulk_update(
+            modifiees, ['montant_restant', 'statut', 'updated_at'], batch_size=cls.TAILLE_LOT
+        )
+        resultat['consommations_creees'] += len(consommations)
+        resultat['avances_modifiees'] += len(modifiees)
+
+    @classmethod
+    def synchroniser(cls, contrat_ids=None, aujourd_hui=None):
+        """
+        Consomme les mois échus manquants des avances actives des contrats indiqués
+        (tous les contrats ayant des avances par défaut) et avance leur filigrane.
+        """
+        mois_limite = cls.mois_limite(aujourd_hui)
+        resultat = {
+            'mois_limite': mois_limite,
+            'contrats': 0,
+            'avances_traitees': 0,
+            'avances_modifiees': 0,
+            'avances_epuisees': 0,
+            'consommations_creees': 0,
+        }
+
+        with transaction.atomic():
+            avances = AvanceLoyer.objects.select_for_update().filter(
+                statut='active',
+                montant_restant__gt=0,
+                mois_debut_couverture__lte=mois_limite,
+                mois_fin_couverture__isnull=False
+            ).order_by('contrat_id', 'date_avance', 'pk')
+            if contrat_ids is not None:
+                avances = avances.filter(contrat_id__in=contrat_ids)
+            avances = list(avances)
+
+            for i in range(0, len(avances), cls.TAILLE_LOT):
+                cls._consommer_lot(avances[i:i + cls.TAILLE_LOT], mois_limite, resultat)
+            resultat['avances_traitees'] = len(avances)
+
+            if contrat_ids is None:
+                contrat_ids = AvanceLoyer.objects.values_list('contrat_id', flat=True).distinct()
+            filigranes = [
+                SynchronisationAvance(contrat_id=contrat_id, mois_limite=mois_limite)
+                for contrat_id in set(contrat_ids)
+            ]
+            SynchronisationAvance.objects.bulk_create(
+                filigranes,
+                batch_size=cls.TAILLE_LOT,
+                update_conflicts=True,
+                unique_fields=['contrat'],
+                update_fields=['mois_limite', 'date_synchronisation'],
+            )
+            resultat['contrats'] = len(filigranes)
+
+        return resultat
+
+    @classmethod
+    def synchroniser_contrat(cls, contrat, aujourd_hui=None):
+        """Chemin rapide : une lecture si le contrat est à jour, sinon une synchronisation en bloc."""
+        if cls.est_a_jour(contrat, aujourd_hui):
+            return None
+        return cls.synchroniser([contrat.pk], aujourd_hui)
+
+    @staticmethod
+    def invalider(contrat_ids):
+        """Oublie le filigrane des contrats (nouvelle avance, consommation supprimée...)."""
+        SynchronisationAvance.objects.filter(contrat_id__in=contrat_ids).delete()
+
+
+def _avance_modifiee(sender, instance, **kwargs):
+    # Consommation d'un mois (AvanceLoyer.consommer_mois) : les consommations
+    # enregistrées restent cohérentes avec le filigrane
+    if getattr(instance, '_consommation', False):
+        return
+    MoteurConsommationAvances.invalider([instance.contrat_id])
+
+
+def _consommation_supprimee(sender, instance, **kwargs):
+    SynchronisationAvance.objects.filter(contrat__avances_loyer=instance.avance_id).delete()
+
+
+def connecter_signaux():
+    """Invalide le filigrane d'un contrat dès que ses avances changent hors du moteur."""
+    post_save.connect(_avance_modifiee, sender=AvanceLoyer, dispatch_uid='consommation_avance_save')
+    post_delete.connect(_avance_modifiee, sender=AvanceLoyer, dispatch_uid='consommation_avance_delete')
+    post_delete.connect(
+        _consommation_supprimee, sender=ConsommationAvance, dispatch_uid='consommation_avance_consommation_delete'
+    )
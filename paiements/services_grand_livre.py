@@ -0,0 +1,309 @@
+"""
+Grand livre mensuel des contrats.
+
+Chaque contrat a une ligne HistoriquePaiement par mois, du début du bail au
+mois en cours (ou à sa fin) : montant dû, règlements validés du mois (selon
+la date de paiement), part couverte par les avances consommées et solde.
+Les lignes sont recalculées en quelques requêtes groupées, après validation
+de la transaction, pour les seuls contrats touchés par un paiement, une
+consommation d'avance ou une modification du bail. Le formulaire de paiement,
+les alertes d'arriérés et le contexte des contrats lisent ensuite ces lignes
+au lieu de tout recalculer.
+"""
+
+import calendar
+import logging
+import threading
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.db.models.functions import TruncMonth
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from contrats.models import Contrat
+
+from .models import Paiement
+from .models_avance import AvanceLoyer, ConsommationAvance, HistoriquePaiement
+
+logger = logging.getLogger(__name__)
+
+
+class GrandLivreContrat:
+    """
+    Tenue et lecture du grand livre mensuel des contrats
+    """
+
+    # Types de paiement qui règlent l'échéance du mois
+    TYPES_REGLEMENT = ('loyer', 'charges', 'regularisation', 'paiement_partiel')
+    TAILLE_LOT = 500
+
+    @staticmethod
+    def _montant(valeur):
+        try:
+            return Decimal(str(valeur)) if valeur else Decimal('0')
+        except (InvalidOperation, ValueError, TypeError):
+            return Decimal('0')
+
+    @staticmethod
+    def _mois(valeur):
+        if hasattr(valeur, 'date'):
+            valeur = valeur.date()
+        return valeur.replace(day=1)
+
+    @classmethod
+    def montant_mensuel(cls, contrat):
+        """Loyer et charges dus chaque mois."""
+        return cls._montant(contrat.loyer_mensuel) + cls._montant(contrat.charges_mensuelles)
+
+    @classmethod
+    def mois_du_contrat(cls, contrat, aujourd_hui=None):
+        """Mois échus ou en cours du bail, du premier au mois en cours (ou à la fin du bail)."""
+        if not contrat.date_debut:
+            return []
+        dernier = (aujourd_hui or timezone.now().date()).replace(day=1)
+        fin = contrat.date_resiliation if contrat.est_resilie and contrat.date_resiliation else contrat.date_fin
+        if fin:
+            dernier = min(dernier, fin.replace(day=1))
+        mois = []
+        courant = contrat.date_debut.replace(day=1)
+        while courant <= dernier:
+            mois.append(courant)
+            courant += relativedelta(months=1)
+        return mois
+
+    @classmethod
+    def reconstruire(cls, contrat_ids=None, aujourd_hui=None):
+        """
+        Recalcule les lignes des contrats indiqués (tous par défaut) : trois
+        lectures groupées, un upsert en bloc et la suppression des lignes hors bail.
+        Retourne le nombre de lignes écrites.
+        """
+        contrats = Contrat.objects.all()
+        paiements = Paiement.objects.filter(
+            is_deleted=False,
+            statut='valide',
+            type_paiement__in=cls.TYPES_REGLEMENT
+        )
+        consommations = ConsommationAvance.objects.all()
+        lignes_existantes = HistoriquePaiement.objects.all()
+        if contrat_ids is not None:
+            contrat_ids = list(set(contrat_ids))
+            contrats = contrats.filter(pk__in=contrat_ids)
+            paiements = paiements.filter(contrat_id__in=contrat_ids)
+            consommations = consommations.filter(avance__contrat_id__in=contrat_ids)
+            lignes_existantes = lignes_existantes.filter(contrat_id__in=contrat_ids)
+
+        reglements = defaultdict(dict)
+        for ligne in paiements.annotate(mois=TruncMonth('date_paiement')).values(
+            'contrat_id', 'mois'
+        ).annotate(
+            montant=Sum('montant'), nombre=Count('id'), dernier=Max('id')
+        ).order_by():
+            reglements[ligne['contrat_id']][cls._mois(ligne['mois'])] = ligne
+
+        avances = defaultdict(lambda: defaultdict(Decimal))
+        for ligne in consommations.values('avance__contrat_id', 'mois_consomme').annotate(
+            montant=Sum('montant_consomme')
+        ).order_by():
+            avances[ligne['avance__contrat_id']][cls._mois(ligne['mois_consomme'])] += ligne['montant'] or Decimal('0')
+
+        lignes = []
+        for contrat in contrats.only(
+            'pk', 'date_debut', 'date_fin', 'date_resiliation', 'est_resilie',
+            'loyer_mensuel', 'charges_mensuelles'
+        ):
+            du_mensuel = cls.montant_mensuel(contrat)
+            mois_bail = set(cls.mois_du_contrat(contrat, aujourd_hui))
+            reglements_contrat = reglements.get(contrat.pk, {})
+            avances_contrat = avances.get(contrat.pk, {})
+            for mois in sorted(mois_bail | set(reglements_contrat) | set(avances_contrat)):
+                reglement = reglements_contrat.get(mois, {})
+                montant_du = du_mensuel if mois in mois_bail else Decimal('0')
+                montant_paye = reglement.get('montant') or Decimal('0')
+                montant_avance = avances_contrat.get(mois, Decimal('0'))
+                solde = montant_du - montant_paye - montant_avance
+                lignes.append(HistoriquePaiement(
+                    contrat_id=contrat.pk,
+                    mois_paiement=mois,
+                    paiement_id=reglement.get('dernier'),
+                    montant_du=montant_du,
+                    montant_paye=montant_paye,
+                    montant_avance_utilisee=montant_avance,
+                    solde=solde,
+                    montant_restant_du=max(solde, Decimal('0')),
+                    nombre_paiements=reglement.get('nombre', 0),
+                    mois_regle=solde <= 0,
+                ))
+
+        with transaction.atomic():
+            HistoriquePaiement.objects.bulk_create(
+                lignes,
+                batch_size=cls.TAILLE_LOT,
+                update_conflicts=True,
+                unique_fields=['contrat', 'mois_paiement'],
+                update_fields=[
+                    'paiement', 'montant_du', 'montant_paye', 'montant_avance_utilisee',
+                    'solde', 'montant_restant_du', 'nombre_paiements', 'mois_regle', 'date_mise_a_jour',
+                ],
+            )
+            conservees = {(ligne.contrat_id, ligne.mois_paiement) for ligne in lignes}
+            obsoletes = [
+                pk for pk, contrat_id, mois in lignes_existantes.values_list('pk', 'contrat_id', 'mois_paiement')
+                if (contrat_id, mois) not in conservees
+            ]
+            if obsoletes:
+                HistoriquePaiement.objects.filter(pk__in=obsoletes).delete()
+        return len(lignes)
+
+    # Lectures
+
+    @staticmethod
+    def lignes(contrat, mois_debut=None, mois_fin=None):
+        queryset = HistoriquePaiement.objects.filter(contrat=contrat)
+        if mois_debut:
+            queryset = queryset.filter(mois_paiement__gte=mois_debut)
+        if mois_fin:
+            queryset = queryset.filter(mois_paiement__lte=mois_fin)
+        return queryset
+
+    @staticmethod
+    def dernier_mois_echu(contrat, aujourd_hui=None):
+        """Dernier mois dont l'échéance (jour de paiement du bail) est dépassée."""
+        aujourd_hui = aujourd_hui or timezone.now().date()
+        mois = aujourd_hui.replace(day=1)
+        jour = min(contrat.jour_paiement or 1, calendar.monthrange(mois.year, mois.month)[1])
+        if aujourd_hui <= mois.replace(day=jour):
+            mois -= relativedelta(months=1)
+        return mois
+
+    @classmethod
+    def situation(cls, contrat, aujourd_hui=None):
+        """
+        Arriérés du contrat d'après le solde cumulé des mois échus, en une
+        lecture : un règlement anticipé ou un trop-perçu compense les mois
+        précédents, et les règlements du mois en cours non encore échu sont
+        déduits sans compter son montant dû. Les mois impayés sont les plus
+        récents mois échus que les règlements ne couvrent pas.
+        """
+        mois_courant = (aujourd_hui or timezone.now().date()).replace(day=1)
+        mois_echu = cls.dernier_mois_echu(contrat, aujourd_hui)
+        lignes = list(HistoriquePaiement.objects.filter(
+            contrat=contrat, mois_paiement__lte=mois_courant
+        ).order_by('mois_paiement').values_list('mois_paiement', 'montant_du', 'solde'))
+
+        cumul = Decimal('0')
+        solde_total = Decimal('0')
+        for mois, montant_du, solde in lignes:
+            solde_total += solde
+            cumul += solde if mois <= mois_echu else solde - montant_du
+        montant_arriere = max(cumul, Decimal('0'))
+
+        # Les règlements soldent les mois les plus anciens en premier
+        mois_impayes = 0
+        premier_mois_impaye = None
+        reste = montant_arriere
+        for mois, montant_du, _ in reversed(lignes):
+            if reste <= 0:
+                break
+            if mois > mois_echu or montant_du <= 0:
+                continue
+            mois_impayes += 1
+            premier_mois_impaye = mois
+            reste -= montant_du
+
+        return {
+            'montant_arriere': montant_arriere,
+            'mois_impayes': mois_impayes,
+            'premier_mois_impaye': premier_mois_impaye,
+            'solde_total': solde_total,
+        }
+
+    @classmethod
+    def montant_du_mois(cls, contrat, mois):
+        """
+        Montant restant dû et part couverte par les avances pour un mois, sans
+        rien consommer : la ligne du grand livre si elle existe, sinon une
+        estimation d'après les avances actives couvrant ce mois.
+        """
+        mois = mois.replace(day=1)
+        ligne = HistoriquePaiement.objects.filter(contrat=contrat, mois_paiement=mois).only(
+            'montant_du', 'montant_paye', 'montant_avance_utilisee'
+        ).first()
+        if ligne is not None and ligne.montant_du:
+            restant = ligne.montant_du - ligne.montant_avance_utilisee
+            return max(restant, Decimal('0')), ligne.montant_avance_utilisee
+
+        montant_du = cls.montant_mensuel(contrat)
+        avance = AvanceLoyer.objects.filter(
+            contrat=contrat,
+            statut='active',
+            montant_restant__gt=0,
+            mois_debut_couverture__lte=mois,
+            mois_fin_couverture__gte=mois
+        ).order_by('date_avance').values_list('loyer_mensuel', flat=True).first()
+        if avance:
+            montant_avance = min(Decimal(str(avance)), montant_du)
+            return montant_du - montant_avance, montant_avance
+        return montant_du, Decimal('0')
+
+
+# Contrats à recalculer à la validation de la transaction en cours
+_en_attente = threading.local()
+
+
+def planifier(contrat_id):
+    """
+    Recalcule le grand livre du contrat une fois la transaction validée. Les
+    contrats touchés par une même transaction sont recalculés ensemble, au
+    premier des rappels ; les suivants n'ont plus rien à faire.
+    """
+    if not contrat_id:
+        return
+    ids = getattr(_en_attente, 'ids', None)
+    if ids is None:
+        ids = _en_attente.ids = set()
+    ids.add(contrat_id)
+    transaction.on_commit(_vider)
+
+
+def _vider():
+    ids = getattr(_en_attente, 'ids', None) or set()
+    _en_attente.ids = set()
+    if ids:
+        try:
+            GrandLivreContrat.reconstruire(ids)
+        except Exception as e:
+            logger.error(f"Erreur lors de la mise à jour du grand livre des contrats {sorted(ids)}: {e}")
+
+
+def _paiement_modifie(sender, instance, **kwargs):
+    planifier(instance.contrat_id)
+
+
+def _consommation_modifiee(sender, instance, **kwargs):
+    contrat_id = AvanceLoyer.objects.filter(pk=instance.avance_id).values_list('contrat_id', flat=True).first()
+    planifier(contrat_id)
+
+
+def _avance_modifiee(sender, instance, **kwargs):
+    planifier(instance.contrat_id)
+
+
+def _contrat_modifie(sender, instance, **kwargs):
+    planifier(instance.pk)
+
+
+def connecter_signaux():
+    """Met à jour le grand livre des contrats dont les paiements, avances ou conditions changent."""
+    post_save.connect(_paiement_modifie, sender=Paiement, dispatch_uid='grand_livre_paiement_save')
+    post_delete.connect(_paiement_modifie, sender=Paiement, dispatch_uid='grand_livre_paiement_delete')
+    post_save.connect(_consommation_modifiee, sender=ConsommationAvance, dispatch_uid='grand_livre_consommation_save')
+    post_delete.connect(
+        _consommation_modifiee, sender=ConsommationAvance, dispatch_uid='grand_livre_consommation_delete'
+    )
+    post_delete.connect(_avance_modifiee, sender=AvanceLoyer, dispatch_uid='grand_livre_avance_delete')
+    post_save.connect(_contrat_modifie, sender=Contrat, dispatch_uid='grand_livre_contrat_save')
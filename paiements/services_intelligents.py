@@ -1,7 +1,7 @@
 from django.db.models import Q, Sum, Count, F, Case, When, DecimalField, Max, Min
 from django.db.models.functions import Coalesce, ExtractMonth, ExtractYear
 from django.utils import timezone
-from datetime import datetime, timedelta, date
+from datetime import datetime, date
 from decimal import Decimal
 from dateutil.relativedelta import relativedelta
 import json
@@ -86,7 +86,9 @@ class ServiceContexteIntelligent:
             contexte_contrat['calculs_automatiques'] = ServiceContexteIntelligent._get_calculs_automatiques(contrat)
             
             # Alertes et notifications
-            contexte_contrat['alertes'] = ServiceContexteIntelligent._get_alertes(contrat)
+            contexte_contrat['alertes'] = ServiceContexteIntelligent._get_alertes(
+                contrat, contexte_contrat['calculs_automatiques'], contexte_contrat['charges_deductibles']
+            )
             
             return {
                 'success': True,
@@ -108,40 +110,39 @@ class ServiceContexteIntelligent:
     def _get_historique_paiements(contrat):
         """
         Récupère l'historique des paiements des 5 derniers mois.
+        Les totaux et le statut de chaque mois viennent du grand livre du contrat.
         """
-        date_limite = timezone.now().date() - timedelta(days=150)  # 5 mois
+        from .services_grand_livre import GrandLivreContrat
+        
+        mois_courant = timezone.now().date().replace(day=1)
+        mois_periode = [mois_courant - relativedelta(months=i) for i in range(5)]
+        
+        lignes = {
+            ligne.mois_paiement: ligne
+            for ligne in GrandLivreContrat.lignes(contrat, mois_periode[-1], mois_courant)
+        }
         
-        paiements = Paiement.objects.filter(
+        paiements_par_mois = {}
+        for paiement in Paiement.objects.filter(
             contrat=contrat,
             is_deleted=False,
-            date_paiement__gte=date_limite
-        ).order_by('-date_paiement')
+            date_paiement__gte=mois_periode[-1]
+        ).order_by('-date_paiement').values(
+            'id', 'montant', 'date_paiement', 'statut', 'type_paiement'
+        ):
+            paiements_par_mois.setdefault(paiement['date_paiement'].replace(day=1), []).append(paiement)
         
         historique = []
-        for i in range(5):
-            date_mois = timezone.now().date() - timedelta(days=30*i)
-            mois = date_mois.month
-            annee = date_mois.year
-            
-            paiements_mois = paiements.filter(
-                date_paiement__month=mois,
-                date_paiement__year=annee
-            )
-            
-            total_mois = paiements_mois.aggregate(
-                total=Coalesce(Sum('montant'), Decimal('0.00'))
-            )['total']
-            
-            nombre_paiements = paiements_mois.count()
-            
+        for mois in mois_periode:
+            ligne = lignes.get(mois)
             historique.append({
-                'mois': date_mois.strftime('%B %Y'),
-                'total_paiements': total_mois,
-                'nombre_paiements': nombre_paiements,
-                'paiements': list(paiements_mois.values(
-                    'id', 'montant', 'date_paiement', 'statut', 'type_paiement'
-                )),
-                'statut_mois': 'Complet' if total_mois >= Decimal(contrat.loyer_mensuel or '0') else 'Incomplet'
+                'mois': mois.strftime('%B %Y'),
+                'total_paiements': ligne.montant_paye if ligne else Decimal('0.00'),
+                'nombre_paiements': ligne.nombre_paiements if ligne else 0,
+                'paiements': paiements_par_mois.get(mois, []),
+                'montant_avance_utilisee': ligne.montant_avance_utilisee if ligne else Decimal('0.00'),
+                'montant_restant_du': ligne.montant_restant_du if ligne else Decimal('0.00'),
+                'statut_mois': 'Complet' if ligne is None or ligne.mois_regle else 'Incomplet'
             })
         
         return historique
@@ -154,7 +155,7 @@ class ServiceContexteIntelligent:
         charges = ChargeDeductible.objects.filter(
             contrat=contrat,
             is_deleted=False
-        ).order_by('-date_creation')
+        ).order_by('-created_at')
         
         total_charges = charges.aggregate(
             total=Coalesce(Sum('montant'), Decimal('0.00'))
@@ -173,7 +174,7 @@ class ServiceContexteIntelligent:
             'charges_en_attente': charges_en_attente,
             'charges_validees': charges_validees,
             'charges_recentes': list(charges[:5].values(
-                'id', 'montant', 'libelle', 'type_charge', 'statut', 'date_charge'
+                'id', 'montant', 'description', 'est_deductible_loyer', 'est_valide', 'date_charge'
             )),
             'nombre_charges': charges.count()
         }
@@ -196,7 +197,7 @@ class ServiceContexteIntelligent:
         total_charges_validees = ChargeDeductible.objects.filter(
             contrat=contrat,
             is_deleted=False,
-            statut='validee'
+            est_valide=True
         ).aggregate(
             total=Coalesce(Sum('montant'), Decimal('0.00'))
         )['total']
@@ -205,6 +206,7 @@ class ServiceContexteIntelligent:
         # Calculer les avances disponibles pour ce contrat
         try:
             from .services_avance import ServiceGestionAvance
+            from .services_grand_livre import GrandLivreContrat
             from .models_avance import AvanceLoyer
             
             # Récupérer les avances actives
@@ -222,17 +224,21 @@ class ServiceContexteIntelligent:
             # Calculer le prochain mois de paiement en tenant compte des avances
             prochain_mois_paiement = ServiceGestionAvance.calculer_prochain_mois_paiement(contrat)
             
-            # Calculer le montant dû pour le prochain mois de paiement en tenant compte des avances
-            montant_du_mois_prochain, montant_avance_utilisee = ServiceGestionAvance.calculer_montant_du_mois(
+            # Montant dû pour le prochain mois de paiement, lu dans le grand livre (sans consommer d'avance)
+            montant_du_mois_prochain, montant_avance_utilisee = GrandLivreContrat.montant_du_mois(
                 contrat, prochain_mois_paiement
             )
             
+            # Arriérés des mois échus
+            situation = GrandLivreContrat.situation(contrat)
+            
         except Exception as e:
             # En cas d'erreur, ne pas prendre en compte les avances
             montant_avances_disponible = Decimal('0')
             mois_couverts_par_avances = 0
             montant_du_mois_prochain = Decimal(contrat.loyer_mensuel or '0') + Decimal(contrat.charges_mensuelles or '0')
             montant_avance_utilisee = Decimal('0')
+            situation = {'montant_arriere': Decimal('0'), 'mois_impayes': 0, 'premier_mois_impaye': None}
         
         # Calcul du loyer net
         loyer_mensuel = Decimal(contrat.loyer_mensuel or '0')
@@ -279,19 +285,28 @@ class ServiceContexteIntelligent:
             'mois_couverts_par_avances': mois_couverts_par_avances,
             'montant_du_mois_prochain': montant_du_mois_prochain,
             'montant_avance_utilisee': montant_avance_utilisee,
-            'avances_actives': avances_actives.count() if 'avances_actives' in locals() else 0
+            'avances_actives': avances_actives.count() if 'avances_actives' in locals() else 0,
+            # *** ARRIÉRÉS (GRAND LIVRE) ***
+            'montant_arriere': situation['montant_arriere'],
+            'mois_impayes': situation['mois_impayes'],
+            'premier_mois_impaye': situation['premier_mois_impaye'],
         }
     
     @staticmethod
-    def _get_alertes(contrat):
+    def _get_alertes(contrat, calculs=None, charges=None):
         """
         Génère des alertes automatiques basées sur le contexte.
+        Les calculs et charges déjà obtenus peuvent être passés pour éviter de les refaire.
         """
         alertes = []
         aujourd_hui = timezone.now().date()
         
+        if calculs is None:
+            calculs = ServiceContexteIntelligent._get_calculs_automatiques(contrat)
+        if charges is None:
+            charges = ServiceContexteIntelligent._get_charges_deductibles(contrat)
+        
         # Alerte échéance proche
-        calculs = ServiceContexteIntelligent._get_calculs_automatiques(contrat)
         if calculs['jours_avant_echeance'] <= 7:
             alertes.append({
                 'type': 'echeance',
@@ -309,8 +324,17 @@ class ServiceContexteIntelligent:
                 'montant': calculs['montant_du']
             })
         
+        # Alerte arriérés
+        if calculs['mois_impayes'] > 0:
+            alertes.append({
+                'type': 'arrieres',
+                'niveau': 'danger',
+                'message': f'Arriérés: {calculs["montant_arriere"]:,.0f} F CFA sur {calculs["mois_impayes"]} mois '
+                           f'(depuis {calculs["premier_mois_impaye"].strftime("%B %Y")})',
+                'montant': calculs['montant_arriere']
+            })
+        
         # Alerte charges en attente
-        charges = ServiceContexteIntelligent._get_charges_deductibles(contrat)
         if charges['charges_en_attente'] > 0:
             alertes.append({
                 'type': 'charges',
@@ -320,8 +344,6 @@ class ServiceContexteIntelligent:
             })
         
         # *** ALERTES POUR LES AVANCES ***
-        calculs = ServiceContexteIntelligent._get_calculs_automatiques(contrat)
-        
         # Alerte avances disponibles
         if calculs['montant_avances_disponible'] > 0:
             alertes.append({
@@ -1,10 +1,11 @@
 """
 Service de monitoring des avances pour détecter la progression de consommation
 """
+from django.db.models import Avg, Count, Min, Q, Sum
 from django.utils import timezone
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
-from .models_avance import AvanceLoyer, ConsommationAvance
+from .models_avance import AvanceLoyer, ConsommationAvance, SuiviAvance
 from .models import Paiement
 
 class ServiceMonitoringAvance:
@@ -216,12 +217,21 @@ class ServiceMonitoringAvance:
     def generer_rapport_progression():
         """
         Génère un rapport global de progression de toutes les avances
+        Lu en une requête agrégée sur l'instantané SuiviAvance
         """
         try:
-            # Récupérer toutes les avances
-            avances = AvanceLoyer.objects.select_related('contrat', 'contrat__locataire').all()
+            stats = SuiviAvance.objects.aggregate(
+                total_avances=Count('id'),
+                avances_actives=Count('id', filter=Q(avance__statut='active')),
+                avances_epuisees=Count('id', filter=Q(avance__statut='epuisee')),
+                avances_critiques=Count('id', filter=Q(bientot_epuisee=True)),
+                montant_total_avances=Sum('avance__montant_avance'),
+                montant_restant_total=Sum('montant_restant'),
+                progression_moyenne=Avg('progression'),
+                date_calcul=Min('date_calcul'),
+            )
             
-            if not avances.exists():
+            if not stats['total_avances']:
                 return {
                     'total_avances': 0,
                     'avances_actives': 0,
@@ -235,50 +245,21 @@ class ServiceMonitoringAvance:
                     'message': 'Aucune avance trouvée'
                 }
             
-            # Statistiques globales
-            total_avances = avances.count()
-            avances_actives = avances.filter(statut='active').count()
-            avances_epuisees = avances.filter(statut='epuisee').count()
-            
-            montant_total_avances = sum(float(a.montant_avance) for a in avances)
-            
-            # *** CORRECTION : Calculer le montant restant total correctement ***
-            montant_restant_total = 0
-            for avance in avances:
-                montant_consomme = sum(
-                    float(c.montant_consomme) for c in ConsommationAvance.objects.filter(avance=avance)
-                )
-                montant_restant = float(avance.montant_avance) - montant_consomme
-                montant_restant_total += max(0, montant_restant)
-            
-            # Calculer la progression moyenne
-            progressions = []
-            avances_critiques = 0
-            
-            for avance in avances:
-                mois_consommes = ConsommationAvance.objects.filter(avance=avance).count()
-                progression = (mois_consommes / avance.nombre_mois_couverts * 100) if avance.nombre_mois_couverts > 0 else 0
-                progressions.append(progression)
-                
-                # Avance critique si progression > 80% et statut actif
-                if progression > 80 and avance.statut == 'active':
-                    avances_critiques += 1
-            
-            progression_moyenne = sum(progressions) / len(progressions) if progressions else 0
-            
-            # Calculer le montant consommé
+            montant_total_avances = float(stats['montant_total_avances'] or 0)
+            montant_restant_total = float(stats['montant_restant_total'] or 0)
             montant_consomme_total = montant_total_avances - montant_restant_total
             
             return {
-                'total_avances': total_avances,
-                'avances_actives': avances_actives,
-                'avances_epuisees': avances_epuisees,
+                'total_avances': stats['total_avances'],
+                'avances_actives': stats['avances_actives'],
+                'avances_epuisees': stats['avances_epuisees'],
                 'montant_total_avances': round(montant_total_avances, 2),
                 'montant_restant_total': round(montant_restant_total, 2),
                 'montant_consomme_total': round(montant_consomme_total, 2),
-                'progression_moyenne': round(progression_moyenne, 2),
-                'avances_critiques': avances_critiques,
-                'pourcentage_consomme': round((montant_consomme_total / montant_total_avances * 100) if montant_total_avances > 0 else 0, 2)
+                'progression_moyenne': round(float(stats['progression_moyenne'] or 0), 2),
+                'avances_critiques': stats['avances_critiques'],
+                'pourcentage_consomme': round((montant_consomme_total / montant_total_avances * 100) if montant_total_avances > 0 else 0, 2),
+                'date_calcul': stats['date_calcul']
             }
             
         except Exception as e:
@@ -299,34 +280,37 @@ class ServiceMonitoringAvance:
     def detecter_avances_critiques():
         """
         Détecte les avances qui nécessitent une attention particulière
+        Lu sur l'instantané SuiviAvance (une requête)
         """
         try:
             avances_critiques = []
             
-            # Avances bientôt épuisées (progression > 80%)
-            avances_actives = AvanceLoyer.objects.filter(statut='active')
+            suivis = SuiviAvance.objects.filter(
+                Q(bientot_epuisee=True) | Q(expiree_non_consommee=True)
+            ).select_related(
+                'avance', 'avance__contrat', 'avance__contrat__locataire'
+            ).order_by('-progression')
             
-            for avance in avances_actives:
-                mois_consommes = ConsommationAvance.objects.filter(avance=avance).count()
-                progression = (mois_consommes / avance.nombre_mois_couverts * 100) if avance.nombre_mois_couverts > 0 else 0
+            for suivi in suivis:
+                progression = float(suivi.progression)
                 
-                if progression > 80:
+                # Avances bientôt épuisées (progression > 80%)
+                if suivi.bientot_epuisee:
                     avances_critiques.append({
-                        'avance': avance,
+                        'avance': suivi.avance,
                         'progression': round(progression, 2),
                         'type_alerte': 'bientot_epuisee',
-                        'message': f'Avance {avance.id} bientôt épuisée ({progression:.1f}%)'
+                        'message': f'Avance {suivi.avance_id} bientôt épuisée ({progression:.1f}%)'
                     })
                 
                 # Avances expirées mais non consommées
-                if avance.mois_fin_couverture and avance.mois_fin_couverture < timezone.now().date().replace(day=1):
-                    if progression < 100:
-                        avances_critiques.append({
-                            'avance': avance,
-                            'progression': round(progression, 2),
-                            'type_alerte': 'expiree_non_consommee',
-                            'message': f'Avance {avance.id} expirée mais non entièrement consommée'
-                        })
+                if suivi.expiree_non_consommee:
+                    avances_critiques.append({
+                        'avance': suivi.avance,
+                        'progression': round(progression, 2),
+                        'type_alerte': 'expiree_non_consommee',
+                        'message': f'Avance {suivi.avance_id} expirée mais non entièrement consommée'
+                    })
             
             return avances_critiques
             
@@ -465,6 +449,9 @@ class ServiceMonitoringAvance:
         Envoie les alertes pour les avances critiques
         """
         try:
+            from .services_suivi_avances import ServiceSuiviAvances
+            
+            ServiceSuiviAvances.actualiser()
             avances_critiques = ServiceMonitoringAvance.detecter_avances_critiques()
             alertes_envoyees = 0
             
@@ -0,0 +1,288 @@
+"""
+Moteur de calcul en masse des récapitulatifs mensuels des bailleurs.
+
+Les totaux de tous les bailleurs d'un mois sont obtenus par quelques requêtes
+agrégées groupées par bailleur, puis appliqués aux RecapMensuel avec un seul
+bulk_update. Le calcul unitaire (RecapMensuel.calculer_totaux_bailleur)
+passe par le même code.
+"""
+
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, When
+from django.utils import timezone
+
+from .models import Paiement, RecapMensuel
+
+
+class ServiceRecapMensuel:
+    """
+    Service de génération des récapitulatifs mensuels pour l'ensemble des bailleurs
+    """
+
+    TAILLE_LOT = 500
+
+    CHAMPS_TOTAUX = [
+        'total_loyers_bruts',
+        'total_charges_deductibles',
+        'total_charges_bailleur',
+        'total_net_a_payer',
+        'nombre_proprietes',
+        'nombre_contrats_actifs',
+        'nombre_paiements_recus',
+    ]
+
+    @staticmethod
+    def bornes_mois(mois):
+        """Retourne (premier jour, premier jour du mois suivant) pour le mois donné."""
+        debut = mois.replace(day=1)
+        return debut, debut + relativedelta(months=1)
+
+    @staticmethod
+    def _montant(valeur):
+        """Conversion sécurisée des montants stockés en texte sur le contrat."""
+        if valeur is None or valeur == '':
+            return Decimal('0')
+        try:
+            return Decimal(str(valeur))
+        except (InvalidOperation, ValueError, TypeError):
+            return Decimal('0')
+
+    @staticmethod
+    def _totaux_vides():
+        return {
+            'total_loyers_bruts': Decimal('0'),
+            'total_charges_deductibles': Decimal('0'),
+            'total_charges_bailleur': Decimal('0'),
+            'total_net_a_payer': Decimal('0'),
+            'nombre_proprietes': 0,
+            'nombre_contrats_actifs': 0,
+            'nombre_paiements_recus': 0,
+            'total_paiements_reels': Decimal('0'),
+        }
+
+    @classmethod
+    def calculer_totaux(cls, mois, bailleur_ids=None):
+        """
+        Calcule les totaux du mois pour tous les bailleurs (ou ceux indiqués).
+
+        Retourne un dictionnaire {bailleur_id: totaux}.
+        """
+        from contrats.models import Contrat
+        from proprietes.models import ChargesBailleur, Propriete
+
+        debut, fin_exclue = cls.bornes_mois(mois)
+        fin = fin_exclue - relativedelta(days=1)
+        totaux = defaultdict(cls._totaux_vides)
+
+        def filtrer(queryset, champ):
+            if bailleur_ids is not None:
+                return queryset.filter(**{f'{champ}__in': bailleur_ids})
+            return queryset
+
+        # 1. Nombre de propriétés par bailleur
+        proprietes = filtrer(Propriete.objects.all(), 'bailleur_id')
+        for ligne in proprietes.values('bailleur_id').annotate(nombre=Count('id')).order_by():
+            totaux[ligne['bailleur_id']]['nombre_proprietes'] = ligne['nombre']
+
+        # 2. Contrats actifs sur le mois : loyers et charges sont stockés en texte,
+        #    ils sont donc lus en une seule passe et convertis côté Python.
+        contrats = filtrer(Contrat.objects.filter(
+            propriete__is_deleted=False,
+            est_actif=True,
+            est_resilie=False,
+            date_debut__lte=fin,
+        ).filter(
+            Q(date_fin__gte=debut) | Q(date_fin__isnull=True)
+        ), 'propriete__bailleur_id')
+        for bailleur_id, loyer, charges in contrats.values_list(
+            'propriete__bailleur_id', 'loyer_mensuel', 'charges_mensuelles'
+        ).iterator(chunk_size=2000):
+            ligne = totaux[bailleur_id]
+            ligne['nombre_contrats_actifs'] += 1
+            ligne['total_loyers_bruts'] += cls._montant(loyer)
+            ligne['total_charges_deductibles'] += cls._montant(charges)
+
+        # 3. Paiements confirmés reçus dans le mois
+        paiements = filtrer(Paiement.objects.filter(
+            date_paiement__gte=debut,
+            date_paiement__lt=fin_exclue,
+            statut='confirme',
+        ), 'contrat__propriete__bailleur_id')
+        for ligne in paiements.values('contrat__propriete__bailleur_id').annotate(
+            nombre=Count('id'), total=Sum('montant')
+        ).order_by():
+            bailleur_totaux = totaux[ligne['contrat__propriete__bailleur_id']]
+            bailleur_totaux['nombre_paiements_recus'] = ligne['nombre']
+            bailleur_totaux['total_paiements_reels'] = ligne['total'] or Decimal('0')
+
+        # 4. Charges bailleur du mois (montant restant, à défaut le montant initial)
+        charges_bailleur = filtrer(ChargesBailleur.objects.filter(
+            date_charge__gte=debut,
+            date_charge__lt=fin_exclue,
+            statut__in=['en_attente', 'deduite_retrait'],
+        ), 'propriete__bailleur_id')
+        montant_retenu = Case(
+            When(Q(montant_restant__isnull=True) | Q(montant_restant=0), then=F('montant')),
+            default=F('montant_restant'),
+            output_field=DecimalField(max_digits=10, decimal_places=2),
+        )
+        for ligne in charges_bailleur.values('propriete__bailleur_id').annotate(
+            total=Sum(montant_retenu)
+        ).order_by():
+            totaux[ligne['propriete__bailleur_id']]['total_charges_bailleur'] = ligne['total'] or Decimal('0')
+
+        # Les paiements réels remplacent les loyers théoriques lorsqu'ils les dépassent
+        for ligne in totaux.values():
+            ligne['paiements_a_lier'] = (
+                ligne['nombre_paiements_recus'] > 0
+                and ligne['total_paiements_reels'] > ligne['total_loyers_bruts']
+            )
+            if ligne['paiements_a_lier']:
+                ligne['total_loyers_bruts'] = ligne['total_paiements_reels']
+            total_net = (
+                ligne['total_loyers_bruts']
+                - ligne['total_charges_deductibles']
+                - ligne['total_charges_bailleur']
+            )
+            ligne['total_net_a_payer'] = max(total_net, Decimal('0'))
+
+        return dict(totaux)
+
+    @classmethod
+    def appliquer_totaux(cls, recaps):
+        """
+        Recalcule et enregistre les totaux d'une liste de récapitulatifs.
+
+        Les récapitulatifs sont regroupés par mois : une série de requêtes agrégées
+        par mois, puis un bulk_update par lot.
+        """
+        recaps = list(recaps)
+        par_mois = defaultdict(list)
+        for recap in recaps:
+            par_mois[recap.mois_recap.replace(day=1)].append(recap)
+
+        resultats = {}
+        maintenant = timezone.now()
+        for mois, recaps_mois in par_mois.items():
+            # Au-delà d'un lot, agréger tout le mois évite une clause IN démesurée
+            bailleur_ids = None if len(recaps_mois) > cls.TAILLE_LOT else [r.bailleur_id for r in recaps_mois]
+            totaux = cls.calculer_totaux(mois, bailleur_ids=bailleur_ids)
+            a_lier = []
+            for recap in recaps_mois:
+                ligne = totaux.get(recap.bailleur_id) or cls._totaux_vides()
+                for champ in cls.CHAMPS_TOTAUX:
+                    setattr(recap, champ, ligne[champ])
+                recap.date_modification = maintenant
+                if ligne.get('paiements_a_lier'):
+                    a_lier.append(recap)
+                resultats[recap.pk] = {champ: ligne[champ] for champ in cls.CHAMPS_TOTAUX}
+
+            with transaction.atomic():
+                RecapMensuel.objects.bulk_update(
+                    recaps_mois, cls.CHAMPS_TOTAUX + ['date_modification'], batch_size=cls.TAILLE_LOT
+                )
+
+            if a_lier:
+                cls.lier_paiements(a_lier)
+
+        return resultats
+
+    @classmethod
+    def lier_paiements(cls, recaps):
+        """
+        Lie aux récapitulatifs les paiements validés ou encaissés de leur mois.
+
+        Une requête de lecture par mois (prédicats sur plage de dates, exploitables
+        par les index) puis un bulk_create sur la table de liaison ; les liens déjà
+        présents sont ignorés. Retourne le nombre de liens soumis.
+        """
+        Liaison = RecapMensuel.paiements_concernes.through
+        par_mois = defaultdict(list)
+        for recap in recaps:
+            par_mois[recap.mois_recap.replace(day=1)].append(recap)
+
+        total = 0
+        for mois, recaps_mois in par_mois.items():
+            debut, fin_exclue = cls.bornes_mois(mois)
+            recap_par_bailleur = {recap.bailleur_id: recap.pk for recap in recaps_mois}
+            paiements = Paiement.objects.filter(
+                date_paiement__gte=debut,
+                date_paiement__lt=fin_exclue,
+                statut__in=['valide', 'encaisse'],
+            )
+            if len(recaps_mois) <= cls.TAILLE_LOT:
+                paiements = paiements.filter(contrat__propriete__bailleur_id__in=list(recap_par_bailleur))
+
+            liaisons = [
+                Liaison(recapmensuel_id=recap_par_bailleur[bailleur_id], paiement_id=paiement_id)
+                for paiement_id, bailleur_id in paiements.values_list(
+                    'id', 'contrat__propriete__bailleur_id'
+                ).iterator(chunk_size=2000)
+                if bailleur_id in recap_par_bailleur
+            ]
+            Liaison.objects.bulk_create(liaisons, batch_size=cls.TAILLE_LOT, ignore_conflicts=True)
+            total += len(liaisons)
+
+        return total
+
+    @classmethod
+    def lier_paiements_mois(cls, mois):
+        """Lie en une passe les paiements de tous les récapitulatifs du mois."""
+        recaps = RecapMensuel.objects.filter(mois_recap=mois.replace(day=1), is_deleted=False)
+        return cls.lier_paiements(recaps.only('id', 'bailleur_id', 'mois_recap'))
+
+    @classmethod
+    def generer_recaps_mois(cls, mois, bailleur_ids=None, utilisateur=None, inclure_valides=False):
+        """
+        Crée les récapitulatifs manquants du mois et recalcule leurs totaux en masse.
+
+        Par défaut seuls les récapitulatifs en brouillon sont recalculés, afin de ne
+        pas modifier les montants déjà validés ou envoyés.
+        """
+        from proprietes.models import Bailleur
+
+        mois = mois.replace(day=1)
+        if bailleur_ids is None:
+            bailleur_ids = list(
+                Bailleur.objects.filter(proprietes__is_deleted=False)
+                .values_list('id', flat=True).distinct()
+            )
+
+        existants = set(RecapMensuel.objects.filter(
+            mois_recap=mois, bailleur_id__in=bailleur_ids
+        ).values_list('bailleur_id', flat=True))
+        nouveaux = [
+            RecapMensuel(bailleur_id=bailleur_id, mois_recap=mois, cree_par=utilisateur)
+            for bailleur_id in bailleur_ids
+            if bailleur_id not in existants
+        ]
+        RecapMensuel.objects.bulk_create(nouveaux, batch_size=cls.TAILLE_LOT, ignore_conflicts=True)
+
+        recaps = RecapMensuel.objects.filter(
+            mois_recap=mois, bailleur_id__in=bailleur_ids, is_deleted=False
+        )
+        if not inclure_valides:
+            recaps = recaps.filter(statut='brouillon')
+        recaps = list(recaps)
+
+        resultats = cls.appliquer_totaux(recaps)
+        if utilisateur is not None and recaps:
+            RecapMensuel.objects.filter(pk__in=[r.pk for r in recaps]).update(modifie_par=utilisateur)
+
+        return {
+            'mois': mois,
+            'crees': len(nouveaux),
+            'mis_a_jour': len(recaps),
+            'totaux': resultats,
+        }
+
+    @staticmethod
+    def mois_precedent(reference=None):
+        """Mois clôturé par défaut : le mois précédant la date de référence."""
+        reference = reference or date.today()
+        return reference.replace(day=1) - relativedelta(months=1)
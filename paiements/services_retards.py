@@ -0,0 +1,119 @@
+"""
+Détection des loyers en retard.
+
+Pour un ensemble de contrats et de mois, les paiements sont lus en une seule
+requête groupée par contrat et par mois ; les couples (contrat, mois) sans
+paiement qualifiant dont l'échéance est dépassée sont les retards. Utilisé
+par les alertes SMS, la détection d'anomalies et l'API des paiements.
+"""
+
+from calendar import monthrange
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+from django.db.models import Count, Min, Q, QuerySet
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from contrats.models import Contrat
+
+from .models import Paiement
+
+
+class DetecteurRetards:
+    """
+    Couples (contrat, mois) en retard de paiement, calculés en bloc
+    """
+
+    # Dans les premiers jours du mois, le mois précédent est encore vérifié
+    JOURS_GRACE = 5
+
+    @classmethod
+    def mois_a_verifier(cls, aujourd_hui=None):
+        """Mois en cours, précédé du mois précédent pendant les premiers jours du mois."""
+        aujourd_hui = aujourd_hui or timezone.now().date()
+        mois_courant = aujourd_hui.replace(day=1)
+        if aujourd_hui.day <= cls.JOURS_GRACE:
+            return [mois_courant - relativedelta(months=1), mois_courant]
+        return [mois_courant]
+
+    @staticmethod
+    def date_echeance(mois, jour_paiement):
+        """Jour de paiement du contrat dans le mois, ramené au dernier jour du mois si besoin."""
+        _, dernier_jour = monthrange(mois.year, mois.month)
+        return date(mois.year, mois.month, min(jour_paiement or 1, dernier_jour))
+
+    @classmethod
+    def detecter(cls, contrats=None, mois=None, statuts=('valide',), types=None, aujourd_hui=None):
+        """
+        Retards des contrats indiqués (contrats actifs par défaut) sur les mois
+        indiqués (mois_a_verifier par défaut), triés par contrat puis par mois.
+
+        Un mois est réglé par un paiement de l'un des `statuts` (et de l'un des
+        `types` s'ils sont donnés) daté de ce mois. Chaque retard est un dict
+        contrat, mois, date_echeance, jours_retard et paiement_en_attente (id
+        d'un paiement en attente du mois, s'il y en a un).
+        """
+        aujourd_hui = aujourd_hui or timezone.now().date()
+        mois = sorted(mois or cls.mois_a_verifier(aujourd_hui))
+        if contrats is None:
+            contrats = Contrat.objects.filter(est_actif=True).select_related('locataire', 'propriete')
+        # Sous-requête plutôt qu'une liste d'identifiants quand c'est possible
+        filtre_contrats = contrats.values('pk') if isinstance(contrats, QuerySet) else None
+        contrats = list(contrats)
+        if not contrats or not mois:
+            return []
+        if filtre_contrats is None:
+            filtre_contrats = [contrat.pk for contrat in contrats]
+
+        paiements = Paiement.objects.filter(
+            contrat__in=filtre_contrats,
+            date_paiement__gte=mois[0],
+            date_paiement__lt=mois[-1] + relativedelta(months=1),
+            statut__in=set(statuts) | {'en_attente'},
+        )
+        if types:
+            paiements = paiements.filter(type_paiement__in=types)
+
+        regles = set()
+        en_attente = {}
+        for ligne in paiements.annotate(mois=TruncMonth('date_paiement')).values(
+            'contrat_id', 'mois'
+        ).annotate(
+            qualifiants=Count('id', filter=Q(statut__in=statuts)),
+            premier_en_attente=Min('id', filter=Q(statut='en_attente')),
+        ).order_by():
+            mois_paiement = ligne['mois']
+            if hasattr(mois_paiement, 'date'):
+                mois_paiement = mois_paiement.date()
+            cle = (ligne['contrat_id'], mois_paiement.replace(day=1))
+            if ligne['qualifiants']:
+                regles.add(cle)
+            elif ligne['premier_en_attente']:
+                en_attente[cle] = ligne['premier_en_attente']
+
+        retards = []
+        for contrat in contrats:
+            debut = contrat.date_debut.replace(day=1) if contrat.date_debut else None
+            for mois_verifie in mois:
+                if (debut and mois_verifie < debut) or (contrat.pk, mois_verifie) in regles:
+                    continue
+                echeance = cls.date_echeance(mois_verifie, contrat.jour_paiement)
+                if aujourd_hui <= echeance:
+                    continue
+                retards.append({
+                    'contrat': contrat,
+                    'mois': mois_verifie,
+                    'date_echeance': echeance,
+                    'jours_retard': (aujourd_hui - echeance).days,
+                    'paiement_en_attente': en_attente.get((contrat.pk, mois_verifie)),
+                })
+        return retards
+
+    @classmethod
+    def contrats_en_retard(cls, contrats=None, **kwargs):
+        """Contrats ayant au moins un mois en retard, dans l'ordre, sans doublon."""
+        resultat = {}
+        for retard in cls.detecter(contrats, **kwargs):
+            resultat.setdefault(retard['contrat'].pk, retard['contrat'])
+        return list(resultat.values())
@@ -0,0 +1,129 @@
+"""
+Statistiques de paiements des bailleurs et des locataires.
+
+Les paiements validés des 12 derniers mois calendaires (mois en cours inclus)
+sont agrégés en une seule requête groupée par personne, par mois (TruncMonth)
+et par propriété, pour une liste quelconque de bailleurs ou de locataires.
+Les séries mensuelles, les totaux du mois et de l'année et le nombre de
+propriétés concernées en sont déduits en mémoire.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Paiement
+
+
+class ServiceStatistiquesPaiements:
+    """
+    Statistiques de paiements calculées en bloc pour des bailleurs ou des locataires
+    """
+
+    NOMBRE_MOIS = 12
+    DERNIERS_MOIS = 6
+
+    # Chemin de la personne depuis le paiement, et nom de la clé du nombre de propriétés
+    PERSONNES = {
+        'bailleur': ('contrat__propriete__bailleur', 'proprietes_avec_paiements'),
+        'locataire': ('contrat__locataire', 'proprietes_louees'),
+    }
+
+    @classmethod
+    def mois_de_la_periode(cls, aujourd_hui=None):
+        """Premiers jours des 12 mois de la période, du plus ancien au mois en cours."""
+        mois_courant = (aujourd_hui or timezone.now().date()).replace(day=1)
+        return [mois_courant - relativedelta(months=i) for i in range(cls.NOMBRE_MOIS - 1, -1, -1)]
+
+    @staticmethod
+    def _identifiants(personnes):
+        return [getattr(personne, 'pk', personne) for personne in personnes]
+
+    @classmethod
+    def agreger(cls, type_personne, personnes, aujourd_hui=None):
+        """
+        Montants et nombres de paiements {pk: {(mois, propriete_id): (montant, nombre)}}
+        des personnes indiquées (objets ou identifiants), en une requête.
+        """
+        chemin, _ = cls.PERSONNES[type_personne]
+        mois = cls.mois_de_la_periode(aujourd_hui)
+        lignes = Paiement.objects.filter(
+            statut='valide',
+            date_paiement__gte=mois[0],
+            **{f'{chemin}__in': cls._identifiants(personnes)}
+        ).annotate(
+            mois=TruncMonth('date_paiement')
+        ).values(
+            chemin, 'mois', 'contrat__propriete'
+        ).annotate(
+            montant=Sum('montant'),
+            nombre=Count('id')
+        ).order_by()
+
+        agregats = defaultdict(dict)
+        for ligne in lignes:
+            mois_paiement = ligne['mois']
+            if hasattr(mois_paiement, 'date'):
+                mois_paiement = mois_paiement.date()
+            agregats[ligne[chemin]][(mois_paiement, ligne['contrat__propriete'])] = (
+                ligne['montant'] or Decimal('0'), ligne['nombre']
+            )
+        return agregats
+
+    @classmethod
+    def _statistiques(cls, type_personne, agregat, mois):
+        _, cle_proprietes = cls.PERSONNES[type_personne]
+        par_mois = {m: [Decimal('0'), 0] for m in mois}
+        proprietes = set()
+        for (mois_paiement, propriete_id), (montant, nombre) in agregat.items():
+            if mois_paiement in par_mois:
+                par_mois[mois_paiement][0] += montant
+                par_mois[mois_paiement][1] += nombre
+                proprietes.add(propriete_id)
+
+        serie = [{'mois': m, 'montant': par_mois[m][0], 'nombre': par_mois[m][1]} for m in mois]
+        courant = serie[-1]
+        annee = [point for point in serie if point['mois'].year == courant['mois'].year]
+
+        total_paiements = sum(point['nombre'] for point in serie)
+        montant_total = sum((point['montant'] for point in serie), Decimal('0'))
+        return {
+            'total_paiements': total_paiements,
+            'montant_total': montant_total,
+            'moyenne_mensuelle': montant_total / cls.NOMBRE_MOIS if total_paiements else 0,
+            'serie_mensuelle': serie,
+            'derniers_mois': [
+                {'mois': point['mois'].strftime('%B %Y'), 'montant': point['montant'], 'nombre': point['nombre']}
+                for point in reversed(serie[-cls.DERNIERS_MOIS:])
+            ],
+            cle_proprietes: len(proprietes),
+            'total_mois': courant['montant'],
+            'nombre_paiements_mois': courant['nombre'],
+            'total_annee': sum((point['montant'] for point in annee), Decimal('0')),
+            'nombre_paiements_annee': sum(point['nombre'] for point in annee),
+        }
+
+    @classmethod
+    def calculer(cls, type_personne, personnes, aujourd_hui=None):
+        """Statistiques {pk: {...}} de chaque bailleur ou locataire indiqué, en une requête."""
+        identifiants = cls._identifiants(personnes)
+        if not identifiants:
+            return {}
+        mois = cls.mois_de_la_periode(aujourd_hui)
+        agregats = cls.agreger(type_personne, identifiants, aujourd_hui)
+        return {
+            pk: cls._statistiques(type_personne, agregats.get(pk, {}), mois)
+            for pk in identifiants
+        }
+
+    @classmethod
+    def pour_bailleurs(cls, bailleurs, aujourd_hui=None):
+        return cls.calculer('bailleur', bailleurs, aujourd_hui)
+
+    @classmethod
+    def pour_locataires(cls, locataires, aujourd_hui=None):
+        return cls.calculer('locataire', locataires, aujourd_hui)
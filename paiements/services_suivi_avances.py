@@ -0,0 +1,152 @@
+"""
+Suivi en lot des avances de loyer.
+
+Toutes les avances sont chargées en une requête annotée (nombre et montant
+des consommations), la couverture restante, la date d'épuisement estimée et
+le niveau de risque sont calculés en mémoire en une passe, puis enregistrés
+en bloc dans SuiviAvance, que lisent le rapport de progression, la détection
+des avances critiques et les vues de monitoring.
+
+Une exécution incrémentale ne recalcule que les contrats modifiés depuis la
+précédente (avance enregistrée, mois consommé, avance sans suivi) et ceux
+dont le suivi date d'un mois précédent, l'échéance des avances dépendant du
+mois courant.
+"""
+
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.db.models.signals import post_delete
+from django.utils import timezone
+
+from .models_avance import AvanceLoyer, ConsommationAvance, SuiviAvance
+
+
+class ServiceSuiviAvances:
+    """
+    Calcul en lot de l'instantané de suivi des avances
+    """
+
+    SEUIL_CRITIQUE = 80
+    SEUIL_EN_COURS = 50
+    TAILLE_LOT = 500
+
+    CHAMPS = [
+        'contrat', 'mois_consommes', 'mois_restants', 'montant_consomme', 'montant_restant',
+        'progression', 'date_epuisement_estimee', 'niveau_risque', 'bientot_epuisee',
+        'expiree_non_consommee', 'date_calcul',
+    ]
+
+    @classmethod
+    def niveau_risque(cls, avance, progression):
+        if avance.statut == 'epuisee' or progression >= 100:
+            return 'epuisee'
+        if progression >= cls.SEUIL_CRITIQUE:
+            return 'critique'
+        if progression >= cls.SEUIL_EN_COURS:
+            return 'en_cours'
+        return 'debut'
+
+    @classmethod
+    def calculer(cls, avance, mois_courant, date_calcul):
+        """Suivi d'une avance annotée avec `nombre_consommations` et `total_consomme`."""
+        mois_consommes = avance.nombre_consommations
+        montant_consomme = avance.total_consomme or Decimal('0')
+        nombre_mois = avance.nombre_mois_couverts
+        progression = Decimal(mois_consommes * 100) / nombre_mois if nombre_mois > 0 else Decimal('0')
+
+        if avance.mois_fin_couverture:
+            date_epuisement = avance.mois_fin_couverture
+        elif avance.mois_debut_couverture:
+            date_epuisement = avance.mois_debut_couverture + relativedelta(months=nombre_mois)
+        else:
+            date_epuisement = None
+
+        active = avance.statut == 'active'
+        return SuiviAvance(
+            avance_id=avance.pk,
+            contrat_id=avance.contrat_id,
+            mois_consommes=mois_consommes,
+            mois_restants=max(0, nombre_mois - mois_consommes),
+            montant_consomme=montant_consomme,
+            montant_restant=max(Decimal('0'), avance.montant_avance - montant_consomme),
+            progression=progression.quantize(Decimal('0.01')),
+            date_epuisement_estimee=date_epuisement,
+            niveau_risque=cls.niveau_risque(avance, progression),
+            bientot_epuisee=active and progression > cls.SEUIL_CRITIQUE,
+            expiree_non_consommee=(
+                active and progression < 100
+                and avance.mois_fin_couverture is not None
+                and avance.mois_fin_couverture < mois_courant
+            ),
+            date_calcul=date_calcul,
+        )
+
+    @staticmethod
+    def contrats_modifies(depuis, mois_courant):
+        """Contrats dont le suivi est à refaire depuis la dernière exécution."""
+        contrats = set(AvanceLoyer.objects.filter(updated_at__gt=depuis).values_list('contrat_id', flat=True))
+        contrats.update(ConsommationAvance.objects.filter(
+            created_at__gt=depuis
+        ).values_list('avance__contrat_id', flat=True))
+        contrats.update(AvanceLoyer.objects.filter(suivi__isnull=True).values_list('contrat_id', flat=True))
+        contrats.update(SuiviAvance.objects.filter(
+            date_calcul__date__lt=mois_courant
+        ).values_list('contrat_id', flat=True))
+        return contrats
+
+    @classmethod
+    def actualiser(cls, complet=False, aujourd_hui=None):
+        """
+        Recalcule le suivi des avances : de toutes (complet) ou seulement des
+        contrats modifiés depuis la dernière exécution. Le début de l'exécution
+        sert de repère à la suivante.
+        """
+        date_calcul = timezone.now()
+        mois_courant = (aujourd_hui or date_calcul.date()).replace(day=1)
+        resultat = {'complet': complet, 'contrats': 0, 'avances': 0}
+
+        avances = AvanceLoyer.objects.annotate(
+            nombre_consommations=Count('consommations'),
+            total_consomme=Sum('consommations__montant_consomme')
+        ).only(
+            'pk', 'contrat_id', 'montant_avance', 'nombre_mois_couverts', 'statut',
+            'mois_debut_couverture', 'mois_fin_couverture'
+        ).order_by()
+
+        depuis = None if complet else SuiviAvance.objects.aggregate(dernier=Max('date_calcul'))['dernier']
+        if depuis is None:
+            resultat['complet'] = True
+        else:
+            contrats = cls.contrats_modifies(depuis, mois_courant)
+            if not contrats:
+                return resultat
+            avances = avances.filter(contrat_id__in=contrats)
+
+        suivis = [cls.calculer(avance, mois_courant, date_calcul) for avance in avances]
+        with transaction.atomic():
+            SuiviAvance.objects.bulk_create(
+                suivis,
+                batch_size=cls.TAILLE_LOT,
+                update_conflicts=True,
+                unique_fields=['avance'],
+                update_fields=cls.CHAMPS,
+            )
+
+        resultat['avances'] = len(suivis)
+        resultat['contrats'] = len({suivi.contrat_id for suivi in suivis})
+        return resultat
+
+
+def _consommation_supprimee(sender, instance, **kwargs):
+    # Une suppression ne laisse pas de trace datée : le suivi sera recalculé
+    SuiviAvance.objects.filter(avance_id=instance.avance_id).delete()
+
+
+def connecter_signaux():
+    """Oublie le suivi d'une avance dont une consommation est supprimée."""
+    post_delete.connect(
+        _consommation_supprimee, sender=ConsommationAvance, dispatch_uid='suivi_avance_consommation_delete'
+    )
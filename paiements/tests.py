@@ -1,3 +1,32 @@
+"""
+Tests des listes paginées de l'API REST des paiements.
+"""
+
+from datetime import date
+from decimal import Decimal
+
 from django.test import TestCase
+from django.urls import reverse
+
+from core.tests_utils import ListePagineeMixin, creer_contrat
+
+from .models import Paiement
+
+
+class ListesPagineesTests(ListePagineeMixin, TestCase):
+
+    def creer_paiement(self, type_paiement):
+        return Paiement.objects.create(
+            contrat=creer_contrat(date_fin=date(2026, 1, 1)), montant=Decimal('100000'),
+            type_paiement=type_paiement, date_paiement=date(2025, 2, 5), mode_paiement='especes',
+        )
+
+    def test_liste_paiements(self):
+        self.verifier_requetes(
+            reverse('paiements:paiement-list'), lambda: self.creer_paiement('loyer'), 1
+        )
 
-# Create your tests here.
+    def test_liste_cautions_avances(self):
+        self.verifier_requetes(
+            reverse('paiements:paiement-caution-avance-list'), lambda: self.creer_paiement('caution'), 1
+        )
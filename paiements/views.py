@@ -24,7 +24,8 @@ from .models import Paiement, ChargeDeductible, QuittancePaiement
 from .forms import PaiementForm, ChargeDeductibleForm, RetraitBailleurForm, GenererPDFLotForm
 from contrats.models import Contrat
 from proprietes.models import Propriete, Locataire, Bailleur
-from core.models import AuditLog, ConfigurationEntreprise
+from core.audit import journaliser
+from core.models import ConfigurationEntreprise
 from core.utils import check_group_permissions, check_group_permissions_with_fallback, get_context_with_entreprise_config
 from django.views.generic import ListView
 # from .models import TableauBordFinancier  # Modèle supprimé
@@ -98,7 +99,8 @@ from .models import Paiement, ChargeDeductible, QuittancePaiement
 from .forms import PaiementForm, ChargeDeductibleForm, RetraitBailleurForm, GenererPDFLotForm
 from contrats.models import Contrat
 from proprietes.models import Propriete, Locataire, Bailleur
-from core.models import AuditLog, ConfigurationEntreprise
+from core.audit import journaliser
+from core.models import ConfigurationEntreprise
 from core.utils import check_group_permissions, check_group_permissions_with_fallback, get_context_with_entreprise_config
 from django.views.generic import ListView
 # from .models import TableauBordFinancier  # Modèle supprimé
@@ -736,7 +738,7 @@ def supprimer_paiement(request, pk):
     paiement.save()
     
     # Log d'audit
-    AuditLog.objects.create(
+    journaliser(
         content_type=ContentType.objects.get_for_model(Paiement),
         object_id=paiement.pk,
         action='DELETE',
@@ -783,7 +785,7 @@ def modifier_paiement(request, pk):
             
             # Log d'audit
             new_data = {f.name: getattr(paiement, f.name) for f in paiement._meta.fields}
-            AuditLog.objects.create(
+            journaliser(
                 content_type=ContentType.objects.get_for_model(Paiement),
                 object_id=paiement.pk,
                 action='UPDATE',
@@ -2217,7 +2219,7 @@ def marquer_quittance_imprimee(request, pk):
         quittance.marquer_imprimee()
         
         # Log d'audit
-        AuditLog.objects.create(
+        journaliser(
             content_type=ContentType.objects.get_for_model(QuittancePaiement),
             object_id=quittance.pk,
             action='UPDATE',
@@ -2247,7 +2249,7 @@ def marquer_quittance_envoyee(request, pk):
         quittance.marquer_envoyee()
         
         # Log d'audit
-        AuditLog.objects.create(
+        journaliser(
             content_type=ContentType.objects.get_for_model(QuittancePaiement),
             object_id=quittance.pk,
             action='UPDATE',
@@ -2279,7 +2281,7 @@ def marquer_quittance_archivee(request, pk):
         quittance.marquer_archivee()
         
         # Log d'audit
-        AuditLog.objects.create(
+        journaliser(
             content_type=ContentType.objects.get_for_model(QuittancePaiement),
             object_id=quittance.pk,
             action='UPDATE',
@@ -2321,7 +2323,7 @@ def generer_quittance_manuelle(request, paiement_pk):
         )
         
         # Log d'audit
-        AuditLog.objects.create(
+        journaliser(
             content_type=ContentType.objects.get_for_model(QuittancePaiement),
             object_id=quittance.pk,
             action='CREATE',
@@ -2394,7 +2396,7 @@ def tableau_bord_create(request):
             form.save_m2m()
             
             # Log d'audit
-            AuditLog.objects.create(
+            journaliser(
                 content_type=ContentType.objects.get_for_model(TableauBordFinancier),
                 object_id=tableau.pk,
                 action='CREATE',
@@ -2443,7 +2445,7 @@ def tableau_bord_update(request, pk):
             tableau = form.save()
             
             # Log d'audit
-            AuditLog.objects.create(
+            journaliser(
                 content_type=ContentType.objects.get_for_model(TableauBordFinancier),
                 object_id=tableau.pk,
                 action='UPDATE',
@@ -2489,7 +2491,7 @@ def tableau_bord_delete(request, pk):
     
     try:
         # Log d'audit avant suppression
-        AuditLog.objects.create(
+        journaliser(
             content_type=ContentType.objects.get_for_model(TableauBordFinancier),
             object_id=tableau.pk,
             action='DELETE',
@@ -11,6 +11,7 @@ from datetime import date, datetime
 from decimal import Decimal
 
 from .services_monitoring_avance import ServiceMonitoringAvance
+from .services_suivi_avances import ServiceSuiviAvances
 from .services_avance import ServiceGestionAvance
 from .models_avance import AvanceLoyer, ConsommationAvance
 from contrats.models import Contrat
@@ -22,6 +23,9 @@ def monitoring_avances(request):
     Vue principale du monitoring des avances
     """
     try:
+        # Mettre à jour le suivi des contrats modifiés depuis le dernier calcul
+        ServiceSuiviAvances.actualiser()
+        
         # Générer le rapport de progression
         rapport = ServiceMonitoringAvance.generer_rapport_progression()
         
@@ -241,7 +245,8 @@ def rapport_progression_ajax(request):
     """
     if request.method == 'GET':
         try:
-            # Générer le rapport
+            # Générer le rapport (suivi mis à jour pour les contrats modifiés)
+            ServiceSuiviAvances.actualiser()
             rapport = ServiceMonitoringAvance.generer_rapport_progression()
             
             if rapport:
@@ -1,4 +1,7 @@
+from datetime import timedelta
+
 from django.contrib import admin
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.utils.html import format_html
 from .models import (
@@ -242,9 +245,18 @@ class UniteLocativeAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        # Occupation sur l'année à venir lue dans l'index, sans requête par ligne
+        from .index_disponibilite import IndexDisponibilite
+        
+        aujourd_hui = timezone.now().date()
+        return IndexDisponibilite.annoter(
+            super().get_queryset(request), aujourd_hui, aujourd_hui + timedelta(days=365)
+        )
+    
     def est_disponible(self, obj):
         """Affiche si l'unité est disponible."""
-        return obj.est_disponible()
+        return obj.statut in ['disponible', 'reservee'] and not obj.occupee
     est_disponible.boolean = True
     est_disponible.short_description = _("Disponible")
 
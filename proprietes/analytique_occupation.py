@@ -0,0 +1,328 @@
+"""
+Analyse de l'occupation des unités locatives et des pièces
+
+Les intervalles (objet, début, fin) de tous les contrats sont lus en une
+requête, puis le taux d'occupation (union exacte des intervalles, les
+contrats qui se chevauchent ne sont comptés qu'une fois), la durée moyenne
+d'occupation et les vacances entre deux locations sont calculés pour tout le
+portefeuille à la fois, avec NumPy quand il est installé. Les résultats sont
+mis en cache par mois de référence et invalidés à chaque modification de
+contrat.
+"""
+
+import time
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+try:
+    import numpy as np
+except ImportError:
+    # Calcul en Python pur si NumPy n'est pas disponible
+    np = None
+
+JOURS_PAR_MOIS = 30.44
+
+
+class AnalytiqueOccupation:
+    """Statistiques d'occupation du portefeuille, calculées en bloc et mises en cache par mois."""
+
+    PREFIXE = 'occupation'
+    DUREE = 6 * 3600
+    CLE_VERSION = f'{PREFIXE}:version'
+
+    VIDE = {
+        'taux_occupation': 0.0,
+        'jours_occupes': 0,
+        'jours_vacants': 0,
+        'vacances': 0,
+        'vacance_moyenne_jours': 0.0,
+        'duree_moyenne_occupation': 0.0,
+        'total_contrats': 0,
+        'contrats_actifs': 0,
+    }
+
+    # ------------------------------------------------------------------
+    # Période d'analyse
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def fenetre(mois=None):
+        """
+        Fenêtre d'analyse [début, fin[ : les 12 mois qui se terminent avec le
+        mois de référence (mois en cours par défaut).
+        """
+        mois = (mois or timezone.now().date()).replace(day=1)
+        fin = (mois + timedelta(days=32)).replace(day=1)
+        return date(fin.year - 1, fin.month, 1), fin
+
+    # ------------------------------------------------------------------
+    # Extraction des intervalles
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _intervalles(lignes, aujourd_hui):
+        """
+        Normalise les lignes (objet, début, fin, actif, résilié, date de résiliation) :
+        la résiliation anticipée raccourcit le contrat, un contrat en vigueur sans
+        fin court jusqu'à nouvel ordre (None), un contrat inactif sans fin est ignoré.
+        """
+        intervalles = []
+        for objet_id, debut, fin, est_actif, est_resilie, date_resiliation in lignes:
+            if est_resilie and date_resiliation and (fin is None or date_resiliation < fin):
+                fin = date_resiliation
+            actif = est_actif and not est_resilie
+            if fin is None and not actif:
+                continue
+            en_cours = actif and debut <= aujourd_hui and (fin is None or fin >= aujourd_hui)
+            termine = bool(est_resilie) and fin is not None
+            intervalles.append((objet_id, debut, fin, actif, en_cours, termine))
+        return intervalles
+
+    @classmethod
+    def _lignes_unites(cls):
+        from contrats.models import Contrat
+
+        return Contrat.objects.filter(unite_locative__isnull=False).values_list(
+            'unite_locative_id', 'date_debut', 'date_fin', 'est_actif', 'est_resilie', 'date_resiliation'
+        )
+
+    @classmethod
+    def _lignes_pieces(cls):
+        from .models import PieceContrat
+
+        return PieceContrat.objects.filter(contrat__is_deleted=False).values_list(
+            'piece_id', 'contrat__date_debut', 'contrat__date_fin', 'contrat__est_actif',
+            'contrat__est_resilie', 'contrat__date_resiliation'
+        ).distinct()
+
+    # ------------------------------------------------------------------
+    # Calcul
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def calculer(cls, lignes, debut, fin, aujourd_hui=None):
+        """Statistiques {objet_id: {...}} des objets présents dans les lignes, sur [debut, fin[."""
+        aujourd_hui = aujourd_hui or timezone.now().date()
+        intervalles = cls._intervalles(lignes, aujourd_hui)
+        if not intervalles:
+            return {}
+        if np is not None:
+            return cls._calculer_numpy(intervalles, debut, fin, aujourd_hui)
+        return cls._calculer_python(intervalles, debut, fin, aujourd_hui)
+
+    @classmethod
+    def _resultat(cls, duree, jours_occupes, vacances, jours_vacances, durees_mois, total, actifs):
+        return {
+            'taux_occupation': round(jours_occupes / duree * 100, 1),
+            'jours_occupes': int(jours_occupes),
+            'jours_vacants': int(duree - jours_occupes),
+            'vacances': int(vacances),
+            'vacance_moyenne_jours': round(jours_vacances / vacances, 1) if vacances else 0.0,
+            'duree_moyenne_occupation': round(durees_mois, 1),
+            'total_contrats': int(total),
+            'contrats_actifs': int(actifs),
+        }
+
+    @classmethod
+    def _calculer_numpy(cls, intervalles, debut, fin, aujourd_hui):
+        n = len(intervalles)
+        w0, w1 = debut.toordinal(), fin.toordinal()
+        ids = np.fromiter((i[0] for i in intervalles), dtype=np.int64, count=n)
+        d = np.fromiter((i[1].toordinal() for i in intervalles), dtype=np.int64, count=n)
+        f = np.fromiter((i[2].toordinal() if i[2] else w1 for i in intervalles), dtype=np.int64, count=n)
+        actif = np.fromiter((i[3] for i in intervalles), dtype=bool, count=n)
+        en_cours = np.fromiter((i[4] for i in intervalles), dtype=bool, count=n)
+        termine = np.fromiter((i[5] for i in intervalles), dtype=bool, count=n)
+
+        objets, groupe = np.unique(ids, return_inverse=True)
+        nb = len(objets)
+
+        # Durée moyenne : contrats résiliés, à défaut ancienneté du contrat en cours
+        somme_termines = np.bincount(groupe[termine], weights=(f - d)[termine], minlength=nb)
+        nb_termines = np.bincount(groupe[termine], minlength=nb)
+        anciennete = np.zeros(nb)
+        np.maximum.at(anciennete, groupe[en_cours], (aujourd_hui.toordinal() - d)[en_cours])
+        durees = np.where(nb_termines > 0, somme_termines / np.maximum(nb_termines, 1), anciennete)
+
+        # Union des intervalles dans la fenêtre, triés par (objet, début)
+        s, e = np.clip(d, w0, w1), np.clip(f, w0, w1)
+        dans_fenetre = e > s
+        total = np.bincount(groupe[dans_fenetre], minlength=nb)
+        actifs = np.bincount(groupe[dans_fenetre & actif], minlength=nb)
+
+        g, s, e = groupe[dans_fenetre], s[dans_fenetre], e[dans_fenetre]
+        ordre = np.lexsort((s, g))
+        g, s, e = g[ordre], s[ordre], e[ordre]
+        premier = np.ones(len(g), dtype=bool)
+        premier[1:] = g[1:] != g[:-1]
+
+        # Fin la plus tardive des intervalles précédents du même objet (maximum cumulé par groupe)
+        decalage = np.cumsum(premier) * (w1 - w0 + 1)
+        fin_max = np.maximum.accumulate(e - w0 + decalage) - decalage + w0
+        precedente = np.empty_like(e)
+        precedente[1:] = fin_max[:-1]
+        precedente[premier] = s[premier]
+
+        couverts = np.maximum(e - np.maximum(s, precedente), 0)
+        trous = np.where(premier, 0, np.maximum(s - precedente, 0))
+
+        occupes = np.zeros(nb, dtype=np.int64)
+        nb_vacances = np.zeros(nb, dtype=np.int64)
+        jours_vacances = np.zeros(nb, dtype=np.int64)
+        np.add.at(occupes, g, couverts)
+        np.add.at(nb_vacances, g, trous > 0)
+        np.add.at(jours_vacances, g, trous)
+
+        duree = w1 - w0
+        return {
+            int(objets[k]): cls._resultat(
+                duree, occupes[k], nb_vacances[k], jours_vacances[k],
+                durees[k] / JOURS_PAR_MOIS, total[k], actifs[k],
+            )
+            for k in range(nb)
+        }
+
+    @classmethod
+    def _calculer_python(cls, intervalles, debut, fin, aujourd_hui):
+        par_objet = {}
+        for intervalle in intervalles:
+            par_objet.setdefault(intervalle[0], []).append(intervalle)
+
+        duree = (fin - debut).days
+        resultats = {}
+        for objet_id, contrats in par_objet.items():
+            termines = [(f - d).days for _, d, f, _, _, t in contrats if t]
+            if termines:
+                duree_moyenne = sum(termines) / len(termines)
+            else:
+                duree_moyenne = max(
+                    [(aujourd_hui - d).days for _, d, _, _, c, _ in contrats if c], default=0
+                )
+
+            segments = sorted(
+                (max(d, debut), min(f or fin, fin), actif)
+                for _, d, f, actif, _, _ in contrats
+                if min(f or fin, fin) > max(d, debut)
+            )
+            occupes = vacances = jours_vacances = 0
+            fin_max = None
+            for s, e, _ in segments:
+                if fin_max is None:
+                    fin_max = s
+                elif s > fin_max:
+                    vacances += 1
+                    jours_vacances += (s - fin_max).days
+                occupes += max((e - max(s, fin_max)).days, 0)
+                fin_max = max(fin_max, e)
+
+            resultats[objet_id] = cls._resultat(
+                duree, occupes, vacances, jours_vacances, duree_moyenne / JOURS_PAR_MOIS,
+                len(segments), sum(1 for *_, actif in segments if actif),
+            )
+        return resultats
+
+    # ------------------------------------------------------------------
+    # Cache
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _version(cls):
+        version = cache.get(cls.CLE_VERSION)
+        if version is None:
+            # Une version recréée ne doit pas retomber sur d'anciennes entrées
+            version = time.time_ns()
+            cache.set(cls.CLE_VERSION, version, None)
+        return version
+
+    @classmethod
+    def _en_cache(cls, type_objet, mois, calcul):
+        debut, fin = cls.fenetre(mois)
+        cle = f'{cls.PREFIXE}:{type_objet}:{debut:%Y-%m}:v{cls._version()}'
+        resultats = cache.get(cle)
+        if resultats is None:
+            resultats = calcul(debut, fin)
+            cache.set(cle, resultats, cls.DUREE)
+        return resultats
+
+    @classmethod
+    def invalider(cls):
+        """Change la version des statistiques, au commit de la transaction."""
+        def incrementer():
+            try:
+                cache.incr(cls.CLE_VERSION)
+            except ValueError:
+                cache.set(cls.CLE_VERSION, time.time_ns(), None)
+
+        transaction.on_commit(incrementer)
+
+    # ------------------------------------------------------------------
+    # Interrogation
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def unites(cls, mois=None):
+        """Statistiques de toutes les unités locatives ayant eu un contrat."""
+        return cls._en_cache(
+            'unites', mois, lambda debut, fin: cls.calculer(cls._lignes_unites(), debut, fin)
+        )
+
+    @classmethod
+    def pieces(cls, mois=None):
+        """Statistiques de toutes les pièces ayant été louées."""
+        return cls._en_cache(
+            'pieces', mois, lambda debut, fin: cls.calculer(cls._lignes_pieces(), debut, fin)
+        )
+
+    @classmethod
+    def unite(cls, unite_id, mois=None):
+        return cls.unites(mois).get(unite_id, cls.VIDE)
+
+    @classmethod
+    def piece(cls, piece_id, mois=None):
+        return cls.pieces(mois).get(piece_id, cls.VIDE)
+
+    @classmethod
+    def proprietes(cls, mois=None):
+        """
+        Occupation agrégée des unités de chaque propriété :
+        {propriete_id: {'unites', 'jours_occupes', 'taux_occupation'}}.
+        """
+        from .models import UniteLocative
+
+        def calcul(debut, fin):
+            statistiques = cls.unites(mois)
+            duree = (fin - debut).days
+            resultats = {}
+            for unite_id, propriete_id in UniteLocative.objects.filter(
+                is_deleted=False
+            ).values_list('pk', 'propriete_id'):
+                agregat = resultats.setdefault(propriete_id, {'unites': 0, 'jours_occupes': 0})
+                agregat['unites'] += 1
+                agregat['jours_occupes'] += statistiques.get(unite_id, cls.VIDE)['jours_occupes']
+            for agregat in resultats.values():
+                agregat['taux_occupation'] = round(
+                    agregat['jours_occupes'] / (agregat['unites'] * duree) * 100, 1
+                )
+            return resultats
+
+        return cls._en_cache('proprietes', mois, calcul)
+
+
+def _donnees_modifiees(sender, **kwargs):
+    AnalytiqueOccupation.invalider()
+
+
+def connecter_signaux():
+    """Invalide les statistiques à chaque modification de contrat, de pièce louée ou d'unité."""
+    from contrats.models import Contrat
+
+    from .models import PieceContrat, UniteLocative
+
+    for modele in (Contrat, PieceContrat, UniteLocative):
+        nom = modele._meta.model_name
+        post_save.connect(_donnees_modifiees, sender=modele, dispatch_uid=f'occupation_{nom}_save')
+        post_delete.connect(_donnees_modifiees, sender=modele, dispatch_uid=f'occupation_{nom}_delete')
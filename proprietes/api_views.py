@@ -20,6 +20,15 @@ from .serializers import (
 )
 
 
+# Nombres de propriétés calculés par la requête de liste, sans requête par ligne
+NOMBRE_PROPRIETES_BAILLEUR = Count('proprietes', filter=Q(proprietes__is_deleted=False))
+NOMBRE_PROPRIETES_LOCATAIRE = Count(
+    'contrats__propriete',
+    filter=Q(contrats__est_actif=True, contrats__est_resilie=False, contrats__is_deleted=False),
+    distinct=True
+)
+
+
 class TypeBienViewSet(viewsets.ModelViewSet):
     """
     ViewSet pour la gestion des types de biens
@@ -29,7 +38,7 @@ class TypeBienViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['nom', 'description']
-    ordering_fields = ['nom', 'prix_moyen_m2']
+    ordering_fields = ['nom']
     ordering = ['nom']
     
     @action(detail=False, methods=['get'])
@@ -60,17 +69,20 @@ class BailleurViewSet(viewsets.ModelViewSet):
             return BailleurListSerializer
         return BailleurSerializer
     
+    def get_queryset(self):
+        return super().get_queryset().annotate(proprietes_count=NOMBRE_PROPRIETES_BAILLEUR)
+    
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """Statistiques des bailleurs"""
         total_bailleurs = Bailleur.objects.count()
         bailleurs_avec_proprietes = Bailleur.objects.annotate(
-            proprietes_count=Count('propriete')
+            proprietes_count=NOMBRE_PROPRIETES_BAILLEUR
         ).filter(proprietes_count__gt=0).count()
         
         # Top 5 des bailleurs avec le plus de propriétés
         top_bailleurs = Bailleur.objects.annotate(
-            proprietes_count=Count('propriete')
+            proprietes_count=NOMBRE_PROPRIETES_BAILLEUR
         ).order_by('-proprietes_count')[:5]
         
         return Response({
@@ -83,7 +95,7 @@ class BailleurViewSet(viewsets.ModelViewSet):
     def proprietes(self, request, pk=None):
         """Récupérer les propriétés d'un bailleur"""
         bailleur = self.get_object()
-        proprietes = bailleur.proprietes.all()
+        proprietes = bailleur.proprietes.select_related('bailleur', 'type_bien')
         serializer = ProprieteListSerializer(proprietes, many=True)
         return Response(serializer.data)
     
@@ -97,7 +109,7 @@ class BailleurViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        bailleurs = Bailleur.objects.filter(
+        bailleurs = self.get_queryset().filter(
             Q(nom__icontains=query) |
             Q(prenom__icontains=query) |
             Q(email__icontains=query) |
@@ -126,6 +138,9 @@ class LocataireViewSet(viewsets.ModelViewSet):
             return LocataireListSerializer
         return LocataireSerializer
     
+    def get_queryset(self):
+        return super().get_queryset().annotate(proprietes_count=NOMBRE_PROPRIETES_LOCATAIRE)
+    
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """Statistiques des locataires"""
@@ -138,7 +153,7 @@ class LocataireViewSet(viewsets.ModelViewSet):
         
         # Top 5 des locataires avec le plus de propriétés
         top_locataires = Locataire.objects.annotate(
-            proprietes_count=Count('propriete')
+            proprietes_count=NOMBRE_PROPRIETES_LOCATAIRE
         ).order_by('-proprietes_count')[:5]
         
         return Response({
@@ -151,7 +166,11 @@ class LocataireViewSet(viewsets.ModelViewSet):
     def proprietes(self, request, pk=None):
         """Récupérer les propriétés d'un locataire"""
         locataire = self.get_object()
-        proprietes = locataire.propriete_set.all()
+        proprietes = Propriete.objects.filter(
+            contrats__locataire=locataire,
+            contrats__est_actif=True,
+            contrats__est_resilie=False
+        ).select_related('bailleur', 'type_bien').distinct()
         serializer = ProprieteListSerializer(proprietes, many=True)
         return Response(serializer.data)
     
@@ -165,7 +184,7 @@ class LocataireViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        locataires = Locataire.objects.filter(
+        locataires = self.get_queryset().filter(
             Q(nom__icontains=query) |
             Q(prenom__icontains=query) |
             Q(email__icontains=query) |
@@ -185,9 +204,9 @@ class ProprieteViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['ville', 'type_bien', 'bailleur', 'disponible', 'etat']
-    search_fields = ['reference', 'titre', 'adresse', 'ville', 'description']
+    search_fields = ['numero_propriete', 'titre', 'adresse', 'ville', 'description']
     ordering_fields = [
-        'reference', 'titre', 'loyer_actuel', 'surface', 
+        'numero_propriete', 'titre', 'loyer_actuel', 'surface', 
         'date_creation', 'date_modification'
     ]
     ordering = ['-date_creation']
@@ -205,7 +224,7 @@ class ProprieteViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Filtrer les propriétés selon les paramètres"""
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().select_related('bailleur', 'type_bien')
         
         # Filtres supplémentaires
         prix_min = self.request.query_params.get('prix_min', None)
@@ -378,7 +397,7 @@ class ProprieteViewSet(viewsets.ModelViewSet):
             )
         
         proprietes = Propriete.objects.filter(
-            Q(reference__icontains=query) |
+            Q(numero_propriete__icontains=query) |
             Q(titre__icontains=query) |
             Q(adresse__icontains=query) |
             Q(ville__icontains=query) |
@@ -428,6 +447,9 @@ class ChargeCommuneViewSet(viewsets.ModelViewSet):
     ordering_fields = ['nom', 'montant_mensuel', 'date_debut']
     ordering = ['-date_creation']
     
+    def get_queryset(self):
+        return super().get_queryset().select_related('propriete')
+    
     def get_serializer_class(self):
         # Pour l'instant, utilisons un serializer basique
         from rest_framework import serializers
@@ -546,6 +568,24 @@ class PieceViewSet(viewsets.ModelViewSet):
     ordering_fields = ['nom', 'surface', 'date_creation']
     ordering = ['propriete', 'type_piece', 'nom']
     
+    def get_queryset(self):
+        # Compteurs calculés par la requête de liste, sans requête par ligne
+        return super().get_queryset().select_related('propriete').prefetch_related(
+            'acces_inclus_dans_pieces'
+        ).annotate(
+            nombre_espaces_partages=Count(
+                'acces_espaces_partages__espace_partage',
+                filter=Q(
+                    acces_espaces_partages__actif=True,
+                    acces_espaces_partages__espace_partage__est_espace_partage=True
+                ),
+                distinct=True
+            ),
+            nombre_contrats_actifs=Count(
+                'contrats', filter=Q(contrats__est_actif=True, contrats__est_resilie=False), distinct=True
+            ),
+        )
+    
     def get_serializer_class(self):
         from rest_framework import serializers
         
@@ -561,10 +601,15 @@ class PieceViewSet(viewsets.ModelViewSet):
                 fields = '__all__'
             
             def get_espaces_partages_count(self, obj):
-                return obj.get_espaces_partages_accessibles().count()
+                if not hasattr(obj, 'nombre_espaces_partages'):
+                    return obj.get_espaces_partages_accessibles().count()
+                # Un espace partagé n'a pas accès à d'autres espaces
+                return 0 if obj.est_espace_partage else obj.nombre_espaces_partages
             
             def get_contrats_actifs_count(self, obj):
-                return obj.contrats.filter(est_actif=True, est_resilie=False).count()
+                if not hasattr(obj, 'nombre_contrats_actifs'):
+                    return obj.contrats.filter(est_actif=True, est_resilie=False).count()
+                return obj.nombre_contrats_actifs
         
         return PieceSerializer
     
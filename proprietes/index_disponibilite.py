@@ -0,0 +1,239 @@
+"""
+Index de disponibilité des propriétés, unités locatives et pièces
+
+Chaque contrat en cours (actif, non résilié, non supprimé) est projeté en
+périodes d'occupation (PeriodeOccupation) : la propriété entière, son unité
+locative ou chacune de ses pièces. La question « qu'est-ce qui est libre entre
+D1 et D2 » se résout alors par une seule requête sur une table indexée, pour
+un objet comme pour tout le portefeuille. L'index est tenu à jour par signaux
+et reconstruit par la commande synchroniser_disponibilite.
+"""
+
+import logging
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from .models import Piece, PieceContrat, PeriodeOccupation, Propriete, UniteLocative
+
+logger = logging.getLogger(__name__)
+
+
+class IndexDisponibilite:
+    """Construction et interrogation des périodes d'occupation."""
+
+    TAILLE_LOT = 1000
+
+    # Champ de PeriodeOccupation désignant chaque type d'objet, et filtres associés
+    CHAMPS_OBJET = {
+        Propriete: ('propriete', {'portee': 'propriete'}),
+        UniteLocative: ('unite_locative', {}),
+        Piece: ('piece', {}),
+    }
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def contrats_occupants():
+        """Contrats qui occupent leur bien (le manager exclut les supprimés)."""
+        from contrats.models import Contrat
+
+        return Contrat.objects.filter(est_actif=True, est_resilie=False)
+
+    @classmethod
+    def _construire(cls, contrat_ids):
+        """Périodes (non enregistrées) des contrats occupants parmi contrat_ids."""
+        contrats = list(cls.contrats_occupants().filter(pk__in=contrat_ids).values_list(
+            'pk', 'propriete_id', 'unite_locative_id', 'date_debut', 'date_fin'
+        ))
+        pieces = {}
+        for contrat_id, piece_id in PieceContrat.objects.filter(
+            contrat_id__in=[contrat[0] for contrat in contrats],
+            actif=True,
+            piece__is_deleted=False,
+        ).values_list('contrat_id', 'piece_id'):
+            pieces.setdefault(contrat_id, []).append(piece_id)
+
+        periodes = []
+        for contrat_id, propriete_id, unite_id, date_debut, date_fin in contrats:
+            commun = {
+                'contrat_id': contrat_id,
+                'propriete_id': propriete_id,
+                'date_debut': date_debut,
+                'date_fin': date_fin,
+            }
+            if unite_id:
+                periodes.append(PeriodeOccupation(portee='unite', unite_locative_id=unite_id, **commun))
+            for piece_id in pieces.get(contrat_id, []):
+                periodes.append(PeriodeOccupation(portee='piece', piece_id=piece_id, **commun))
+            if not unite_id and contrat_id not in pieces:
+                periodes.append(PeriodeOccupation(portee='propriete', **commun))
+        return periodes
+
+    @classmethod
+    def synchroniser(cls, contrat_ids):
+        """Recalcule les périodes des contrats indiqués."""
+        contrat_ids = list(set(contrat_ids))
+        with transaction.atomic():
+            PeriodeOccupation.objects.filter(contrat_id__in=contrat_ids).delete()
+            periodes = cls._construire(contrat_ids)
+            PeriodeOccupation.objects.bulk_create(periodes, batch_size=cls.TAILLE_LOT)
+        return len(periodes)
+
+    @classmethod
+    def reconstruire(cls):
+        """Reconstruit l'index complet ; retourne le nombre de périodes créées."""
+        ids = list(cls.contrats_occupants().order_by('pk').values_list('pk', flat=True))
+        total = 0
+        with transaction.atomic():
+            PeriodeOccupation.objects.all().delete()
+            for i in range(0, len(ids), cls.TAILLE_LOT):
+                periodes = cls._construire(ids[i:i + cls.TAILLE_LOT])
+                PeriodeOccupation.objects.bulk_create(periodes, batch_size=cls.TAILLE_LOT)
+                total += len(periodes)
+        return total
+
+    # ------------------------------------------------------------------
+    # Interrogation
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def periodes(date_debut=None, date_fin=None):
+        """
+        Périodes d'occupation qui chevauchent la période demandée.
+
+        Sans date_fin (ou date_fin <= date_debut), la période est le seul jour
+        date_debut, bornes incluses ; sinon l'intervalle [date_debut, date_fin[ :
+        un contrat qui se termine le jour où un autre commence n'entre pas en
+        conflit. date_debut vaut aujourd'hui par défaut ; une période sans date
+        de fin est sans échéance.
+        """
+        debut = date_debut or timezone.now().date()
+        if date_fin is None or date_fin <= debut:
+            return PeriodeOccupation.objects.filter(
+                Q(date_fin__gte=debut) | Q(date_fin__isnull=True),
+                date_debut__lte=debut,
+            )
+        return PeriodeOccupation.objects.filter(
+            Q(date_fin__gt=debut) | Q(date_fin__isnull=True),
+            date_debut__lt=date_fin,
+        )
+
+    @classmethod
+    def occupations(cls, date_debut=None, date_fin=None, propriete_ids=None):
+        """
+        Identifiants occupés sur la période pour tout le portefeuille, en une requête :
+        {'proprietes': propriétés louées entières, 'unites': ..., 'pieces': ...}.
+        """
+        periodes = cls.periodes(date_debut, date_fin)
+        if propriete_ids is not None:
+            periodes = periodes.filter(propriete_id__in=propriete_ids)
+
+        occupes = {'proprietes': set(), 'unites': set(), 'pieces': set()}
+        for portee, propriete_id, unite_id, piece_id in periodes.values_list(
+            'portee', 'propriete_id', 'unite_locative_id', 'piece_id'
+        ):
+            if portee == 'propriete':
+                occupes['proprietes'].add(propriete_id)
+            elif portee == 'unite':
+                occupes['unites'].add(unite_id)
+            else:
+                occupes['pieces'].add(piece_id)
+        return occupes
+
+    @classmethod
+    def est_occupe(cls, date_debut=None, date_fin=None, **objet):
+        """Vrai si l'objet (propriete=, unite_locative= ou piece=) est occupé sur la période."""
+        periodes = cls.periodes(date_debut, date_fin).filter(**objet)
+        if 'propriete' in objet:
+            periodes = periodes.filter(portee='propriete')
+        return periodes.exists()
+
+    @classmethod
+    def unites_disponibles(cls, date_debut=None, date_fin=None, propriete=None):
+        """Unités locatives disponibles et libres sur la période."""
+        unites = UniteLocative.objects.filter(statut='disponible', is_deleted=False).filter(
+            ~Exists(cls.periodes(date_debut, date_fin).filter(unite_locative=OuterRef('pk')))
+        )
+        if propriete is not None:
+            unites = unites.filter(propriete=propriete)
+        return unites
+
+    @classmethod
+    def pieces_disponibles(cls, date_debut=None, date_fin=None, propriete=None):
+        """Pièces disponibles et libres sur la période."""
+        pieces = Piece.objects.filter(statut='disponible', is_deleted=False).filter(
+            ~Exists(cls.periodes(date_debut, date_fin).filter(piece=OuterRef('pk')))
+        )
+        if propriete is not None:
+            pieces = pieces.filter(propriete=propriete)
+        return pieces
+
+    @classmethod
+    def proprietes_disponibles(cls, date_debut=None, date_fin=None, queryset=None):
+        """
+        Propriétés louables sur la période : pas de contrat sur la propriété entière,
+        et marquées disponibles ou dotées d'une unité ou d'une pièce libre.
+        """
+        if queryset is None:
+            queryset = Propriete.objects.filter(is_deleted=False)
+        entiere = cls.periodes(date_debut, date_fin).filter(
+            propriete=OuterRef('pk'), portee='propriete'
+        )
+        unites = cls.unites_disponibles(date_debut, date_fin).filter(propriete=OuterRef('pk'))
+        pieces = cls.pieces_disponibles(date_debut, date_fin).filter(propriete=OuterRef('pk'))
+        return queryset.filter(
+            ~Exists(entiere) & (Q(disponible=True) | Exists(unites) | Exists(pieces))
+        )
+
+    @classmethod
+    def annoter(cls, queryset, date_debut=None, date_fin=None):
+        """
+        Ajoute `occupee` (booléen) à un queryset de propriétés (louées entières),
+        d'unités locatives ou de pièces : une sous-requête indexée au lieu d'une
+        requête par ligne dans les listes.
+        """
+        champ, filtres = cls.CHAMPS_OBJET[queryset.model]
+        periodes = cls.periodes(date_debut, date_fin).filter(**{champ: OuterRef('pk')}, **filtres)
+        return queryset.annotate(occupee=Exists(periodes))
+
+
+# ----------------------------------------------------------------------
+# Maintenance par signaux
+# ----------------------------------------------------------------------
+
+def _contrat_modifie(sender, instance, **kwargs):
+    contrat_id = instance.pk
+
+    def appliquer():
+        try:
+            IndexDisponibilite.synchroniser([contrat_id])
+        except Exception as e:
+            logger.error(f"Erreur lors de la mise à jour de l'index de disponibilité (contrat #{contrat_id}): {e}")
+
+    transaction.on_commit(appliquer)
+
+
+def _piece_contrat_modifiee(sender, instance, **kwargs):
+    contrat_id = instance.contrat_id
+
+    def appliquer():
+        try:
+            IndexDisponibilite.synchroniser([contrat_id])
+        except Exception as e:
+            logger.error(f"Erreur lors de la mise à jour de l'index de disponibilité (contrat #{contrat_id}): {e}")
+
+    transaction.on_commit(appliquer)
+
+
+def connecter_signaux():
+    """Branche la mise à jour incrémentale de l'index (les suppressions de contrat cascadent)."""
+    from contrats.models import Contrat
+
+    post_save.connect(_contrat_modifie, sender=Contrat, dispatch_uid='disponibilite_contrat_save')
+    post_save.connect(_piece_contrat_modifiee, sender=PieceContrat, dispatch_uid='disponibilite_piece_save')
+    post_delete.connect(_piece_contrat_modifiee, sender=PieceContrat, dispatch_uid='disponibilite_piece_delete')
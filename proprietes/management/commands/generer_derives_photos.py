@@ -0,0 +1,56 @@
+"""
+Commande Django pour générer les miniatures et versions moyennes des photos existantes.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from proprietes.models import Photo
+from proprietes.photos_derives import DerivesPhoto
+
+
+class Command(BaseCommand):
+    help = 'Génère les miniatures (JPEG) et versions moyennes (WebP) manquantes des photos de propriétés'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Régénère aussi les dérivées déjà à jour',
+        )
+        parser.add_argument(
+            '--propriete',
+            type=int,
+            help='Limite la génération aux photos de cette propriété (id)',
+        )
+
+    def handle(self, *args, **options):
+        photos = Photo.objects.exclude(image='').order_by('pk')
+        if options['propriete']:
+            photos = photos.filter(propriete_id=options['propriete'])
+
+        total = photos.count()
+        self.stdout.write(
+            self.style.SUCCESS(f'🖼️ Génération des dérivées pour {total} photo(s)...')
+        )
+
+        debut = time.monotonic()
+        generees = a_jour = erreurs = 0
+        for index, photo in enumerate(photos.iterator(), start=1):
+            try:
+                if DerivesPhoto.generer(photo, force=options['force']):
+                    generees += 1
+                else:
+                    a_jour += 1
+            except Exception as e:
+                erreurs += 1
+                self.stdout.write(self.style.WARNING(f'⚠️ Photo #{photo.pk} ({photo.image.name}): {e}'))
+            if index % 100 == 0:
+                self.stdout.write(f'⏳ {index}/{total} photos traitées')
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✅ Terminé en {time.monotonic() - debut:.1f}s: {generees} générée(s), '
+                f'{a_jour} déjà à jour, {erreurs} erreur(s)'
+            )
+        )
@@ -0,0 +1,71 @@
+# Generated manually for the availability index
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def remplir_index(apps, schema_editor):
+    """Projette les contrats en cours en périodes d'occupation."""
+    Contrat = apps.get_model('contrats', 'Contrat')
+    PieceContrat = apps.get_model('proprietes', 'PieceContrat')
+    PeriodeOccupation = apps.get_model('proprietes', 'PeriodeOccupation')
+
+    pieces = {}
+    for contrat_id, piece_id in PieceContrat.objects.filter(
+        actif=True, piece__is_deleted=False
+    ).values_list('contrat_id', 'piece_id').iterator():
+        pieces.setdefault(contrat_id, []).append(piece_id)
+
+    periodes = []
+    for contrat_id, propriete_id, unite_id, date_debut, date_fin in Contrat.objects.filter(
+        est_actif=True, est_resilie=False, is_deleted=False
+    ).values_list('pk', 'propriete_id', 'unite_locative_id', 'date_debut', 'date_fin').iterator():
+        commun = {
+            'contrat_id': contrat_id,
+            'propriete_id': propriete_id,
+            'date_debut': date_debut,
+            'date_fin': date_fin,
+        }
+        if unite_id:
+            periodes.append(PeriodeOccupation(portee='unite', unite_locative_id=unite_id, **commun))
+        for piece_id in pieces.get(contrat_id, []):
+            periodes.append(PeriodeOccupation(portee='piece', piece_id=piece_id, **commun))
+        if not unite_id and contrat_id not in pieces:
+            periodes.append(PeriodeOccupation(portee='propriete', **commun))
+
+    PeriodeOccupation.objects.bulk_create(periodes, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contrats', '0010_merge_20251008_1344'),
+        ('proprietes', '0028_add_motif_deduction_to_charges_bailleur'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodeOccupation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('portee', models.CharField(choices=[('propriete', 'Propriété entière'), ('unite', 'Unité locative'), ('piece', 'Pièce')], max_length=10, verbose_name='Portée')),
+                ('date_debut', models.DateField(verbose_name="Début d'occupation")),
+                ('date_fin', models.DateField(blank=True, null=True, verbose_name="Fin d'occupation")),
+                ('contrat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='periodes_occupation', to='contrats.contrat', verbose_name='Contrat')),
+                ('piece', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='periodes_occupation', to='proprietes.piece', verbose_name='Pièce')),
+                ('propriete', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='periodes_occupation', to='proprietes.propriete', verbose_name='Propriété')),
+                ('unite_locative', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='periodes_occupation', to='proprietes.unitelocative', verbose_name='Unité locative')),
+            ],
+            options={
+                'verbose_name': "Période d'occupation",
+                'verbose_name_plural': "Périodes d'occupation",
+                'indexes': [
+                    models.Index(fields=['propriete', 'portee', 'date_debut', 'date_fin'], name='occupation_propriete_idx'),
+                    models.Index(fields=['unite_locative', 'date_debut', 'date_fin'], name='occupation_unite_idx'),
+                    models.Index(fields=['piece', 'date_debut', 'date_fin'], name='occupation_piece_idx'),
+                    models.Index(fields=['date_debut', 'date_fin'], name='occupation_periode_idx'),
+                ],
+            },
+        ),
+        migrations.RunPython(remplir_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated manually for the photo derivative pipeline
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proprietes', '0029_periodeoccupation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photo',
+            name='miniature',
+            field=models.ImageField(blank=True, editable=False, max_length=255, upload_to='proprietes/photos/', verbose_name='Miniature'),
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='moyenne',
+            field=models.ImageField(blank=True, editable=False, max_length=255, upload_to='proprietes/photos/', verbose_name='Version moyenne (WebP)'),
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='derives_source',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='Image source des dérivées'),
+        ),
+    ]
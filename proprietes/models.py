@@ -123,53 +123,9 @@ class Bailleur(DuplicatePreventionMixin, models.Model):
         return reverse('proprietes:detail_bailleur', kwargs={'pk': self.pk})
     
     def get_statistiques_paiements(self):
-        """Récupère les statistiques des paiements pour ce bailleur."""
-        from paiements.models import Paiement
-        from django.db.models import Sum, Count
-        from django.utils import timezone
-        from datetime import timedelta
-        
-        # Période de référence (12 derniers mois)
-        date_debut = timezone.now() - timedelta(days=365)
-        
-        # Paiements du bailleur
-        paiements = Paiement.objects.filter(
-            contrat__propriete__bailleur=self,
-            statut='valide',
-            date_paiement__gte=date_debut
-        )
-        
-        # Statistiques
-        stats = {
-            'total_paiements': paiements.count(),
-            'montant_total': paiements.aggregate(total=Sum('montant'))['total'] or 0,
-            'moyenne_mensuelle': 0,
-            'derniers_mois': [],
-            'proprietes_avec_paiements': paiements.values('contrat__propriete').distinct().count(),
-        }
-        
-        # Calcul de la moyenne mensuelle
-        if stats['total_paiements'] > 0:
-            stats['moyenne_mensuelle'] = stats['montant_total'] / 12
-        
-        # Paiements par mois (6 derniers mois)
-        for i in range(6):
-            mois = timezone.now() - timedelta(days=30*i)
-            debut_mois = mois.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            fin_mois = (debut_mois + timedelta(days=32)).replace(day=1) - timedelta(seconds=1)
-            
-            paiements_mois = paiements.filter(
-                date_paiement__gte=debut_mois,
-                date_paiement__lte=fin_mois
-            )
-            
-            stats['derniers_mois'].append({
-                'mois': debut_mois.strftime('%B %Y'),
-                'montant': paiements_mois.aggregate(total=Sum('montant'))['total'] or 0,
-                'nombre': paiements_mois.count()
-            })
-        
-        return stats
+        """Récupère les statistiques des paiements pour ce bailleur (12 derniers mois)."""
+        from paiements.services_statistiques import ServiceStatistiquesPaiements
+        return ServiceStatistiquesPaiements.pour_bailleurs([self])[self.pk]
 
 
 class Locataire(DuplicatePreventionMixin, models.Model):
@@ -293,53 +249,9 @@ class Locataire(DuplicatePreventionMixin, models.Model):
         return reverse('proprietes:detail_locataire', kwargs={'pk': self.pk})
     
     def get_statistiques_paiements(self):
-        """Récupère les statistiques des paiements pour ce locataire."""
-        from paiements.models import Paiement
-        from django.db.models import Sum, Count
-        from django.utils import timezone
-        from datetime import timedelta
-        
-        # Période de référence (12 derniers mois)
-        date_debut = timezone.now() - timedelta(days=365)
-        
-        # Paiements du locataire
-        paiements = Paiement.objects.filter(
-            contrat__locataire=self,
-            statut='valide',
-            date_paiement__gte=date_debut
-        )
-        
-        # Statistiques
-        stats = {
-            'total_paiements': paiements.count(),
-            'montant_total': paiements.aggregate(total=Sum('montant'))['total'] or 0,
-            'moyenne_mensuelle': 0,
-            'derniers_mois': [],
-            'proprietes_louees': paiements.values('contrat__propriete').distinct().count(),
-        }
-        
-        # Calcul de la moyenne mensuelle
-        if stats['total_paiements'] > 0:
-            stats['moyenne_mensuelle'] = stats['montant_total'] / 12
-        
-        # Paiements par mois (6 derniers mois)
-        for i in range(6):
-            mois = timezone.now() - timedelta(days=30*i)
-            debut_mois = mois.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            fin_mois = (debut_mois + timedelta(days=32)).replace(day=1) - timedelta(seconds=1)
-            
-            paiements_mois = paiements.filter(
-                date_paiement__gte=debut_mois,
-                date_paiement__lte=fin_mois
-            )
-            
-            stats['derniers_mois'].append({
-                'mois': debut_mois.strftime('%B %Y'),
-                'montant': paiements_mois.aggregate(total=Sum('montant'))['total'] or 0,
-                'nombre': paiements_mois.count()
-            })
-        
-        return stats
+        """Récupère les statistiques des paiements pour ce locataire (12 derniers mois)."""
+        from paiements.services_statistiques import ServiceStatistiquesPaiements
+        return ServiceStatistiquesPaiements.pour_locataires([self])[self.pk]
 
     def a_des_contrats_actifs(self):
         """
@@ -560,44 +472,21 @@ class Propriete(models.Model):
         La logique diffère selon le type de gestion :
         - Propriété entière : vérifie s'il n'y a pas de contrat actif sur la propriété complète
         - Unités multiples : vérifie s'il y a des unités locatives ou pièces disponibles
+        
+        Les occupations sont lues dans l'index de disponibilité (PeriodeOccupation).
         """
-        from django.utils import timezone
-        from contrats.models import Contrat
+        from .index_disponibilite import IndexDisponibilite
         
         if self.est_propriete_entiere():
             # Pour une propriété entière, vérifier s'il n'y a pas de contrat actif
-            contrats_actifs = Contrat.objects.filter(
-                propriete=self,
-                est_actif=True,
-                est_resilie=False,
-                date_debut__lte=timezone.now().date(),
-                date_fin__gte=timezone.now().date(),
-                is_deleted=False,
-                unite_locative__isnull=True  # Pas d'unité locative = propriété complète
-            ).exists()
-            
-            return self.disponible and not contrats_actifs
+            return self.disponible and not IndexDisponibilite.est_occupe(propriete=self)
             
         elif self.est_avec_unites_multiples():
             # Pour les propriétés avec unités multiples, vérifier les unités et pièces disponibles
-            unites_disponibles = self.get_unites_locatives().filter(
-                statut='disponible'
-            ).exclude(
-                contrats__est_actif=True,
-                contrats__est_resilie=False,
-                contrats__date_debut__lte=timezone.now().date(),
-                contrats__date_fin__gte=timezone.now().date(),
-                contrats__is_deleted=False
-            ).exists()
+            unites_disponibles = IndexDisponibilite.unites_disponibles(propriete=self).exists()
             
-            pieces_disponibles = self.get_pieces_louables_individuellement().filter(
-                statut='disponible'
-            ).exclude(
-                contrats__est_actif=True,
-                contrats__est_resilie=False,
-                contrats__date_debut__lte=timezone.now().date(),
-                contrats__date_fin__gte=timezone.now().date(),
-                contrats__is_deleted=False
+            pieces_disponibles = IndexDisponibilite.pieces_disponibles(propriete=self).filter(
+                unite_locative__isnull=True
             ).exists()
             
             return unites_disponibles or pieces_disponibles
@@ -609,38 +498,18 @@ class Propriete(models.Model):
         Retourne les unités locatives vraiment disponibles pour cette propriété.
         Exclut celles qui sont déjà louées par des contrats actifs.
         """
-        from django.utils import timezone
-        from contrats.models import Contrat
+        from .index_disponibilite import IndexDisponibilite
         
-        return self.unites_locatives.filter(
-            statut='disponible',
-            is_deleted=False
-        ).exclude(
-            contrats__est_actif=True,
-            contrats__est_resilie=False,
-            contrats__date_debut__lte=timezone.now().date(),
-            contrats__date_fin__gte=timezone.now().date(),
-            contrats__is_deleted=False
-        )
+        return IndexDisponibilite.unites_disponibles(propriete=self)
     
     def get_pieces_disponibles(self):
         """
         Retourne les pièces vraiment disponibles pour cette propriété.
         Exclut celles qui sont déjà louées par des contrats actifs.
         """
-        from django.utils import timezone
-        from contrats.models import Contrat
+        from .index_disponibilite import IndexDisponibilite
         
-        return self.pieces.filter(
-            statut='disponible',
-            is_deleted=False
-        ).exclude(
-            contrats__est_actif=True,
-            contrats__est_resilie=False,
-            contrats__date_debut__lte=timezone.now().date(),
-            contrats__date_fin__gte=timezone.now().date(),
-            contrats__is_deleted=False
-        )
+        return IndexDisponibilite.pieces_disponibles(propriete=self)
     
     def get_contrats_actifs(self):
         """
@@ -969,6 +838,28 @@ class Photo(models.Model):
         verbose_name=_("Date de modification")
     )
     
+    # Images dérivées, produites en arrière-plan (voir photos_derives)
+    miniature = models.ImageField(
+        upload_to='proprietes/photos/',
+        max_length=255,
+        blank=True,
+        editable=False,
+        verbose_name=_("Miniature")
+    )
+    moyenne = models.ImageField(
+        upload_to='proprietes/photos/',
+        max_length=255,
+        blank=True,
+        editable=False,
+        verbose_name=_("Version moyenne (WebP)")
+    )
+    derives_source = models.CharField(
+        max_length=255,
+        blank=True,
+        editable=False,
+        verbose_name=_("Image source des dérivées")
+    )
+    
     class Meta:
         app_label = 'proprietes'
         verbose_name = _("Photo")
@@ -979,16 +870,22 @@ class Photo(models.Model):
     def __str__(self):
         return f"{self.titre} - {self.propriete.adresse}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._est_principale_initiale = instance.__dict__.get('est_principale')
+        return instance
+    
     def save(self, *args, **kwargs):
-        # Si c'est marqué comme photo principale, retirer le statut des autres
-        if self.est_principale:
+        # Si elle devient photo principale, retirer le statut des autres
+        if self.est_principale and getattr(self, '_est_principale_initiale', None) is not True:
             Photo.objects.filter(
                 propriete=self.propriete,
                 est_principale=True
             ).exclude(pk=self.pk).update(est_principale=False)
         
-        # Définir l'ordre automatiquement si non spécifié
-        if not self.ordre:
+        # Définir l'ordre automatiquement à la création si non spécifié
+        if self._state.adding and not self.ordre:
             max_ordre = Photo.objects.filter(
                 propriete=self.propriete
             ).aggregate(
@@ -997,6 +894,7 @@ class Photo(models.Model):
             self.ordre = max_ordre + 1
         
         super().save(*args, **kwargs)
+        self._est_principale_initiale = self.est_principale
     
     def get_image_url(self):
         """Retourne l'URL de l'image."""
@@ -1005,10 +903,16 @@ class Photo(models.Model):
         return None
     
     def get_thumbnail_url(self):
-        """Retourne l'URL de la miniature (pour l'instant identique à l'image)."""
-        if self.image:
-            return self.image.url
-        return None
+        """Retourne l'URL de la miniature, ou de l'image tant qu'elle n'est pas générée."""
+        if self.miniature and self.derives_source == self.image.name:
+            return self.miniature.url
+        return self.get_image_url()
+    
+    def get_medium_url(self):
+        """Retourne l'URL de la version moyenne (WebP), ou de l'image tant qu'elle n'est pas générée."""
+        if self.moyenne and self.derives_source == self.image.name:
+            return self.moyenne.url
+        return self.get_image_url()
 
 
 
@@ -1215,10 +1119,10 @@ class ChargesBailleur(models.Model):
     def creer_log_deduction(self, montant_deduit):
         """Crée un log de déduction pour traçabilité."""
         try:
-            from core.models import AuditLog
+            from core.audit import journaliser
             from django.contrib.contenttypes.models import ContentType
             content_type = ContentType.objects.get_for_model(ChargesBailleur)
-            AuditLog.objects.create(
+            journaliser(
                 content_type=content_type,
                 object_id=self.id,
                 action='update',
@@ -1736,7 +1640,7 @@ class UniteLocative(models.Model):
             return False
         
         from django.utils import timezone
-        from contrats.models import Contrat
+        from .index_disponibilite import IndexDisponibilite
         
         if not date_debut:
             date_debut = timezone.now().date()
@@ -1744,15 +1648,7 @@ class UniteLocative(models.Model):
             date_fin = date_debut + timezone.timedelta(days=365)
         
         # Vérifier les contrats actifs qui se chevauchent
-        contrats_conflictuels = Contrat.objects.filter(
-            unite_locative=self,
-            est_actif=True,
-            est_resilie=False,
-            date_debut__lt=date_fin,
-            date_fin__gt=date_debut
-        ).exists()
-        
-        return not contrats_conflictuels
+        return not IndexDisponibilite.est_occupe(date_debut, date_fin, unite_locative=self)
     
     def get_contrat_actuel(self):
         """Retourne le contrat actuel de cette unité."""
@@ -1795,70 +1691,19 @@ class UniteLocative(models.Model):
         return self.get_loyer_total() * 12
     
     def get_taux_occupation(self):
-        """Calcule le taux d'occupation de l'unité sur les 12 derniers mois."""
-        from contrats.models import Contrat
-        from django.utils import timezone
-        from datetime import timedelta
-        
-        # Période d'analyse : 12 derniers mois
-        fin_periode = timezone.now().date()
-        debut_periode = fin_periode - timedelta(days=365)
-        
-        # Récupérer tous les contrats qui se chevauchent avec cette période
-        contrats = Contrat.objects.filter(
-            unite_locative=self,
-            date_debut__lt=fin_periode,
-            date_fin__gt=debut_periode
-        )
-        
-        if not contrats.exists():
-            return 0.0
-        
-        # Calculer les jours d'occupation
-        jours_occupes = 0
-        for contrat in contrats:
-            # Calculer l'intersection entre le contrat et la période d'analyse
-            debut_effectif = max(contrat.date_debut, debut_periode)
-            fin_effective = min(contrat.date_fin, fin_periode)
-            
-            if debut_effectif < fin_effective:
-                jours_occupes += (fin_effective - debut_effectif).days
-        
-        # Éviter le double comptage en cas de contrats qui se chevauchent
-        jours_occupes = min(jours_occupes, 365)
-        
-        return round((jours_occupes / 365) * 100, 1)
+        """Taux d'occupation de l'unité sur les 12 derniers mois (mois en cours inclus)."""
+        from .analytique_occupation import AnalytiqueOccupation
+        return AnalytiqueOccupation.unite(self.pk)['taux_occupation']
     
     def get_duree_moyenne_occupation(self):
         """Calcule la durée moyenne d'occupation en mois."""
-        from contrats.models import Contrat
-        from django.db.models import Avg
-        from django.utils import timezone
-        
-        # Récupérer les contrats terminés pour calculer la durée moyenne
-        contrats_termines = Contrat.objects.filter(
-            unite_locative=self,
-            est_resilie=True
-        ).exclude(date_fin__isnull=True)
-        
-        if not contrats_termines.exists():
-            # Si pas de contrats terminés, calculer avec le contrat actuel
-            contrat_actuel = self.get_contrat_actuel()
-            if contrat_actuel:
-                duree_actuelle = (timezone.now().date() - contrat_actuel.date_debut).days
-                return round(duree_actuelle / 30.44, 1)  # Conversion en mois
-            return 0.0
-        
-        # Calculer la durée moyenne des contrats terminés
-        durees = []
-        for contrat in contrats_termines:
-            duree_jours = (contrat.date_fin - contrat.date_debut).days
-            durees.append(duree_jours / 30.44)  # Conversion en mois
-        
-        if durees:
-            return round(sum(durees) / len(durees), 1)
-        
-        return 0.0
+        from .analytique_occupation import AnalytiqueOccupation
+        return AnalytiqueOccupation.unite(self.pk)['duree_moyenne_occupation']
+    
+    def get_statistiques_occupation(self):
+        """Retourne les statistiques d'occupation de l'unité (taux, durée moyenne, vacances)."""
+        from .analytique_occupation import AnalytiqueOccupation
+        return AnalytiqueOccupation.unite(self.pk)
 
 
 class ReservationUnite(models.Model):
@@ -2146,19 +1991,9 @@ class Piece(models.Model):
             return False
             
         # Vérifier s'il n'y a pas de contrat actif sur cette pièce
-        from django.utils import timezone
-        from contrats.models import Contrat
-        
-        contrats_actifs = Contrat.objects.filter(
-            pieces=self,
-            est_actif=True,
-            est_resilie=False,
-            date_debut__lte=timezone.now().date(),
-            date_fin__gte=timezone.now().date(),
-            is_deleted=False
-        ).exists()
+        from .index_disponibilite import IndexDisponibilite
         
-        return self.statut == 'disponible' and not contrats_actifs
+        return self.statut == 'disponible' and not IndexDisponibilite.est_occupe(piece=self)
     
     def est_disponible(self, date_debut=None, date_fin=None):
         """Vérifie si la pièce est disponible pour une période donnée."""
@@ -2166,8 +2001,8 @@ class Piece(models.Model):
             return False
         
         # Vérifier s'il y a des contrats actifs pour cette pièce
-        from contrats.models import Contrat
         from django.utils import timezone
+        from .index_disponibilite import IndexDisponibilite
         
         if not date_debut:
             date_debut = timezone.now().date()
@@ -2175,15 +2010,7 @@ class Piece(models.Model):
             date_fin = date_debut + timezone.timedelta(days=365)  # Par défaut 1 an
         
         # Vérifier les contrats actifs qui se chevauchent
-        contrats_conflictuels = Contrat.objects.filter(
-            pieces=self,
-            est_actif=True,
-            est_resilie=False,
-            date_debut__lt=date_fin,
-            date_fin__gt=date_debut
-        ).exists()
-        
-        return not contrats_conflictuels
+        return not IndexDisponibilite.est_occupe(date_debut, date_fin, piece=self)
     
     def get_contrat_actuel(self):
         """Retourne le contrat actuel de cette pièce."""
@@ -2229,38 +2056,8 @@ class Piece(models.Model):
     
     def get_statistiques_occupation(self):
         """Retourne les statistiques d'occupation de la pièce."""
-        from contrats.models import Contrat
-        from django.utils import timezone
-        from datetime import timedelta
-        
-        # Période de référence (12 derniers mois)
-        date_debut = timezone.now().date() - timedelta(days=365)
-        
-        contrats = Contrat.objects.filter(
-            pieces=self,
-            date_debut__gte=date_debut,
-            is_deleted=False
-        )
-        
-        total_contrats = contrats.count()
-        jours_occupes = 0
-        
-        for contrat in contrats:
-            if contrat.date_fin:
-                duree = (contrat.date_fin - contrat.date_debut).days
-                jours_occupes += duree
-            else:
-                # Contrat en cours
-                jours_occupes += (timezone.now().date() - contrat.date_debut).days
-        
-        taux_occupation = (jours_occupes / 365) * 100 if total_contrats > 0 else 0
-        
-        return {
-            'total_contrats': total_contrats,
-            'jours_occupes': jours_occupes,
-            'taux_occupation': round(taux_occupation, 2),
-            'contrats_actifs': contrats.filter(est_actif=True, est_resilie=False).count()
-        }
+        from .analytique_occupation import AnalytiqueOccupation
+        return AnalytiqueOccupation.piece(self.pk)
     
     def get_espaces_partages_accessibles(self):
         """Retourne les espaces partagés accessibles depuis cette pièce."""
@@ -2776,4 +2573,68 @@ class AccesEspacePartage(models.Model):
     
     def save(self, *args, **kwargs):
         self.clean()
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+class PeriodeOccupation(models.Model):
+    """
+    Période d'occupation d'une propriété entière, d'une unité locative ou d'une
+    pièce par un contrat en cours. Index maintenu par
+    proprietes.index_disponibilite à partir des contrats ; il ne doit pas être
+    modifié directement.
+    """
+    
+    PORTEE_CHOICES = [
+        ('propriete', 'Propriété entière'),
+        ('unite', 'Unité locative'),
+        ('piece', 'Pièce'),
+    ]
+    
+    contrat = models.ForeignKey(
+        'contrats.Contrat',
+        on_delete=models.CASCADE,
+        related_name='periodes_occupation',
+        verbose_name=_("Contrat")
+    )
+    portee = models.CharField(max_length=10, choices=PORTEE_CHOICES, verbose_name=_("Portée"))
+    propriete = models.ForeignKey(
+        Propriete,
+        on_delete=models.CASCADE,
+        related_name='periodes_occupation',
+        db_index=False,  # préfixe des index composites
+        verbose_name=_("Propriété")
+    )
+    unite_locative = models.ForeignKey(
+        UniteLocative,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='periodes_occupation',
+        db_index=False,  # préfixe des index composites
+        verbose_name=_("Unité locative")
+    )
+    piece = models.ForeignKey(
+        Piece,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='periodes_occupation',
+        db_index=False,  # préfixe des index composites
+        verbose_name=_("Pièce")
+    )
+    date_debut = models.DateField(verbose_name=_("Début d'occupation"))
+    date_fin = models.DateField(null=True, blank=True, verbose_name=_("Fin d'occupation"))
+    
+    class Meta:
+        app_label = 'proprietes'
+        verbose_name = _("Période d'occupation")
+        verbose_name_plural = _("Périodes d'occupation")
+        indexes = [
+            models.Index(fields=['propriete', 'portee', 'date_debut', 'date_fin'], name='occupation_propriete_idx'),
+            models.Index(fields=['unite_locative', 'date_debut', 'date_fin'], name='occupation_unite_idx'),
+            models.Index(fields=['piece', 'date_debut', 'date_fin'], name='occupation_piece_idx'),
+            models.Index(fields=['date_debut', 'date_fin'], name='occupation_periode_idx'),
+        ]
+    
+    def __str__(self):
+        fin = self.date_fin or '…'
+        return f"{self.get_portee_display()} - Contrat {self.contrat_id} ({self.date_debut} → {fin})"
@@ -0,0 +1,148 @@
+"""
+Images dérivées des photos de propriétés
+
+À l'enregistrement d'une photo, une miniature de taille fixe (JPEG) et une
+version moyenne (WebP) sont produites avec Pillow hors de la requête, par
+une tâche de la file d'arrière-plan (commande run_workers). Les fichiers
+sont rangés à côté de l'original, sous un nom qui contient l'empreinte de
+son contenu : une nouvelle image donne de nouvelles URL, les navigateurs
+peuvent les mettre en cache sans fin. La commande generer_derives_photos
+rattrape les photos existantes.
+"""
+
+import hashlib
+import logging
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from PIL import Image, ImageOps
+
+from core.taches import enqueue
+
+logger = logging.getLogger(__name__)
+
+
+class DerivesPhoto:
+    """Génération et nettoyage des miniatures et versions moyennes."""
+
+    # Champ du modèle -> (taille, recadrage à la taille exacte, format, extension, options)
+    DERIVES = {
+        'miniature': ((400, 300), True, 'JPEG', 'thumb.jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+        'moyenne': ((1280, 1280), False, 'WEBP', 'medium.webp', {'quality': 80, 'method': 4}),
+    }
+
+    @staticmethod
+    def empreinte(fichier):
+        """Empreinte courte du contenu de l'image originale."""
+        sha = hashlib.sha1()
+        fichier.open('rb')
+        try:
+            for bloc in fichier.chunks():
+                sha.update(bloc)
+        finally:
+            fichier.close()
+        return sha.hexdigest()[:10]
+
+    @classmethod
+    def nom_derive(cls, nom_original, empreinte, champ):
+        base, _ = os.path.splitext(nom_original)
+        return f"{base}.{empreinte}.{cls.DERIVES[champ][3]}"
+
+    @classmethod
+    def _rendre(cls, image, champ):
+        taille, recadrer, format_image, _, options = cls.DERIVES[champ]
+        if recadrer:
+            derive = ImageOps.fit(image, taille, Image.LANCZOS)
+        else:
+            derive = image.copy()
+            derive.thumbnail(taille, Image.LANCZOS)
+        tampon = BytesIO()
+        derive.save(tampon, format_image, **options)
+        return tampon.getvalue()
+
+    @classmethod
+    def supprimer_fichiers(cls, storage, noms):
+        for nom in noms:
+            if nom:
+                try:
+                    storage.delete(nom)
+                except OSError as e:
+                    logger.warning(f"Impossible de supprimer la photo dérivée {nom}: {e}")
+
+    @classmethod
+    def generer(cls, photo, force=False):
+        """
+        Produit les dérivées de la photo et les enregistre sans repasser par save().
+        Retourne False si elles étaient déjà à jour.
+        """
+        from .models import Photo
+
+        if not photo.image:
+            return False
+        nom_original = photo.image.name
+        if not force and photo.derives_source == nom_original and photo.miniature and photo.moyenne:
+            return False
+
+        storage = photo.image.storage
+        empreinte = cls.empreinte(photo.image)
+        photo.image.open('rb')
+        try:
+            with Image.open(photo.image) as source:
+                image = ImageOps.exif_transpose(source)
+                if image.mode not in ('RGB', 'L'):
+                    image = image.convert('RGB')
+                rendus = {champ: cls._rendre(image, champ) for champ in cls.DERIVES}
+        finally:
+            photo.image.close()
+
+        anciens = [getattr(photo, champ).name for champ in cls.DERIVES]
+        noms = {}
+        for champ, contenu in rendus.items():
+            nom = cls.nom_derive(nom_original, empreinte, champ)
+            if storage.exists(nom):
+                storage.delete(nom)
+            noms[champ] = storage.save(nom, ContentFile(contenu))
+
+        # La photo a pu être remplacée ou supprimée pendant le calcul
+        mis_a_jour = Photo.objects.filter(pk=photo.pk, image=nom_original).update(
+            derives_source=nom_original, **noms
+        )
+        if not mis_a_jour:
+            cls.supprimer_fichiers(storage, noms.values())
+            return False
+
+        cls.supprimer_fichiers(storage, [nom for nom in anciens if nom and nom not in noms.values()])
+        for champ, nom in noms.items():
+            setattr(photo, champ, nom)
+        photo.derives_source = nom_original
+        return True
+
+
+def generer_derives(photo_id):
+    """Tâche d'arrière-plan : dérivées d'une photo, si elle existe encore."""
+    from .models import Photo
+
+    photo = Photo.objects.filter(pk=photo_id).first()
+    return DerivesPhoto.generer(photo) if photo is not None else False
+
+
+def _photo_enregistree(sender, instance, **kwargs):
+    if instance.image and instance.derives_source != instance.image.name:
+        enqueue(generer_derives, instance.pk, cle=f'derives_photo:{instance.pk}')
+
+
+def _photo_supprimee(sender, instance, **kwargs):
+    storage = instance.image.storage
+    noms = [getattr(instance, champ).name for champ in DerivesPhoto.DERIVES]
+    transaction.on_commit(lambda: DerivesPhoto.supprimer_fichiers(storage, noms))
+
+
+def connecter_signaux():
+    """Met les photos enregistrées en file et nettoie les dérivées des photos supprimées."""
+    from .models import Photo
+
+    post_save.connect(_photo_enregistree, sender=Photo, dispatch_uid='derives_photo_save')
+    post_delete.connect(_photo_supprimee, sender=Photo, dispatch_uid='derives_photo_delete')
@@ -1,4 +1,6 @@
 from rest_framework import serializers
+
+from core.api_rest import ChampsDemandesMixin
 from .models import Bailleur, Locataire, TypeBien, Propriete
 
 
@@ -8,36 +10,33 @@ class TypeBienSerializer(serializers.ModelSerializer):
     """
     class Meta:
         model = TypeBien
-        fields = ['id', 'nom', 'description', 'prix_moyen_m2']
+        fields = ['id', 'nom', 'description']
 
 
-class BailleurSerializer(serializers.ModelSerializer):
+class BailleurSerializer(ChampsDemandesMixin, serializers.ModelSerializer):
     """
     Sérialiseur pour le modèle Bailleur
     """
-    proprietes_count = serializers.SerializerMethodField()
+    # Annoté par BailleurViewSet.get_queryset
+    proprietes_count = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = Bailleur
         fields = [
-            'id', 'nom', 'prenom', 'email', 'telephone', 'adresse',
-            'ville', 'code_postal', 'pays', 'date_naissance',
-            'profession', 'revenus_mensuels', 'proprietes_count',
-            'date_creation', 'date_modification'
+            'id', 'numero_bailleur', 'nom', 'prenom', 'email', 'telephone',
+            'telephone_mobile', 'adresse', 'ville', 'code_postal', 'pays',
+            'date_naissance', 'proprietes_count', 'date_creation',
+            'date_modification'
         ]
         read_only_fields = ['id', 'date_creation', 'date_modification']
-    
-    def get_proprietes_count(self, obj):
-        """Retourne le nombre de propriétés du bailleur"""
-        return obj.proprietes.count()
 
 
-class BailleurListSerializer(serializers.ModelSerializer):
+class BailleurListSerializer(ChampsDemandesMixin, serializers.ModelSerializer):
     """
     Sérialiseur simplifié pour la liste des bailleurs
     """
     nom_complet = serializers.SerializerMethodField()
-    proprietes_count = serializers.SerializerMethodField()
+    proprietes_count = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = Bailleur
@@ -49,17 +48,14 @@ class BailleurListSerializer(serializers.ModelSerializer):
     def get_nom_complet(self, obj):
         """Retourne le nom complet du bailleur"""
         return f"{obj.prenom} {obj.nom}".strip()
-    
-    def get_proprietes_count(self, obj):
-        """Retourne le nombre de propriétés du bailleur"""
-        return obj.proprietes.count()
 
 
-class LocataireSerializer(serializers.ModelSerializer):
+class LocataireSerializer(ChampsDemandesMixin, serializers.ModelSerializer):
     """
     Sérialiseur pour le modèle Locataire
     """
-    proprietes_count = serializers.SerializerMethodField()
+    # Propriétés louées (contrats actifs), annoté par LocataireViewSet.get_queryset
+    proprietes_count = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = Locataire
@@ -71,18 +67,14 @@ class LocataireSerializer(serializers.ModelSerializer):
             'date_modification'
         ]
         read_only_fields = ['id', 'date_creation', 'date_modification']
-    
-    def get_proprietes_count(self, obj):
-        """Retourne le nombre de propriétés louées par le locataire"""
-        return obj.proprietes.count()
 
 
-class LocataireListSerializer(serializers.ModelSerializer):
+class LocataireListSerializer(ChampsDemandesMixin, serializers.ModelSerializer):
     """
     Sérialiseur simplifié pour la liste des locataires
     """
     nom_complet = serializers.SerializerMethodField()
-    proprietes_count = serializers.SerializerMethodField()
+    proprietes_count = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = Locataire
@@ -94,52 +86,44 @@ class LocataireListSerializer(serializers.ModelSerializer):
     def get_nom_complet(self, obj):
         """Retourne le nom complet du locataire"""
         return f"{obj.prenom} {obj.nom}".strip()
-    
-    def get_proprietes_count(self, obj):
-        """Retourne le nombre de propriétés louées par le locataire"""
-        return obj.proprietes.count()
 
 
-class ProprieteSerializer(serializers.ModelSerializer):
+class ProprieteSerializer(ChampsDemandesMixin, serializers.ModelSerializer):
     """
     Sérialiseur pour le modèle Propriete
     """
-    bailleur_nom = serializers.CharField(source='bailleur.nom_complet', read_only=True)
-    locataire_nom = serializers.CharField(source='locataire.nom_complet', read_only=True)
+    bailleur_nom = serializers.CharField(source='bailleur.get_nom_complet', read_only=True)
     type_bien_nom = serializers.CharField(source='type_bien.nom', read_only=True)
-    statut_display = serializers.CharField(source='get_statut_display', read_only=True)
+    etat_display = serializers.CharField(source='get_etat_display', read_only=True)
     
     class Meta:
         model = Propriete
         fields = [
-            'id', 'reference', 'titre', 'description', 'adresse',
+            'id', 'numero_propriete', 'titre', 'description', 'adresse',
             'ville', 'code_postal', 'pays', 'surface', 'nombre_pieces',
-            'nombre_chambres', 'nombre_salles_bain', 'etage',
-            'annee_construction', 'prix_achat', 'prix_location',
-            'charges_mensuelles', 'statut', 'statut_display',
-            'bailleur', 'bailleur_nom', 'locataire', 'locataire_nom',
-            'type_bien', 'type_bien_nom', 'date_creation',
-            'date_modification'
+            'nombre_chambres', 'nombre_salles_bain', 'prix_achat',
+            'loyer_actuel', 'charges_locataire', 'etat', 'etat_display',
+            'disponible', 'bailleur', 'bailleur_nom', 'type_bien',
+            'type_bien_nom', 'date_creation', 'date_modification'
         ]
-        read_only_fields = ['id', 'reference', 'date_creation', 'date_modification']
+        read_only_fields = ['id', 'numero_propriete', 'date_creation', 'date_modification']
 
 
-class ProprieteListSerializer(serializers.ModelSerializer):
+class ProprieteListSerializer(ChampsDemandesMixin, serializers.ModelSerializer):
     """
     Sérialiseur simplifié pour la liste des propriétés
     """
-    bailleur_nom = serializers.CharField(source='bailleur.nom_complet', read_only=True)
-    locataire_nom = serializers.CharField(source='locataire.nom_complet', read_only=True)
+    bailleur_nom = serializers.CharField(source='bailleur.get_nom_complet', read_only=True)
     type_bien_nom = serializers.CharField(source='type_bien.nom', read_only=True)
-    statut_display = serializers.CharField(source='get_statut_display', read_only=True)
+    etat_display = serializers.CharField(source='get_etat_display', read_only=True)
     
     class Meta:
         model = Propriete
         fields = [
-            'id', 'reference', 'titre', 'adresse', 'ville',
-            'surface', 'nombre_pieces', 'prix_location',
-            'statut', 'statut_display', 'bailleur_nom',
-            'locataire_nom', 'type_bien_nom'
+            'id', 'numero_propriete', 'titre', 'adresse', 'ville',
+            'surface', 'nombre_pieces', 'loyer_actuel',
+            'etat', 'etat_display', 'disponible', 'bailleur',
+            'bailleur_nom', 'type_bien_nom'
         ]
 
 
@@ -152,19 +136,18 @@ class ProprieteCreateSerializer(serializers.ModelSerializer):
         fields = [
             'titre', 'description', 'adresse', 'ville', 'code_postal',
             'pays', 'surface', 'nombre_pieces', 'nombre_chambres',
-            'nombre_salles_bain', 'etage', 'annee_construction',
-            'prix_achat', 'prix_location', 'charges_mensuelles',
-            'statut', 'bailleur', 'locataire', 'type_bien'
+            'nombre_salles_bain', 'prix_achat', 'loyer_actuel',
+            'charges_locataire', 'etat', 'disponible', 'bailleur', 'type_bien'
         ]
     
     def validate(self, attrs):
         """Validation personnalisée"""
-        # Vérifier que le prix de location est positif
-        if attrs.get('prix_location', 0) <= 0:
-            raise serializers.ValidationError("Le prix de location doit être positif.")
+        # Vérifier que le loyer est positif
+        if (attrs.get('loyer_actuel') or 0) <= 0:
+            raise serializers.ValidationError("Le loyer doit être positif.")
         
         # Vérifier que la surface est positive
-        if attrs.get('surface', 0) <= 0:
+        if (attrs.get('surface') or 0) <= 0:
             raise serializers.ValidationError("La surface doit être positive.")
         
         return attrs
@@ -179,29 +162,27 @@ class ProprieteUpdateSerializer(serializers.ModelSerializer):
         fields = [
             'titre', 'description', 'adresse', 'ville', 'code_postal',
             'pays', 'surface', 'nombre_pieces', 'nombre_chambres',
-            'nombre_salles_bain', 'etage', 'annee_construction',
-            'prix_achat', 'prix_location', 'charges_mensuelles',
-            'statut', 'bailleur', 'locataire', 'type_bien'
+            'nombre_salles_bain', 'prix_achat', 'loyer_actuel',
+            'charges_locataire', 'etat', 'disponible', 'bailleur', 'type_bien'
         ]
 
 
-class ProprieteDetailSerializer(serializers.ModelSerializer):
+class ProprieteDetailSerializer(ChampsDemandesMixin, serializers.ModelSerializer):
     """
     Sérialiseur détaillé pour une propriété
     """
-    bailleur = BailleurSerializer(read_only=True)
-    locataire = LocataireSerializer(read_only=True)
+    bailleur = BailleurListSerializer(read_only=True)
     type_bien = TypeBienSerializer(read_only=True)
-    statut_display = serializers.CharField(source='get_statut_display', read_only=True)
+    etat_display = serializers.CharField(source='get_etat_display', read_only=True)
     
     class Meta:
         model = Propriete
         fields = [
-            'id', 'reference', 'titre', 'description', 'adresse',
+            'id', 'numero_propriete', 'titre', 'description', 'adresse',
             'ville', 'code_postal', 'pays', 'surface', 'nombre_pieces',
-            'nombre_chambres', 'nombre_salles_bain', 'etage',
-            'annee_construction', 'prix_achat', 'prix_location',
-            'charges_mensuelles', 'statut', 'statut_display',
-            'bailleur', 'locataire', 'type_bien', 'date_creation',
+            'nombre_chambres', 'nombre_salles_bain', 'ascenseur', 'parking',
+            'balcon', 'jardin', 'cuisine', 'prix_achat', 'loyer_actuel',
+            'charges_locataire', 'etat', 'etat_display', 'disponible',
+            'bailleur', 'type_bien', 'notes', 'date_creation',
             'date_modification'
-        ] 
\ No newline at end of file
+        ]
@@ -1,6 +1,7 @@
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
+from .index_disponibilite import IndexDisponibilite
 from .models import Piece, PieceContrat
 from contrats.models import Contrat
 from django.db import models
@@ -280,8 +281,10 @@ class ValidationContratService:
             for piece in contrat.pieces.all():
                 piece.marquer_disponible()
             
-            # Désactiver les liaisons pièce-contrat
+            # Désactiver les liaisons pièce-contrat (update() sans signaux :
+            # index de disponibilité resynchronisé ici)
             contrat.pieces_contrat.update(actif=False)
+            IndexDisponibilite.synchroniser([contrat.pk])
             
             return True, []
             
@@ -5,13 +5,11 @@ import io
 import os
 from datetime import datetime
 from typing import List, Dict, Any, Optional
-from django.http import HttpResponse
+from django.http import HttpResponse, HttpResponseBase
 from django.db.models import QuerySet
 from django.utils import timezone
 from django.conf import settings
-import openpyxl
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
 from reportlab.lib.pagesizes import A4, letter
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
@@ -23,6 +21,8 @@ from reportlab.lib.utils import ImageReader
 from PIL import Image
 import tempfile
 
+from core.exports import TAILLE_LOT, reponse_export
+
 from ..models import Document
 
 
@@ -51,87 +51,46 @@ class DocumentExportService:
             )
         }
     
-    def export_to_excel(self, documents: QuerySet, filename: Optional[str] = None) -> HttpResponse:
-        """Exporte les documents vers un fichier Excel."""
+    # Colonnes des exports tabulaires : (titre, largeur dans le classeur)
+    COLONNES = [
+        ('ID', 8), ('Nom', 30), ('Type', 15), ('Description', 40), ('Propriété', 25),
+        ('Bailleur', 25), ('Locataire', 25), ('Statut', 15), ('Date Création', 18),
+        ('Date Modification', 18), ('Date Expiration', 18), ('Créé par', 15),
+        ('Tags', 15), ('Confidentiel', 15), ('Taille (KB)', 15)
+    ]
+    
+    def _lignes(self, documents: QuerySet):
+        """Lignes d'export, documents lus par lots avec leurs relations."""
+        types = dict(Document.TYPE_DOCUMENT_CHOICES)
+        statuts = dict(Document.STATUT_CHOICES)
+        documents = documents.select_related(
+            'propriete', 'bailleur', 'locataire', 'cree_par'
+        ).iterator(chunk_size=TAILLE_LOT)
+        for doc in documents:
+            yield [
+                doc.id,
+                doc.nom,
+                types.get(doc.type_document, doc.type_document),
+                doc.description or '',
+                str(doc.propriete) if doc.propriete else '',
+                str(doc.bailleur) if doc.bailleur else '',
+                str(doc.locataire) if doc.locataire else '',
+                statuts.get(doc.statut, doc.statut),
+                doc.date_creation.strftime('%d/%m/%Y %H:%M'),
+                doc.date_modification.strftime('%d/%m/%Y %H:%M'),
+                doc.date_expiration.strftime('%d/%m/%Y') if doc.date_expiration else '',
+                str(doc.cree_par) if doc.cree_par else '',
+                doc.tags or '',
+                'Oui' if doc.confidentiel else 'Non',
+                round(doc.taille_fichier / 1024, 2) if doc.taille_fichier else 0
+            ]
+    
+    def export_to_excel(self, documents: QuerySet, filename: Optional[str] = None) -> HttpResponseBase:
+        """Exporte les documents vers un fichier Excel (écriture en mode write-only)."""
         if not filename:
             filename = f"documents_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
         
-        # Créer un workbook
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Documents"
-        
-        # En-têtes
-        headers = [
-            'ID', 'Nom', 'Type', 'Description', 'Propriété', 'Bailleur', 'Locataire',
-            'Statut', 'Date Création', 'Date Modification', 'Date Expiration',
-            'Créé par', 'Tags', 'Confidentiel', 'Taille (KB)'
-        ]
-        
-        # Appliquer les styles aux en-têtes
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col, value=header)
-            cell.font = self.styles['header']
-            cell.fill = self.styles['header_fill']
-            cell.alignment = self.styles['center']
-            cell.border = self.styles['border']
-        
-        # Données des documents
-        row = 2
-        for doc in documents:
-            ws.cell(row=row, column=1, value=doc.id)
-            ws.cell(row=row, column=2, value=doc.nom)
-            ws.cell(row=row, column=3, value=doc.get_type_document_display())
-            ws.cell(row=row, column=4, value=doc.description or '')
-            ws.cell(row=row, column=5, value=str(doc.propriete) if doc.propriete else '')
-            ws.cell(row=row, column=6, value=str(doc.bailleur) if doc.bailleur else '')
-            ws.cell(row=row, column=7, value=str(doc.locataire) if doc.locataire else '')
-            ws.cell(row=row, column=8, value=doc.get_statut_display())
-            ws.cell(row=row, column=9, value=doc.date_creation.strftime('%d/%m/%Y %H:%M'))
-            ws.cell(row=row, column=10, value=doc.date_modification.strftime('%d/%m/%Y %H:%M'))
-            ws.cell(row=row, column=11, value=doc.date_expiration.strftime('%d/%m/%Y') if doc.date_expiration else '')
-            ws.cell(row=row, column=12, value=str(doc.cree_par) if doc.cree_par else '')
-            ws.cell(row=row, column=13, value=doc.tags or '')
-            ws.cell(row=row, column=14, value='Oui' if doc.confidentiel else 'Non')
-            ws.cell(row=row, column=15, value=round(doc.taille_fichier / 1024, 2) if doc.taille_fichier else 0)
-            
-            # Appliquer les styles aux données
-            for col in range(1, len(headers) + 1):
-                cell = ws.cell(row=row, column=col)
-                cell.font = self.styles['normal']
-                cell.alignment = self.styles['left']
-                cell.border = self.styles['border']
-            
-            row += 1
-        
-        # Ajuster la largeur des colonnes
-        for col in range(1, len(headers) + 1):
-            column_letter = get_column_letter(col)
-            if col == 1:  # ID
-                ws.column_dimensions[column_letter].width = 8
-            elif col == 2:  # Nom
-                ws.column_dimensions[column_letter].width = 30
-            elif col == 4:  # Description
-                ws.column_dimensions[column_letter].width = 40
-            elif col in [5, 6, 7]:  # Propriété, Bailleur, Locataire
-                ws.column_dimensions[column_letter].width = 25
-            elif col in [9, 10, 11]:  # Dates
-                ws.column_dimensions[column_letter].width = 18
-            else:
-                ws.column_dimensions[column_letter].width = 15
-        
-        # Créer la réponse HTTP
-        response = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        
-        # Sauvegarder le workbook
-        with io.BytesIO() as output:
-            wb.save(output)
-            response.write(output.getvalue())
-        
-        return response
+        return reponse_export('excel', self.COLONNES, self._lignes(documents), filename, titre_feuille="Documents")
     
     def export_to_pdf(self, documents: QuerySet, filename: Optional[str] = None) -> HttpResponse:
         """Exporte les documents vers un fichier PDF."""
@@ -228,49 +187,13 @@ class DocumentExportService:
         response.write(pdf_content)
         return response
     
-    def export_to_csv(self, documents: QuerySet, filename: Optional[str] = None) -> HttpResponse:
-        """Exporte les documents vers un fichier CSV."""
-        import csv
-        
+    def export_to_csv(self, documents: QuerySet, filename: Optional[str] = None) -> HttpResponseBase:
+        """Exporte les documents vers un fichier CSV diffusé au fil de la lecture."""
         if not filename:
             filename = f"documents_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
         
-        response = HttpResponse(content_type='text/csv; charset=utf-8')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        
-        # Ajouter BOM pour Excel
-        response.write('\ufeff')
-        
-        writer = csv.writer(response, delimiter=';')
-        
-        # En-têtes
-        writer.writerow([
-            'ID', 'Nom', 'Type', 'Description', 'Propriété', 'Bailleur', 'Locataire',
-            'Statut', 'Date Création', 'Date Modification', 'Date Expiration',
-            'Créé par', 'Tags', 'Confidentiel', 'Taille (KB)'
-        ])
-        
-        # Données
-        for doc in documents:
-            writer.writerow([
-                doc.id,
-                doc.nom,
-                doc.get_type_document_display(),
-                doc.description or '',
-                str(doc.propriete) if doc.propriete else '',
-                str(doc.bailleur) if doc.bailleur else '',
-                str(doc.locataire) if doc.locataire else '',
-                doc.get_statut_display(),
-                doc.date_creation.strftime('%d/%m/%Y %H:%M'),
-                doc.date_modification.strftime('%d/%m/%Y %H:%M'),
-                doc.date_expiration.strftime('%d/%m/%Y') if doc.date_expiration else '',
-                str(doc.cree_par) if doc.cree_par else '',
-                doc.tags or '',
-                'Oui' if doc.confidentiel else 'Non',
-                round(doc.taille_fichier / 1024, 2) if doc.taille_fichier else 0
-            ])
-        
-        return response
+        # BOM pour Excel
+        return reponse_export('csv', self.COLONNES, self._lignes(documents), filename, delimiter=';', bom=True)
     
     def get_export_statistics(self, documents: QuerySet) -> Dict[str, Any]:
         """Calcule les statistiques pour l'export."""
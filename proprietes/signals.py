@@ -0,0 +1,16 @@
+"""
+Signaux de l'application propriétés
+"""
+
+from .analytique_occupation import connecter_signaux as connecter_analytique_occupation
+from .index_disponibilite import connecter_signaux as connecter_index_disponibilite
+from .photos_derives import connecter_signaux as connecter_derives_photos
+
+# Index de disponibilité mis à jour à chaque modification de contrat
+connecter_index_disponibilite()
+
+# Statistiques d'occupation recalculées après chaque modification
+connecter_analytique_occupation()
+
+# Miniatures et versions moyennes des photos produites en arrière-plan
+connecter_derives_photos()
@@ -1,3 +1,45 @@
+"""
+Tests des listes paginées de l'API REST des propriétés.
+"""
+
+from datetime import date
+from decimal import Decimal
+
 from django.test import TestCase
+from django.urls import reverse
+
+from core.tests_utils import ListePagineeMixin, creer_bailleur, creer_locataire, creer_propriete, numero
+
+from .models import ChargeCommune, Piece
+
+
+class ListesPagineesTests(ListePagineeMixin, TestCase):
+
+    def test_liste_bailleurs(self):
+        def creer():
+            creer_propriete(creer_bailleur())
+        self.verifier_requetes(reverse('proprietes:bailleur-list'), creer, 1)
+
+    def test_liste_locataires(self):
+        self.verifier_requetes(reverse('proprietes:locataire-list'), creer_locataire, 1)
+
+    def test_liste_proprietes(self):
+        self.verifier_requetes(reverse('proprietes:propriete-list'), creer_propriete, 1)
+
+    def test_liste_charges_communes(self):
+        propriete = creer_propriete()
+
+        def creer():
+            ChargeCommune.objects.create(
+                propriete=propriete, nom='Gardiennage', type_charge='entretien',
+                montant_mensuel=Decimal('10000'), date_debut=date(2025, 1, 1),
+            )
+        self.verifier_requetes(reverse('proprietes:charge-commune-list'), creer, 1)
+
+    def test_liste_pieces(self):
+        propriete = creer_propriete()
 
-# Create your tests here.
+        def creer():
+            n = numero()
+            Piece.objects.create(propriete=propriete, nom=f'Chambre {n}', numero_piece=f'CH{n}', type_piece='chambre')
+        self.verifier_requetes(reverse('proprietes:piece-list'), creer, 2)
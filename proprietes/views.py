@@ -13,7 +13,7 @@ from core.models import Devise
 from core.mixins import DetailViewQuickActionsMixin, ListViewQuickActionsMixin
 from core.quick_actions_generator import QuickActionsGenerator
 from contrats.models import Contrat
-from core.models import AuditLog
+from core.audit import journaliser
 from django.contrib.contenttypes.models import ContentType
 from paiements.models import Paiement
 from django.core.paginator import Paginator
@@ -593,6 +593,7 @@ class BailleurListView(PrivilegeButtonsMixin, IntelligentListView):
         {'field': 'email', 'label': 'Email', 'sortable': True},
         {'field': 'telephone', 'label': 'Téléphone', 'sortable': True},
         {'field': 'adresse', 'label': 'Adresse', 'sortable': True},
+        {'field': 'montant_encaisse_12_mois', 'label': 'Encaissé (12 mois)', 'sortable': False},
     ]
     actions = [
         {'url_name': 'proprietes:detail_bailleur', 'icon': 'eye', 'style': 'outline-primary', 'title': 'Voir'},
@@ -612,6 +613,13 @@ class BailleurListView(PrivilegeButtonsMixin, IntelligentListView):
         
         # Statistiques
         context['total_bailleurs'] = Bailleur.objects.count()
+
+        # Encaissements des bailleurs de la page, en une requête
+        from paiements.services_statistiques import ServiceStatistiquesPaiements
+        bailleurs = list(context['object_list'])
+        statistiques = ServiceStatistiquesPaiements.pour_bailleurs(bailleurs)
+        for bailleur in bailleurs:
+            bailleur.montant_encaisse_12_mois = statistiques[bailleur.pk]['montant_total']
         
         return context
 
@@ -915,7 +923,7 @@ def supprimer_bailleur(request, pk):
             bailleur.save()
             
             # Log d'audit
-            AuditLog.objects.create(
+            journaliser(
                 content_type=ContentType.objects.get_for_model(Bailleur),
                 object_id=bailleur.pk,
                 action='delete',
@@ -1103,7 +1111,6 @@ class SupprimerLocataireView(SuppressionGeneriqueView):
     def logical_delete(self, request, obj):
         """Effectue une suppression logique (mise en corbeille)."""
         from django.utils import timezone
-        from core.models import AuditLog
         from django.contrib.contenttypes.models import ContentType
         
         # Log d'audit - filtrer les champs non sérialisables
@@ -1127,7 +1134,7 @@ class SupprimerLocataireView(SuppressionGeneriqueView):
         obj.save()
         
         # Log d'audit
-        AuditLog.objects.create(
+        journaliser(
             content_type=ContentType.objects.get_for_model(Locataire),
             object_id=obj.pk,
             action='delete',
@@ -1147,7 +1154,6 @@ class SupprimerLocataireView(SuppressionGeneriqueView):
     
     def permanent_delete(self, request, obj):
         """Effectue une suppression définitive avec vérifications de sécurité."""
-        from core.models import AuditLog
         from django.contrib.contenttypes.models import ContentType
         
         # Vérification 1: Le locataire ne doit pas avoir de contrats actifs
@@ -1195,7 +1201,7 @@ class SupprimerLocataireView(SuppressionGeneriqueView):
                     old_data[f.name] = str(value)
             except Exception:
                 old_data[f.name] = str(getattr(obj, f.name, None))
-        AuditLog.objects.create(
+        journaliser(
             content_type=ContentType.objects.get_for_model(Locataire),
             object_id=obj.pk,
             action='delete',
@@ -1570,7 +1576,7 @@ def supprimer_locataire(request, pk):
             locataire.save()
             
             # Log d'audit
-            AuditLog.objects.create(
+            journaliser(
                 content_type=ContentType.objects.get_for_model(Locataire),
                 object_id=locataire.pk,
                 action='delete',
@@ -1594,7 +1600,7 @@ def supprimer_locataire(request, pk):
             locataire.save()
             
             # Log d'audit
-            AuditLog.objects.create(
+            journaliser(
                 content_type=ContentType.objects.get_for_model(Locataire),
                 object_id=locataire.pk,
                 action='update',
@@ -1621,7 +1627,7 @@ def supprimer_locataire(request, pk):
                     contrats_transferes.update(locataire=nouveau_locataire)
                     
                     # Log d'audit
-                    AuditLog.objects.create(
+                    journaliser(
                         content_type=ContentType.objects.get_for_model(Locataire),
                         object_id=locataire.pk,
                         action='update',
@@ -1686,7 +1692,7 @@ def corbeille_locataires(request):
                 locataire.save()
                 
                 # Log d'audit
-                AuditLog.objects.create(
+                journaliser(
                     content_type=ContentType.objects.get_for_model(Locataire),
                     object_id=locataire.pk,
                     action='update',
@@ -1717,7 +1723,7 @@ def corbeille_locataires(request):
                 
                 # Log d'audit avant suppression
                 old_data = {f.name: getattr(locataire, f.name) for f in locataire._meta.fields}
-                AuditLog.objects.create(
+                journaliser(
                     content_type=ContentType.objects.get_for_model(Locataire),
                     object_id=locataire.pk,
                     action='delete',
@@ -1878,7 +1884,7 @@ def supprimer_propriete(request, pk):
             propriete.save()
             
             # Log d'audit
-            AuditLog.objects.create(
+            journaliser(
                 content_type=ContentType.objects.get_for_model(Propriete),
                 object_id=propriete.pk,
                 action='DELETE',
@@ -1922,7 +1928,7 @@ def supprimer_type_bien(request, pk):
             type_bien.save()
             
             # Log d'audit
-            AuditLog.objects.create(
+            journaliser(
                 content_type=ContentType.objects.get_for_model(TypeBien),
                 object_id=type_bien.pk,
                 action='DELETE',
@@ -1966,7 +1972,7 @@ def supprimer_charge_bailleur(request, pk):
             charge.save()
             
             # Log d'audit
-            AuditLog.objects.create(
+            journaliser(
                 content_type=ContentType.objects.get_for_model(ChargesBailleur),
                 object_id=charge.pk,
                 action='DELETE',
@@ -3024,8 +3030,11 @@ def liberer_piece(request, piece_id):
             contrat_actuel.date_resiliation = timezone.now().date()
             contrat_actuel.save()
             
-            # Désactiver les liaisons pièce-contrat
+            # Désactiver les liaisons pièce-contrat (update() sans signaux :
+            # index de disponibilité resynchronisé ici)
             contrat_actuel.pieces_contrat.filter(piece=piece).update(actif=False)
+            from .index_disponibilite import IndexDisponibilite
+            IndexDisponibilite.synchroniser([contrat_actuel.pk])
         
         # Marquer la pièce comme disponible
         piece.statut = 'disponible'
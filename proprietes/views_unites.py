@@ -10,6 +10,7 @@ from django.db.models import Q, Count, Sum, Avg
 from django.utils import timezone
 from datetime import timedelta
 
+from .analytique_occupation import AnalytiqueOccupation
 from .models import Propriete, UniteLocative, ReservationUnite
 from .forms import UniteLocativeForm, ReservationUniteForm, UniteRechercheForm
 from utilisateurs.mixins import PrivilegeButtonsMixin
@@ -461,6 +462,9 @@ def api_statistiques_propriete(request, propriete_id):
     stats['revenus_potentiels'] = float(propriete.get_revenus_mensuels_potentiels())
     stats['revenus_actuels'] = float(propriete.get_revenus_mensuels_actuels())
     stats['taux_occupation_global'] = propriete.get_taux_occupation_global()
+    stats['taux_occupation_12_mois'] = AnalytiqueOccupation.proprietes().get(
+        propriete.pk, {}
+    ).get('taux_occupation', 0.0)
     
     # Convertir les Decimal en float pour la sérialisation JSON
     for key, value in stats.items():
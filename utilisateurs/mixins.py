@@ -5,7 +5,7 @@ from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.contrib.contenttypes.models import ContentType
 from .models import Utilisateur
-from core.models import AuditLog
+from core.audit import journaliser
 import json
 
 
@@ -271,7 +271,7 @@ class PrivilegeDeleteMixin:
         """
         try:
             # Log d'audit détaillé
-            AuditLog.objects.create(
+            journaliser(
                 content_type=ContentType.objects.get_for_model(element),
                 object_id=element.id,
                 action=f'privilege_{action.lower()}',
@@ -8,7 +8,7 @@ from django.utils.decorators import method_decorator
 from django.views.generic import View
 from django.http import JsonResponse
 from django.contrib.contenttypes.models import ContentType
-from core.models import AuditLog
+from core.audit import journaliser
 from core.utils import check_group_permissions
 from django.utils import timezone
 
@@ -105,7 +105,7 @@ class SuppressionGeneriqueView(SuppressionViewMixin, View):
                 obj.save()
                 
                 # Log d'audit
-                AuditLog.objects.create(
+                journaliser(
                     content_type=ContentType.objects.get_for_model(obj.__class__),
                     object_id=obj.pk,
                     action='DELETE',
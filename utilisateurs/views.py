@@ -11,6 +11,7 @@ from .models import Utilisateur, GroupeTravail
 from .forms import UtilisateurForm, GroupeTravailForm
 from .decorators import groupe_required
 import json
+from core.audit import journaliser
 from core.models import AuditLog
 from django.contrib.contenttypes.models import ContentType
 from core.intelligent_views import IntelligentListView
@@ -456,7 +457,7 @@ def supprimer_utilisateur(request, pk):
             utilisateur.deleted_at = timezone.now()
             utilisateur.deleted_by = request.user
             utilisateur.save()
-            AuditLog.objects.create(
+            journaliser(
                 content_type=ContentType.objects.get_for_model(Utilisateur),
                 object_id=utilisateur.pk,
                 action='DELETE',
@@ -851,7 +852,7 @@ def privilege_force_delete_element(request, model_name, element_id):
         element.delete()
         
         # Log d'audit spécial pour suppression forcée
-        AuditLog.objects.create(
+        journaliser(
             content_type=ContentType.objects.get_for_model(element.__class__),
             object_id=element_id,
             action='force_delete',
@@ -949,7 +950,7 @@ def privilege_profile_management(request):
         element.delete()
 
         # Log d'audit spécial pour suppression forcée
-        AuditLog.objects.create(
+        journaliser(
             content_type=ContentType.objects.get_for_model(element.__class__),
             object_id=element_id,
             action='force_delete',